@@ -0,0 +1,180 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+"""Monthly totals of GL Entries used by `get_balance_on`.
+
+Every built month of a company has one row per (account, cost center, party) and one marker
+row without account. Months are always built in order, and any change to GL Entries of a
+month removes the snapshots of that month and all later months, so the marker rows of a
+company always form a contiguous range of complete months. GL Entries outside that range
+are read from the ledger.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder.functions import Max, Min
+from frappe.utils import add_days, add_months, get_first_day, get_last_day, getdate, now, today
+
+SNAPSHOT_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"company",
+	"period_end",
+	"account",
+	"cost_center",
+	"party_type",
+	"party",
+	"debit",
+	"credit",
+	"debit_in_account_currency",
+	"credit_in_account_currency",
+)
+
+
+class AccountBalanceSnapshot(Document):
+	pass
+
+
+def get_balance_snapshot_period(company, date=None):
+	"""Returns (from_date, to_date) of the snapshots of the company built upto `date`."""
+	if not company:
+		return
+
+	snapshot = frappe.qb.DocType("Account Balance Snapshot")
+	query = (
+		frappe.qb.from_(snapshot)
+		.select(Min(snapshot.period_end), Max(snapshot.period_end))
+		.where((snapshot.company == company) & (snapshot.account.isnull()))
+	)
+
+	if date:
+		query = query.where(snapshot.period_end <= getdate(date))
+
+	first_period_end, last_period_end = query.run()[0]
+	if last_period_end:
+		return get_first_day(first_period_end), last_period_end
+
+
+def invalidate_balance_snapshots(gl_entries):
+	"""Remove snapshots affected by added, cancelled or deleted GL Entries.
+
+	Should be called after the GL Entries are written, so that a snapshot being built for the
+	same period waits for this transaction."""
+	from_dates = {}
+	for entry in gl_entries:
+		company, posting_date = entry.get("company"), getdate(entry.get("posting_date"))
+		if company not in from_dates or posting_date < from_dates[company]:
+			from_dates[company] = posting_date
+
+	for company, from_date in from_dates.items():
+		frappe.db.sql(
+			"""delete from `tabAccount Balance Snapshot`
+			where company = %s and period_end >= %s""",
+			(company, from_date),
+		)
+
+
+def invalidate_balance_snapshots_of_vouchers(voucher_type, voucher_nos):
+	"""Remove snapshots affected by GL Entries of the vouchers, call before deleting them."""
+	gle = frappe.qb.DocType("GL Entry")
+	gl_entries = (
+		frappe.qb.from_(gle)
+		.select(gle.company, Min(gle.posting_date).as_("posting_date"))
+		.where((gle.voucher_type == voucher_type) & (gle.voucher_no.isin(voucher_nos)))
+		.groupby(gle.company)
+	).run(as_dict=True)
+
+	invalidate_balance_snapshots(gl_entries)
+
+
+def build_balance_snapshots():
+	"""Build snapshots of all completed months, runs daily."""
+	for company in frappe.get_all("Company", pluck="name"):
+		build_company_snapshots(company)
+
+
+def build_company_snapshots(company, upto=None):
+	upto = getdate(upto or get_last_day(add_months(today(), -1)))
+
+	snapshot_period = get_balance_snapshot_period(company)
+	if snapshot_period:
+		from_date = add_days(snapshot_period[1], 1)
+	else:
+		from_date = frappe.db.get_value("GL Entry", {"company": company}, "min(posting_date)")
+		if not from_date:
+			return
+
+	is_first_period = not snapshot_period
+	period_end = get_last_day(from_date)
+	while period_end <= upto:
+		if not make_snapshot(company, get_first_day(period_end), period_end, is_first_period):
+			break
+
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+		is_first_period = False
+		period_end = get_last_day(add_days(period_end, 1))
+
+
+def make_snapshot(company, from_date, to_date, is_first_period=False):
+	if not is_first_period:
+		# previous month may have been invalidated meanwhile, lock its marker until this month is
+		# committed so that the built months stay contiguous
+		previous_period_marker = frappe.db.sql(
+			"""select name from `tabAccount Balance Snapshot`
+			where company = %s and period_end = %s and account is null
+			for update""",
+			(company, add_days(from_date, -1)),
+		)
+		if not previous_period_marker:
+			return False
+
+	# locking read, so that GL Entries of the month can not change until the snapshot is committed
+	lock = " lock in share mode" if frappe.db.db_type == "mariadb" else ""
+
+	totals = frappe.db.sql(
+		"""
+		select
+			account, cost_center, party_type, party,
+			sum(debit), sum(credit),
+			sum(debit_in_account_currency), sum(credit_in_account_currency)
+		from `tabGL Entry`
+		where company = %s and posting_date between %s and %s and is_cancelled = 0
+		group by account, cost_center, party_type, party
+		{lock}""".format(
+			lock=lock
+		),
+		(company, from_date, to_date),
+	)
+
+	timestamp = now()
+	user = frappe.session.user
+
+	def make_row(values):
+		return (
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			company,
+			to_date,
+			*values,
+		)
+
+	rows = [make_row(row) for row in totals]
+
+	# marker for the month
+	rows.append(make_row((None, None, None, None, 0, 0, 0, 0)))
+
+	frappe.db.bulk_insert("Account Balance Snapshot", SNAPSHOT_FIELDS, rows)
+	return True
+
+
+def on_doctype_update():
+	frappe.db.add_index("Account Balance Snapshot", ["company", "period_end"])
+	frappe.db.add_index("Account Balance Snapshot", ["account", "period_end"])
+	frappe.db.add_index("Account Balance Snapshot", ["party_type", "party"])
@@ -0,0 +1,68 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_months, get_first_day, nowdate
+
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	build_company_snapshots,
+	get_balance_snapshot_period,
+)
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.utils import get_balance_on
+
+COMPANY = "_Test Company"
+
+
+class TestAccountBalanceSnapshot(FrappeTestCase):
+	def setUp(self):
+		frappe.db.delete("Account Balance Snapshot", {"company": COMPANY})
+
+		month_start = get_first_day(nowdate())
+		for months in (-3, -2, -1):
+			posting_date = add_days(add_months(month_start, months), 10)
+			make_journal_entry(
+				"_Test Bank - _TC", "Sales - _TC", 100, posting_date=posting_date, submit=True
+			)
+			create_sales_invoice(posting_date=posting_date, rate=250)
+
+		make_journal_entry("_Test Bank - _TC", "Sales - _TC", 100, posting_date=nowdate(), submit=True)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_balances(self):
+		month_start = get_first_day(nowdate())
+		dates = [None, nowdate(), add_days(month_start, -1), add_days(add_months(month_start, -2), 3)]
+
+		balances = []
+		for date in dates:
+			balances += [
+				get_balance_on("_Test Bank - _TC", date),
+				get_balance_on("Current Assets - _TC", date, company=COMPANY),
+				get_balance_on("Sales - _TC", date, cost_center="_Test Cost Center - _TC"),
+				get_balance_on(
+					"Debtors - _TC", date, party_type="Customer", party="_Test Customer", company=COMPANY
+				),
+				get_balance_on(date=date, party_type="Customer", party="_Test Customer", company=COMPANY),
+			]
+
+		return balances
+
+	def test_balance_with_snapshots(self):
+		expected = self.get_balances()
+
+		build_company_snapshots(COMPANY)
+		self.assertTrue(get_balance_snapshot_period(COMPANY))
+		self.assertEqual(self.get_balances(), expected)
+
+		# back dated entry should remove snapshots of its month and later
+		posting_date = add_days(add_months(get_first_day(nowdate()), -2), 5)
+		make_journal_entry("_Test Bank - _TC", "Sales - _TC", 40, posting_date=posting_date, submit=True)
+		self.assertLess(get_balance_snapshot_period(COMPANY)[1], posting_date)
+
+		with_snapshots = self.get_balances()
+		frappe.db.delete("Account Balance Snapshot", {"company": COMPANY})
+		self.assertEqual(with_snapshots, self.get_balances())
@@ -17,7 +17,7 @@ from erpnext.accounts.doctype.accounting_dimension_filter.accounting_dimension_f
 	get_dimension_filter_map,
 )
 from erpnext.accounts.party import validate_party_frozen_disabled, validate_party_gle_currency
-from erpnext.accounts.utils import get_account_currency, get_fiscal_year
+from erpnext.accounts.utils import get_account_currency, get_fiscal_year, insert_docs_in_bulk
 from erpnext.exceptions import (
 	InvalidAccountCurrency,
 	InvalidAccountDimensionError,
@@ -58,20 +58,25 @@ class GLEntry(Document):
 			validate_balance_type(self.account, adv_adj)
 			validate_frozen_account(self.account, adv_adj)
 
-			if frappe.db.get_value("Account", self.account, "account_type") not in [
-				"Receivable",
-				"Payable",
-			]:
-				# Update outstanding amt on against voucher
-				if (
-					self.against_voucher_type in ["Journal Entry", "Sales Invoice", "Purchase Invoice", "Fees"]
-					and self.against_voucher
-					and self.flags.update_outstanding == "Yes"
-					and not frappe.flags.is_reverse_depr_entry
-				):
-					update_outstanding_amt(
-						self.account, self.party_type, self.party, self.against_voucher_type, self.against_voucher
-					)
+			if self.is_outstanding_update_required():
+				update_outstanding_amt(
+					self.account, self.party_type, self.party, self.against_voucher_type, self.against_voucher
+				)
+
+	def is_outstanding_update_required(self):
+		"""Outstanding of the against voucher is updated here only for non party accounts"""
+		if frappe.get_cached_value("Account", self.account, "account_type") in [
+			"Receivable",
+			"Payable",
+		]:
+			return False
+
+		return bool(
+			self.against_voucher_type in ["Journal Entry", "Sales Invoice", "Purchase Invoice", "Fees"]
+			and self.against_voucher
+			and self.flags.update_outstanding == "Yes"
+			and not frappe.flags.is_reverse_depr_entry
+		)
 
 	def check_mandatory(self):
 		mandatory = ["account", "voucher_type", "voucher_no", "company"]
@@ -127,10 +132,13 @@ class GLEntry(Document):
 
 			frappe.throw(msg, title=_("Missing Cost Center"))
 
-	def validate_dimensions_for_pl_and_bs(self):
-		account_type = frappe.db.get_value("Account", self.account, "report_type")
+	def validate_dimensions_for_pl_and_bs(self, dimensions=None):
+		account_type = frappe.get_cached_value("Account", self.account, "report_type")
 
-		for dimension in get_checks_for_pl_and_bs_accounts():
+		if dimensions is None:
+			dimensions = get_checks_for_pl_and_bs_accounts()
+
+		for dimension in dimensions:
 			if (
 				account_type == "Profit and Loss"
 				and self.company == dimension.company
@@ -157,8 +165,10 @@ class GLEntry(Document):
 						)
 					)
 
-	def validate_allowed_dimensions(self):
-		dimension_filter_map = get_dimension_filter_map()
+	def validate_allowed_dimensions(self, dimension_filter_map=None):
+		if dimension_filter_map is None:
+			dimension_filter_map = get_dimension_filter_map()
+
 		for key, value in dimension_filter_map.products():
 			dimension = key[0]
 			account = key[1]
@@ -287,6 +297,55 @@ class GLEntry(Document):
 		frappe.throw(msg)
 
 
+def insert_gl_entries(gl_entries):
+	"""Validate and insert new GL Entries with a single multi-row insert.
+
+	Row level validations of `GLEntry` run for every entry, while checks which only depend on
+	the account run once per account and outstanding amounts are updated once per against
+	voucher."""
+	if not gl_entries:
+		return
+
+	dimensions = get_checks_for_pl_and_bs_accounts()
+	dimension_filter_map = get_dimension_filter_map()
+
+	ledger_entries = []
+	for gle in gl_entries:
+		gle.validate()
+		if not gle.flags.from_repost and gle.voucher_type != "Period Closing Voucher":
+			gle.validate_dimensions_for_pl_and_bs(dimensions)
+			gle.validate_allowed_dimensions(dimension_filter_map)
+			ledger_entries.append(gle)
+
+	validated_accounts = {}
+	for gle in ledger_entries:
+		if gle.account not in validated_accounts:
+			gle.validate_account_details(gle.flags.adv_adj)
+			validated_accounts[gle.account] = gle.flags.adv_adj
+
+	insert_docs_in_bulk(gl_entries)
+
+	for account, adv_adj in validated_accounts.items():
+		validate_balance_type(account, adv_adj)
+		validate_frozen_account(account, adv_adj)
+
+	against_vouchers = []
+	for gle in ledger_entries:
+		if gle.is_outstanding_update_required():
+			against_voucher = (
+				gle.account,
+				gle.party_type,
+				gle.party,
+				gle.against_voucher_type,
+				gle.against_voucher,
+			)
+			if against_voucher not in against_vouchers:
+				against_vouchers.append(against_voucher)
+
+	for against_voucher in against_vouchers:
+		update_outstanding_amt(*against_voucher)
+
+
 def validate_balance_type(account, adv_adj=False):
 	if not adv_adj and account:
 		balance_must_be = frappe.db.get_value("Account", account, "balance_must_be")
@@ -426,6 +485,9 @@ def update_against_account(voucher_type, voucher_no):
 def on_doctype_update():
 	frappe.db.add_index("GL Entry", ["against_voucher_type", "against_voucher"])
 	frappe.db.add_index("GL Entry", ["voucher_type", "voucher_no"])
+	# General Ledger reads entries of an account or party in the order of posting date
+	frappe.db.add_index("GL Entry", ["account", "posting_date"])
+	frappe.db.add_index("GL Entry", ["party", "posting_date"])
 
 
 def rename_gle_sle_docs():
@@ -445,3 +507,10 @@ def rename_temporarily_named_docs(doctype):
 			(newname, oldname),
 			auto_commit=True,
 		)
+
+		if doctype == "Stock Ledger Entry":
+			frappe.db.sql(
+				"UPDATE `tabStock Ledger Serial No` SET stock_ledger_entry = %s where stock_ledger_entry = %s",
+				(newname, oldname),
+				auto_commit=True,
+			)
@@ -2,9 +2,12 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import re
 import unittest
+from unittest.mock import patch
 
 import frappe
+from frappe.tests.utils import change_settings
 from frappe.utils import flt, nowdate
 
 from erpnext.accounts.doctype.account.test_account import get_inventory_account
@@ -424,6 +427,33 @@ class TestJournalEntry(unittest.TestCase):
 		account_balance = get_balance_on(account="_Test Bank - _TC", cost_center=cost_center)
 		self.assertEqual(expected_account_balance, account_balance)
 
+	@change_settings("Accounts Settings", {"merge_similar_account_heads": 0})
+	def test_gl_entries_of_large_journal_entry_are_inserted_in_bulk(self):
+		jv = make_journal_entry("_Test Cash - _TC", "_Test Bank - _TC", 1, save=False)
+		jv.set("accounts", [])
+		for idx in range(250):
+			jv.append("accounts", {"account": "_Test Cash - _TC", "debit_in_account_currency": idx + 1})
+			jv.append("accounts", {"account": "_Test Bank - _TC", "credit_in_account_currency": idx + 1})
+		jv.insert()
+
+		gl_entry_insert = re.compile(r"insert\s+into\s+`tabGL Entry`", re.IGNORECASE)
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			jv.submit()
+			inserts = [call for call in sql.call_args_list if gl_entry_insert.match(call.args[0].strip())]
+
+		self.assertEqual(len(inserts), 1)
+
+		gl_entries = frappe.get_all(
+			"GL Entry",
+			filters={"voucher_type": "Journal Entry", "voucher_no": jv.name, "is_cancelled": 0},
+			fields=["sum(debit) as debit", "sum(credit) as credit", "count(*) as count"],
+		)[0]
+		self.assertEqual(gl_entries.count, 500)
+		self.assertEqual(gl_entries.debit, gl_entries.credit)
+
+		jv.cancel()
+		self.assertEqual(frappe.db.count("GL Entry", {"voucher_no": jv.name, "is_cancelled": 1}), 1000)
+
 
 def make_journal_entry(
 	account1,
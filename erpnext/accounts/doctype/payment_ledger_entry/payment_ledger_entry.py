@@ -16,7 +16,10 @@ from erpnext.accounts.doctype.gl_entry.gl_entry import (
 	validate_balance_type,
 	validate_frozen_account,
 )
-from erpnext.accounts.utils import update_voucher_outstanding
+from erpnext.accounts.doctype.voucher_outstanding.voucher_outstanding import (
+	update_voucher_outstandings,
+)
+from erpnext.accounts.utils import insert_docs_in_bulk, update_voucher_outstanding
 from erpnext.exceptions import InvalidAccountDimensionError, MandatoryAccountDimensionError
 
 
@@ -60,8 +63,10 @@ class PaymentLedgerEntry(Document):
 				)
 			)
 
-	def validate_allowed_dimensions(self):
-		dimension_filter_map = get_dimension_filter_map()
+	def validate_allowed_dimensions(self, dimension_filter_map=None):
+		if dimension_filter_map is None:
+			dimension_filter_map = get_dimension_filter_map()
+
 		for key, value in dimension_filter_map.products():
 			dimension = key[0]
 			account = key[1]
@@ -96,10 +101,13 @@ class PaymentLedgerEntry(Document):
 							InvalidAccountDimensionError,
 						)
 
-	def validate_dimensions_for_pl_and_bs(self):
-		account_type = frappe.db.get_value("Account", self.account, "report_type")
+	def validate_dimensions_for_pl_and_bs(self, dimensions=None):
+		account_type = frappe.get_cached_value("Account", self.account, "report_type")
 
-		for dimension in get_checks_for_pl_and_bs_accounts():
+		if dimensions is None:
+			dimensions = get_checks_for_pl_and_bs_accounts()
+
+		for dimension in dimensions:
 			if (
 				account_type == "Profit and Loss"
 				and self.company == dimension.company
@@ -129,6 +137,10 @@ class PaymentLedgerEntry(Document):
 	def validate(self):
 		self.validate_account()
 
+	def after_insert(self):
+		# before on_update, which reads the outstanding of the against voucher
+		update_voucher_outstandings([self])
+
 	def on_update(self):
 		adv_adj = self.flags.adv_adj
 		if not self.flags.from_repost:
@@ -139,14 +151,67 @@ class PaymentLedgerEntry(Document):
 			validate_frozen_account(self.account, adv_adj)
 
 		# update outstanding amount
-		if (
+		if self.is_outstanding_update_required():
+			update_voucher_outstanding(
+				self.against_voucher_type, self.against_voucher_no, self.account, self.party_type, self.party
+			)
+
+	def is_outstanding_update_required(self):
+		return bool(
 			self.against_voucher_type in ["Journal Entry", "Sales Invoice", "Purchase Invoice", "Fees"]
 			and self.flags.update_outstanding == "Yes"
 			and not frappe.flags.is_reverse_depr_entry
-		):
-			update_voucher_outstanding(
-				self.against_voucher_type, self.against_voucher_no, self.account, self.party_type, self.party
+		)
+
+
+def insert_payment_ledger_entries(pl_entries):
+	"""Validate and insert new Payment Ledger Entries with a single multi-row insert.
+
+	Account level checks run once per account and outstanding amounts are updated once per
+	against voucher, after all entries are written."""
+	if not pl_entries:
+		return
+
+	dimensions = get_checks_for_pl_and_bs_accounts()
+	dimension_filter_map = get_dimension_filter_map()
+
+	validated_account_types, validated_accounts = [], {}
+	for ple in pl_entries:
+		account_type = (ple.company, ple.account, ple.account_type)
+		if account_type not in validated_account_types:
+			ple.validate()
+			validated_account_types.append(account_type)
+
+		if not ple.flags.from_repost:
+			ple.validate_dimensions_for_pl_and_bs(dimensions)
+			ple.validate_allowed_dimensions(dimension_filter_map)
+			if ple.account not in validated_accounts:
+				ple.validate_account_details()
+				validated_accounts[ple.account] = ple.flags.adv_adj
+
+	insert_docs_in_bulk(pl_entries)
+
+	update_voucher_outstandings(pl_entries)
+
+	for account, adv_adj in validated_accounts.items():
+		validate_balance_type(account, adv_adj)
+		validate_frozen_account(account, adv_adj)
+
+	against_vouchers = []
+	for ple in pl_entries:
+		if ple.is_outstanding_update_required():
+			against_voucher = (
+				ple.against_voucher_type,
+				ple.against_voucher_no,
+				ple.account,
+				ple.party_type,
+				ple.party,
 			)
+			if against_voucher not in against_vouchers:
+				against_vouchers.append(against_voucher)
+
+	for against_voucher in against_vouchers:
+		update_voucher_outstanding(*against_voucher)
 
 
 def on_doctype_update():
@@ -12,6 +12,11 @@ from frappe import _, throw
 from frappe.model.document import Document
 from frappe.utils import cint, flt, getdate
 
+from erpnext.accounts.doctype.pricing_rule.pricing_rule_index import (
+	clear_pricing_rule_index,
+	get_pricing_rule_index,
+)
+
 apply_on_dict = {"Product Code": "products", "Product Group": "product_groups", "Brand": "brands"}
 
 other_fields = ["other_product_code", "other_product_group", "other_brand"]
@@ -35,6 +40,12 @@ class PricingRule(Document):
 		if not self.margin_type:
 			self.margin_rate_or_amount = 0.0
 
+	def on_update(self):
+		clear_pricing_rule_index()
+
+	def on_trash(self):
+		clear_pricing_rule_index()
+
 	def validate_duplicate_apply_on(self):
 		if self.apply_on != "Transaction":
 			apply_on_table = apply_on_dict.get(self.apply_on)
@@ -238,6 +249,15 @@ def apply_pricing_rule(args, doc=None):
 	product_list = args.get("products")
 	args.pop("products")
 
+	if isinstance(doc, str):
+		doc = json.loads(doc)
+
+	if doc:
+		doc = frappe.get_doc(doc)
+
+	# resolve rules of all rows against the same index
+	pricing_rule_index = get_pricing_rule_index()
+
 	set_serial_nos_based_on_fifo = frappe.db.get_single_value(
 		"Stock Settings", "automatically_set_serial_nos_based_on_fifo"
 	)
@@ -256,7 +276,9 @@ def apply_pricing_rule(args, doc=None):
 	for product in product_list:
 		args_copy = copy.deepcopy(args)
 		args_copy.update(product)
-		data = get_pricing_rule_for_product(args_copy, doc=doc)
+		data = get_pricing_rule_for_product(
+			args_copy, doc=doc, pricing_rule_index=pricing_rule_index
+		)
 		out.append(data)
 
 		if (
@@ -293,7 +315,7 @@ def update_pricing_rule_uom(pricing_rule, args):
 			pricing_rule.uom = row.uom
 
 
-def get_pricing_rule_for_product(args, doc=None, for_validate=False):
+def get_pricing_rule_for_product(args, doc=None, for_validate=False, pricing_rule_index=None):
 	from erpnext.accounts.doctype.pricing_rule.utils import (
 		get_applied_pricing_rules,
 		get_pricing_rule_products,
@@ -337,7 +359,7 @@ def get_pricing_rule_for_product(args, doc=None, for_validate=False):
 	pricing_rules = (
 		get_applied_pricing_rules(args.get("pricing_rules"))
 		if for_validate and args.get("pricing_rules")
-		else get_pricing_rules(args, doc)
+		else get_pricing_rules(args, doc, pricing_rule_index)
 	)
 
 	if pricing_rules:
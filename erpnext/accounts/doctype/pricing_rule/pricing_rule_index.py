@@ -0,0 +1,270 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""In-memory index of enabled Pricing Rules.
+
+Resolves the candidate rules of a transaction row without querying the database, with the
+same matching and ordering as the `_get_pricing_rules` query it replaces:
+
+        rules applying on the product code / product group / brand of the row, or on it as
+        "other" product, filtered by party, company, warehouse, territory, price list,
+        validity and selling / buying, ordered by priority desc, name desc.
+
+The index is built once, stored in redis and kept per process. A fingerprint of the Pricing
+Rule table (row count and last modified) is checked once per lookup, so rules changed in
+another process, deleted by queries or rolled back are never served from a stale index.
+Saving or deleting a Pricing Rule also drops the cached index.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cstr, getdate
+
+CACHE_KEY = "pricing_rule_index"
+
+# indexes built in this process, by site
+_local_indexes = {}
+
+APPLY_ON_TABLES = {
+	"product_code": "Pricing Rule Product Code",
+	"product_group": "Pricing Rule Product Group",
+	"brand": "Pricing Rule Brand",
+}
+
+PARTY_FIELDS = ("company", "customer", "supplier", "campaign", "sales_partner")
+TREE_FIELDS = {
+	"customer_group": "Customer Group",
+	"territory": "Territory",
+	"supplier_group": "Supplier Group",
+	"warehouse": "Warehouse",
+}
+
+SELLING_DOCTYPES = (
+	"Quotation",
+	"Quotation Product",
+	"Sales Order",
+	"Sales Order Product",
+	"Delivery Note",
+	"Delivery Note Product",
+	"Sales Invoice",
+	"Sales Invoice Product",
+	"POS Invoice",
+	"POS Invoice Product",
+)
+
+# ifnull(valid_from, '2000-01-01') / ifnull(valid_upto, '2500-12-31') of the query
+MIN_DATE = getdate("2000-01-01")
+MAX_DATE = getdate("2500-12-31")
+
+
+def get_key(value):
+	"""Match values like the database does, case insensitive and ignoring trailing spaces"""
+	return cstr(value).rstrip().lower()
+
+
+class PricingRuleIndex:
+	def __init__(self, fingerprint):
+		self.fingerprint = fingerprint
+		self.rules = {}
+		self.transaction_types = set()
+
+		# apply on field -> key of value -> names of rules having it in their apply on table
+		self.rules_by_value = {field: {} for field in APPLY_ON_TABLES}
+
+		# apply on field -> key of other value -> names of rules applying on it as other
+		self.rules_by_other_value = {field: {} for field in APPLY_ON_TABLES}
+
+		# apply on field -> rule name -> rows of apply on table as (value, uom)
+		self.rows_by_rule = {field: {} for field in APPLY_ON_TABLES}
+
+	@classmethod
+	def build(cls, fingerprint):
+		index = cls(fingerprint)
+
+		for rule in frappe.db.sql("select * from `tabPricing Rule` where disable = 0", as_dict=1):
+			index.rules[rule.name] = rule
+			index.transaction_types.update(d for d in ("selling", "buying") if rule.get(d))
+
+		for field, child_doctype in APPLY_ON_TABLES.items():
+			rows = frappe.db.sql(
+				"""select parent, {field}, uom from `tab{child_doctype}`
+				where parenttype = 'Pricing Rule' order by idx""".format(
+					field=field, child_doctype=child_doctype
+				),
+				as_dict=1,
+			)
+			for row in rows:
+				if row.parent not in index.rules:
+					continue
+
+				index.rows_by_rule[field].setdefault(row.parent, []).append((row.get(field), row.uom))
+				index.rules_by_value[field].setdefault(get_key(row.get(field)), set()).add(row.parent)
+
+			for rule in index.rules.values():
+				other_value = rule.get("other_" + field)
+				if rule.apply_rule_on_other is not None and other_value is not None:
+					rules = index.rules_by_other_value[field].setdefault(get_key(other_value), set())
+					rules.add(rule.name)
+
+		return index
+
+	def has_rules(self, transaction_type):
+		return transaction_type in self.transaction_types
+
+	def get_pricing_rules(self, apply_on_field, args):
+		"""Returns rule rows of the transaction row for `apply_on_field`, same as the rows of the
+		`tabPricing Rule` join `tabPricing Rule {apply_on}` query."""
+		value = args.get(apply_on_field)
+		values = {get_key(value)}
+
+		if apply_on_field == "product_group":
+			values = {get_key(d) for d in get_tree_ancestors("Product Group", value)}
+		elif apply_on_field == "product_code" and args.variant_of:
+			values.add(get_key(args.variant_of))
+
+		rule_names = set(self.rules_by_other_value[apply_on_field].get(get_key(value), ()))
+		for key in values:
+			rule_names.update(self.rules_by_value[apply_on_field].get(key, ()))
+
+		filters = get_rule_filters(args)
+		rule_names = [name for name in rule_names if self.is_applicable(self.rules[name], filters)]
+		rule_names.sort(
+			key=lambda name: (get_key(self.rules[name].priority), get_key(name)), reverse=True
+		)
+
+		pricing_rules = []
+		for name in rule_names:
+			rule = self.rules[name]
+			for row_value, uom in self.rows_by_rule[apply_on_field].get(name, ()):
+				if self.is_row_matching(apply_on_field, rule, row_value, uom, args, values):
+					pricing_rule = frappe._dict(rule)
+					pricing_rule[apply_on_field] = row_value
+					pricing_rule.uom = uom
+					pricing_rules.append(pricing_rule)
+
+		return pricing_rules
+
+	def is_row_matching(self, apply_on_field, rule, row_value, uom, args, values):
+		value = args.get(apply_on_field)
+
+		if rule.apply_rule_on_other is not None and get_key(
+			rule.get("other_" + apply_on_field)
+		) == get_key(value):
+			return True
+
+		if apply_on_field == "product_code":
+			if args.variant_of and get_key(row_value) == get_key(args.variant_of):
+				return True
+
+			if get_key(row_value) != get_key(value):
+				return False
+
+			return not args.get("uom") or get_key(uom) in (get_key(args.get("uom")), "")
+
+		return get_key(row_value) in values
+
+	def is_applicable(self, rule, filters):
+		for field in filters.check_fields:
+			if not rule.get(field):
+				return False
+
+		for field, allowed in filters.allowed_values.items():
+			if get_key(rule.get(field)) not in allowed:
+				return False
+
+		if filters.transaction_date:
+			valid_from = getdate(rule.valid_from) if rule.valid_from else MIN_DATE
+			valid_upto = getdate(rule.valid_upto) if rule.valid_upto else MAX_DATE
+			if not (valid_from <= filters.transaction_date <= valid_upto):
+				return False
+
+		return True
+
+
+def get_rule_filters(args):
+	"""Conditions of the transaction row on Pricing Rule fields, see `get_other_conditions`"""
+	filters = frappe._dict(
+		check_fields=[
+			args.transaction_type,
+			"selling" if args.get("doctype") in SELLING_DOCTYPES else "buying",
+		],
+		allowed_values={},
+		transaction_date=getdate(args.transaction_date) if args.get("transaction_date") else None,
+	)
+
+	for field in PARTY_FIELDS:
+		filters.allowed_values[field] = {"", get_key(args.get(field))} if args.get(field) else {""}
+
+	for field, parenttype in TREE_FIELDS.items():
+		if args.get(field):
+			ancestors = get_tree_ancestors(parenttype, args.get(field))
+			if ancestors:
+				filters.allowed_values[field] = {get_key(d) for d in ancestors} | {""}
+
+	filters.allowed_values["for_price_list"] = {"", get_key(args.get("price_list"))}
+
+	return filters
+
+
+def get_fingerprint():
+	return tuple(frappe.db.sql("select count(*), max(modified) from `tabPricing Rule`")[0])
+
+
+def get_pricing_rule_index():
+	"""Returns index of the current Pricing Rules, built if missing or outdated"""
+	fingerprint = get_fingerprint()
+
+	index = _local_indexes.get(frappe.local.site)
+	if index and index.fingerprint == fingerprint:
+		return index
+
+	index = frappe.cache().get_value(CACHE_KEY)
+	if not index or index.fingerprint != fingerprint:
+		index = PricingRuleIndex.build(fingerprint)
+		frappe.cache().set_value(CACHE_KEY, index)
+
+	_local_indexes[frappe.local.site] = index
+	return index
+
+
+def clear_pricing_rule_index():
+	_local_indexes.pop(frappe.local.site, None)
+	frappe.cache().delete_value(CACHE_KEY)
+
+
+def get_tree_ancestors(parenttype, name):
+	"""Returns `name`, all its ancestors and the root group of the tree"""
+	if not frappe.flags.tree_ancestors:
+		frappe.flags.tree_ancestors = {}
+
+	key = (parenttype, name)
+	if key in frappe.flags.tree_ancestors:
+		return frappe.flags.tree_ancestors[key]
+
+	try:
+		lft, rgt = frappe.db.get_value(parenttype, name, ["lft", "rgt"])
+	except TypeError:
+		frappe.throw(_("Invalid {0}").format(name))
+
+	parent_groups = frappe.db.sql_list(
+		"""select name from `tab%s`
+		where lft<=%s and rgt>=%s"""
+		% (parenttype, "%s", "%s"),
+		(lft, rgt),
+	)
+
+	if parenttype in ["Customer Group", "Product Group", "Territory"]:
+		parent_field = "parent_{0}".format(frappe.scrub(parenttype))
+		root_name = frappe.db.get_list(
+			parenttype,
+			{"is_group": 1, parent_field: ("is", "not set")},
+			"name",
+			as_list=1,
+			ignore_permissions=True,
+		)
+
+		if root_name and root_name[0][0]:
+			parent_groups.append(root_name[0][0])
+
+	frappe.flags.tree_ancestors[key] = parent_groups
+	return parent_groups
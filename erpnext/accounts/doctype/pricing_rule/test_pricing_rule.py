@@ -982,6 +982,47 @@ class TestPricingRule(unittest.TestCase):
 		self.assertEqual(so.products[1].product_code, "_Test Product")
 		self.assertEqual(so.products[1].qty, 4)
 
+	def test_pricing_rule_index_is_rebuilt_on_changes(self):
+		from erpnext.accounts.doctype.pricing_rule.pricing_rule_index import get_pricing_rule_index
+
+		args = frappe._dict(
+			{
+				"product_code": "_Test Product",
+				"company": "_Test Company",
+				"price_list": "_Test Price List",
+				"currency": "_Test Currency",
+				"doctype": "Sales Order",
+				"conversion_rate": 1,
+				"price_list_currency": "_Test Currency",
+				"plc_conversion_rate": 1,
+				"order_type": "Sales",
+				"customer": "_Test Customer",
+				"name": None,
+			}
+		)
+
+		rule = make_pricing_rule(selling=1, discount_percentage=10)
+		self.assertIn(rule.name, get_pricing_rule_index().rules)
+		self.assertEqual(get_product_details(args).get("discount_percentage"), 10)
+
+		# updated without running controller methods
+		rule.db_set("discount_percentage", 15)
+		self.assertEqual(get_pricing_rule_index().rules[rule.name].discount_percentage, 15)
+		self.assertEqual(get_product_details(args).get("discount_percentage"), 15)
+
+		rule.reload()
+		rule.disable = 1
+		rule.save()
+		self.assertNotIn(rule.name, get_pricing_rule_index().rules)
+		self.assertFalse(get_product_details(args).get("discount_percentage"))
+
+		rule = make_pricing_rule(selling=1, discount_percentage=20)
+		self.assertEqual(get_product_details(args).get("discount_percentage"), 20)
+
+		delete_existing_pricing_rules()
+		self.assertFalse(get_pricing_rule_index().rules)
+		self.assertFalse(get_product_details(args).get("discount_percentage"))
+
 
 test_dependencies = ["Campaign"]
 
@@ -11,6 +11,10 @@ import frappe
 from frappe import _, bold
 from frappe.utils import cint, flt, fmt_money, get_link_to_form, getdate, today
 
+from erpnext.accounts.doctype.pricing_rule.pricing_rule_index import (
+	get_pricing_rule_index,
+	get_tree_ancestors,
+)
 from erpnext.setup.doctype.product_group.product_group import get_child_product_groups
 from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
 from erpnext.stock.get_product_details import get_conversion_factor
@@ -23,15 +27,16 @@ class MultiplePricingRuleConflict(frappe.ValidationError):
 apply_on_table = {"Product Code": "products", "Product Group": "product_groups", "Brand": "brands"}
 
 
-def get_pricing_rules(args, doc=None):
+def get_pricing_rules(args, doc=None, pricing_rule_index=None):
 	pricing_rules = []
 	values = {}
 
-	if not frappe.db.exists("Pricing Rule", {"disable": 0, args.transaction_type: 1}):
+	pricing_rule_index = pricing_rule_index or get_pricing_rule_index()
+	if not pricing_rule_index.has_rules(args.transaction_type):
 		return
 
 	for apply_on in ["Product Code", "Product Group", "Brand"]:
-		pricing_rules.extend(_get_pricing_rules(apply_on, args, values))
+		pricing_rules.extend(_get_pricing_rules(apply_on, args, values, pricing_rule_index))
 		if pricing_rules and not apply_multiple_pricing_rules(pricing_rules):
 			break
 
@@ -95,78 +100,20 @@ def filter_pricing_rule_based_on_condition(pricing_rules, doc=None):
 	return filtered_pricing_rules
 
 
-def _get_pricing_rules(apply_on, args, values):
+def _get_pricing_rules(apply_on, args, values, pricing_rule_index=None):
 	apply_on_field = frappe.scrub(apply_on)
 
 	if not args.get(apply_on_field):
 		return []
 
-	child_doc = "`tabPricing Rule {0}`".format(apply_on)
-
-	conditions = product_variant_condition = product_conditions = ""
-	values[apply_on_field] = args.get(apply_on_field)
-	if apply_on_field in ["product_code", "brand"]:
-		product_conditions = "{child_doc}.{apply_on_field}= %({apply_on_field})s".format(
-			child_doc=child_doc, apply_on_field=apply_on_field
-		)
-
-		if apply_on_field == "product_code":
-			if args.get("uom", None):
-				product_conditions += (
-					" and ({child_doc}.uom='{product_uom}' or IFNULL({child_doc}.uom, '')='')".format(
-						child_doc=child_doc, product_uom=args.get("uom")
-					)
-				)
-			if "variant_of" not in args:
-				args.variant_of = frappe.get_cached_value("Product", args.product_code, "variant_of")
-
-			if args.variant_of:
-				product_variant_condition = " or {child_doc}.product_code=%(variant_of)s ".format(
-					child_doc=child_doc
-				)
-				values["variant_of"] = args.variant_of
-	elif apply_on_field == "product_group":
-		product_conditions = _get_tree_conditions(args, "Product Group", child_doc, False)
-
-	conditions += get_other_conditions(conditions, values, args)
-	warehouse_conditions = _get_tree_conditions(args, "Warehouse", "`tabPricing Rule`")
-	if warehouse_conditions:
-		warehouse_conditions = " and {0}".format(warehouse_conditions)
+	if apply_on_field == "product_code" and "variant_of" not in args:
+		args.variant_of = frappe.get_cached_value("Product", args.product_code, "variant_of")
 
 	if not args.price_list:
 		args.price_list = None
 
-	conditions += " and ifnull(`tabPricing Rule`.for_price_list, '') in (%(price_list)s, '')"
-	values["price_list"] = args.get("price_list")
-
-	pricing_rules = (
-		frappe.db.sql(
-			"""select `tabPricing Rule`.*,
-			{child_doc}.{apply_on_field}, {child_doc}.uom
-		from `tabPricing Rule`, {child_doc}
-		where ({product_conditions} or (`tabPricing Rule`.apply_rule_on_other is not null
-			and `tabPricing Rule`.{apply_on_other_field}=%({apply_on_field})s) {product_variant_condition})
-			and {child_doc}.parent = `tabPricing Rule`.name
-			and `tabPricing Rule`.disable = 0 and
-			`tabPricing Rule`.{transaction_type} = 1 {warehouse_cond} {conditions}
-		order by `tabPricing Rule`.priority desc,
-			`tabPricing Rule`.name desc""".format(
-				child_doc=child_doc,
-				apply_on_field=apply_on_field,
-				product_conditions=product_conditions,
-				product_variant_condition=product_variant_condition,
-				transaction_type=args.transaction_type,
-				warehouse_cond=warehouse_conditions,
-				apply_on_other_field="other_{0}".format(apply_on_field),
-				conditions=conditions,
-			),
-			values,
-			as_dict=1,
-		)
-		or []
-	)
-
-	return pricing_rules
+	pricing_rule_index = pricing_rule_index or get_pricing_rule_index()
+	return pricing_rule_index.get_pricing_rules(apply_on_field, args)
 
 
 def apply_multiple_pricing_rules(pricing_rules):
@@ -190,30 +137,7 @@ def _get_tree_conditions(args, parenttype, table, allow_blank=True):
 		if key in frappe.flags.tree_conditions:
 			return frappe.flags.tree_conditions[key]
 
-		try:
-			lft, rgt = frappe.db.get_value(parenttype, args.get(field), ["lft", "rgt"])
-		except TypeError:
-			frappe.throw(_("Invalid {0}").format(args.get(field)))
-
-		parent_groups = frappe.db.sql_list(
-			"""select name from `tab%s`
-			where lft<=%s and rgt>=%s"""
-			% (parenttype, "%s", "%s"),
-			(lft, rgt),
-		)
-
-		if parenttype in ["Customer Group", "Product Group", "Territory"]:
-			parent_field = "parent_{0}".format(frappe.scrub(parenttype))
-			root_name = frappe.db.get_list(
-				parenttype,
-				{"is_group": 1, parent_field: ("is", "not set")},
-				"name",
-				as_list=1,
-				ignore_permissions=True,
-			)
-
-			if root_name and root_name[0][0]:
-				parent_groups.append(root_name[0][0])
+		parent_groups = list(get_tree_ancestors(parenttype, args.get(field)))
 
 		if parent_groups:
 			if allow_blank:
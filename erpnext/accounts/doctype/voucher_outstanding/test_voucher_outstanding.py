@@ -0,0 +1,109 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, nowdate
+
+from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.report.accounts_receivable.accounts_receivable import (
+	ReceivablePayableReport,
+	execute,
+)
+from erpnext.accounts.utils import QueryPaymentLedger, get_outstanding_invoices
+
+COMPANY = "_Test Company"
+
+
+class TestVoucherOutstanding(FrappeTestCase):
+	def setUp(self):
+		posting_date = add_days(nowdate(), -20)
+		self.invoices = [create_sales_invoice(posting_date=posting_date, rate=100) for i in range(3)]
+
+		# settled, partly paid and unpaid invoice
+		self.payments = []
+		for invoice, amount in zip(self.invoices, (100, 40)):
+			pe = get_payment_entry("Sales Invoice", invoice.name, party_amount=amount)
+			pe.reference_no = pe.reference_date = nowdate()
+			self.payments.append(pe.submit())
+
+		# credit note against the last invoice
+		create_sales_invoice(
+			posting_date=add_days(posting_date, 5),
+			rate=100,
+			qty=-1,
+			is_return=1,
+			return_against=self.invoices[-1].name,
+		)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def assert_outstandings_match_ledger(self):
+		expected = frappe.db.sql(
+			"""
+			select against_voucher_type, against_voucher_no, party, sum(amount), count(*),
+				sum(case when voucher_no = against_voucher_no then 1 else 0 end)
+			from `tabPayment Ledger Entry`
+			where delinked = 0 and company = %s
+			group by against_voucher_type, against_voucher_no, party
+			order by against_voucher_type, against_voucher_no, party""",
+			COMPANY,
+		)
+		outstandings = frappe.db.sql(
+			"""
+			select voucher_type, voucher_no, party, sum(amount), sum(entry_count), sum(own_entry_count)
+			from `tabVoucher Outstanding`
+			where company = %s and entry_count > 0
+			group by voucher_type, voucher_no, party
+			order by voucher_type, voucher_no, party""",
+			COMPANY,
+		)
+		self.assertEqual(outstandings, expected)
+
+	def get_outstandings(self):
+		filters = {"company": COMPANY, "report_date": nowdate(), "range1": 30, "range2": 60}
+		return [
+			execute(filters)[1],
+			execute(dict(filters, report_date=add_days(nowdate(), -10)))[1],
+			get_outstanding_invoices("Customer", "_Test Customer", "Debtors - _TC"),
+		]
+
+	def get_invoice_outstanding(self, invoice):
+		return frappe.db.get_value(
+			"Voucher Outstanding", {"voucher_type": "Sales Invoice", "voucher_no": invoice}, "amount"
+		)
+
+	def test_outstandings_updated_with_ledger(self):
+		self.assert_outstandings_match_ledger()
+		self.assertEqual(self.get_invoice_outstanding(self.invoices[0].name), 0)
+
+		# cancelling the payment reopens the invoice
+		self.payments[0].cancel()
+		self.assertEqual(self.get_invoice_outstanding(self.invoices[0].name), 100)
+		self.assert_outstandings_match_ledger()
+
+		# cancelled invoice is left without active entries
+		self.payments[1].cancel()
+		self.invoices[1].reload().cancel()
+		self.assertEqual(self.get_invoice_outstanding(self.invoices[1].name), 0)
+		self.assertEqual(
+			frappe.db.get_value(
+				"Voucher Outstanding",
+				{"voucher_type": "Sales Invoice", "voucher_no": self.invoices[1].name},
+				"entry_count",
+			),
+			0,
+		)
+		self.assert_outstandings_match_ledger()
+
+	def test_outstandings_match_ledger(self):
+		outstandings = self.get_outstandings()
+
+		with patch.object(
+			ReceivablePayableReport, "can_use_voucher_outstandings", return_value=False
+		), patch.object(QueryPaymentLedger, "can_use_voucher_outstandings", return_value=False):
+			self.assertEqual(self.get_outstandings(), outstandings)
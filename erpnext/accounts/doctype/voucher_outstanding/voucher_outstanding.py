@@ -0,0 +1,214 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+"""Outstanding of vouchers, summed from the Payment Ledger.
+
+There is one row per (voucher, company, account, party) having Payment Ledger Entries against
+it, named by a hash of that key. It holds the total and the number of its active (not
+delinked) entries. Whenever entries are added, delinked, relinked or deleted, their amounts
+are added to or subtracted from the rows with an upsert, so that concurrent postings against
+the same voucher only wait on the row itself and never have to read or lock the ledger.
+"""
+
+import hashlib
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import cstr, flt, getdate, now
+
+KEY_FIELDS = ("voucher_type", "voucher_no", "company", "account", "party_type", "party")
+
+OUTSTANDING_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	*KEY_FIELDS,
+	"account_type",
+	"account_currency",
+	"amount",
+	"amount_in_account_currency",
+	"last_posting_date",
+	"entry_count",
+	"own_entry_count",
+)
+
+
+class VoucherOutstanding(Document):
+	pass
+
+
+def get_voucher_outstanding_name(key):
+	return hashlib.sha1("\0".join(cstr(value) for value in key).encode()).hexdigest()
+
+
+def get_active_entries(condition):
+	"""Returns active Payment Ledger Entries matching the condition, a criterion on
+	`frappe.qb.DocType("Payment Ledger Entry")`. Call before changing or deleting the entries,
+	to subtract them from the outstanding."""
+	ple = frappe.qb.DocType("Payment Ledger Entry")
+	return (
+		frappe.qb.from_(ple)
+		.select(
+			ple.company,
+			ple.account,
+			ple.account_type,
+			ple.party_type,
+			ple.party,
+			ple.voucher_type,
+			ple.voucher_no,
+			ple.against_voucher_type,
+			ple.against_voucher_no,
+			ple.account_currency,
+			ple.amount,
+			ple.amount_in_account_currency,
+			ple.posting_date,
+		)
+		.where((ple.delinked == 0) & condition)
+	).run(as_dict=True)
+
+
+def update_voucher_outstandings(entries, sign=1):
+	"""Add active Payment Ledger Entries to the outstanding of their against vouchers, or
+	subtract them if `sign` is -1."""
+	changes = {}
+	for entry in entries:
+		if entry.get("delinked") or not entry.get("against_voucher_no"):
+			continue
+
+		key = (
+			entry.against_voucher_type,
+			entry.against_voucher_no,
+			entry.company,
+			entry.account,
+			entry.party_type,
+			entry.party,
+		)
+		if key not in changes:
+			changes[key] = frappe._dict(
+				account_type=entry.account_type,
+				account_currency=entry.account_currency,
+				amount=0.0,
+				amount_in_account_currency=0.0,
+				last_posting_date=None,
+				entry_count=0,
+				own_entry_count=0,
+			)
+
+		change = changes[key]
+		change.amount += sign * flt(entry.amount)
+		change.amount_in_account_currency += sign * flt(entry.amount_in_account_currency)
+		change.entry_count += sign
+		if (entry.voucher_type, entry.voucher_no) == key[:2]:
+			change.own_entry_count += sign
+
+		# only moves forward, a later date left by removed entries just loads more parties
+		if sign > 0 and entry.posting_date:
+			posting_date = getdate(entry.posting_date)
+			if not change.last_posting_date or posting_date > change.last_posting_date:
+				change.last_posting_date = posting_date
+
+	upsert_voucher_outstandings(changes)
+
+
+def upsert_voucher_outstandings(changes):
+	"""Insert rows of new keys and add the changes to existing rows, in the order of their names
+	so that transactions updating the same rows lock them in the same order."""
+	if not changes:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+
+	rows = sorted(
+		(
+			get_voucher_outstanding_name(key),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			*key,
+			change.account_type,
+			change.account_currency,
+			change.amount,
+			change.amount_in_account_currency,
+			change.last_posting_date,
+			change.entry_count,
+			change.own_entry_count,
+		)
+		for key, change in changes.items()
+	)
+
+	# backticks are changed to double quotes for postgres
+	if frappe.db.db_type == "mariadb":
+		existing, new = "`{0}`", "values(`{0}`)"
+		upsert = "on duplicate key update"
+	else:
+		existing, new = "`tabVoucher Outstanding`.`{0}`", "excluded.`{0}`"
+		upsert = "on conflict (name) do update set"
+
+	def added(field):
+		return "`{0}` = {1} + {2}".format(field, existing.format(field), new.format(field))
+
+	updates = ", ".join(
+		[
+			added("amount"),
+			added("amount_in_account_currency"),
+			added("entry_count"),
+			added("own_entry_count"),
+			"`last_posting_date` = greatest(coalesce({0}, {1}), coalesce({1}, {0}))".format(
+				existing.format("last_posting_date"), new.format("last_posting_date")
+			),
+			"`modified` = {0}".format(new.format("modified")),
+			"`modified_by` = {0}".format(new.format("modified_by")),
+		]
+	)
+
+	columns = ", ".join(f"`{field}`" for field in OUTSTANDING_FIELDS)
+	placeholders = "({0})".format(", ".join(["%s"] * len(OUTSTANDING_FIELDS)))
+
+	for batch in frappe.utils.create_batch(rows, 1000):
+		frappe.db.sql(
+			"""insert into `tabVoucher Outstanding` ({columns})
+			values {values}
+			{upsert} {updates}""".format(
+				columns=columns,
+				values=", ".join([placeholders] * len(batch)),
+				upsert=upsert,
+				updates=updates,
+			),
+			[value for row in batch for value in row],
+		)
+
+
+def rebuild_voucher_outstandings(batch_size=1000):
+	"""Rebuild outstanding rows of all vouchers from the Payment Ledger."""
+	frappe.db.truncate("Voucher Outstanding")
+
+	last_voucher_no = ""
+	while True:
+		voucher_nos = frappe.db.sql_list(
+			"""
+			select distinct against_voucher_no
+			from `tabPayment Ledger Entry`
+			where against_voucher_no > %(last_voucher_no)s
+			order by against_voucher_no
+			limit %(batch_size)s
+			""",
+			{"last_voucher_no": last_voucher_no, "batch_size": batch_size},
+		)
+
+		if not voucher_nos:
+			break
+
+		ple = frappe.qb.DocType("Payment Ledger Entry")
+		update_voucher_outstandings(get_active_entries(ple.against_voucher_no.isin(voucher_nos)))
+		frappe.db.commit()
+
+		last_voucher_no = voucher_nos[-1]
+
+
+def on_doctype_update():
+	frappe.db.add_index("Voucher Outstanding", ["voucher_no", "voucher_type"])
+	frappe.db.add_index("Voucher Outstanding", ["party_type", "party"])
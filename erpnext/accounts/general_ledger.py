@@ -10,10 +10,14 @@ from frappe.model.meta import get_field_precision
 from frappe.utils import cint, cstr, flt, formatdate, getdate, now
 
 import erpnext
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	invalidate_balance_snapshots,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
 from erpnext.accounts.doctype.budget.budget import validate_expense_against_budget
+from erpnext.accounts.doctype.gl_entry.gl_entry import insert_gl_entries
 from erpnext.accounts.utils import create_payment_ledger_entry
 
 
@@ -175,10 +179,14 @@ def merge_similar_entries(gl_map, precision=None):
 	merged_gl_map = []
 	accounting_dimensions = get_accounting_dimensions()
 
+	# merged entries by account head, same match as `check_if_in_list` without scanning the list
+	merged_heads = {}
+
 	for entry in gl_map:
 		# if there is already an entry in this account then just add it
 		# to that entry
-		same_head = check_if_in_list(entry, merged_gl_map, accounting_dimensions)
+		head = get_account_head(entry, accounting_dimensions)
+		same_head = merged_heads.get(head)
 		if same_head:
 			same_head.debit = flt(same_head.debit) + flt(entry.debit)
 			same_head.debit_in_account_currency = flt(same_head.debit_in_account_currency) + flt(
@@ -189,6 +197,7 @@ def merge_similar_entries(gl_map, precision=None):
 				entry.credit_in_account_currency
 			)
 		else:
+			merged_heads[head] = entry
 			merged_gl_map.append(entry)
 
 	company = gl_map[0].company if gl_map else erpnext.get_default_company()
@@ -213,17 +222,27 @@ def merge_similar_entries(gl_map, precision=None):
 	return merged_gl_map
 
 
+ACCOUNT_HEAD_FIELDNAMES = (
+	"voucher_detail_no",
+	"party",
+	"against_voucher",
+	"cost_center",
+	"against_voucher_type",
+	"party_type",
+	"project",
+	"finance_book",
+)
+
+
+def get_account_head(gle, dimensions=None):
+	"""Key of the fields which must match for GL Entries to be merged"""
+	return (gle.account,) + tuple(
+		cstr(gle.get(fieldname)) for fieldname in ACCOUNT_HEAD_FIELDNAMES + tuple(dimensions or ())
+	)
+
+
 def check_if_in_list(gle, gl_map, dimensions=None):
-	account_head_fieldnames = [
-		"voucher_detail_no",
-		"party",
-		"against_voucher",
-		"cost_center",
-		"against_voucher_type",
-		"party_type",
-		"project",
-		"finance_book",
-	]
+	account_head_fieldnames = list(ACCOUNT_HEAD_FIELDNAMES)
 
 	if dimensions:
 		account_head_fieldnames = account_head_fieldnames + dimensions
@@ -304,22 +323,33 @@ def save_entries(gl_map, adv_adj, update_outstanding, from_repost=False):
 		if gl_map[0]["voucher_type"] != "Period Closing Voucher":
 			validate_against_pcv(is_opening, gl_map[0]["posting_date"], gl_map[0]["company"])
 
-	for entry in gl_map:
-		make_entry(entry, adv_adj, update_outstanding, from_repost)
+	make_entries(gl_map, adv_adj, update_outstanding, from_repost)
 
+	invalidate_balance_snapshots(gl_map)
 
-def make_entry(args, adv_adj, update_outstanding, from_repost=False):
-	gle = frappe.new_doc("GL Entry")
-	gle.update(args)
-	gle.flags.ignore_permissions = 1
-	gle.flags.from_repost = from_repost
-	gle.flags.adv_adj = adv_adj
-	gle.flags.update_outstanding = update_outstanding or "Yes"
-	gle.flags.notify_update = False
-	gle.submit()
 
-	if not from_repost and gle.voucher_type != "Period Closing Voucher":
-		validate_expense_against_budget(args)
+def make_entries(gl_map, adv_adj, update_outstanding, from_repost=False):
+	"""Insert all GL Entries of the map at once, see `insert_gl_entries`"""
+	gl_entries = []
+	for args in gl_map:
+		gle = frappe.new_doc("GL Entry")
+		gle.update(args)
+		gle.flags.ignore_permissions = 1
+		gle.flags.from_repost = from_repost
+		gle.flags.adv_adj = adv_adj
+		gle.flags.update_outstanding = update_outstanding or "Yes"
+		gle.flags.notify_update = False
+		gl_entries.append(gle)
+
+	insert_gl_entries(gl_entries)
+
+	for args, gle in zip(gl_map, gl_entries):
+		if not from_repost and gle.voucher_type != "Period Closing Voucher":
+			validate_expense_against_budget(args)
+
+
+def make_entry(args, adv_adj, update_outstanding, from_repost=False):
+	make_entries([args], adv_adj, update_outstanding, from_repost)
 
 
 def validate_cwip_accounts(gl_map):
@@ -529,6 +559,7 @@ def make_reverse_gl_entries(
 		validate_against_pcv(is_opening, gl_entries[0]["posting_date"], gl_entries[0]["company"])
 		set_as_cancel(gl_entries[0]["voucher_type"], gl_entries[0]["voucher_no"])
 
+		reverse_gl_map = []
 		for entry in gl_entries:
 			new_gle = copy.deepcopy(entry)
 			new_gle["name"] = None
@@ -547,7 +578,10 @@ def make_reverse_gl_entries(
 			new_gle["is_cancelled"] = 1
 
 			if new_gle["debit"] or new_gle["credit"]:
-				make_entry(new_gle, adv_adj, "Yes")
+				reverse_gl_map.append(new_gle)
+
+		make_entries(reverse_gl_map, adv_adj, "Yes")
+		invalidate_balance_snapshots(gl_entries)
 
 
 def check_freezing_date(posting_date, adv_adj=False):
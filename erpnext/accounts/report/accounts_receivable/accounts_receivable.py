@@ -695,6 +695,9 @@ class ReceivablePayableReport(object):
 		else:
 			self.qb_selection_filter.append(self.ple.posting_date.lte(self.filters.report_date))
 
+		if self.can_use_voucher_outstandings():
+			self.qb_selection_filter.append(self.ple.party.isin(self.get_open_parties_query()))
+
 		ple = qb.DocType("Payment Ledger Entry")
 		query = (
 			qb.from_(ple)
@@ -725,6 +728,52 @@ class ReceivablePayableReport(object):
 
 		self.ple_entries = query.run(as_dict=True)
 
+	def can_use_voucher_outstandings(self):
+		"""Voucher Outstanding has the totals of all entries against each voucher. It can only be
+		used if the report nets all entries against a voucher in the same row, which is not the case
+		when entries are filtered on other fields or posted after the report date."""
+		if (
+			self.filters.show_future_payments
+			or self.filters.cost_center
+			or self.filters.finance_book
+			or self.filters.get("sales_person")
+		):
+			return False
+
+		return not any(
+			self.filters.get(dimension.fieldname)
+			for dimension in get_accounting_dimensions(as_list=False)
+		)
+
+	def get_open_parties_query(self):
+		"""Parties that can have outstanding on the report date.
+
+		Entries against a voucher are netted in the row of the voucher, if its own entry is in the
+		ledger. Rows of parties whose vouchers have all been settled on or before the report date
+		are all zero and do not have to be loaded, neither do rows left without active entries by
+		cancelled vouchers."""
+		outstanding = qb.DocType("Voucher Outstanding")
+
+		conditions = [outstanding.party_type == self.party_type]
+		if self.filters.company:
+			conditions.append(outstanding.company == self.filters.company)
+		if self.filters.party_account:
+			conditions.append(outstanding.account == self.filters.party_account)
+
+		return (
+			qb.from_(outstanding)
+			.select(outstanding.party)
+			.distinct()
+			.where(Criterion.all(conditions))
+			.where(outstanding.entry_count > 0)
+			.where(
+				(outstanding.amount != 0)
+				| (outstanding.amount_in_account_currency != 0)
+				| (outstanding.last_posting_date > self.filters.report_date)
+				| (outstanding.own_entry_count == 0)
+			)
+		)
+
 	def get_sales_invoices_or_customers_based_on_sales_person(self):
 		if self.filters.get("sales_person"):
 			lft, rgt = frappe.db.get_value("Sales Person", self.filters.get("sales_person"), ["lft", "rgt"])
@@ -8,6 +8,8 @@ import re
 
 import frappe
 from frappe import _
+from frappe.query_builder import Case
+from frappe.query_builder.functions import Min, Sum
 from frappe.utils import add_days, add_months, cint, cstr, flt, formatdate, get_first_day, getdate
 
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
@@ -188,6 +190,7 @@ def get_data(
 			filters,
 			gl_entries_by_account,
 			ignore_closing_entries=ignore_closing_entries,
+			period_list=period_list,
 		)
 
 	calculate_values(
@@ -416,8 +419,12 @@ def set_gl_entries_by_account(
 	filters,
 	gl_entries_by_account,
 	ignore_closing_entries=False,
+	period_list=None,
 ):
-	"""Returns a dict like { "account": [gl entries], ... }"""
+	"""Returns a dict like { "account": [gl entries], ... }
+
+	If `period_list` is passed, GL Entries of each account are summed per period in the database
+	and returned as one entry per account and period."""
 	gl_entries = []
 
 	accounts_list = frappe.db.get_all(
@@ -459,6 +466,7 @@ def set_gl_entries_by_account(
 			filters,
 			ignore_closing_entries,
 			ignore_opening_entries=ignore_opening_entries,
+			period_list=period_list,
 		)
 
 		if filters and filters.get("presentation_currency"):
@@ -479,11 +487,14 @@ def get_accounting_entries(
 	ignore_closing_entries,
 	period_closing_voucher=None,
 	ignore_opening_entries=False,
+	period_list=None,
 ):
 	gl_entry = frappe.qb.DocType(doctype)
-	query = (
-		frappe.qb.from_(gl_entry)
-		.select(
+
+	if doctype == "GL Entry" and period_list:
+		query = get_period_wise_totals_query(gl_entry, period_list)
+	else:
+		query = frappe.qb.from_(gl_entry).select(
 			gl_entry.account,
 			gl_entry.debit,
 			gl_entry.credit,
@@ -491,11 +502,12 @@ def get_accounting_entries(
 			gl_entry.credit_in_account_currency,
 			gl_entry.account_currency,
 		)
-		.where(gl_entry.company == filters.company)
-	)
+
+	query = query.where(gl_entry.company == filters.company)
 
 	if doctype == "GL Entry":
-		query = query.select(gl_entry.posting_date, gl_entry.is_opening, gl_entry.fiscal_year)
+		if not period_list:
+			query = query.select(gl_entry.posting_date, gl_entry.is_opening, gl_entry.fiscal_year)
 		query = query.where(gl_entry.is_cancelled == 0)
 		query = query.where(gl_entry.posting_date <= to_date)
 
@@ -513,6 +525,38 @@ def get_accounting_entries(
 	return entries
 
 
+def get_period_wise_totals_query(gl_entry, period_list):
+	"""
+	Query of GL Entries summed by account, fiscal year and the intervals between the start and
+	end dates of the periods. All entries of an interval fall in the same periods, so every sum
+	is returned with the first posting date of its entries and is bucketed like them.
+	"""
+	boundaries = {getdate(period_list[0].year_start_date)}
+	for period in period_list:
+		boundaries.add(getdate(period.from_date))
+		boundaries.add(getdate(add_days(period.to_date, 1)))
+
+	interval_start = Case()
+	for boundary in sorted(boundaries, reverse=True):
+		interval_start = interval_start.when(gl_entry.posting_date >= boundary, boundary)
+	interval_start = interval_start.else_(None)
+
+	return (
+		frappe.qb.from_(gl_entry)
+		.select(
+			gl_entry.account,
+			Sum(gl_entry.debit).as_("debit"),
+			Sum(gl_entry.credit).as_("credit"),
+			Sum(gl_entry.debit_in_account_currency).as_("debit_in_account_currency"),
+			Sum(gl_entry.credit_in_account_currency).as_("credit_in_account_currency"),
+			gl_entry.account_currency,
+			Min(gl_entry.posting_date).as_("posting_date"),
+			gl_entry.fiscal_year,
+		)
+		.groupby(gl_entry.account, gl_entry.account_currency, gl_entry.fiscal_year, interval_start)
+	)
+
+
 def apply_additional_conditions(doctype, query, from_date, ignore_closing_entries, filters):
 	gl_entry = frappe.qb.DocType(doctype)
 	accounting_dimensions = get_accounting_dimensions(as_list=False)
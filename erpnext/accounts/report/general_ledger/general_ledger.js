@@ -189,7 +189,27 @@ frappe.query_reports["General Ledger"] = {
 			"label": __("Show Net Values in Party Account"),
 			"fieldtype": "Check"
 		}
-	]
+	],
+
+	"onload": function(report) {
+		["CSV", "Excel"].forEach((file_format_type) => {
+			report.page.add_inner_button(__(file_format_type), function() {
+				frappe.call({
+					method: "erpnext.accounts.report.general_ledger.general_ledger.export_report",
+					args: {
+						filters: report.get_values(),
+						file_format_type: file_format_type
+					},
+					freeze: true,
+					callback: function(r) {
+						if (r.message) {
+							window.open(r.message);
+						}
+					}
+				});
+			}, __("Export Full Ledger"));
+		});
+	}
 }
 
 erpnext.utils.add_dimensions('General Ledger', 15)
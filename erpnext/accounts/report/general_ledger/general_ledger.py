@@ -2,11 +2,13 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import csv
 from collections import OrderedDict
+from itertools import groupby
 
 import frappe
 from frappe import _, _dict
-from frappe.utils import cstr, getdate
+from frappe.utils import cstr, flt, getdate
 
 from erpnext import get_company_currency, get_default_company
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
@@ -20,11 +22,26 @@ from erpnext.accounts.utils import get_account_currency
 # to cache translations
 TRANSLATIONS = frappe._dict()
 
+# GL Entries read at once by `iter_gl_entries`
+STREAM_PAGE_LENGTH = 10000
+
 
 def execute(filters=None):
 	if not filters:
 		return [], []
 
+	filters, account_details = prepare_filters(filters)
+
+	columns = get_columns(filters)
+
+	update_translations()
+
+	res = get_result(filters, account_details)
+
+	return columns, res
+
+
+def prepare_filters(filters):
 	account_details = {}
 
 	if filters and filters.get("print_in_account_currency") and not filters.get("account"):
@@ -42,13 +59,7 @@ def execute(filters=None):
 
 	filters = set_account_currency(filters)
 
-	columns = get_columns(filters)
-
-	update_translations()
-
-	res = get_result(filters, account_details)
-
-	return columns, res
+	return filters, account_details
 
 
 def update_translations():
@@ -160,8 +171,6 @@ def get_result(filters, account_details):
 
 def get_gl_entries(filters, accounting_dimensions):
 	currency_map = get_currency(filters)
-	select_fields = """, debit, credit, debit_in_account_currency,
-		credit_in_account_currency """
 
 	order_by_statement = "order by posting_date, account, creation"
 
@@ -178,24 +187,14 @@ def get_gl_entries(filters, accounting_dimensions):
 			"Company", filters.get("company"), "default_finance_book"
 		)
 
-	dimension_fields = ""
-	if accounting_dimensions:
-		dimension_fields = ", ".join(accounting_dimensions) + ","
-
 	gl_entries = frappe.db.sql(
 		"""
-		select
-			name as gl_entry, posting_date, account, party_type, party,
-			voucher_type, voucher_no, {dimension_fields}
-			cost_center, project,
-			against_voucher_type, against_voucher, account_currency,
-			remarks, against, is_opening, creation {select_fields}
+		select {fields}
 		from `tabGL Entry`
 		where company=%(company)s {conditions}
 		{order_by_statement}
 	""".format(
-			dimension_fields=dimension_fields,
-			select_fields=select_fields,
+			fields=get_gl_entry_fields(accounting_dimensions),
 			conditions=get_conditions(filters),
 			order_by_statement=order_by_statement,
 		),
@@ -209,6 +208,22 @@ def get_gl_entries(filters, accounting_dimensions):
 		return gl_entries
 
 
+def get_gl_entry_fields(accounting_dimensions):
+	dimension_fields = ""
+	if accounting_dimensions:
+		dimension_fields = ", ".join(accounting_dimensions) + ","
+
+	return """
+		name as gl_entry, posting_date, account, party_type, party,
+		voucher_type, voucher_no, {dimension_fields}
+		cost_center, project,
+		against_voucher_type, against_voucher, account_currency,
+		remarks, against, is_opening, creation, debit, credit, debit_in_account_currency,
+		credit_in_account_currency""".format(
+		dimension_fields=dimension_fields
+	)
+
+
 def get_conditions(filters):
 	conditions = []
 
@@ -388,39 +403,10 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map):
 	group_by = group_by_field(filters.get("group_by"))
 	group_by_voucher_consolidated = filters.get("group_by") == "Group by Voucher (Consolidated)"
 
+	account_type_map = None
 	if filters.get("show_net_values_in_party_account"):
 		account_type_map = get_account_type_map(filters.get("company"))
 
-	def update_value_in_dict(data, key, gle):
-		data[key].debit += gle.debit
-		data[key].credit += gle.credit
-
-		data[key].debit_in_account_currency += gle.debit_in_account_currency
-		data[key].credit_in_account_currency += gle.credit_in_account_currency
-
-		if filters.get("show_net_values_in_party_account") and account_type_map.get(
-			data[key].account
-		) in ("Receivable", "Payable"):
-			net_value = data[key].debit - data[key].credit
-			net_value_in_account_currency = (
-				data[key].debit_in_account_currency - data[key].credit_in_account_currency
-			)
-
-			if net_value < 0:
-				dr_or_cr = "credit"
-				rev_dr_or_cr = "debit"
-			else:
-				dr_or_cr = "debit"
-				rev_dr_or_cr = "credit"
-
-			data[key][dr_or_cr] = abs(net_value)
-			data[key][dr_or_cr + "_in_account_currency"] = abs(net_value_in_account_currency)
-			data[key][rev_dr_or_cr] = 0
-			data[key][rev_dr_or_cr + "_in_account_currency"] = 0
-
-		if data[key].against_voucher and gle.against_voucher:
-			data[key].against_voucher += ", " + gle.against_voucher
-
 	from_date, to_date = getdate(filters.from_date), getdate(filters.to_date)
 	show_opening_entries = filters.get("show_opening_entries")
 
@@ -429,18 +415,18 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map):
 
 		if gle.posting_date < from_date or (cstr(gle.is_opening) == "Yes" and not show_opening_entries):
 			if not group_by_voucher_consolidated:
-				update_value_in_dict(gle_map[group_by_value].totals, "opening", gle)
-				update_value_in_dict(gle_map[group_by_value].totals, "closing", gle)
+				update_value_in_dict(gle_map[group_by_value].totals, "opening", gle, account_type_map)
+				update_value_in_dict(gle_map[group_by_value].totals, "closing", gle, account_type_map)
 
-			update_value_in_dict(totals, "opening", gle)
-			update_value_in_dict(totals, "closing", gle)
+			update_value_in_dict(totals, "opening", gle, account_type_map)
+			update_value_in_dict(totals, "closing", gle, account_type_map)
 
 		elif gle.posting_date <= to_date or (cstr(gle.is_opening) == "Yes" and show_opening_entries):
 			if not group_by_voucher_consolidated:
-				update_value_in_dict(gle_map[group_by_value].totals, "total", gle)
-				update_value_in_dict(gle_map[group_by_value].totals, "closing", gle)
-				update_value_in_dict(totals, "total", gle)
-				update_value_in_dict(totals, "closing", gle)
+				update_value_in_dict(gle_map[group_by_value].totals, "total", gle, account_type_map)
+				update_value_in_dict(gle_map[group_by_value].totals, "closing", gle, account_type_map)
+				update_value_in_dict(totals, "total", gle, account_type_map)
+				update_value_in_dict(totals, "closing", gle, account_type_map)
 
 				gle_map[group_by_value].entries.append(gle)
 
@@ -461,16 +447,46 @@ def get_accountwise_gle(filters, accounting_dimensions, gl_entries, gle_map):
 				if key not in consolidated_gle:
 					consolidated_gle.setdefault(key, gle)
 				else:
-					update_value_in_dict(consolidated_gle, key, gle)
+					update_value_in_dict(consolidated_gle, key, gle, account_type_map)
 
 	for key, value in consolidated_gle.products():
-		update_value_in_dict(totals, "total", value)
-		update_value_in_dict(totals, "closing", value)
+		update_value_in_dict(totals, "total", value, account_type_map)
+		update_value_in_dict(totals, "closing", value, account_type_map)
 		entries.append(value)
 
 	return totals, entries
 
 
+def update_value_in_dict(data, key, gle, account_type_map=None):
+	"""Add debit and credit of `gle` to `data[key]`, netted if `account_type_map` is passed"""
+	data[key].debit += gle.debit
+	data[key].credit += gle.credit
+
+	data[key].debit_in_account_currency += gle.debit_in_account_currency
+	data[key].credit_in_account_currency += gle.credit_in_account_currency
+
+	if account_type_map and account_type_map.get(data[key].account) in ("Receivable", "Payable"):
+		net_value = data[key].debit - data[key].credit
+		net_value_in_account_currency = (
+			data[key].debit_in_account_currency - data[key].credit_in_account_currency
+		)
+
+		if net_value < 0:
+			dr_or_cr = "credit"
+			rev_dr_or_cr = "debit"
+		else:
+			dr_or_cr = "debit"
+			rev_dr_or_cr = "credit"
+
+		data[key][dr_or_cr] = abs(net_value)
+		data[key][dr_or_cr + "_in_account_currency"] = abs(net_value_in_account_currency)
+		data[key][rev_dr_or_cr] = 0
+		data[key][rev_dr_or_cr + "_in_account_currency"] = 0
+
+	if data[key].against_voucher and gle.against_voucher:
+		data[key].against_voucher += ", " + gle.against_voucher
+
+
 def get_account_type_map(company):
 	account_type_map = frappe._dict(
 		frappe.get_all(
@@ -498,11 +514,17 @@ def get_result_as_list(data, filters):
 	return data
 
 
-def get_supplier_invoice_details():
+def get_supplier_invoice_details(invoices=None):
 	inv_details = {}
+	if invoices is not None and not invoices:
+		return inv_details
+
 	for d in frappe.db.sql(
 		""" select name, bill_no from `tabPurchase Invoice`
-		where docstatus = 1 and bill_no is not null and bill_no != '' """,
+		where docstatus = 1 and bill_no is not null and bill_no != '' {condition}""".format(
+			condition="and name in %(invoices)s" if invoices else ""
+		),
+		{"invoices": list(invoices or [])},
 		as_dict=1,
 	):
 		inv_details[d.name] = d.bill_no
@@ -516,6 +538,369 @@ def get_balance(row, balance, debit_field, credit_field):
 	return balance
 
 
+def iter_result(filters):
+	"""
+	Yields the rows of `get_result` without loading the ledger in memory. Openings are summed by
+	one query and GL Entries of the period are read page by page in the order of the rows.
+
+	Entries of an account or party are read together, so these groups are ordered by their group
+	value instead of by their first posting date.
+	"""
+	balance = 0
+	for d in iter_data_with_opening_closing(filters):
+		if not d.get("posting_date"):
+			balance = 0
+
+		balance = get_balance(d, balance, "debit", "credit")
+		d["balance"] = balance
+
+		d["account_currency"] = filters.account_currency
+		d.setdefault("bill_no", "")
+
+		yield d
+
+
+def iter_data_with_opening_closing(filters):
+	accounting_dimensions = []
+	if filters.get("include_dimensions"):
+		accounting_dimensions = get_accounting_dimensions()
+
+	group_by = group_by_field(filters.get("group_by"))
+	account_type_map = None
+	if filters.get("show_net_values_in_party_account"):
+		account_type_map = get_account_type_map(filters.get("company"))
+
+	if filters.get("include_default_book_entries"):
+		filters["company_fb"] = frappe.db.get_value(
+			"Company", filters.get("company"), "default_finance_book"
+		)
+
+	conditions = get_conditions(filters)
+	account_currencies = None
+	if filters.get("presentation_currency"):
+		account_currencies = frappe.db.sql_list(
+			"""select distinct account_currency from `tabGL Entry`
+			where company=%(company)s {conditions}""".format(
+				conditions=conditions
+			),
+			filters,
+		)
+
+	openings = get_openings(filters, conditions, group_by, account_currencies)
+
+	totals = get_totals_dict()
+	for opening in openings.values():
+		update_value_in_dict(totals, "opening", opening)
+		update_value_in_dict(totals, "closing", opening)
+
+	# Opening for filtered account
+	yield totals.opening
+
+	if filters.get("group_by") == "Group by Voucher (Consolidated)":
+		for gle in iter_consolidated_gl_entries(
+			filters, conditions, accounting_dimensions, account_currencies, account_type_map
+		):
+			update_value_in_dict(totals, "total", gle)
+			update_value_in_dict(totals, "closing", gle)
+			yield gle
+	else:
+		for group_by_value, entries in iter_gl_entry_groups(
+			filters, conditions, group_by, accounting_dimensions, account_currencies
+		):
+			group_totals = get_totals_dict()
+			opening = openings.get(group_by_value)
+			if opening:
+				update_value_in_dict(group_totals, "opening", opening)
+				update_value_in_dict(group_totals, "closing", opening)
+
+			yield {}
+			if filters.get("group_by") != "Group by Voucher":
+				yield group_totals.opening
+
+			for gle in entries:
+				update_value_in_dict(group_totals, "total", gle)
+				update_value_in_dict(group_totals, "closing", gle)
+				update_value_in_dict(totals, "total", gle)
+				update_value_in_dict(totals, "closing", gle)
+				yield gle
+
+			yield group_totals.total
+			if filters.get("group_by") != "Group by Voucher":
+				yield group_totals.closing
+
+		yield {}
+
+	yield totals.total
+	yield totals.closing
+
+
+def get_period_conditions(filters):
+	"""Returns conditions of (opening entries, entries of the period), see `get_accountwise_gle`"""
+	if filters.get("show_opening_entries"):
+		return "posting_date < %(from_date)s", "posting_date >= %(from_date)s"
+
+	return (
+		"(posting_date < %(from_date)s or is_opening = 'Yes')",
+		"(posting_date >= %(from_date)s and ifnull(is_opening, '') != 'Yes')",
+	)
+
+
+def get_openings(filters, conditions, group_by, account_currencies=None):
+	"""Returns opening debit and credit of each value of `group_by`, summed in the database"""
+	openings = {}
+	opening_condition = get_period_conditions(filters)[0]
+
+	gl_entries = frappe.db.sql(
+		"""
+		select
+			{group_by} as group_by_value, account_currency,
+			sum(debit) as debit, sum(credit) as credit,
+			sum(debit_in_account_currency) as debit_in_account_currency,
+			sum(credit_in_account_currency) as credit_in_account_currency
+		from `tabGL Entry`
+		where company=%(company)s {conditions} and {opening_condition}
+		group by {group_by}, account_currency""".format(
+			group_by=group_by, conditions=conditions, opening_condition=opening_condition
+		),
+		filters,
+		as_dict=1,
+	)
+
+	if filters.get("presentation_currency"):
+		convert_to_presentation_currency(gl_entries, get_currency(filters), account_currencies)
+
+	for gle in gl_entries:
+		opening = openings.setdefault(
+			cstr(gle.group_by_value),
+			_dict(
+				debit=0.0, credit=0.0, debit_in_account_currency=0.0, credit_in_account_currency=0.0
+			),
+		)
+		opening.debit += flt(gle.debit)
+		opening.credit += flt(gle.credit)
+		opening.debit_in_account_currency += flt(gle.debit_in_account_currency)
+		opening.credit_in_account_currency += flt(gle.credit_in_account_currency)
+
+	return openings
+
+
+def get_posting_date_sort_key(filters):
+	"""Returns the sort key of entries of a posting date, same order as `get_gl_entries`"""
+	if filters.get("group_by") == "Group by Voucher":
+		fields = ("voucher_type", "voucher_no")
+	elif filters.get("group_by") == "Group by Account" or filters.get("include_dimensions"):
+		fields = ("creation",)
+	else:
+		fields = ("account", "creation")
+
+	return lambda gle: tuple(gle.get(field) for field in fields)
+
+
+def iter_gl_entries_by_posting_date(
+	filters,
+	conditions,
+	accounting_dimensions,
+	account_currencies=None,
+	group_by=None,
+	group_value=None,
+):
+	"""Yields lists of GL Entries of each posting date of the period, sorted by
+	`get_posting_date_sort_key`, with only entries of `group_value` if `group_by` is set."""
+	sort_key = get_posting_date_sort_key(filters)
+	gl_entries = iter_gl_entries(
+		filters, conditions, accounting_dimensions, account_currencies, group_by, group_value
+	)
+
+	for posting_date, entries in groupby(gl_entries, key=lambda gle: gle.posting_date):
+		yield sorted(entries, key=sort_key)
+
+
+def iter_gl_entry_groups(
+	filters, conditions, group_by, accounting_dimensions, account_currencies=None
+):
+	"""Yields (group value, entries) in the order of the rows"""
+	if group_by == "voucher_no":
+		# entries of a voucher have its posting date, groups are in the order of the entries
+		for entries in iter_gl_entries_by_posting_date(
+			filters, conditions, accounting_dimensions, account_currencies
+		):
+			vouchers = OrderedDict()
+			for gle in entries:
+				vouchers.setdefault(cstr(gle.voucher_no), []).append(gle)
+
+			yield from vouchers.products()
+		return
+
+	# accounts and parties have entries all over the period, groups are in the order of values
+	for group_value in get_group_by_values(filters, conditions, group_by):
+		entries = iter_gl_entries_by_posting_date(
+			filters, conditions, accounting_dimensions, account_currencies, group_by, group_value
+		)
+		yield group_value, (gle for day_entries in entries for gle in day_entries)
+
+
+def iter_consolidated_gl_entries(
+	filters, conditions, accounting_dimensions, account_currencies=None, account_type_map=None
+):
+	"""Yields entries consolidated by voucher, account, party and dimensions like
+	`get_accountwise_gle`. Entries of a voucher have its posting date, so entries are
+	consolidated one posting date at a time."""
+	key_fields = ["voucher_type", "voucher_no", "account", "party_type", "party"]
+	if filters.get("include_dimensions"):
+		key_fields += accounting_dimensions + ["cost_center"]
+
+	for entries in iter_gl_entries_by_posting_date(
+		filters, conditions, accounting_dimensions, account_currencies
+	):
+		consolidated_gle = OrderedDict()
+		for gle in entries:
+			key = tuple(gle.get(field) for field in key_fields)
+			if key not in consolidated_gle:
+				consolidated_gle[key] = gle
+			else:
+				update_value_in_dict(consolidated_gle, key, gle, account_type_map)
+
+		yield from consolidated_gle.values()
+
+
+def get_group_by_values(filters, conditions, group_by):
+	period_condition = get_period_conditions(filters)[1]
+	values = frappe.db.sql_list(
+		"""
+		select distinct {group_by}
+		from `tabGL Entry`
+		where company=%(company)s {conditions} and {period_condition}
+		order by {group_by}""".format(
+			group_by=group_by, conditions=conditions, period_condition=period_condition
+		),
+		filters,
+	)
+
+	# entries without a value are one group
+	return list(OrderedDict.fromkeys(cstr(value) for value in values))
+
+
+def iter_gl_entries(
+	filters,
+	conditions,
+	accounting_dimensions,
+	account_currencies=None,
+	group_by=None,
+	group_value=None,
+):
+	"""
+	Yields GL Entries of the period ordered by posting date and name, the order of the index on
+	posting date (and of the indexes on account and party with posting date, for entries of one
+	group value). Entries are read in pages, each page starting after the last entry of the
+	previous page.
+	"""
+	currency_map = get_currency(filters)
+	period_condition = get_period_conditions(filters)[1]
+
+	group_condition = ""
+	if group_by:
+		group_condition = (
+			"and {0} = %(group_value)s".format(group_by)
+			if group_value
+			else "and ifnull({0}, '') = ''".format(group_by)
+		)
+
+	values = frappe._dict(filters, group_value=group_value)
+	last_gle = None
+
+	while True:
+		keyset_condition = ""
+		if last_gle:
+			# split, so that the range on posting date can use the index
+			keyset_condition = """and posting_date >= %(last_posting_date)s
+				and (posting_date > %(last_posting_date)s or name > %(last_name)s)"""
+			values.update(last_posting_date=last_gle.posting_date, last_name=last_gle.gl_entry)
+
+		gl_entries = frappe.db.sql(
+			"""
+			select {fields}
+			from `tabGL Entry`
+			where company=%(company)s {conditions} and {period_condition}
+				{group_condition} {keyset_condition}
+			order by posting_date, name
+			limit {page_length}""".format(
+				fields=get_gl_entry_fields(accounting_dimensions),
+				conditions=conditions,
+				period_condition=period_condition,
+				group_condition=group_condition,
+				keyset_condition=keyset_condition,
+				page_length=STREAM_PAGE_LENGTH,
+			),
+			values,
+			as_dict=1,
+		)
+
+		if not gl_entries:
+			return
+
+		last_gle = gl_entries[-1]
+
+		inv_details = get_supplier_invoice_details(
+			{gle.against_voucher for gle in gl_entries if gle.against_voucher}
+		)
+		for gle in gl_entries:
+			gle.bill_no = inv_details.get(gle.against_voucher, "")
+
+		if filters.get("presentation_currency"):
+			convert_to_presentation_currency(gl_entries, currency_map, account_currencies)
+
+		yield from gl_entries
+
+		if len(gl_entries) < STREAM_PAGE_LENGTH:
+			return
+
+
+@frappe.whitelist()
+def export_report(filters, file_format_type="CSV"):
+	"""Writes the report to a private file row by row and returns the file url"""
+	from frappe.desk.query_report import get_report_doc
+
+	get_report_doc("General Ledger")
+
+	filters, account_details = prepare_filters(frappe._dict(frappe.parse_json(filters)))
+	columns = [column for column in get_columns(filters) if not column.get("hidden")]
+	update_translations()
+
+	extension = "xlsx" if file_format_type == "Excel" else "csv"
+	file_name = "general_ledger_{0}.{1}".format(frappe.generate_hash(length=10), extension)
+	path = frappe.get_site_path("private", "files", file_name)
+
+	labels = [column["label"] for column in columns]
+	rows = ([d.get(column["fieldname"]) for column in columns] for d in iter_result(filters))
+
+	if extension == "xlsx":
+		from openpyxl import Workbook
+
+		workbook = Workbook(write_only=True)
+		sheet = workbook.create_sheet(_("General Ledger"))
+		sheet.append(labels)
+		for row in rows:
+			sheet.append(row)
+		workbook.save(path)
+	else:
+		with open(path, "w", newline="") as f:
+			writer = csv.writer(f)
+			writer.writerow(labels)
+			writer.writerows(rows)
+
+	_file = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": "/private/files/" + file_name,
+			"is_private": 1,
+		}
+	)
+	_file.insert(ignore_permissions=True)
+
+	return _file.file_url
+
+
 def get_columns(filters):
 	if filters.get("presentation_currency"):
 		currency = filters["presentation_currency"]
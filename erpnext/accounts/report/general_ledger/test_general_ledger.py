@@ -1,10 +1,14 @@
 # Copyright (c) 2022, Frappe Technologies Pvt. Ltd. and Contributors
 # MIT License. See license.txt
 
+from unittest.mock import patch
+
 import frappe
 from frappe.tests.utils import FrappeTestCase
-from frappe.utils import today
+from frappe.utils import add_days, today
 
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.report.general_ledger import general_ledger
 from erpnext.accounts.report.general_ledger.general_ledger import execute
 
 
@@ -148,3 +152,35 @@ class TestGeneralLedger(FrappeTestCase):
 		self.assertEqual(data[2]["credit"], 900)
 		self.assertEqual(data[3]["debit"], 100)
 		self.assertEqual(data[3]["credit"], 100)
+
+	def test_streamed_result(self):
+		for days in (-10, -5, -1, 0, 0):
+			make_journal_entry(
+				"_Test Bank - _TC",
+				"Cash - _TC",
+				100 + days,
+				posting_date=add_days(today(), days),
+				submit=True,
+			)
+
+		fields = ["account", "posting_date", "voucher_no", "debit", "credit", "balance"]
+
+		for group_by in ("Group by Account", "Group by Voucher", "Group by Voucher (Consolidated)"):
+			filters = {
+				"company": "_Test Company",
+				"from_date": add_days(today(), -6),
+				"to_date": today(),
+				"account": ["Bank Accounts - _TC"] if group_by == "Group by Account" else ["_Test Bank - _TC"],
+				"group_by": group_by,
+			}
+
+			data = execute(frappe._dict(filters))[1]
+
+			streamed_filters = general_ledger.prepare_filters(frappe._dict(filters))[0]
+			with patch.object(general_ledger, "STREAM_PAGE_LENGTH", 2):
+				streamed_data = list(general_ledger.iter_result(streamed_filters))
+
+			self.assertEqual(
+				[[d.get(field) for field in fields] for d in streamed_data],
+				[[d.get(field) for field in fields] for d in data],
+			)
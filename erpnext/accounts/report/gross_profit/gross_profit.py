@@ -6,7 +6,7 @@ from collections import OrderedDict
 import frappe
 from frappe import _, qb, scrub
 from frappe.query_builder import Order
-from frappe.utils import cint, flt, formatdate
+from frappe.utils import cint, create_batch, flt, formatdate
 
 from erpnext.controllers.queries import get_match_cond
 from erpnext.stock.report.stock_ledger.stock_ledger import get_product_group_condition
@@ -409,6 +409,7 @@ class GrossProfitGenerator(object):
 
 		self.load_product_bundle()
 		self.load_non_stock_products()
+		self.load_stock_ledger_entries()
 		self.get_returned_invoice_products()
 		self.process()
 
@@ -616,41 +617,36 @@ class GrossProfitGenerator(object):
 
 		return flt(buying_amount, self.currency_precision)
 
-	def calculate_buying_amount_from_sle(self, row, my_sle, parenttype, parent, product_row, product_code):
-		for i, sle in enumerate(my_sle):
-			# find the stock valution rate from stock ledger entry
-			if (
-				sle.voucher_type == parenttype
-				and parent == sle.voucher_no
-				and sle.voucher_detail_no == product_row
-			):
-				previous_stock_value = len(my_sle) > i + 1 and flt(my_sle[i + 1].stock_value) or 0.0
+	def calculate_buying_amount_from_sle(self, row, sle, product_code):
+		# find the stock valution rate from stock ledger entry
+		if sle:
+			# stock value of the product and warehouse before this entry
+			previous_stock_value = flt(sle.stock_value) - flt(sle.stock_value_difference)
 
-				if previous_stock_value:
-					return abs(previous_stock_value - flt(sle.stock_value)) * flt(row.qty) / abs(flt(sle.qty))
-				else:
-					return flt(row.qty) * self.get_average_buying_rate(row, product_code)
+			if previous_stock_value:
+				return abs(previous_stock_value - flt(sle.stock_value)) * flt(row.qty) / abs(flt(sle.qty))
+			else:
+				return flt(row.qty) * self.get_average_buying_rate(row, product_code)
 		return 0.0
 
 	def get_buying_amount(self, row, product_code):
-		# IMP NOTE
-		# stock_ledger_entries should already be filtered by product_code and warehouse and
-		# sorted by posting_date desc, posting_time desc
 		if product_code in self.non_stock_products and (row.project or row.cost_center):
 			# Issue 6089-Get last purchasing rate for non-stock product
 			product_rate = self.get_last_purchase_rate(product_code, row)
 			return flt(row.qty) * product_rate
 
 		else:
-			my_sle = self.get_stock_ledger_entries(product_code, row.warehouse)
-			if (row.update_stock or row.dn_detail) and my_sle:
+			if (row.update_stock or row.dn_detail) and self.has_stock_ledger_entries(
+				product_code, row.warehouse
+			):
 				parenttype, parent = row.parenttype, row.parent
 				if row.dn_detail:
 					parenttype, parent = "Delivery Note", row.delivery_note
 
-				return self.calculate_buying_amount_from_sle(
-					row, my_sle, parenttype, parent, row.product_row, product_code
+				sle = self.get_stock_ledger_entry(
+					parenttype, parent, row.product_row, product_code, row.warehouse
 				)
+				return self.calculate_buying_amount_from_sle(row, sle, product_code)
 			elif self.delivery_notes.get((row.parent, row.product_code), None):
 				#  check if Invoice has delivery notes
 				dn = self.delivery_notes.get((row.parent, row.product_code))
@@ -660,10 +656,8 @@ class GrossProfitGenerator(object):
 					dn["product_row"],
 					dn["warehouse"],
 				)
-				my_sle = self.get_stock_ledger_entries(product_code, row.warehouse)
-				return self.calculate_buying_amount_from_sle(
-					row, my_sle, parenttype, parent, product_row, product_code
-				)
+				sle = self.get_stock_ledger_entry(parenttype, parent, product_row, product_code, row.warehouse)
+				return self.calculate_buying_amount_from_sle(row, sle, product_code)
 			elif row.sales_order and row.so_detail:
 				incoming_amount = self.get_buying_amount_from_so_dn(row.sales_order, row.so_detail, product_code)
 				if incoming_amount:
@@ -941,11 +935,28 @@ class GrossProfitGenerator(object):
 			"Product", product_code, ["product_name", "description", "product_group", "brand"]
 		)
 
-	def get_stock_ledger_entries(self, product_code, warehouse):
-		if product_code and warehouse:
-			if (product_code, warehouse) not in self.sle:
-				sle = qb.DocType("Stock Ledger Entry")
-				res = (
+	def load_stock_ledger_entries(self):
+		"""Load Stock Ledger Entries of the invoices and delivery notes in the report, indexed by
+		voucher row, product and warehouse"""
+		self.sle = {}
+		self.product_warehouses_with_sle = set()
+		self.products_with_loaded_warehouses = set()
+
+		voucher_nos_by_type = {}
+		for row in self.si_list:
+			if row.update_stock and row.parent:
+				voucher_nos_by_type.setdefault(row.parenttype, set()).add(row.parent)
+			if row.dn_detail and row.delivery_note:
+				voucher_nos_by_type.setdefault("Delivery Note", set()).add(row.delivery_note)
+
+		for dn in self.delivery_notes.values():
+			voucher_nos_by_type.setdefault("Delivery Note", set()).add(dn.delivery_note)
+
+		sle = qb.DocType("Stock Ledger Entry")
+		product_codes = {row.product_code for row in self.si_list if row.product_code}
+		for voucher_type, voucher_nos in voucher_nos_by_type.items():
+			for voucher_nos_batch in create_batch(sorted(voucher_nos), 1000):
+				entries = (
 					qb.from_(sle)
 					.select(
 						sle.product_code,
@@ -953,24 +964,67 @@ class GrossProfitGenerator(object):
 						sle.voucher_no,
 						sle.voucher_detail_no,
 						sle.stock_value,
+						sle.stock_value_difference,
 						sle.warehouse,
 						sle.actual_qty.as_("qty"),
 					)
 					.where(
 						(sle.company == self.filters.company)
-						& (sle.product_code == product_code)
-						& (sle.warehouse == warehouse)
+						& (sle.voucher_type == voucher_type)
+						& (sle.voucher_no.isin(voucher_nos_batch))
 						& (sle.is_cancelled == 0)
 					)
-					.orderby(sle.product_code)
-					.orderby(sle.warehouse, sle.posting_date, sle.posting_time, sle.creation, order=Order.desc)
+					.orderby(sle.posting_date, sle.posting_time, sle.creation)
 					.run(as_dict=True)
 				)
 
-				self.sle[(product_code, warehouse)] = res
+				# latest entry of a voucher row is used, like in the ledger sorted latest first
+				for entry in entries:
+					key = (
+						entry.voucher_type,
+						entry.voucher_no,
+						entry.voucher_detail_no,
+						entry.product_code,
+						entry.warehouse,
+					)
+					self.sle[key] = entry
+					product_codes.add(entry.product_code)
+
+		self.load_product_warehouses_with_sle(product_codes)
+
+	def load_product_warehouses_with_sle(self, product_codes):
+		product_codes = set(product_codes) - self.products_with_loaded_warehouses
+		if not product_codes:
+			return
+
+		sle = qb.DocType("Stock Ledger Entry")
+		for product_codes_batch in create_batch(sorted(product_codes), 1000):
+			self.product_warehouses_with_sle.update(
+				(
+					qb.from_(sle)
+					.select(sle.product_code, sle.warehouse)
+					.distinct()
+					.where(
+						(sle.company == self.filters.company)
+						& (sle.product_code.isin(product_codes_batch))
+						& (sle.is_cancelled == 0)
+					)
+				).run()
+			)
+
+		self.products_with_loaded_warehouses.update(product_codes)
+
+	def has_stock_ledger_entries(self, product_code, warehouse):
+		if not (product_code and warehouse):
+			return False
+
+		self.load_product_warehouses_with_sle([product_code])
+		return (product_code, warehouse) in self.product_warehouses_with_sle
 
-			return self.sle[(product_code, warehouse)]
-		return []
+	def get_stock_ledger_entry(
+		self, voucher_type, voucher_no, voucher_detail_no, product_code, warehouse
+	):
+		return self.sle.get((voucher_type, voucher_no, voucher_detail_no, product_code, warehouse))
 
 	def load_product_bundle(self):
 		self.product_bundles = {}
@@ -5,13 +5,60 @@ from frappe.utils import add_days, flt, nowdate
 
 from erpnext.accounts.doctype.sales_invoice.sales_invoice import make_delivery_note
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
-from erpnext.accounts.report.gross_profit.gross_profit import execute
+from erpnext.accounts.report.gross_profit.gross_profit import GrossProfitGenerator, execute
 from erpnext.stock.doctype.delivery_note.delivery_note import make_sales_invoice
 from erpnext.stock.doctype.delivery_note.test_delivery_note import create_delivery_note
 from erpnext.stock.doctype.product.test_product import create_product
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
 
 
+class GrossProfitByLedgerScan(GrossProfitGenerator):
+	"""Previous implementation, scanning the whole ledger of the product and warehouse"""
+
+	def load_stock_ledger_entries(self):
+		self.ledgers = {}
+
+	def get_ledger(self, product_code, warehouse):
+		if (product_code, warehouse) not in self.ledgers:
+			sle = qb.DocType("Stock Ledger Entry")
+			self.ledgers[(product_code, warehouse)] = (
+				qb.from_(sle)
+				.select(
+					sle.voucher_type,
+					sle.voucher_no,
+					sle.voucher_detail_no,
+					sle.stock_value,
+					sle.actual_qty.as_("qty"),
+				)
+				.where(
+					(sle.company == self.filters.company)
+					& (sle.product_code == product_code)
+					& (sle.warehouse == warehouse)
+					& (sle.is_cancelled == 0)
+				)
+				.orderby(sle.posting_date, sle.posting_time, sle.creation, order=qb.desc)
+				.run(as_dict=True)
+			)
+
+		return self.ledgers[(product_code, warehouse)]
+
+	def has_stock_ledger_entries(self, product_code, warehouse):
+		return bool(product_code and warehouse and self.get_ledger(product_code, warehouse))
+
+	def get_stock_ledger_entry(
+		self, voucher_type, voucher_no, voucher_detail_no, product_code, warehouse
+	):
+		my_sle = self.get_ledger(product_code, warehouse)
+		for i, sle in enumerate(my_sle):
+			if (sle.voucher_type, sle.voucher_no, sle.voucher_detail_no) == (
+				voucher_type,
+				voucher_no,
+				voucher_detail_no,
+			):
+				previous_stock_value = len(my_sle) > i + 1 and flt(my_sle[i + 1].stock_value) or 0.0
+				return sle.update(stock_value_difference=flt(sle.stock_value) - previous_stock_value)
+
+
 class TestGrossProfit(FrappeTestCase):
 	def setUp(self):
 		self.create_company()
@@ -460,3 +507,27 @@ class TestGrossProfit(FrappeTestCase):
 		}
 		gp_entry = [x for x in data if x.parent_invoice == sinv.name]
 		self.assertDictContainsSubset(expected_entry, gp_entry[0])
+
+	def test_buying_amount_matches_ledger_scan(self):
+		for rate in (100, 120, 90):
+			make_stock_entry(
+				company=self.company, product_code=self.product, target=self.warehouse, qty=5, basic_rate=rate
+			)
+
+		for qty in (2, 3, 4):
+			sinv = self.create_sales_invoice(qty=qty, rate=200, do_not_save=True)
+			sinv.update_stock = 1
+			sinv.save().submit()
+
+		dnote = self.create_delivery_note(qty=3, rate=200)
+		make_sales_invoice(dnote.name).save().submit()
+
+		for group_by in ("Invoice", "Product Code"):
+			filters = frappe._dict(
+				company=self.company, from_date=nowdate(), to_date=nowdate(), group_by=group_by
+			)
+			expected = GrossProfitByLedgerScan(filters).si_list
+			buying_amounts = [row.buying_amount for row in GrossProfitGenerator(filters).si_list]
+
+			self.assertTrue(any(buying_amounts))
+			self.assertEqual(buying_amounts, [row.buying_amount for row in expected])
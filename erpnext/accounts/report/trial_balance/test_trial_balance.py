@@ -0,0 +1,100 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_years, flt, getdate, nowdate
+
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.report.trial_balance.trial_balance import execute
+from erpnext.accounts.report.trial_balance_for_party.trial_balance_for_party import (
+	execute as execute_for_party,
+)
+
+COMPANY = "_Test Company"
+
+
+def get_ledger_balances(filters):
+	"""Balances by account summed from GL Entries, as computed by the previous report"""
+	return frappe.db.sql(
+		"""
+		select gle.account,
+			sum(case when gle.posting_date < %(from_date)s
+				and (acc.report_type = 'Balance Sheet' or gle.posting_date >= %(year_start_date)s)
+				then gle.debit - gle.credit else 0 end),
+			sum(case when gle.posting_date >= %(from_date)s and gle.is_opening = 'No'
+				then gle.debit else 0 end),
+			sum(case when gle.posting_date >= %(from_date)s and gle.is_opening = 'No'
+				then gle.credit else 0 end)
+		from `tabGL Entry` gle, `tabAccount` acc
+		where gle.account = acc.name and gle.company = %(company)s and gle.is_cancelled = 0
+			and gle.posting_date <= %(to_date)s and gle.voucher_type != 'Period Closing Voucher'
+		group by gle.account""",
+		filters,
+	)
+
+
+def get_ledger_party_balances(filters):
+	return frappe.db.sql(
+		"""
+		select party,
+			sum(case when posting_date < %(from_date)s or is_opening = 'Yes'
+				then debit - credit else 0 end),
+			sum(case when posting_date >= %(from_date)s and is_opening = 'No' then debit else 0 end),
+			sum(case when posting_date >= %(from_date)s and is_opening = 'No' then credit else 0 end)
+		from `tabGL Entry`
+		where company = %(company)s and is_cancelled = 0 and party_type = %(party_type)s
+			and ifnull(party, '') != '' and posting_date <= %(to_date)s
+		group by party""",
+		filters,
+	)
+
+
+class TestTrialBalance(FrappeTestCase):
+	def setUp(self):
+		# entries over the previous years and the current year
+		for years in (-3, -2, -1, 0):
+			posting_date = add_days(add_years(nowdate(), years), -5)
+			make_journal_entry(
+				"_Test Bank - _TC", "Sales - _TC", 100, posting_date=posting_date, submit=True
+			)
+			make_journal_entry(
+				"_Test Account Cost for Goods Sold - _TC",
+				"_Test Bank - _TC",
+				40,
+				posting_date=posting_date,
+				submit=True,
+			)
+			create_sales_invoice(posting_date=posting_date, rate=250)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_filters(self, years=0):
+		year = getdate(add_years(nowdate(), years)).year
+		return frappe._dict(
+			company=COMPANY,
+			fiscal_year=f"_Test Fiscal Year {year}",
+			from_date=f"{year}-01-01",
+			to_date=f"{year}-12-31",
+			party_type="Customer",
+		)
+
+	def test_balances_match_ledger(self):
+		for years in (-1, 0):
+			filters = self.get_filters(years)
+			rows = {row.get("account"): row for row in execute(filters)[1] if row.get("account")}
+
+			for account, opening, debit, credit in get_ledger_balances(filters):
+				row = rows[account]
+				self.assertEqual(flt(row["opening_debit"] - row["opening_credit"], 2), flt(opening, 2))
+				self.assertEqual(flt(row["debit"], 2), flt(debit, 2))
+				self.assertEqual(flt(row["credit"], 2), flt(credit, 2))
+
+	def test_party_balances_match_ledger(self):
+		filters = self.get_filters()
+		rows = {row.get("party"): row for row in execute_for_party(filters)[1]}
+
+		for party, opening, debit, credit in get_ledger_party_balances(filters):
+			row = rows[party]
+			self.assertEqual(flt(row["opening_debit"] - row["opening_credit"], 2), flt(opening, 2))
+			self.assertEqual(flt(row["debit"], 2), flt(debit, 2))
+			self.assertEqual(flt(row["credit"], 2), flt(credit, 2))
@@ -4,7 +4,8 @@
 
 import frappe
 from frappe import _
-from frappe.query_builder.functions import Sum
+from frappe.query_builder import Case
+from frappe.query_builder.functions import IfNull, Sum
 from frappe.utils import add_days, cstr, flt, formatdate, getdate
 
 import erpnext
@@ -13,9 +14,9 @@ from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_dimension_with_children,
 )
 from erpnext.accounts.report.financial_statements import (
+	apply_additional_conditions,
 	filter_accounts,
 	filter_out_zero_value_rows,
-	set_gl_entries_by_account,
 )
 from erpnext.accounts.report.utils import convert_to_presentation_currency, get_currency
 
@@ -94,32 +95,9 @@ def get_data(filters):
 
 	accounts, accounts_by_name, parent_children_map = filter_accounts(accounts)
 
-	min_lft, max_rgt = frappe.db.sql(
-		"""select min(lft), max(rgt) from `tabAccount`
-		where company=%s""",
-		(filters.company,),
-	)[0]
+	opening_balances, balances_within_period = get_balances(filters)
 
-	gl_entries_by_account = {}
-
-	opening_balances = get_opening_balances(filters)
-
-	# add filter inside list so that the query in financial_statements.py doesn't break
-	if filters.project:
-		filters.project = [filters.project]
-
-	set_gl_entries_by_account(
-		filters.company,
-		filters.from_date,
-		filters.to_date,
-		min_lft,
-		max_rgt,
-		filters,
-		gl_entries_by_account,
-		ignore_closing_entries=not flt(filters.with_period_closing_entry),
-	)
-
-	calculate_values(accounts, gl_entries_by_account, opening_balances)
+	calculate_values(accounts, balances_within_period, opening_balances)
 	accumulate_values_into_parents(accounts, accounts_by_name)
 
 	data = prepare_data(accounts, filters, parent_children_map, company_currency)
@@ -130,16 +108,15 @@ def get_data(filters):
 	return data
 
 
-def get_opening_balances(filters):
-	balance_sheet_opening = get_rootwise_opening_balances(filters, "Balance Sheet")
-	pl_opening = get_rootwise_opening_balances(filters, "Profit and Loss")
-
-	balance_sheet_opening.update(pl_opening)
-	return balance_sheet_opening
+def get_balances(filters):
+	"""
+	Returns opening balances and balances within the period by account.
 
-
-def get_rootwise_opening_balances(filters, report_type):
-	gle = []
+	Openings are taken from the Account Closing Balance of the last Period Closing Voucher before
+	the from date. GL Entries after it, upto the to date, are summed by one grouped query into
+	opening and within period totals.
+	"""
+	accounting_dimensions = get_accounting_dimensions(as_list=False)
 
 	last_period_closing_voucher = frappe.db.get_all(
 		"Period Closing Voucher",
@@ -149,28 +126,24 @@ def get_rootwise_opening_balances(filters, report_type):
 		limit=1,
 	)
 
-	accounting_dimensions = get_accounting_dimensions(as_list=False)
-
+	opening_entries = []
+	start_date = None
 	if last_period_closing_voucher:
-		gle = get_opening_balance(
-			"Account Closing Balance",
-			filters,
-			report_type,
-			accounting_dimensions,
-			period_closing_voucher=last_period_closing_voucher[0].name,
+		opening_entries = get_closing_balance_openings(
+			filters, accounting_dimensions, last_period_closing_voucher[0].name
 		)
-		if getdate(last_period_closing_voucher[0].posting_date) < getdate(
-			add_days(filters.from_date, -1)
-		):
-			start_date = add_days(last_period_closing_voucher[0].posting_date, 1)
-			gle += get_opening_balance(
-				"GL Entry", filters, report_type, accounting_dimensions, start_date=start_date
-			)
-	else:
-		gle = get_opening_balance("GL Entry", filters, report_type, accounting_dimensions)
+		start_date = add_days(last_period_closing_voucher[0].posting_date, 1)
+
+	gl_entries = get_gl_entry_balances(filters, start_date)
+	opening_entries += [d for d in gl_entries if d.balance_type == "Opening"]
+	entries_within_period = [d for d in gl_entries if d.balance_type != "Opening"]
+
+	if filters.get("presentation_currency"):
+		convert_to_presentation_currency(opening_entries, get_currency(filters))
+		convert_to_presentation_currency(entries_within_period, get_currency(filters))
 
 	opening = frappe._dict()
-	for d in gle:
+	for d in opening_entries:
 		opening.setdefault(
 			d.account,
 			{
@@ -182,13 +155,77 @@ def get_rootwise_opening_balances(filters, report_type):
 		opening[d.account]["opening_debit"] += flt(d.debit)
 		opening[d.account]["opening_credit"] += flt(d.credit)
 
-	return opening
+	balances_within_period = frappe._dict()
+	for d in entries_within_period:
+		balances_within_period.setdefault(d.account, {"debit": 0.0, "credit": 0.0})
+		balances_within_period[d.account]["debit"] += flt(d.debit)
+		balances_within_period[d.account]["credit"] += flt(d.credit)
+
+	return opening, balances_within_period
 
 
-def get_opening_balance(
-	doctype, filters, report_type, accounting_dimensions, period_closing_voucher=None, start_date=None
-):
-	closing_balance = frappe.qb.DocType(doctype)
+def get_gl_entry_balances(filters, start_date=None):
+	"""GL Entries from `start_date` upto the to date summed by account, as opening or within the
+	period. Profit and Loss entries before the fiscal year are left out of the openings, unless
+	`show_unclosed_fy_pl_balances` is set, and opening entries of the period are left out."""
+	gle = frappe.qb.DocType("GL Entry")
+	account = frappe.qb.DocType("Account")
+
+	opening_condition = gle.posting_date < filters.from_date
+	if start_date:
+		opening_condition &= gle.is_opening == "No"
+
+	if not filters.show_unclosed_fy_pl_balances:
+		opening_condition &= (account.report_type == "Balance Sheet") | (
+			(account.report_type == "Profit and Loss") & (gle.posting_date >= filters.year_start_date)
+		)
+	else:
+		opening_condition &= account.report_type.isin(["Balance Sheet", "Profit and Loss"])
+
+	period_condition = (gle.posting_date >= filters.from_date) & (
+		IfNull(gle.is_opening, "No") != "Yes"
+	)
+
+	balance_type = Case().when(period_condition, "Period").else_("Opening")
+
+	query = (
+		frappe.qb.from_(gle)
+		.inner_join(account)
+		.on(account.name == gle.account)
+		.select(
+			gle.account,
+			gle.account_currency,
+			balance_type.as_("balance_type"),
+			Sum(gle.debit).as_("debit"),
+			Sum(gle.credit).as_("credit"),
+			Sum(gle.debit_in_account_currency).as_("debit_in_account_currency"),
+			Sum(gle.credit_in_account_currency).as_("credit_in_account_currency"),
+		)
+		.where(
+			(gle.company == filters.company)
+			& (gle.is_cancelled == 0)
+			& (gle.posting_date <= filters.to_date)
+			& (opening_condition | period_condition)
+		)
+		.groupby(gle.account, gle.account_currency, balance_type)
+	)
+
+	if start_date:
+		query = query.where(gle.posting_date >= start_date)
+
+	# add filter inside list so that the query in financial_statements.py doesn't break
+	if filters.project:
+		filters.project = [filters.project]
+
+	query = apply_additional_conditions(
+		"GL Entry", query, None, not flt(filters.with_period_closing_entry), filters
+	)
+
+	return query.run(as_dict=True)
+
+
+def get_closing_balance_openings(filters, accounting_dimensions, period_closing_voucher):
+	closing_balance = frappe.qb.DocType("Account Closing Balance")
 	account = frappe.qb.DocType("Account")
 
 	opening_balance = (
@@ -203,39 +240,20 @@ def get_opening_balance(
 		)
 		.where(
 			(closing_balance.company == filters.company)
+			& (closing_balance.period_closing_voucher == period_closing_voucher)
 			& (
 				closing_balance.account.isin(
-					frappe.qb.from_(account).select("name").where(account.report_type == report_type)
+					frappe.qb.from_(account)
+					.select("name")
+					.where(account.report_type.isin(["Balance Sheet", "Profit and Loss"]))
 				)
 			)
 		)
 		.groupby(closing_balance.account)
 	)
 
-	if period_closing_voucher:
-		opening_balance = opening_balance.where(
-			closing_balance.period_closing_voucher == period_closing_voucher
-		)
-	else:
-		if start_date:
-			opening_balance = opening_balance.where(closing_balance.posting_date >= start_date)
-			opening_balance = opening_balance.where(closing_balance.is_opening == "No")
-		opening_balance = opening_balance.where(closing_balance.posting_date < filters.from_date)
-
-	if (
-		not filters.show_unclosed_fy_pl_balances
-		and report_type == "Profit and Loss"
-		and doctype == "GL Entry"
-	):
-		opening_balance = opening_balance.where(closing_balance.posting_date >= filters.year_start_date)
-
 	if not flt(filters.with_period_closing_entry):
-		if doctype == "Account Closing Balance":
-			opening_balance = opening_balance.where(closing_balance.is_period_closing_voucher_entry == 0)
-		else:
-			opening_balance = opening_balance.where(
-				closing_balance.voucher_type != "Period Closing Voucher"
-			)
+		opening_balance = opening_balance.where(closing_balance.is_period_closing_voucher_entry == 0)
 
 	if filters.cost_center:
 		lft, rgt = frappe.db.get_value("Cost Center", filters.cost_center, ["lft", "rgt"])
@@ -284,15 +302,10 @@ def get_opening_balance(
 						closing_balance[dimension.fieldname].isin(filters[dimension.fieldname])
 					)
 
-	gle = opening_balance.run(as_dict=1)
-
-	if filters and filters.get("presentation_currency"):
-		convert_to_presentation_currency(gle, get_currency(filters))
-
-	return gle
+	return opening_balance.run(as_dict=1)
 
 
-def calculate_values(accounts, gl_entries_by_account, opening_balances):
+def calculate_values(accounts, balances_within_period, opening_balances):
 	init = {
 		"opening_debit": 0.0,
 		"opening_credit": 0.0,
@@ -309,10 +322,8 @@ def calculate_values(accounts, gl_entries_by_account, opening_balances):
 		d["opening_debit"] = opening_balances.get(d.name, {}).get("opening_debit", 0)
 		d["opening_credit"] = opening_balances.get(d.name, {}).get("opening_credit", 0)
 
-		for entry in gl_entries_by_account.get(d.name, []):
-			if cstr(entry.is_opening) != "Yes":
-				d["debit"] += flt(entry.debit)
-				d["credit"] += flt(entry.credit)
+		d["debit"] = balances_within_period.get(d.name, {}).get("debit", 0.0)
+		d["credit"] = balances_within_period.get(d.name, {}).get("credit", 0.0)
 
 		d["closing_debit"] = d["opening_debit"] + d["debit"]
 		d["closing_credit"] = d["opening_credit"] + d["credit"]
@@ -36,8 +36,7 @@ def get_data(filters, show_party_name):
 		order_by="name",
 	)
 	company_currency = frappe.get_cached_value("Company", filters.company, "default_currency")
-	opening_balances = get_opening_balances(filters)
-	balances_within_period = get_balances_within_period(filters)
+	opening_balances, balances_within_period = get_balances(filters)
 
 	data = []
 	# total_debit, total_credit = 0, 0
@@ -91,21 +90,29 @@ def get_data(filters, show_party_name):
 	return data
 
 
-def get_opening_balances(filters):
-
+def get_balances(filters):
+	"""Returns opening balances and balances within the period by party, summed by one query"""
 	account_filter = ""
 	if filters.get("account"):
 		account_filter = "and account = %s" % (frappe.db.escape(filters.get("account")))
 
 	gle = frappe.db.sql(
 		"""
-		select party, sum(debit) as opening_debit, sum(credit) as opening_credit
-		from `tabGL Entry`
-		where company=%(company)s
-			and is_cancelled=0
-			and ifnull(party_type, '') = %(party_type)s and ifnull(party, '') != ''
-			and (posting_date < %(from_date)s or (ifnull(is_opening, 'No') = 'Yes' and posting_date <= %(to_date)s))
-			{account_filter}
+		select party,
+			sum(case when is_opening_balance then debit else 0 end) as opening_debit,
+			sum(case when is_opening_balance then credit else 0 end) as opening_credit,
+			sum(case when is_opening_balance then 0 else debit end) as debit,
+			sum(case when is_opening_balance then 0 else credit end) as credit
+		from (
+			select party, debit, credit,
+				(posting_date < %(from_date)s or ifnull(is_opening, 'No') = 'Yes') as is_opening_balance
+			from `tabGL Entry`
+			where company=%(company)s
+				and is_cancelled=0
+				and ifnull(party_type, '') = %(party_type)s and ifnull(party, '') != ''
+				and posting_date <= %(to_date)s
+				{account_filter}
+		) gle
 		group by party""".format(
 			account_filter=account_filter
 		),
@@ -119,46 +126,13 @@ def get_opening_balances(filters):
 	)
 
 	opening = frappe._dict()
+	balances_within_period = frappe._dict()
 	for d in gle:
 		opening_debit, opening_credit = toggle_debit_credit(d.opening_debit, d.opening_credit)
 		opening.setdefault(d.party, [opening_debit, opening_credit])
+		balances_within_period.setdefault(d.party, [flt(d.debit), flt(d.credit)])
 
-	return opening
-
-
-def get_balances_within_period(filters):
-
-	account_filter = ""
-	if filters.get("account"):
-		account_filter = "and account = %s" % (frappe.db.escape(filters.get("account")))
-
-	gle = frappe.db.sql(
-		"""
-		select party, sum(debit) as debit, sum(credit) as credit
-		from `tabGL Entry`
-		where company=%(company)s
-			and is_cancelled = 0
-			and ifnull(party_type, '') = %(party_type)s and ifnull(party, '') != ''
-			and posting_date >= %(from_date)s and posting_date <= %(to_date)s
-			and ifnull(is_opening, 'No') = 'No'
-			{account_filter}
-		group by party""".format(
-			account_filter=account_filter
-		),
-		{
-			"company": filters.company,
-			"from_date": filters.from_date,
-			"to_date": filters.to_date,
-			"party_type": filters.party_type,
-		},
-		as_dict=True,
-	)
-
-	balances_within_period = frappe._dict()
-	for d in gle:
-		balances_within_period.setdefault(d.party, [d.debit, d.credit])
-
-	return balances_within_period
+	return opening, balances_within_period
 
 
 def toggle_debit_credit(debit, credit):
@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_months, get_first_day, get_last_day, nowdate
+
+from erpnext.accounts.doctype.journal_entry.test_journal_entry import make_journal_entry
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.accounts.report import financial_statements
+from erpnext.accounts.report.balance_sheet.balance_sheet import execute as balance_sheet
+from erpnext.accounts.report.profit_and_loss_statement.profit_and_loss_statement import (
+	execute as profit_and_loss_statement,
+)
+
+set_gl_entries_by_account = financial_statements.set_gl_entries_by_account
+
+
+def set_gl_entries_row_wise(*args, **kwargs):
+	"""Loads every GL Entry, like before period wise totals"""
+	kwargs.pop("period_list", None)
+	return set_gl_entries_by_account(*args, **kwargs)
+
+
+class TestFinancialStatements(FrappeTestCase):
+	def setUp(self):
+		month_start = get_first_day(nowdate())
+		for months in range(-14, 1):
+			posting_date = add_days(add_months(month_start, months), abs(months) % 27)
+			make_journal_entry(
+				"_Test Bank - _TC", "Sales - _TC", 100.33 + months, posting_date=posting_date, submit=True
+			)
+			create_sales_invoice(posting_date=posting_date, rate=250.17, qty=abs(months) + 1)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_filters(self, **kwargs):
+		return frappe._dict(
+			company="_Test Company",
+			filter_based_on="Date Range",
+			period_start_date=get_first_day(add_months(nowdate(), -12)),
+			period_end_date=get_last_day(nowdate()),
+			periodicity="Monthly",
+			**kwargs
+		)
+
+	def assert_same_report(self, execute, filters):
+		result = execute(frappe._dict(filters))
+		with patch.object(
+			financial_statements, "set_gl_entries_by_account", side_effect=set_gl_entries_row_wise
+		):
+			expected = execute(frappe._dict(filters))
+
+		self.assertEqual(result[1], expected[1])
+
+	def test_period_wise_totals(self):
+		for accumulated_values in (0, 1):
+			filters = self.get_filters(accumulated_values=accumulated_values)
+			self.assert_same_report(balance_sheet, filters)
+			self.assert_same_report(profit_and_loss_statement, filters)
+
+		filters = self.get_filters(accumulated_values=1, cost_center=["_Test Cost Center - _TC"])
+		self.assert_same_report(profit_and_loss_statement, filters)
+
+		filters = self.get_filters(accumulated_values=1, periodicity="Quarterly")
+		self.assert_same_report(balance_sheet, filters)
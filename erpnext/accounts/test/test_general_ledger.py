@@ -0,0 +1,65 @@
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from erpnext.accounts.general_ledger import check_if_in_list, merge_similar_entries
+
+DIMENSIONS = ["dimension_{0}".format(idx) for idx in range(6)]
+
+
+def merge_by_scanning(gl_map, dimensions):
+	"""Previous list scanning implementation of `merge_similar_entries`"""
+	merged_gl_map = []
+	for entry in gl_map:
+		same_head = check_if_in_list(entry, merged_gl_map, dimensions)
+		if same_head:
+			same_head.debit = flt(same_head.debit) + flt(entry.debit)
+			same_head.debit_in_account_currency = flt(same_head.debit_in_account_currency) + flt(
+				entry.debit_in_account_currency
+			)
+			same_head.credit = flt(same_head.credit) + flt(entry.credit)
+			same_head.credit_in_account_currency = flt(same_head.credit_in_account_currency) + flt(
+				entry.credit_in_account_currency
+			)
+		else:
+			merged_gl_map.append(entry)
+
+	return [d for d in merged_gl_map if flt(d.debit, 2) != 0 or flt(d.credit, 2) != 0]
+
+
+class TestMergeSimilarEntries(FrappeTestCase):
+	ROWS = 5000
+
+	def make_gl_map(self):
+		gl_map = []
+		for idx in range(self.ROWS):
+			entry = frappe._dict(
+				company="_Test Company",
+				account="_Test Account {0} - _TC".format(idx % 10),
+				cost_center="_Test Cost Center - _TC",
+				party_type="Customer" if idx % 10 == 0 else None,
+				party="_Test Customer" if idx % 10 == 0 else None,
+				voucher_type="Sales Invoice",
+				voucher_no="SINV-0001",
+				debit=flt(idx % 7 * 1.1, 2),
+				credit=flt(idx % 5 * 0.3, 2),
+				debit_in_account_currency=flt(idx % 7 * 1.1, 2),
+				credit_in_account_currency=flt(idx % 5 * 0.3, 2),
+			)
+			for dimension_idx, dimension in enumerate(DIMENSIONS):
+				entry[dimension] = "D{0}".format(idx % (dimension_idx + 2)) if idx % 3 else None
+			gl_map.append(entry)
+
+		return gl_map
+
+	def test_keyed_merge_matches_list_scan(self):
+		expected = merge_by_scanning(self.make_gl_map(), DIMENSIONS)
+
+		with patch(
+			"erpnext.accounts.general_ledger.get_accounting_dimensions", return_value=DIMENSIONS
+		):
+			merged = merge_similar_entries(self.make_gl_map(), precision=2)
+
+		self.assertEqual(merged, expected)
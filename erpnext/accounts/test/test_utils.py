@@ -5,7 +5,9 @@ from frappe.test_runner import make_test_objects
 
 from erpnext.accounts.party import get_party_shipping_address
 from erpnext.accounts.utils import (
+	compare_existing_and_expected_gle,
 	get_future_stock_vouchers,
+	get_vouchers_for_gl_reposting,
 	get_voucherwise_gl_entries,
 	sort_stock_vouchers_by_posting_date,
 )
@@ -73,6 +75,53 @@ class TestUtils(unittest.TestCase):
 		sorted_vouchers = sort_stock_vouchers_by_posting_date(list(reversed(vouchers)))
 		self.assertEqual(sorted_vouchers, vouchers)
 
+	def test_compare_merged_gl_entries(self):
+		def gle(account, debit=0, credit=0):
+			return frappe._dict(
+				account=account, cost_center="Main - _TC", project=None, debit=debit, credit=credit
+			)
+
+		expected_gle = [
+			gle("Stock In Hand - _TC", debit=60),
+			gle("Stock In Hand - _TC", debit=40),
+			gle("Stock Adjustment - _TC", credit=100),
+		]
+		existing_gle = [gle("Stock Adjustment - _TC", credit=100), gle("Stock In Hand - _TC", debit=100)]
+		self.assertTrue(compare_existing_and_expected_gle(existing_gle, expected_gle, 2))
+
+		existing_gle[1].debit = 90
+		self.assertFalse(compare_existing_and_expected_gle(existing_gle, expected_gle, 2))
+
+		existing_gle[1].debit = 100
+		existing_gle[1].cost_center = "_Test Cost Center - _TC"
+		self.assertFalse(compare_existing_and_expected_gle(existing_gle, expected_gle, 2))
+
+	def test_vouchers_for_gl_reposting(self):
+		pr = make_purchase_receipt(
+			product_code="_Test Product",
+			rate=100,
+			qty=2,
+			warehouse="Stores - TCP1",
+			company="_Test Company with perpetual inventory",
+		)
+		se = make_stock_entry(
+			product_code="_Test Product",
+			from_warehouse="Stores - TCP1",
+			qty=1,
+			company="_Test Company with perpetual inventory",
+		)
+
+		vouchers = get_vouchers_for_gl_reposting([(pr.doctype, pr.name), (se.doctype, se.name)])
+		for doc in (pr, se):
+			preloaded = vouchers[(doc.doctype, doc.name)]
+			self.assertEqual(len(preloaded.products), len(doc.products))
+
+			expected_gle = frappe.get_doc(doc.doctype, doc.name).get_gl_entries()
+			self.assertEqual(
+				[(d.account, d.debit, d.credit) for d in preloaded.get_gl_entries()],
+				[(d.account, d.debit, d.credit) for d in expected_gle],
+			)
+
 
 ADDRESS_RECORDS = [
 	{
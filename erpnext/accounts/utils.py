@@ -9,6 +9,7 @@ import frappe
 import frappe.defaults
 from frappe import _, qb, throw
 from frappe.model.meta import get_field_precision
+from frappe.model.naming import set_new_name
 from frappe.query_builder import AliasedQuery, Criterion, Table
 from frappe.query_builder.functions import Sum
 from frappe.query_builder.utils import DocType
@@ -30,9 +31,17 @@ import erpnext
 
 # imported to enable erpnext.accounts.utils.get_account_currency
 from erpnext.accounts.doctype.account.account import get_account_currency  # noqa
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	get_balance_snapshot_period,
+	invalidate_balance_snapshots_of_vouchers,
+)
+from erpnext.accounts.doctype.voucher_outstanding.voucher_outstanding import (
+	get_active_entries,
+	update_voucher_outstandings,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import get_dimensions
 from erpnext.stock import get_warehouse_account_map
-from erpnext.stock.utils import get_stock_value_on
+from erpnext.stock.utils import get_combine_datetime, get_stock_value_on
 
 if TYPE_CHECKING:
 	from erpnext.stock.doctype.repost_product_valuation.repost_product_valuation import RepostProductValuation
@@ -191,9 +200,11 @@ def get_balance_on(
 	if not cost_center and frappe.form_dict.get("cost_center"):
 		cost_center = frappe.form_dict.get("cost_center")
 
-	cond = ["is_cancelled=0"]
+	# conditions applied to both GL Entries and Account Balance Snapshots
+	cond = []
+	ledger_cond = ["is_cancelled=0"]
 	if date:
-		cond.append("posting_date <= %s" % frappe.db.escape(cstr(date)))
+		ledger_cond.append("posting_date <= %s" % frappe.db.escape(cstr(date)))
 	else:
 		# get balance of all entries that exist
 		date = nowdate()
@@ -268,14 +279,39 @@ def get_balance_on(
 			select_field = "sum(debit_in_account_currency) - sum(credit_in_account_currency)"
 		else:
 			select_field = "sum(debit) - sum(credit)"
-		bal = frappe.db.sql(
-			"""
-			SELECT {0}
-			FROM `tabGL Entry` gle
-			WHERE {1}""".format(
-				select_field, " and ".join(cond)
+
+		snapshot_period = get_balance_snapshot_period(company or (account and acc.company), date)
+		if snapshot_period:
+			# totals of complete months from snapshots, remaining entries from the ledger
+			ledger_cond.append(
+				"(posting_date < %s or posting_date > %s)"
+				% (frappe.db.escape(cstr(snapshot_period[0])), frappe.db.escape(cstr(snapshot_period[1])))
 			)
-		)[0][0]
+			bal = frappe.db.sql(
+				"""
+				SELECT sum(balance) FROM (
+					SELECT {0} as balance
+					FROM `tabAccount Balance Snapshot` gle
+					WHERE {1}
+					UNION ALL
+					SELECT {0} as balance
+					FROM `tabGL Entry` gle
+					WHERE {2}
+				) balances""".format(
+					select_field,
+					" and ".join(cond + ["period_end <= %s" % frappe.db.escape(cstr(snapshot_period[1]))]),
+					" and ".join(ledger_cond + cond),
+				)
+			)[0][0]
+		else:
+			bal = frappe.db.sql(
+				"""
+				SELECT {0}
+				FROM `tabGL Entry` gle
+				WHERE {1}""".format(
+					select_field, " and ".join(ledger_cond + cond)
+				)
+			)[0][0]
 
 		# if bal is None, return 0
 		return flt(bal)
@@ -672,15 +708,26 @@ def unlink_ref_doc_from_payment_entries(ref_doc):
 	)
 
 	ple = qb.DocType("Payment Ledger Entry")
+	unlinked_filter = (
+		(ple.against_voucher_type == ref_doc.doctype)
+		& (ple.against_voucher_no == ref_doc.name)
+		& (ple.delinked == 0)
+	)
+
+	# unlinked entries become outstanding of their own vouchers
+	unlinked_entries = get_active_entries(unlinked_filter)
+	update_voucher_outstandings(unlinked_entries, sign=-1)
 
 	qb.update(ple).set(ple.against_voucher_type, ple.voucher_type).set(
 		ple.against_voucher_no, ple.voucher_no
 	).set(ple.modified, now()).set(ple.modified_by, frappe.session.user).where(
-		(ple.against_voucher_type == ref_doc.doctype)
-		& (ple.against_voucher_no == ref_doc.name)
-		& (ple.delinked == 0)
+		unlinked_filter
 	).run()
 
+	for entry in unlinked_entries:
+		entry.against_voucher_type, entry.against_voucher_no = entry.voucher_type, entry.voucher_no
+	update_voucher_outstandings(unlinked_entries)
+
 	if ref_doc.doctype in ("Sales Invoice", "Purchase Invoice"):
 		ref_doc.set("advances", [])
 
@@ -781,6 +828,7 @@ def fix_total_debit_credit():
 	for d in vouchers:
 		if abs(d.diff) > 0:
 			dr_or_cr = d.voucher_type == "Sales Invoice" and "credit" or "debit"
+			invalidate_balance_snapshots_of_vouchers(d.voucher_type, [d.voucher_no])
 
 			frappe.db.sql(
 				"""update `tabGL Entry` set %s = %s + %s
@@ -1164,10 +1212,15 @@ def repost_gle_for_stock_vouchers(
 
 	for stock_vouchers_chunk in create_batch(stock_vouchers, GL_REPOSTING_CHUNK):
 		gle = get_voucherwise_gl_entries(stock_vouchers_chunk, posting_date)
+		vouchers = get_vouchers_for_gl_reposting(stock_vouchers_chunk)
 
+		vouchers_to_delete = []
+		vouchers_to_repost = []
 		for voucher_type, voucher_no in stock_vouchers_chunk:
 			existing_gle = gle.get((voucher_type, voucher_no), [])
-			voucher_obj = frappe.get_doc(voucher_type, voucher_no)
+			voucher_obj = vouchers.get((voucher_type, voucher_no)) or frappe.get_doc(
+				voucher_type, voucher_no
+			)
 			# Some transactions post credit as negative debit, this is handled while posting GLE
 			# but while comparing we need to make sure it's flipped so comparisons are accurate
 			expected_gle = toggle_debit_credit_if_negative(voucher_obj.get_gl_entries(warehouse_account))
@@ -1175,10 +1228,14 @@ def repost_gle_for_stock_vouchers(
 				if not existing_gle or not compare_existing_and_expected_gle(
 					existing_gle, expected_gle, precision
 				):
-					_delete_accounting_ledger_entries(voucher_type, voucher_no)
-					voucher_obj.make_gl_entries(gl_entries=expected_gle, from_repost=True)
+					vouchers_to_delete.append((voucher_type, voucher_no))
+					vouchers_to_repost.append((voucher_obj, expected_gle))
 			else:
-				_delete_accounting_ledger_entries(voucher_type, voucher_no)
+				vouchers_to_delete.append((voucher_type, voucher_no))
+
+		_delete_accounting_ledger_entries_of_vouchers(vouchers_to_delete)
+		for voucher_obj, expected_gle in vouchers_to_repost:
+			voucher_obj.make_gl_entries(gl_entries=expected_gle, from_repost=True)
 
 		if not frappe.flags.in_test:
 			frappe.db.commit()
@@ -1192,12 +1249,15 @@ def repost_gle_for_stock_vouchers(
 
 def _delete_pl_entries(voucher_type, voucher_no):
 	ple = qb.DocType("Payment Ledger Entry")
-	qb.from_(ple).delete().where(
-		(ple.voucher_type == voucher_type) & (ple.voucher_no == voucher_no)
-	).run()
+	voucher_filter = (ple.voucher_type == voucher_type) & (ple.voucher_no == voucher_no)
+
+	update_voucher_outstandings(get_active_entries(voucher_filter), sign=-1)
+	qb.from_(ple).delete().where(voucher_filter).run()
 
 
 def _delete_gl_entries(voucher_type, voucher_no):
+	invalidate_balance_snapshots_of_vouchers(voucher_type, [voucher_no])
+
 	gle = qb.DocType("GL Entry")
 	qb.from_(gle).delete().where(
 		(gle.voucher_type == voucher_type) & (gle.voucher_no == voucher_no)
@@ -1212,6 +1272,78 @@ def _delete_accounting_ledger_entries(voucher_type, voucher_no):
 	_delete_pl_entries(voucher_type, voucher_no)
 
 
+def _delete_accounting_ledger_entries_of_vouchers(vouchers):
+	"""
+	Remove entries from both General and Payment Ledger for specified Vouchers,
+	with one statement per voucher type and ledger
+	"""
+	voucher_nos_by_type = {}
+	for voucher_type, voucher_no in vouchers:
+		voucher_nos_by_type.setdefault(voucher_type, []).append(voucher_no)
+
+	gle = qb.DocType("GL Entry")
+	ple = qb.DocType("Payment Ledger Entry")
+	for voucher_type, voucher_nos in voucher_nos_by_type.items():
+		invalidate_balance_snapshots_of_vouchers(voucher_type, voucher_nos)
+		update_voucher_outstandings(
+			get_active_entries((ple.voucher_type == voucher_type) & (ple.voucher_no.isin(voucher_nos))),
+			sign=-1,
+		)
+		for ledger in (gle, ple):
+			qb.from_(ledger).delete().where(
+				(ledger.voucher_type == voucher_type) & (ledger.voucher_no.isin(voucher_nos))
+			).run()
+
+
+def get_vouchers_for_gl_reposting(stock_vouchers):
+	"""Load voucher documents with one query per voucher type and child table.
+
+	Stock ledger entries of all vouchers are fetched together and set on the documents,
+	so that `get_gl_entries` does not query them again for every voucher.
+
+	returns:
+	        Dict[Tuple[voucher_type, voucher_no], Document]
+	"""
+	from erpnext.controllers.stock_controller import get_voucherwise_stock_ledger_details
+
+	voucher_nos_by_type = {}
+	for voucher_type, voucher_no in stock_vouchers:
+		voucher_nos_by_type.setdefault(voucher_type, []).append(voucher_no)
+
+	vouchers = {}
+	for voucher_type, voucher_nos in voucher_nos_by_type.items():
+		table_fields = frappe.get_meta(voucher_type).get_table_fields()
+
+		child_rows = {}
+		for df in table_fields:
+			for row in frappe.get_all(
+				df.options,
+				filters={
+					"parent": ("in", voucher_nos),
+					"parenttype": voucher_type,
+					"parentfield": df.fieldname,
+				},
+				fields=["*"],
+				order_by="idx asc",
+			):
+				child_rows.setdefault((row.parent, df.fieldname), []).append(row)
+
+		for voucher in frappe.get_all(
+			voucher_type, filters={"name": ("in", voucher_nos)}, fields=["*"]
+		):
+			voucher.doctype = voucher_type
+			for df in table_fields:
+				voucher[df.fieldname] = child_rows.get((voucher.name, df.fieldname), [])
+
+			vouchers[(voucher_type, voucher.name)] = frappe.get_doc(voucher)
+
+	for voucher, stock_ledger_details in get_voucherwise_stock_ledger_details(stock_vouchers).items():
+		if voucher in vouchers:
+			vouchers[voucher].flags.stock_ledger_details = stock_ledger_details
+
+	return vouchers
+
+
 def sort_stock_vouchers_by_posting_date(
 	stock_vouchers: List[Tuple[str, str]]
 ) -> List[Tuple[str, str]]:
@@ -1258,13 +1390,13 @@ def get_future_stock_vouchers(
 		"""select distinct sle.voucher_type, sle.voucher_no
 		from `tabStock Ledger Entry` sle
 		where
-			timestamp(sle.posting_date, sle.posting_time) >= timestamp(%s, %s)
+			sle.posting_datetime >= %s
 			and is_cancelled = 0
 			{condition}
-		order by timestamp(sle.posting_date, sle.posting_time) asc, creation asc for update""".format(
+		order by sle.posting_datetime asc, creation asc for update""".format(
 			condition=condition
 		),
-		tuple([posting_date, posting_time] + values),
+		tuple([get_combine_datetime(posting_date, posting_time)] + values),
 		as_dict=True,
 	)
 
@@ -1304,29 +1436,22 @@ def get_voucherwise_gl_entries(future_stock_vouchers, posting_date):
 
 
 def compare_existing_and_expected_gle(existing_gle, expected_gle, precision):
-	if len(existing_gle) != len(expected_gle):
-		return False
+	"""Compare GL entries by their debit and credit totals per (account, cost center, project).
 
-	matched = True
-	for entry in expected_gle:
-		account_existed = False
-		for e in existing_gle:
-			if entry.account == e.account:
-				account_existed = True
-			if (
-				entry.account == e.account
-				and (not entry.cost_center or not e.cost_center or entry.cost_center == e.cost_center)
-				and (
-					flt(entry.debit, precision) != flt(e.debit, precision)
-					or flt(entry.credit, precision) != flt(e.credit, precision)
-				)
-			):
-				matched = False
-				break
-		if not account_existed:
-			matched = False
-			break
-	return matched
+	Totals are insensitive to how the entries were merged while posting."""
+	return get_gle_totals(existing_gle, precision) == get_gle_totals(expected_gle, precision)
+
+
+def get_gle_totals(gl_entries, precision):
+	totals = {}
+	for entry in gl_entries:
+		key = (entry.account, entry.cost_center or "", entry.project or "")
+		debit, credit = totals.get(key, (0.0, 0.0))
+		totals[key] = (debit + flt(entry.debit), credit + flt(entry.credit))
+
+	return {
+		key: (flt(debit, precision), flt(credit, precision)) for key, (debit, credit) in totals.items()
+	}
 
 
 def get_stock_accounts(company, voucher_type=None, voucher_no=None):
@@ -1525,9 +1650,14 @@ def get_payment_ledger_entries(gl_entries, cancel=0):
 def create_payment_ledger_entry(
 	gl_entries, cancel=0, adv_adj=0, update_outstanding="Yes", from_repost=0
 ):
+	from erpnext.accounts.doctype.payment_ledger_entry.payment_ledger_entry import (
+		insert_payment_ledger_entries,
+	)
+
 	if gl_entries:
 		ple_map = get_payment_ledger_entries(gl_entries, cancel=cancel)
 
+		pl_entries = []
 		for entry in ple_map:
 
 			ple = frappe.get_doc(entry)
@@ -1539,7 +1669,34 @@ def create_payment_ledger_entry(
 			ple.flags.adv_adj = adv_adj
 			ple.flags.from_repost = from_repost
 			ple.flags.update_outstanding = update_outstanding
-			ple.submit()
+			pl_entries.append(ple)
+
+		insert_payment_ledger_entries(pl_entries)
+
+
+def insert_docs_in_bulk(docs):
+	"""
+	Insert new submitted documents of a doctype with a single multi-row insert.
+	Documents should be validated by the caller, controller methods and hooks are not run.
+	"""
+	if not docs:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+
+	rows = []
+	for doc in docs:
+		set_new_name(doc)
+		doc.docstatus = 1
+		doc.owner = doc.modified_by = user
+		doc.creation = doc.modified = timestamp
+		rows.append(doc.get_valid_dict(convert_dates_to_str=True))
+
+	fields = list(rows[0])
+	frappe.db.bulk_insert(
+		docs[0].doctype, fields, [[row.get(field) for field in fields] for row in rows]
+	)
 
 
 def update_voucher_outstanding(voucher_type, voucher_no, account, party_type, party):
@@ -1583,26 +1740,41 @@ def update_voucher_outstanding(voucher_type, voucher_no, account, party_type, pa
 def delink_original_entry(pl_entry):
 	if pl_entry:
 		ple = qb.DocType("Payment Ledger Entry")
+		original_filter = (
+			(ple.company == pl_entry.company)
+			& (ple.account_type == pl_entry.account_type)
+			& (ple.account == pl_entry.account)
+			& (ple.party_type == pl_entry.party_type)
+			& (ple.party == pl_entry.party)
+			& (ple.voucher_type == pl_entry.voucher_type)
+			& (ple.voucher_no == pl_entry.voucher_no)
+			& (ple.against_voucher_type == pl_entry.against_voucher_type)
+			& (ple.against_voucher_no == pl_entry.against_voucher_no)
+		)
+
+		update_voucher_outstandings(get_active_entries(original_filter), sign=-1)
+
 		query = (
 			qb.update(ple)
 			.set(ple.delinked, True)
 			.set(ple.modified, now())
 			.set(ple.modified_by, frappe.session.user)
-			.where(
-				(ple.company == pl_entry.company)
-				& (ple.account_type == pl_entry.account_type)
-				& (ple.account == pl_entry.account)
-				& (ple.party_type == pl_entry.party_type)
-				& (ple.party == pl_entry.party)
-				& (ple.voucher_type == pl_entry.voucher_type)
-				& (ple.voucher_no == pl_entry.voucher_no)
-				& (ple.against_voucher_type == pl_entry.against_voucher_type)
-				& (ple.against_voucher_no == pl_entry.against_voucher_no)
-			)
+			.where(original_filter)
 		)
 		query.run()
 
 
+# fields of Payment Ledger Entry that Voucher Outstanding has with the same meaning
+VOUCHER_OUTSTANDING_FILTER_FIELDS = (
+	"company",
+	"account",
+	"account_type",
+	"party_type",
+	"party",
+	"account_currency",
+)
+
+
 class QueryPaymentLedger(object):
 	"""
 	Helper Class for Querying Payment Ledger Entry
@@ -1694,25 +1866,34 @@ class QueryPaymentLedger(object):
 		)
 
 		# build query for voucher outstanding
-		query_voucher_outstanding = (
-			qb.from_(ple)
-			.select(
-				ple.account,
-				ple.against_voucher_type.as_("voucher_type"),
-				ple.against_voucher_no.as_("voucher_no"),
-				ple.party_type,
-				ple.party,
-				ple.posting_date,
-				ple.due_date,
-				ple.account_currency.as_("currency"),
-				Sum(ple.amount).as_("amount"),
-				Sum(ple.amount_in_account_currency).as_("amount_in_account_currency"),
+		if self.can_use_voucher_outstandings():
+			query_voucher_outstanding = self.get_voucher_outstandings_query()
+
+			# vouchers without outstanding of the requested sign are filtered out anyway
+			if self.get_invoices or self.get_payments:
+				query_voucher_amount = query_voucher_amount.where(
+					ple.voucher_no.isin(self.get_open_vouchers_query())
+				)
+		else:
+			query_voucher_outstanding = (
+				qb.from_(ple)
+				.select(
+					ple.account,
+					ple.against_voucher_type.as_("voucher_type"),
+					ple.against_voucher_no.as_("voucher_no"),
+					ple.party_type,
+					ple.party,
+					ple.posting_date,
+					ple.due_date,
+					ple.account_currency.as_("currency"),
+					Sum(ple.amount).as_("amount"),
+					Sum(ple.amount_in_account_currency).as_("amount_in_account_currency"),
+				)
+				.where(ple.delinked == 0)
+				.where(Criterion.all(filter_on_against_voucher_no))
+				.where(Criterion.all(self.common_filter))
+				.groupby(ple.against_voucher_type, ple.against_voucher_no, ple.party_type, ple.party)
 			)
-			.where(ple.delinked == 0)
-			.where(Criterion.all(filter_on_against_voucher_no))
-			.where(Criterion.all(self.common_filter))
-			.groupby(ple.against_voucher_type, ple.against_voucher_no, ple.party_type, ple.party)
-		)
 
 		# build CTE for combining voucher amount and outstanding
 		self.cte_query_voucher_amount_and_outstanding = (
@@ -1767,6 +1948,61 @@ class QueryPaymentLedger(object):
 		# execute SQL
 		self.voucher_outstandings = self.cte_query_voucher_amount_and_outstanding.run(as_dict=True)
 
+	def can_use_voucher_outstandings(self):
+		"""Voucher Outstanding has the totals of entries against each voucher, it can replace the
+		ledger if common filters are only on fields it has"""
+		return all(
+			field.name in VOUCHER_OUTSTANDING_FILTER_FIELDS
+			for criterion in self.common_filter
+			for field in criterion.fields_()
+		)
+
+	def get_voucher_outstandings_filter(self, outstanding):
+		conditions = [criterion.replace_table(self.ple, outstanding) for criterion in self.common_filter]
+
+		if self.vouchers:
+			conditions.append(outstanding.voucher_type.isin({x.voucher_type for x in self.vouchers}))
+			conditions.append(outstanding.voucher_no.isin({x.voucher_no for x in self.vouchers}))
+
+		return conditions
+
+	def get_voucher_outstandings_query(self):
+		outstanding = qb.DocType("Voucher Outstanding")
+
+		return (
+			qb.from_(outstanding)
+			.select(
+				outstanding.account,
+				outstanding.voucher_type,
+				outstanding.voucher_no,
+				outstanding.party_type,
+				outstanding.party,
+				outstanding.account_currency.as_("currency"),
+				Sum(outstanding.amount).as_("amount"),
+				Sum(outstanding.amount_in_account_currency).as_("amount_in_account_currency"),
+			)
+			.where(Criterion.all(self.get_voucher_outstandings_filter(outstanding)))
+			.groupby(
+				outstanding.voucher_type, outstanding.voucher_no, outstanding.party_type, outstanding.party
+			)
+		)
+
+	def get_open_vouchers_query(self):
+		"""Vouchers having outstanding of the sign being fetched"""
+		outstanding = qb.DocType("Voucher Outstanding")
+
+		if self.get_invoices:
+			open_filter = outstanding.amount_in_account_currency > 0
+		else:
+			open_filter = outstanding.amount_in_account_currency < 0
+
+		return (
+			qb.from_(outstanding)
+			.select(outstanding.voucher_no)
+			.where(Criterion.all(self.get_voucher_outstandings_filter(outstanding)))
+			.where(open_filter)
+		)
+
 	def get_voucher_outstandings(
 		self,
 		vouchers=None,
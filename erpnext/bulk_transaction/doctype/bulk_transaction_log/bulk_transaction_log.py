@@ -6,7 +6,7 @@ from datetime import date
 import frappe
 from frappe.model.document import Document
 
-from erpnext.utilities.bulk_transaction import task, update_logger
+from erpnext.utilities.bulk_transaction import enqueue_bulk_transaction, process_transactions
 
 
 class BulkTransactionLog(Document):
@@ -28,40 +28,10 @@ def retry_failing_transaction(log_date=None):
 	).run(as_dict=True)
 
 	if data:
+		records = [(d.transaction_name, d.from_doctype, d.to_doctype) for d in data]
 		if len(data) > 10:
-			frappe.enqueue(job, queue="long", job_name="bulk_retry", data=data, log_date=log_date)
+			enqueue_bulk_transaction(records, log_date=log_date, restarted=1)
 		else:
-			job(data, log_date)
+			process_transactions(records, log_date=log_date, restarted=1)
 	else:
 		return "No Failed Records"
-
-
-def job(data, log_date):
-	for d in data:
-		failed = []
-		try:
-			frappe.db.savepoint("before_creation_of_record")
-			task(d.transaction_name, d.from_doctype, d.to_doctype)
-		except Exception as e:
-			frappe.db.rollback(save_point="before_creation_of_record")
-			failed.append(e)
-			update_logger(
-				d.transaction_name,
-				e,
-				d.from_doctype,
-				d.to_doctype,
-				status="Failed",
-				log_date=log_date,
-				restarted=1,
-			)
-
-		if not failed:
-			update_logger(
-				d.transaction_name,
-				None,
-				d.from_doctype,
-				d.to_doctype,
-				status="Success",
-				log_date=log_date,
-				restarted=1,
-			)
@@ -6,6 +6,9 @@ from datetime import date
 
 import frappe
 
+from erpnext.bulk_transaction.doctype.bulk_transaction_log.bulk_transaction_log import (
+	retry_failing_transaction,
+)
 from erpnext.utilities.bulk_transaction import transaction_processing
 
 
@@ -27,6 +30,49 @@ class TestBulkTransactionLog(unittest.TestCase):
 				self.assertEqual(d.to_doctype, "Sales Invoice")
 				self.assertEqual(d.retried, 0)
 
+	def test_bulk_entries_in_log(self):
+		so_names = [create_so() for i in range(11)]
+		missing_so = frappe.generate_hash(length=10)
+
+		# more than 10 records are split across background jobs
+		transaction_processing(
+			[{"name": name} for name in so_names + [missing_so]], "Sales Order", "Sales Invoice"
+		)
+
+		log_detail = frappe.qb.DocType("Bulk Transaction Log Detail")
+		rows = (
+			frappe.qb.from_(log_detail)
+			.select(
+				log_detail.transaction_name,
+				log_detail.transaction_status,
+				log_detail.retried,
+				log_detail.idx,
+			)
+			.where(log_detail.parent == str(date.today()))
+			.where(log_detail.transaction_name.isin(so_names + [missing_so]))
+		).run(as_dict=True)
+
+		self.assertEqual(len(rows), 12)
+		# shards number their rows apart
+		self.assertEqual(len({row.idx for row in rows}), 12)
+		for row in rows:
+			status = "Failed" if row.transaction_name == missing_so else "Success"
+			self.assertEqual(row.transaction_status, status)
+			self.assertEqual(row.retried, 0)
+
+		for so_name in so_names:
+			self.assertTrue(frappe.db.exists("Sales Invoice Product", {"sales_order": so_name}))
+
+		# a failure retried is marked as retried, and not logged again if it fails
+		retry_failing_transaction()
+		rows = frappe.get_all(
+			"Bulk Transaction Log Detail",
+			filters={"parent": str(date.today()), "transaction_name": missing_so},
+			fields=["transaction_status", "retried"],
+		)
+		self.assertEqual(len(rows), 1)
+		self.assertEqual(rows[0].retried, 1)
+
 
 def create_company():
 	if not frappe.db.exists("Company", "_Test Company"):
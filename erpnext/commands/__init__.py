@@ -2,10 +2,33 @@
 # GPL v3 License. See license.txt
 
 import click
+from frappe.commands import get_site, pass_context
 
 
 def call_command(cmd, context):
 	return click.Context(cmd, obj=context).forward(cmd)
 
 
-commands = []
+@click.command("convert-stock-queues")
+@click.option("--batch-size", default=1000, help="Number of Stock Ledger Entries per commit")
+@click.option("--no-compress", is_flag=True, default=False, help="Don't zlib compress queues")
+@pass_context
+def convert_stock_queues(context, batch_size=1000, no_compress=False):
+	"Convert large JSON stock queues of Stock Ledger Entries to compact binary format"
+	import frappe
+
+	from erpnext.stock.stock_queue import convert_stock_queues
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		converted = convert_stock_queues(
+			batch_size=batch_size, compress=not no_compress, verbose=context.verbose
+		)
+		print(f"Converted {converted} stock queues")
+	finally:
+		frappe.destroy()
+
+
+commands = [convert_stock_queues]
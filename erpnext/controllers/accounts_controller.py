@@ -23,6 +23,9 @@ from frappe.utils import (
 )
 
 import erpnext
+from erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot import (
+	invalidate_balance_snapshots_of_vouchers,
+)
 from erpnext.accounts.doctype.accounting_dimension.accounting_dimension import (
 	get_accounting_dimensions,
 )
@@ -37,7 +40,12 @@ from erpnext.accounts.party import (
 	get_party_gle_currency,
 	validate_party_frozen_disabled,
 )
-from erpnext.accounts.utils import get_account_currency, get_fiscal_years, validate_fiscal_year
+from erpnext.accounts.utils import (
+	_delete_pl_entries,
+	get_account_currency,
+	get_fiscal_years,
+	validate_fiscal_year,
+)
 from erpnext.buying.utils import update_last_purchase_rate
 from erpnext.controllers.print_settings import (
 	set_print_templates_for_product_table,
@@ -48,7 +56,11 @@ from erpnext.exceptions import InvalidCurrency
 from erpnext.setup.utils import get_exchange_rate
 from erpnext.stock.doctype.product.product import get_uom_conv_factor
 from erpnext.stock.doctype.packed_product.packed_product import make_packing_list
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	invalidate_stock_balance_snapshots_of_voucher,
+)
 from erpnext.stock.get_product_details import (
+	ProductDetailsCache,
 	_get_product_tax_template,
 	get_conversion_factor,
 	get_product_details,
@@ -212,17 +224,20 @@ class AccountsController(TransactionBase):
 
 		# delete sl and gl entries on deletion of transaction
 		if frappe.db.get_single_value("Accounts Settings", "delete_linked_ledger_entries"):
-			ple = frappe.qb.DocType("Payment Ledger Entry")
-			frappe.qb.from_(ple).delete().where(
-				(ple.voucher_type == self.doctype) & (ple.voucher_no == self.name)
-			).run()
+			_delete_pl_entries(self.doctype, self.name)
+			invalidate_balance_snapshots_of_vouchers(self.doctype, [self.name])
 			frappe.db.sql(
 				"delete from `tabGL Entry` where voucher_type=%s and voucher_no=%s", (self.doctype, self.name)
 			)
+			invalidate_stock_balance_snapshots_of_voucher(self.doctype, self.name)
 			frappe.db.sql(
 				"delete from `tabStock Ledger Entry` where voucher_type=%s and voucher_no=%s",
 				(self.doctype, self.name),
 			)
+			frappe.db.sql(
+				"delete from `tabStock Ledger Serial No` where voucher_type=%s and voucher_no=%s",
+				(self.doctype, self.name),
+			)
 
 	def validate_deferred_income_expense_account(self):
 		field_map = {
@@ -528,87 +543,95 @@ class AccountsController(TransactionBase):
 
 			self.pricing_rules = []
 
-			for product in self.get("products"):
-				if product.get("product_code"):
-					args = parent_dict.copy()
-					args.update(product.as_dict())
-
-					args["doctype"] = self.doctype
-					args["name"] = self.name
-					args["child_docname"] = product.name
-					args["ignore_pricing_rule"] = (
-						self.ignore_pricing_rule if hasattr(self, "ignore_pricing_rule") else 0
-					)
+			product_codes = {d.product_code for d in self.get("products") if d.get("product_code")}
+			price_lists = {
+				parent_dict.get(fieldname)
+				for fieldname in ("price_list", "selling_price_list", "buying_price_list")
+				if parent_dict.get(fieldname)
+			}
 
-					if not args.get("transaction_date"):
-						args["transaction_date"] = args.get("posting_date")
+			with ProductDetailsCache(product_codes, price_lists):
+				for product in self.get("products"):
+					if product.get("product_code"):
+						args = parent_dict.copy()
+						args.update(product.as_dict())
+
+						args["doctype"] = self.doctype
+						args["name"] = self.name
+						args["child_docname"] = product.name
+						args["ignore_pricing_rule"] = (
+							self.ignore_pricing_rule if hasattr(self, "ignore_pricing_rule") else 0
+						)
 
-					if self.get("is_subcontracted"):
-						args["is_subcontracted"] = self.is_subcontracted
+						if not args.get("transaction_date"):
+							args["transaction_date"] = args.get("posting_date")
 
-					ret = get_product_details(args, self, for_validate=True, overwrite_warehouse=False)
+						if self.get("is_subcontracted"):
+							args["is_subcontracted"] = self.is_subcontracted
 
-					for fieldname, value in ret.products():
-						if product.meta.get_field(fieldname) and value is not None:
-							if product.get(fieldname) is None or fieldname in force_product_fields:
-								product.set(fieldname, value)
+						ret = get_product_details(args, self, for_validate=True, overwrite_warehouse=False)
 
-							elif fieldname in ["cost_center", "conversion_factor"] and not product.get(fieldname):
-								product.set(fieldname, value)
+						for fieldname, value in ret.products():
+							if product.meta.get_field(fieldname) and value is not None:
+								if product.get(fieldname) is None or fieldname in force_product_fields:
+									product.set(fieldname, value)
 
-							elif fieldname == "serial_no":
-								# Ensure that serial numbers are matched against Stock UOM
-								product_conversion_factor = product.get("conversion_factor") or 1.0
-								product_qty = abs(product.get("qty")) * product_conversion_factor
+								elif fieldname in ["cost_center", "conversion_factor"] and not product.get(fieldname):
+									product.set(fieldname, value)
 
-								if product_qty != len(get_serial_nos(product.get("serial_no"))):
+								elif fieldname == "serial_no":
+									# Ensure that serial numbers are matched against Stock UOM
+									product_conversion_factor = product.get("conversion_factor") or 1.0
+									product_qty = abs(product.get("qty")) * product_conversion_factor
+
+									if product_qty != len(get_serial_nos(product.get("serial_no"))):
+										product.set(fieldname, value)
+
+								elif (
+									ret.get("pricing_rule_removed")
+									and value is not None
+									and fieldname
+									in [
+										"discount_percentage",
+										"discount_amount",
+										"rate",
+										"margin_rate_or_amount",
+										"margin_type",
+										"remove_free_product",
+									]
+								):
+									# reset pricing rule fields if pricing_rule_removed
 									product.set(fieldname, value)
 
-							elif (
-								ret.get("pricing_rule_removed")
-								and value is not None
-								and fieldname
-								in [
-									"discount_percentage",
-									"discount_amount",
-									"rate",
-									"margin_rate_or_amount",
-									"margin_type",
-									"remove_free_product",
-								]
-							):
-								# reset pricing rule fields if pricing_rule_removed
-								product.set(fieldname, value)
-
-					if self.doctype in ["Purchase Invoice", "Sales Invoice"] and product.meta.get_field(
-						"is_fixed_asset"
-					):
-						product.set("is_fixed_asset", ret.get("is_fixed_asset", 0))
-
-					# Double check for cost center
-					# Products add via promotional scheme may not have cost center set
-					if hasattr(product, "cost_center") and not product.get("cost_center"):
-						product.set(
-							"cost_center", self.get("cost_center") or erpnext.get_default_cost_center(self.company)
-						)
+						if self.doctype in ["Purchase Invoice", "Sales Invoice"] and product.meta.get_field(
+							"is_fixed_asset"
+						):
+							product.set("is_fixed_asset", ret.get("is_fixed_asset", 0))
 
-					if ret.get("pricing_rules"):
-						self.apply_pricing_rule_on_products(product, ret)
-						self.set_pricing_rule_details(product, ret)
-				else:
-					# Transactions line product without product code
-
-					uom = product.get("uom")
-					stock_uom = product.get("stock_uom")
-					if bool(uom) != bool(stock_uom):  # xor
-						product.stock_uom = product.uom = uom or stock_uom
-
-					# UOM cannot be zero so substitute as 1
-					product.conversion_factor = (
-						get_uom_conv_factor(product.get("uom"), product.get("stock_uom"))
-						or product.get("conversion_factor")
-						or 1
-					)
+						# Double check for cost center
+						# Products add via promotional scheme may not have cost center set
+						if hasattr(product, "cost_center") and not product.get("cost_center"):
+							product.set(
+								"cost_center", self.get("cost_center") or erpnext.get_default_cost_center(self.company)
+							)
+
+						if ret.get("pricing_rules"):
+							self.apply_pricing_rule_on_products(product, ret)
+							self.set_pricing_rule_details(product, ret)
+					else:
+						# Transactions line product without product code
+
+						uom = product.get("uom")
+						stock_uom = product.get("stock_uom")
+						if bool(uom) != bool(stock_uom):  # xor
+							product.stock_uom = product.uom = uom or stock_uom
+
+						# UOM cannot be zero so substitute as 1
+						product.conversion_factor = (
+							get_uom_conv_factor(product.get("uom"), product.get("stock_uom"))
+							or product.get("conversion_factor")
+							or 1
+						)
 
 			if self.doctype == "Purchase Invoice":
 				self.set_expense_account(for_validate)
@@ -22,6 +22,8 @@ from erpnext.stock.doctype.inventory_dimension.inventory_dimension import (
 	get_evaluated_inventory_dimension,
 )
 from erpnext.stock.stock_ledger import get_products_to_be_repost
+from erpnext.stock.stock_queue import is_queue_empty
+from erpnext.stock.utils import get_combine_datetime
 
 
 class QualityInspectionRequiredError(frappe.ValidationError):
@@ -311,25 +313,12 @@ class StockController(AccountsController):
 		return list(products), list(warehouses)
 
 	def get_stock_ledger_details(self):
-		stock_ledger = {}
-		stock_ledger_entries = frappe.db.sql(
-			"""
-			select
-				name, warehouse, stock_value_difference, valuation_rate,
-				voucher_detail_no, product_code, posting_date, posting_time,
-				actual_qty, qty_after_transaction
-			from
-				`tabStock Ledger Entry`
-			where
-				voucher_type=%s and voucher_no=%s and is_cancelled = 0
-		""",
-			(self.doctype, self.name),
-			as_dict=True,
-		)
+		# preloaded while reposting GL entries of many vouchers
+		if self.flags.stock_ledger_details is not None:
+			return self.flags.stock_ledger_details
 
-		for sle in stock_ledger_entries:
-			stock_ledger.setdefault(sle.voucher_detail_no, []).append(sle)
-		return stock_ledger
+		voucher = (self.doctype, self.name)
+		return get_voucherwise_stock_ledger_details([voucher]).get(voucher, {})
 
 	def make_batches(self, warehouse_field):
 		"""Create batches if required. Called before submit"""
@@ -854,7 +843,7 @@ def repost_required_for_queue(doc: StockController) -> bool:
 		return False
 
 	for sle in consuming_sles:
-		if sle.stock_queue != "[]":  # using FIFO/LIFO valuation
+		if not is_queue_empty(sle.stock_queue):  # using FIFO/LIFO valuation
 			return True
 	return False
 
@@ -897,6 +886,40 @@ def make_quality_inspections(doctype, docname, products):
 	return inspections
 
 
+def get_voucherwise_stock_ledger_details(vouchers):
+	"""Get stock ledger entries of vouchers grouped by voucher and voucher detail no.
+
+	returns:
+	        Dict[Tuple[voucher_type, voucher_no], Dict[voucher_detail_no, List[SLE]]]
+	"""
+	stock_ledger = {}
+	if not vouchers:
+		return stock_ledger
+
+	vouchers = set(vouchers)
+	stock_ledger_entries = frappe.db.sql(
+		"""
+		select
+			name, warehouse, stock_value_difference, valuation_rate,
+			voucher_detail_no, product_code, posting_date, posting_time,
+			actual_qty, qty_after_transaction, voucher_type, voucher_no
+		from
+			`tabStock Ledger Entry`
+		where
+			voucher_no in %(voucher_nos)s and is_cancelled = 0
+	""",
+		{"voucher_nos": tuple({voucher_no for _voucher_type, voucher_no in vouchers})},
+		as_dict=True,
+	)
+
+	for sle in stock_ledger_entries:
+		voucher = (sle.voucher_type, sle.voucher_no)
+		if voucher in vouchers:
+			stock_ledger.setdefault(voucher, {}).setdefault(sle.voucher_detail_no, []).append(sle)
+
+	return stock_ledger
+
+
 def is_reposting_pending():
 	return frappe.db.exists(
 		"Repost Product Valuation", {"docstatus": 1, "status": ["in", ["Queued", "In Progress"]]}
@@ -919,15 +942,15 @@ def future_sle_exists(args, sl_entries=None):
 			return
 
 	or_conditions = get_conditions_to_validate_future_sle(sl_entries)
+	args["posting_datetime"] = get_combine_datetime(args.posting_date, args.posting_time)
 
 	data = frappe.db.sql(
 		"""
 		select product_code, warehouse, count(name) as total_row
-		from `tabStock Ledger Entry` force index (product_warehouse)
+		from `tabStock Ledger Entry` force index (product_warehouse_posting_datetime_index)
 		where
 			({})
-			and timestamp(posting_date, posting_time)
-				>= timestamp(%(posting_date)s, %(posting_time)s)
+			and posting_datetime >= %(posting_datetime)s
 			and voucher_no != %(voucher_no)s
 			and is_cancelled = 0
 		GROUP BY
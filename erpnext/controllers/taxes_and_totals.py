@@ -244,25 +244,22 @@ class calculate_taxes_and_totals(object):
 		if not any(cint(tax.included_in_print_rate) for tax in self.doc.get("taxes")):
 			return
 
+		# fractions only depend on the tax rates of the product, compute them once per tax rates
+		tax_fractions_by_tax_rate = {}
 		for product in self._products:
-			product_tax_map = self._load_product_tax_rate(product.product_tax_rate)
-			cumulated_tax_fraction = 0
-			total_inclusive_tax_amount_per_qty = 0
-			for i, tax in enumerate(self.doc.get("taxes")):
-				(
-					tax.tax_fraction_for_current_product,
-					inclusive_tax_amount_per_qty,
-				) = self.get_current_tax_fraction(tax, product_tax_map)
+			if product.product_tax_rate not in tax_fractions_by_tax_rate:
+				tax_fractions_by_tax_rate[product.product_tax_rate] = self.get_tax_fractions(
+					self._load_product_tax_rate(product.product_tax_rate)
+				)
 
-				if i == 0:
-					tax.grand_total_fraction_for_current_product = 1 + tax.tax_fraction_for_current_product
-				else:
-					tax.grand_total_fraction_for_current_product = (
-						self.doc.get("taxes")[i - 1].grand_total_fraction_for_current_product
-						+ tax.tax_fraction_for_current_product
-					)
+			(
+				tax_fractions,
+				cumulated_tax_fraction,
+				inclusive_tax_amounts_per_qty,
+			) = tax_fractions_by_tax_rate[product.product_tax_rate]
 
-				cumulated_tax_fraction += tax.tax_fraction_for_current_product
+			total_inclusive_tax_amount_per_qty = 0
+			for inclusive_tax_amount_per_qty in inclusive_tax_amounts_per_qty:
 				total_inclusive_tax_amount_per_qty += inclusive_tax_amount_per_qty * flt(product.qty)
 
 			if (
@@ -278,6 +275,41 @@ class calculate_taxes_and_totals(object):
 
 				self._set_in_company_currency(product, ["net_rate", "net_amount"])
 
+		# taxes keep the fractions of the last product
+		for tax, (tax_fraction, grand_total_fraction) in zip(self.doc.get("taxes"), tax_fractions):
+			tax.tax_fraction_for_current_product = tax_fraction
+			tax.grand_total_fraction_for_current_product = grand_total_fraction
+
+	def get_tax_fractions(self, product_tax_map):
+		"""
+		Returns (tax fraction, grand total fraction) of each tax, their cumulated tax fraction and
+		inclusive tax amount per qty of each tax for products with the given tax rates
+		"""
+		tax_fractions = []
+		cumulated_tax_fraction = 0
+		inclusive_tax_amounts_per_qty = []
+		for i, tax in enumerate(self.doc.get("taxes")):
+			(
+				tax.tax_fraction_for_current_product,
+				inclusive_tax_amount_per_qty,
+			) = self.get_current_tax_fraction(tax, product_tax_map)
+
+			if i == 0:
+				tax.grand_total_fraction_for_current_product = 1 + tax.tax_fraction_for_current_product
+			else:
+				tax.grand_total_fraction_for_current_product = (
+					self.doc.get("taxes")[i - 1].grand_total_fraction_for_current_product
+					+ tax.tax_fraction_for_current_product
+				)
+
+			tax_fractions.append(
+				(tax.tax_fraction_for_current_product, tax.grand_total_fraction_for_current_product)
+			)
+			cumulated_tax_fraction += tax.tax_fraction_for_current_product
+			inclusive_tax_amounts_per_qty.append(inclusive_tax_amount_per_qty)
+
+		return tax_fractions, cumulated_tax_fraction, inclusive_tax_amounts_per_qty
+
 	def _load_product_tax_rate(self, product_tax_rate):
 		return json.loads(product_tax_rate) if product_tax_rate else {}
 
@@ -320,6 +352,22 @@ class calculate_taxes_and_totals(object):
 		else:
 			return tax.rate
 
+	def get_product_tax_rates(self):
+		"""Returns rates of all taxes for each product, computed once per distinct product tax rates"""
+		tax_rates_by_product_tax_rate = {}
+		product_tax_rates = []
+
+		for product in self._products:
+			if product.product_tax_rate not in tax_rates_by_product_tax_rate:
+				product_tax_map = self._load_product_tax_rate(product.product_tax_rate)
+				tax_rates_by_product_tax_rate[product.product_tax_rate] = [
+					self._get_tax_rate(tax, product_tax_map) for tax in self.doc.get("taxes")
+				]
+
+			product_tax_rates.append(tax_rates_by_product_tax_rate[product.product_tax_rate])
+
+		return product_tax_rates
+
 	def calculate_net_total(self):
 		self.doc.total_qty = (
 			self.doc.total
@@ -353,73 +401,79 @@ class calculate_taxes_and_totals(object):
 		if not rounding_adjustment_computed:
 			self.doc.rounding_adjustment = 0
 
-		# maintain actual tax rate based on idx
-		actual_tax_dict = dict(
-			[
-				[tax.idx, flt(tax.tax_amount, tax.precision("tax_amount"))]
-				for tax in self.doc.get("taxes")
-				if tax.charge_type == "Actual"
-			]
-		)
+		taxes = self.doc.get("taxes")
+		product_tax_rates = self.get_product_tax_rates()
 
-		for n, product in enumerate(self._products):
-			product_tax_map = self._load_product_tax_rate(product.product_tax_rate)
-			for i, tax in enumerate(self.doc.get("taxes")):
-				# tax_amount represents the amount of tax for the current step
-				current_tax_amount = self.get_current_tax_amount(product, tax, product_tax_map)
+		# tax amount and grand total of each product, by tax row, taxes are computed one tax row
+		# at a time for all products
+		tax_amounts = []
+		grand_totals = []
+
+		for i, tax in enumerate(taxes):
+			# tax_amount represents the amount of tax for the current step
+			current_tax_amounts = self.get_current_tax_amounts(
+				i, tax, product_tax_rates, tax_amounts, grand_totals
+			)
 
-				# Adjust divisional loss to the last product
-				if tax.charge_type == "Actual":
-					actual_tax_dict[tax.idx] -= current_tax_amount
-					if n == len(self._products) - 1:
-						current_tax_amount += actual_tax_dict[tax.idx]
+			# Adjust divisional loss to the last product
+			if tax.charge_type == "Actual":
+				actual_tax_amount = flt(tax.tax_amount, tax.precision("tax_amount"))
+				for current_tax_amount in current_tax_amounts:
+					actual_tax_amount -= current_tax_amount
 
+				current_tax_amounts[-1] += actual_tax_amount
+
+			for current_tax_amount in current_tax_amounts:
 				# accumulate tax amount into tax.tax_amount
 				if tax.charge_type != "Actual" and not (
 					self.discount_amount_applied and self.doc.apply_discount_on == "Grand Total"
 				):
 					tax.tax_amount += current_tax_amount
 
-				# store tax_amount for current product as it will be used for
-				# charge type = 'On Previous Row Amount'
-				tax.tax_amount_for_current_product = current_tax_amount
-
 				# set tax after discount
 				tax.tax_amount_after_discount_amount += current_tax_amount
 
-				current_tax_amount = self.get_tax_amount_if_for_valuation_or_deduction(current_tax_amount, tax)
+			# note: grand_total_for_current_product contains the contribution of
+			# product's amount, previously applied tax and the current tax on that product
+			current_grand_totals = []
+			for n, product in enumerate(self._products):
+				current_tax_amount = self.get_tax_amount_if_for_valuation_or_deduction(
+					current_tax_amounts[n], tax
+				)
 
-				# note: grand_total_for_current_product contains the contribution of
-				# product's amount, previously applied tax and the current tax on that product
 				if i == 0:
-					tax.grand_total_for_current_product = flt(product.net_amount + current_tax_amount)
+					current_grand_totals.append(flt(product.net_amount + current_tax_amount))
 				else:
-					tax.grand_total_for_current_product = flt(
-						self.doc.get("taxes")[i - 1].grand_total_for_current_product + current_tax_amount
-					)
+					current_grand_totals.append(flt(grand_totals[i - 1][n] + current_tax_amount))
 
-				# set precision in the last product iteration
-				if n == len(self._products) - 1:
-					self.round_off_totals(tax)
-					self._set_in_company_currency(tax, ["tax_amount", "tax_amount_after_discount_amount"])
+			tax_amounts.append(current_tax_amounts)
+			grand_totals.append(current_grand_totals)
 
-					self.round_off_base_values(tax)
-					self.set_cumulative_total(i, tax)
+			# taxes keep the amounts of the last product
+			tax.tax_amount_for_current_product = current_tax_amounts[-1]
+			tax.grand_total_for_current_product = current_grand_totals[-1]
 
-					self._set_in_company_currency(tax, ["total"])
+			# set precision
+			self.round_off_totals(tax)
+			self._set_in_company_currency(tax, ["tax_amount", "tax_amount_after_discount_amount"])
 
-					# adjust Discount Amount loss in last tax iteration
-					if (
-						i == (len(self.doc.get("taxes")) - 1)
-						and self.discount_amount_applied
-						and self.doc.discount_amount
-						and self.doc.apply_discount_on == "Grand Total"
-						and not rounding_adjustment_computed
-					):
-						self.doc.rounding_adjustment = flt(
-							self.doc.grand_total - flt(self.doc.discount_amount) - tax.total,
-							self.doc.precision("rounding_adjustment"),
-						)
+			self.round_off_base_values(tax)
+			self.set_cumulative_total(i, tax)
+
+			self._set_in_company_currency(tax, ["total"])
+
+			# adjust Discount Amount loss in last tax iteration
+			if (
+				i == (len(taxes) - 1)
+				and self.discount_amount_applied
+				and self.doc.discount_amount
+				and self.doc.apply_discount_on == "Grand Total"
+				and not rounding_adjustment_computed
+			):
+				self.doc.rounding_adjustment = flt(
+					self.doc.grand_total - flt(self.doc.discount_amount) - tax.total,
+					self.doc.precision("rounding_adjustment"),
+				)
 
 	def get_tax_amount_if_for_valuation_or_deduction(self, tax_amount, tax):
 		# if just for valuation, do not add the tax amount in total
@@ -444,34 +498,43 @@ class calculate_taxes_and_totals(object):
 		else:
 			tax.total = flt(self.doc.get("taxes")[row_idx - 1].total + tax_amount, tax.precision("total"))
 
-	def get_current_tax_amount(self, product, tax, product_tax_map):
-		tax_rate = self._get_tax_rate(tax, product_tax_map)
-		current_tax_amount = 0.0
-
+	def get_current_tax_amounts(self, row_idx, tax, product_tax_rates, tax_amounts, grand_totals):
+		"""
+		Returns tax amount of each product for the tax, `tax_amounts` and `grand_totals` have the
+		amounts of each product for the previous tax rows
+		"""
 		if tax.charge_type == "Actual":
 			# distribute the tax amount proportionally to each product row
 			actual = flt(tax.tax_amount, tax.precision("tax_amount"))
-			current_tax_amount = (
-				product.net_amount * actual / self.doc.net_total if self.doc.net_total else 0.0
-			)
-
-		elif tax.charge_type == "On Net Total":
-			current_tax_amount = (tax_rate / 100.0) * product.net_amount
 		elif tax.charge_type == "On Previous Row Amount":
-			current_tax_amount = (tax_rate / 100.0) * self.doc.get("taxes")[
-				cint(tax.row_id) - 1
-			].tax_amount_for_current_product
+			previous_row_amounts = tax_amounts[cint(tax.row_id) - 1]
 		elif tax.charge_type == "On Previous Row Total":
-			current_tax_amount = (tax_rate / 100.0) * self.doc.get("taxes")[
-				cint(tax.row_id) - 1
-			].grand_total_for_current_product
-		elif tax.charge_type == "On Product Quantity":
-			current_tax_amount = tax_rate * product.qty
+			previous_row_amounts = grand_totals[cint(tax.row_id) - 1]
+
+		set_product_wise_tax = not (self.doc.get("is_consolidated") or tax.get("dont_recompute_tax"))
+
+		current_tax_amounts = []
+		for n, product in enumerate(self._products):
+			tax_rate = product_tax_rates[n][row_idx]
+			current_tax_amount = 0.0
+
+			if tax.charge_type == "Actual":
+				current_tax_amount = (
+					product.net_amount * actual / self.doc.net_total if self.doc.net_total else 0.0
+				)
+			elif tax.charge_type == "On Net Total":
+				current_tax_amount = (tax_rate / 100.0) * product.net_amount
+			elif tax.charge_type in ("On Previous Row Amount", "On Previous Row Total"):
+				current_tax_amount = (tax_rate / 100.0) * previous_row_amounts[n]
+			elif tax.charge_type == "On Product Quantity":
+				current_tax_amount = tax_rate * product.qty
+
+			if set_product_wise_tax:
+				self.set_product_wise_tax(product, tax, tax_rate, current_tax_amount)
 
-		if not (self.doc.get("is_consolidated") or tax.get("dont_recompute_tax")):
-			self.set_product_wise_tax(product, tax, tax_rate, current_tax_amount)
+			current_tax_amounts.append(current_tax_amount)
 
-		return current_tax_amount
+		return current_tax_amounts
 
 	def set_product_wise_tax(self, product, tax, tax_rate, current_tax_amount):
 		# store tax breakup for each product
@@ -0,0 +1,93 @@
+import json
+
+from frappe.tests.utils import FrappeTestCase
+
+from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
+from erpnext.controllers.taxes_and_totals import calculate_taxes_and_totals
+
+
+class TestCalculateTaxesAndTotals(FrappeTestCase):
+	def make_invoice(self, products, taxes, included_in_print_rate=0, discount_amount=0):
+		si = create_sales_invoice(do_not_save=True)
+		si.products = []
+		for qty, rate, product_tax_rate in products:
+			si.append(
+				"products",
+				{
+					"product_code": "_Test Product",
+					"qty": qty,
+					"rate": rate,
+					"product_tax_rate": json.dumps(product_tax_rate) if product_tax_rate else None,
+					"income_account": "Sales - _TC",
+					"cost_center": "_Test Cost Center - _TC",
+				},
+			)
+
+		for charge_type, account_head, rate, row_id, tax_amount in taxes:
+			si.append(
+				"taxes",
+				{
+					"charge_type": charge_type,
+					"account_head": account_head,
+					"description": account_head,
+					"rate": rate,
+					"row_id": row_id,
+					"tax_amount": tax_amount,
+					"included_in_print_rate": included_in_print_rate,
+					"cost_center": "_Test Cost Center - _TC",
+				},
+			)
+
+		si.apply_discount_on = "Grand Total"
+		si.discount_amount = discount_amount
+
+		calculate_taxes_and_totals(si)
+		return si
+
+	def assert_taxes(self, si, expected_taxes):
+		self.assertEqual(
+			[(tax.tax_amount, tax.total) for tax in si.taxes],
+			expected_taxes,
+		)
+
+	def test_exclusive_taxes(self):
+		si = self.make_invoice(
+			products=[(2, 100, None), (3, 50, {"_Test Account VAT - _TC": 5})],
+			taxes=[
+				("On Net Total", "_Test Account VAT - _TC", 10, None, 0),
+				("On Previous Row Amount", "_Test Account Service Tax - _TC", 10, 1, 0),
+				("On Previous Row Total", "_Test Account Excise Duty - _TC", 4, 2, 0),
+				("Actual", "_Test Account Shipping Charges - _TC", 0, None, 25),
+			],
+		)
+
+		self.assertEqual(si.net_total, 350)
+		self.assert_taxes(si, [(27.5, 377.5), (2.75, 380.25), (15.21, 395.46), (25, 420.46)])
+		self.assertEqual(si.total_taxes_and_charges, 70.46)
+		self.assertEqual(si.grand_total, 420.46)
+
+	def test_inclusive_taxes(self):
+		si = self.make_invoice(
+			products=[(1, 116.5, None)],
+			taxes=[
+				("On Net Total", "_Test Account VAT - _TC", 15, None, 0),
+				("On Previous Row Amount", "_Test Account Service Tax - _TC", 10, 1, 0),
+			],
+			included_in_print_rate=1,
+		)
+
+		self.assertEqual(si.net_total, 100)
+		self.assert_taxes(si, [(15, 115), (1.5, 116.5)])
+		self.assertEqual(si.grand_total, 116.5)
+
+	def test_discount_on_grand_total(self):
+		si = self.make_invoice(
+			products=[(2, 100, None), (3, 50, None)],
+			taxes=[("On Net Total", "_Test Account VAT - _TC", 10, None, 0)],
+			discount_amount=38.5,
+		)
+
+		self.assertEqual(si.net_total, 315)
+		self.assertEqual(si.taxes[0].tax_amount, 35)
+		self.assertEqual(si.taxes[0].tax_amount_after_discount_amount, 31.5)
+		self.assertEqual(si.grand_total, 346.5)
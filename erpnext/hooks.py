@@ -369,7 +369,6 @@ auto_cancel_exempted_doctypes = [
 scheduler_events = {
 	"cron": {
 		"0/15 * * * *": [
-			"erpnext.manufacturing.doctype.bom_update_log.bom_update_log.resume_bom_cost_update_jobs",
 			"erpnext.accounts.doctype.process_payment_reconciliation.process_payment_reconciliation.trigger_reconciliation_for_queued_docs",
 		],
 		"0/30 * * * *": [
@@ -431,6 +430,9 @@ scheduler_events = {
 		"erpnext.loan_management.doctype.process_loan_security_shortfall.process_loan_security_shortfall.create_process_loan_security_shortfall",
 		"erpnext.loan_management.doctype.process_loan_interest_accrual.process_loan_interest_accrual.process_loan_interest_accrual_for_term_loans",
 		"erpnext.crm.utils.open_leads_opportunities_based_on_todays_event",
+		"erpnext.accounts.doctype.account_balance_snapshot.account_balance_snapshot.build_balance_snapshots",
+		"erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot.build_stock_balance_snapshots",
+		"erpnext.stock.doctype.stock_ageing_checkpoint.stock_ageing_checkpoint.build_stock_ageing_checkpoints",
 	],
 	"monthly_long": [
 		"erpnext.accounts.deferred_revenue.process_deferred_accounting",
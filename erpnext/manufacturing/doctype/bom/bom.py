@@ -21,6 +21,9 @@ from erpnext.stock.get_product_details import get_conversion_factor, get_price_l
 
 form_grid_templates = {"products": "templates/form_grid/product_grid.html"}
 
+# bump when the format of the cached BOM explosions changes
+BOM_EXPLOSION_CACHE_VERSION = 1
+
 
 class BOMRecursionError(frappe.ValidationError):
 	pass
@@ -202,20 +205,24 @@ class BOM(WebsiteGenerator):
 
 	def on_update(self):
 		frappe.cache().hdel("bom_children", self.name)
+		clear_bom_explosion_cache(self.name)
 		self.check_recursion()
 
 	def on_submit(self):
+		clear_bom_explosion_cache(self.name)
 		self.manage_default_bom()
 
 	def on_cancel(self):
 		self.db_set("is_active", 0)
 		self.db_set("is_default", 0)
+		clear_bom_explosion_cache(self.name)
 
 		# check if used in any other bom
 		self.validate_bom_links()
 		self.manage_default_bom()
 
 	def on_update_after_submit(self):
+		clear_bom_explosion_cache(self.name)
 		self.validate_bom_links()
 		self.manage_default_bom()
 
@@ -398,6 +405,7 @@ class BOM(WebsiteGenerator):
 
 		if save:
 			self.db_update()
+			clear_bom_explosion_cache(self.name)
 
 		# update parent BOMs
 		if self.total_cost != existing_bom_cost and update_parent:
@@ -785,45 +793,24 @@ class BOM(WebsiteGenerator):
 
 	def get_child_exploded_products(self, bom_no, stock_qty):
 		"""Add all products from Flat BOM of child BOM"""
-		# Did not use qty_consumed_per_unit in the query, as it leads to rounding loss
-		child_fb_products = frappe.db.sql(
-			"""
-			SELECT
-				bom_product.product_code,
-				bom_product.product_name,
-				bom_product.description,
-				bom_product.source_warehouse,
-				bom_product.operation,
-				bom_product.stock_uom,
-				bom_product.stock_qty,
-				bom_product.rate,
-				bom_product.include_product_in_manufacturing,
-				bom_product.sourced_by_supplier,
-				bom_product.stock_qty / ifnull(bom.quantity, 1) AS qty_consumed_per_unit
-			FROM `tabBOM Explosion Product` bom_product, `tabBOM` bom
-			WHERE
-				bom_product.parent = bom.name
-				AND bom.name = %s
-				AND bom.docstatus = 1
-		""",
-			bom_no,
-			as_dict=1,
-		)
+		explosion = get_bom_explosion(bom_no)
+		if explosion.docstatus != 1:
+			return
 
-		for d in child_fb_products:
+		for d in explosion.products:
 			self.add_to_cur_exploded_products(
 				frappe._dict(
 					{
-						"product_code": d["product_code"],
-						"product_name": d["product_name"],
-						"source_warehouse": d["source_warehouse"],
-						"operation": d["operation"],
-						"description": d["description"],
-						"stock_uom": d["stock_uom"],
-						"stock_qty": d["qty_consumed_per_unit"] * stock_qty,
-						"rate": flt(d["rate"]),
-						"include_product_in_manufacturing": d.get("include_product_in_manufacturing", 0),
-						"sourced_by_supplier": d.get("sourced_by_supplier", 0),
+						"product_code": d.product_code,
+						"product_name": d.product_name,
+						"source_warehouse": d.source_warehouse,
+						"operation": d.operation,
+						"description": d.description,
+						"stock_uom": d.stock_uom,
+						"stock_qty": d.stock_qty * stock_qty,
+						"rate": flt(d.rate),
+						"include_product_in_manufacturing": d.include_product_in_manufacturing or 0,
+						"sourced_by_supplier": d.sourced_by_supplier or 0,
 					}
 				)
 			)
@@ -1005,25 +992,30 @@ def get_bom_products_as_dict(
 ):
 	product_dict = {}
 
-	# Did not use qty_consumed_per_unit in the query, as it leads to rounding loss
-	query = """select
+	if cint(fetch_exploded) or not fetch_scrap_products:
+		products = get_products_from_bom_explosion(
+			bom, company, qty, fetch_exploded, include_non_stock_products, fetch_qty_in_stock_uom
+		)
+	else:
+		products = frappe.db.sql(
+			"""select
 				bom_product.product_code,
 				bom_product.idx,
 				product.product_name,
-				sum(bom_product.{qty_field}/ifnull(bom.quantity, 1)) * %(qty)s as qty,
+				sum(bom_product.stock_qty/ifnull(bom.quantity, 1)) * %(qty)s as qty,
 				product.image,
 				bom.project,
 				bom_product.rate,
-				sum(bom_product.{qty_field}/ifnull(bom.quantity, 1)) * bom_product.rate * %(qty)s as amount,
+				sum(bom_product.stock_qty/ifnull(bom.quantity, 1)) * bom_product.rate * %(qty)s as amount,
 				product.stock_uom,
 				product.product_group,
 				product.allow_alternative_product,
 				product_default.default_warehouse,
 				product_default.expense_account as expense_account,
-				product_default.buying_cost_center as cost_center
-				{select_columns}
+				product_default.buying_cost_center as cost_center,
+				product.description
 			from
-				`tab{table}` bom_product
+				`tabBOM Scrap Product` bom_product
 				JOIN `tabBOM` bom ON bom_product.parent = bom.name
 				JOIN `tabProduct` product ON product.name = bom_product.product_code
 				LEFT JOIN `tabProduct Default` product_default
@@ -1032,47 +1024,14 @@ def get_bom_products_as_dict(
 				bom_product.docstatus < 2
 				and bom.name = %(bom)s
 				and product.is_stock_product in (1, {is_stock_product})
-				{where_conditions}
 				group by product_code, stock_uom
-				order by idx"""
-
-	is_stock_product = 0 if include_non_stock_products else 1
-	if cint(fetch_exploded):
-		query = query.format(
-			table="BOM Explosion Product",
-			where_conditions="",
-			is_stock_product=is_stock_product,
-			qty_field="stock_qty",
-			select_columns=""", bom_product.source_warehouse, bom_product.operation,
-				bom_product.include_product_in_manufacturing, bom_product.description, bom_product.rate, bom_product.sourced_by_supplier,
-				(Select idx from `tabBOM Product` where product_code = bom_product.product_code and parent = %(parent)s limit 1) as idx""",
+				order by idx""".format(
+				is_stock_product=0 if include_non_stock_products else 1
+			),
+			{"qty": qty, "bom": bom, "company": company},
+			as_dict=True,
 		)
 
-		products = frappe.db.sql(
-			query, {"parent": bom, "qty": qty, "bom": bom, "company": company}, as_dict=True
-		)
-	elif fetch_scrap_products:
-		query = query.format(
-			table="BOM Scrap Product",
-			where_conditions="",
-			select_columns=", product.description",
-			is_stock_product=is_stock_product,
-			qty_field="stock_qty",
-		)
-
-		products = frappe.db.sql(query, {"qty": qty, "bom": bom, "company": company}, as_dict=True)
-	else:
-		query = query.format(
-			table="BOM Product",
-			where_conditions="",
-			is_stock_product=is_stock_product,
-			qty_field="stock_qty" if fetch_qty_in_stock_uom else "qty",
-			select_columns=""", bom_product.uom, bom_product.conversion_factor, bom_product.source_warehouse,
-				bom_product.operation, bom_product.include_product_in_manufacturing, bom_product.sourced_by_supplier,
-				bom_product.description, bom_product.base_rate as rate """,
-		)
-		products = frappe.db.sql(query, {"qty": qty, "bom": bom, "company": company}, as_dict=True)
-
 	for product in products:
 		if product.product_code in product_dict:
 			product_dict[product.product_code]["qty"] += flt(product.qty)
@@ -1092,6 +1051,194 @@ def get_bom_products_as_dict(
 	return product_dict
 
 
+def get_products_from_bom_explosion(
+	bom,
+	company,
+	qty=1,
+	fetch_exploded=1,
+	include_non_stock_products=False,
+	fetch_qty_in_stock_uom=True,
+):
+	"""Returns products of the BOM for `qty` from the cached explosion, grouped by product in order
+	of idx, with the product details and defaults of the company"""
+	explosion = get_bom_explosion(bom, fetch_exploded)
+	product_details = get_product_details_for_bom_explosion(
+		{d.product_code for d in explosion.products}, company
+	)
+
+	if any(d.product_code not in product_details for d in explosion.products):
+		# a product was renamed after the explosion was cached, rebuild instead of dropping it
+		clear_bom_explosion_cache(bom)
+		explosion = get_bom_explosion(bom, fetch_exploded)
+		product_details = get_product_details_for_bom_explosion(
+			{d.product_code for d in explosion.products}, company
+		)
+
+	if explosion.docstatus not in (0, 1):
+		return []
+
+	qty_field = "stock_qty" if cint(fetch_exploded) or fetch_qty_in_stock_uom else "qty"
+
+	products = {}
+	for d in explosion.products:
+		product = product_details.get(d.product_code)
+		if not product or not (product.is_stock_product or include_non_stock_products):
+			continue
+
+		if d.product_code in products:
+			products[d.product_code].qty += flt(d.get(qty_field)) * flt(qty)
+			continue
+
+		row = frappe._dict(
+			{
+				"product_code": d.product_code,
+				"idx": d.idx,
+				"product_name": product.product_name,
+				"qty": flt(d.get(qty_field)) * flt(qty),
+				"image": product.image,
+				"project": explosion.project,
+				"bom_rate": flt(d.rate),
+				"rate": d.rate,
+				"stock_uom": product.stock_uom,
+				"product_group": product.product_group,
+				"allow_alternative_product": product.allow_alternative_product,
+				"default_warehouse": product.default_warehouse,
+				"expense_account": product.expense_account,
+				"cost_center": product.cost_center,
+				"source_warehouse": d.source_warehouse,
+				"operation": d.operation,
+				"include_product_in_manufacturing": d.include_product_in_manufacturing,
+				"description": d.description,
+				"sourced_by_supplier": d.sourced_by_supplier,
+			}
+		)
+
+		if not cint(fetch_exploded):
+			row.update({"uom": d.uom, "conversion_factor": d.conversion_factor, "rate": d.base_rate})
+
+		products[d.product_code] = row
+
+	for row in products.values():
+		row.amount = row.qty * row.pop("bom_rate")
+
+	# products not in BOM Products of an exploded BOM come first, same as ordering by a null idx
+	return sorted(products.values(), key=lambda d: (d.idx is not None, cint(d.idx)))
+
+
+def get_product_details_for_bom_explosion(product_codes, company):
+	if not product_codes:
+		return {}
+
+	product = frappe.qb.DocType("Product")
+	product_default = frappe.qb.DocType("Product Default")
+
+	products = (
+		frappe.qb.from_(product)
+		.left_join(product_default)
+		.on((product_default.parent == product.name) & (product_default.company == company))
+		.select(
+			product.name,
+			product.product_name,
+			product.image,
+			product.stock_uom,
+			product.product_group,
+			product.allow_alternative_product,
+			product.is_stock_product,
+			product_default.default_warehouse,
+			product_default.expense_account,
+			product_default.buying_cost_center.as_("cost_center"),
+		)
+		.where(product.name.isin(list(product_codes)))
+	).run(as_dict=True)
+
+	return {d.name: d for d in products}
+
+
+def get_bom_explosion(bom_no, fetch_exploded=1):
+	"""Returns the BOM with its rows per unit of the BOM quantity, cached until the BOM changes.
+
+	Rows are the BOM Explosion Products with `fetch_exploded`, else the BOM Products. The cached
+	values are shared, callers must not modify them."""
+	key = f"{bom_no}::{cint(fetch_exploded)}"
+	explosion = frappe.cache().hget("bom_explosion", key)
+
+	if not explosion or explosion.get("version") != BOM_EXPLOSION_CACHE_VERSION:
+		explosion = make_bom_explosion(bom_no, cint(fetch_exploded))
+		frappe.cache().hset("bom_explosion", key, explosion)
+
+	return explosion
+
+
+def make_bom_explosion(bom_no, fetch_exploded=1):
+	bom = frappe.db.get_value(
+		"BOM", bom_no, ["docstatus", "product", "project", "quantity"], as_dict=True
+	) or frappe._dict()
+
+	fields = [
+		"idx",
+		"product_code",
+		"product_name",
+		"description",
+		"source_warehouse",
+		"operation",
+		"stock_uom",
+		"stock_qty",
+		"rate",
+		"include_product_in_manufacturing",
+		"sourced_by_supplier",
+	]
+
+	if fetch_exploded:
+		products = frappe.get_all(
+			"BOM Explosion Product", filters={"parent": bom_no}, fields=fields, order_by="idx"
+		)
+
+		# idx of the product in BOM Products, to keep the order of the BOM
+		product_idx = {}
+		for product_code, idx in frappe.get_all(
+			"BOM Product",
+			filters={"parent": bom_no, "parenttype": "BOM"},
+			fields=["product_code", "idx"],
+			order_by="idx",
+			as_list=True,
+		):
+			product_idx.setdefault(product_code, idx)
+
+		for d in products:
+			d.idx = product_idx.get(d.product_code)
+	else:
+		products = frappe.get_all(
+			"BOM Product",
+			filters={"parent": bom_no, "parenttype": "BOM"},
+			fields=fields + ["bom_no", "qty", "uom", "conversion_factor", "base_rate"],
+			order_by="idx",
+		)
+
+	# Did not use qty_consumed_per_unit, as it leads to rounding loss
+	quantity = flt(bom.quantity) or 1
+	for d in products:
+		d.stock_qty = flt(d.stock_qty) / quantity
+		if not fetch_exploded:
+			d.qty = flt(d.qty) / quantity
+
+	return frappe._dict(
+		version=BOM_EXPLOSION_CACHE_VERSION,
+		docstatus=bom.docstatus,
+		product=bom.product,
+		project=bom.project,
+		products=products,
+	)
+
+
+def clear_bom_explosion_cache(bom_no=None):
+	"Clear cached explosions of the BOM, or of all BOMs"
+	if bom_no:
+		for fetch_exploded in (0, 1):
+			frappe.cache().hdel("bom_explosion", f"{bom_no}::{fetch_exploded}")
+	else:
+		frappe.cache().delete_key("bom_explosion")
+
+
 @frappe.whitelist()
 def get_bom_products(bom, company, qty=1, fetch_exploded=1):
 	products = get_bom_products_as_dict(
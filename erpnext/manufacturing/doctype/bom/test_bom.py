@@ -51,6 +51,53 @@ class TestBOM(FrappeTestCase):
 		self.assertTrue(test_records[0]["products"][1]["product_code"] in products_dict)
 		self.assertEqual(len(products_dict.values()), 3)
 
+	@timeout
+	def test_bom_explosion_cache(self):
+		from erpnext.manufacturing.doctype.bom.bom import get_bom_explosion
+
+		bom = frappe.copy_doc(test_records[2])
+		bom.insert()
+
+		explosion = get_bom_explosion(bom.name, fetch_exploded=0)
+		self.assertEqual(explosion.docstatus, 0)
+		self.assertEqual(
+			[d.product_code for d in explosion.products], [d.product_code for d in bom.products]
+		)
+		self.assertEqual(explosion.products[0].stock_qty, flt(bom.products[0].stock_qty) / bom.quantity)
+
+		# cached explosion should be cleared on update and submit
+		bom.products[0].qty += 1
+		bom.save()
+		explosion = get_bom_explosion(bom.name, fetch_exploded=0)
+		self.assertEqual(explosion.products[0].stock_qty, flt(bom.products[0].stock_qty) / bom.quantity)
+
+		bom.submit()
+		self.assertEqual(get_bom_explosion(bom.name).docstatus, 1)
+		self.assertEqual(
+			sorted(d.product_code for d in get_bom_explosion(bom.name).products),
+			sorted(d.product_code for d in bom.exploded_products),
+		)
+
+	@timeout
+	def test_bom_explosion_cache_after_product_rename(self):
+		from erpnext.manufacturing.doctype.bom.bom import (
+			get_bom_explosion,
+			get_products_from_bom_explosion,
+		)
+
+		prefix = "_Test Rename " + frappe.generate_hash(length=5) + " "
+		bom = create_nested_bom({"FG": {"RM": {}}}, prefix=prefix)
+		stale_explosion = get_bom_explosion(bom.name)
+
+		new_name = frappe.rename_doc("Product", prefix + "RM", prefix + "Renamed RM")
+		products = get_products_from_bom_explosion(bom.name, "_Test Company")
+		self.assertEqual([d.product_code for d in products], [new_name])
+
+		# an explosion cached with the old product code is rebuilt instead of dropping the product
+		frappe.cache().hset("bom_explosion", f"{bom.name}::1", stale_explosion)
+		products = get_products_from_bom_explosion(bom.name, "_Test Company")
+		self.assertEqual([d.product_code for d in products], [new_name])
+
 	@timeout
 	def test_get_products_list(self):
 		from erpnext.manufacturing.doctype.bom.bom import get_bom_products
@@ -2,15 +2,86 @@
 # For license information, please see license.txt
 
 import copy
-import json
-from collections import defaultdict
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 
 if TYPE_CHECKING:
 	from erpnext.manufacturing.doctype.bom_update_log.bom_update_log import BOMUpdateLog
 
 import frappe
 from frappe import _
+from frappe.model.meta import get_field_precision
+from frappe.query_builder.functions import IfNull, Sum
+from frappe.utils import create_batch, flt
+from pypika import Case
+
+from erpnext.manufacturing.doctype.bom.bom import (
+	BOMRecursionError,
+	clear_bom_explosion_cache,
+	get_bom_product_rate,
+	get_valuation_rate,
+)
+
+BOM_FIELDS = (
+	"company",
+	"currency",
+	"quantity",
+	"conversion_rate",
+	"plc_conversion_rate",
+	"rm_cost_as_per",
+	"buying_price_list",
+	"set_rate_of_sub_assembly_product_based_on_bom",
+	"with_operations",
+	"fg_based_operating_cost",
+	"operating_cost_per_bom_quantity",
+)
+
+CHILD_TABLES = {
+	"operations": (
+		"BOM Operation",
+		("workstation", "time_in_mins", "batch_size", "set_cost_based_on_bom_qty"),
+	),
+	"products": (
+		"BOM Product",
+		(
+			"product_code",
+			"bom_no",
+			"qty",
+			"uom",
+			"stock_uom",
+			"stock_qty",
+			"conversion_factor",
+			"sourced_by_supplier",
+		),
+	),
+	"scrap_products": ("BOM Scrap Product", ("rate", "stock_qty")),
+	"exploded_products": ("BOM Explosion Product", ("product_code", "stock_qty")),
+}
+
+# fields written back by the cost update
+COST_FIELDS = {
+	"BOM": (
+		"operating_cost",
+		"base_operating_cost",
+		"raw_material_cost",
+		"base_raw_material_cost",
+		"scrap_material_cost",
+		"base_scrap_material_cost",
+		"total_cost",
+		"base_total_cost",
+	),
+	"BOM Operation": (
+		"hour_rate",
+		"base_hour_rate",
+		"operating_cost",
+		"base_operating_cost",
+		"cost_per_unit",
+		"base_cost_per_unit",
+	),
+	"BOM Product": ("rate", "base_rate", "amount", "base_amount", "qty_consumed_per_unit"),
+	"BOM Scrap Product": ("base_rate", "amount", "base_amount"),
+	"BOM Explosion Product": ("rate", "amount"),
+}
 
 
 def replace_bom(boms: Dict, log_name: str) -> None:
@@ -23,6 +94,7 @@ def replace_bom(boms: Dict, log_name: str) -> None:
 	update_new_bom_in_bom_products(unit_cost, current_bom, new_bom)
 
 	frappe.cache().delete_key("bom_children")
+	clear_bom_explosion_cache()
 	parent_boms = get_ancestor_boms(new_bom)
 
 	for bom in parent_boms:
@@ -35,6 +107,8 @@ def replace_bom(boms: Dict, log_name: str) -> None:
 		bom_obj.calculate_cost()
 		bom_obj.update_parent_cost()
 		bom_obj.db_update()
+		# may have been cached from old rows while exploding an ancestor processed earlier
+		clear_bom_explosion_cache(bom)
 		bom_obj.flags.updater_reference = {
 			"doctype": "BOM Update Log",
 			"docname": log_name,
@@ -43,32 +117,6 @@ def replace_bom(boms: Dict, log_name: str) -> None:
 		bom_obj.save_version()
 
 
-def update_cost_in_level(
-	doc: "BOMUpdateLog", bom_list: List[str], batch_name: Union[int, str]
-) -> None:
-	"Updates Cost for BOMs within a given level. Runs via background jobs."
-
-	try:
-		status = frappe.db.get_value("BOM Update Log", doc.name, "status")
-		if status == "Failed":
-			return
-
-		update_cost_in_boms(bom_list=bom_list)  # main updation logic
-
-		bom_batch = frappe.qb.DocType("BOM Update Batch")
-		(
-			frappe.qb.update(bom_batch)
-			.set(bom_batch.boms_updated, json.dumps(bom_list))
-			.set(bom_batch.status, "Completed")
-			.where(bom_batch.name == batch_name)
-		).run()
-	except Exception:
-		handle_exception(doc)
-	finally:
-		if not frappe.flags.in_test:
-			frappe.db.commit()  # nosemgrep
-
-
 def get_ancestor_boms(new_bom: str, bom_list: Optional[List] = None) -> List:
 	"Recursively get all ancestors of BOM."
 
@@ -114,55 +162,10 @@ def get_bom_unit_cost(bom_name: str) -> float:
 	return frappe.utils.flt(new_bom_unitcost[0][0])
 
 
-def update_cost_in_boms(bom_list: List[str]) -> None:
-	"Updates cost in given BOMs. Returns current and total updated BOMs."
-
-	for index, bom in enumerate(bom_list):
-		bom_doc = frappe.get_doc("BOM", bom, for_update=True)
-		bom_doc.calculate_cost(save_updates=True, update_hour_rate=True)
-		bom_doc.db_update()
-
-		if (index % 50 == 0) and not frappe.flags.in_test:
-			frappe.db.commit()  # nosemgrep
-
-
-def get_next_higher_level_boms(
-	child_boms: List[str], processed_boms: Dict[str, bool]
-) -> List[str]:
-	"Generate immediate higher level dependants with no unresolved dependencies (children)."
-
-	def _all_children_are_processed(parent_bom):
-		child_boms = dependency_map.get(parent_bom)
-		return all(processed_boms.get(bom) for bom in child_boms)
-
-	dependants_map, dependency_map = _generate_dependence_map()
-
-	dependants = []
-	for bom in child_boms:
-		# generate list of immediate dependants
-		parents = dependants_map.get(bom) or []
-		dependants.extend(parents)
-
-	dependants = set(dependants)  # remove duplicates
-	resolved_dependants = set()
-
-	# consider only if children are all resolved
-	for parent_bom in dependants:
-		if _all_children_are_processed(parent_bom):
-			resolved_dependants.add(parent_bom)
-
-	return list(resolved_dependants)
+def update_cost_in_all_boms() -> None:
+	"Updates cost in all active submitted BOMs, sub-assembly BOMs first."
 
-
-def get_leaf_boms() -> List[str]:
-	"Get BOMs that have no dependencies."
-
-	return frappe.db.sql_list(
-		"""select name from `tabBOM` bom
-		where docstatus=1 and is_active=1
-			and not exists(select bom_no from `tabBOM Product`
-				where parent=bom.name and ifnull(bom_no, '')!='')"""
-	)
+	BOMCostRollup().run()
 
 
 def _generate_dependence_map() -> defaultdict:
@@ -200,6 +203,389 @@ def _generate_dependence_map() -> defaultdict:
 	return child_parent_map, parent_child_map
 
 
+def get_bom_costing_order(boms: Set[str]) -> List[str]:
+	"Order BOMs such that every BOM comes after all the BOMs it depends on."
+
+	dependants_map, dependency_map = _generate_dependence_map()
+	pending_dependencies = {bom: set(dependency_map.get(bom, [])) & boms for bom in boms}
+
+	costing_order = []
+	resolved = deque(bom for bom, dependencies in pending_dependencies.items() if not dependencies)
+	while resolved:
+		bom = resolved.popleft()
+		costing_order.append(bom)
+
+		for parent_bom in set(dependants_map.get(bom, [])):
+			dependencies = pending_dependencies.get(parent_bom)
+			if dependencies and bom in dependencies:
+				dependencies.discard(bom)
+				if not dependencies:
+					resolved.append(parent_bom)
+
+	if len(costing_order) < len(boms):
+		unresolved = sorted(boms - set(costing_order))
+		frappe.throw(
+			_("BOM recursion found in {0}").format(", ".join(unresolved[:10])),
+			exc=BOMRecursionError,
+		)
+
+	return costing_order
+
+
+class BOMCostRollup:
+	"""Updates the costs of all active submitted BOMs in a single pass.
+
+	All BOMs with their rows are loaded upfront and costed in memory in dependency order, same
+	as `BOM.calculate_cost`, so that the cost of a sub-assembly BOM is final before the BOMs
+	using it are costed. Only the changed rows are written back, in bulk."""
+
+	def __init__(self):
+		self.boms = {}
+		self.product_details = {}
+		self.workstation_hour_rates = {}
+		self.bin_valuation_rates = {}
+		self.valuation_rates = {}
+		self.sub_assembly_unit_costs = {}
+		self.exploded_rates = {}
+		self.precisions = {}
+		self.changes = defaultdict(dict)
+
+	def run(self):
+		self.load_boms()
+		self.load_sub_assembly_boms()
+		self.load_product_details()
+		self.load_bin_valuation_rates()
+		self.workstation_hour_rates = frappe._dict(
+			frappe.get_all("Workstation", fields=["name", "hour_rate"], as_list=True)
+		)
+
+		for bom_name in get_bom_costing_order(set(self.boms)):
+			self.calculate_cost(self.boms[bom_name])
+
+		try:
+			self.write_changes()
+		finally:
+			# batches written before a failure are committed
+			clear_bom_explosion_cache()
+
+	def load_boms(self):
+		bom = frappe.qb.DocType("BOM")
+		boms = (
+			frappe.qb.from_(bom)
+			.select(bom.name, *[bom[field] for field in BOM_FIELDS + COST_FIELDS["BOM"]])
+			.where((bom.docstatus == 1) & (bom.is_active == 1))
+		).run(as_dict=True)
+
+		for d in boms:
+			d.rm_cost_as_per = d.rm_cost_as_per or "Valuation Rate"
+			for parentfield in CHILD_TABLES:
+				d[parentfield] = []
+			self.boms[d.name] = d
+
+		for parentfield, (doctype, fields) in CHILD_TABLES.items():
+			child = frappe.qb.DocType(doctype)
+			rows = (
+				frappe.qb.from_(child)
+				.inner_join(bom)
+				.on(child.parent == bom.name)
+				.select(child.name, child.parent, *[child[field] for field in fields + COST_FIELDS[doctype]])
+				.where(
+					(bom.docstatus == 1)
+					& (bom.is_active == 1)
+					& (child.parenttype == "BOM")
+					& (child.parentfield == parentfield)
+				)
+				.orderby(child.parent)
+				.orderby(child.idx)
+			).run(as_dict=True)
+
+			for row in rows:
+				self.boms[row.parent][parentfield].append(row)
+
+	def load_sub_assembly_boms(self):
+		"Unit costs and exploded rates of the sub-assembly BOMs that are not costed here."
+
+		bom_nos = {
+			row.bom_no for bom in self.boms.values() for row in bom.products if row.bom_no
+		} - set(self.boms)
+
+		bom = frappe.qb.DocType("BOM")
+		explosion_product = frappe.qb.DocType("BOM Explosion Product")
+		for batch in create_batch(sorted(bom_nos), 1000):
+			self.sub_assembly_unit_costs.update(
+				(
+					frappe.qb.from_(bom)
+					.select(bom.name, bom.base_total_cost / bom.quantity)
+					.where((bom.name.isin(batch)) & (bom.is_active == 1))
+				).run()
+			)
+
+			for parent, product_code, rate in (
+				frappe.qb.from_(explosion_product)
+				.select(explosion_product.parent, explosion_product.product_code, explosion_product.rate)
+				.where(explosion_product.parent.isin(batch))
+			).run():
+				self.exploded_rates.setdefault(parent, {})[product_code] = flt(rate)
+
+	def load_product_details(self):
+		product_codes = {row.product_code for bom in self.boms.values() for row in bom.products}
+		for batch in create_batch(sorted(product_codes), 1000):
+			for d in frappe.get_all(
+				"Product",
+				filters={"name": ("in", batch)},
+				fields=["name", "is_customer_provided_product", "last_purchase_rate", "valuation_rate"],
+			):
+				self.product_details[d.name] = d
+
+	def load_bin_valuation_rates(self):
+		"Average valuation rate of products across the warehouses of each company, from Bins."
+
+		product_codes = {
+			row.product_code
+			for bom in self.boms.values()
+			if bom.rm_cost_as_per == "Valuation Rate"
+			for row in bom.products
+		}
+
+		bin = frappe.qb.DocType("Bin")
+		warehouse = frappe.qb.DocType("Warehouse")
+		for batch in create_batch(sorted(product_codes), 1000):
+			for product_code, company, valuation_rate in (
+				frappe.qb.from_(bin)
+				.inner_join(warehouse)
+				.on(bin.warehouse == warehouse.name)
+				.select(
+					bin.product_code,
+					warehouse.company,
+					IfNull(Sum(bin.stock_value) / Sum(bin.actual_qty), 0.0),
+				)
+				.where(bin.product_code.isin(batch))
+				.groupby(bin.product_code, warehouse.company)
+			).run():
+				self.bin_valuation_rates[(product_code, company)] = flt(valuation_rate)
+
+	def get_precision(self, doctype, fieldname, bom):
+		key = (doctype, fieldname, bom.currency)
+		if key not in self.precisions:
+			df = frappe.get_meta(doctype).get_field(fieldname)
+			self.precisions[key] = get_field_precision(df, bom)
+
+		return self.precisions[key]
+
+	def calculate_cost(self, bom):
+		operating_cost, base_operating_cost = self.calculate_operating_cost(bom)
+		raw_material_cost, base_raw_material_cost = self.calculate_raw_material_cost(bom)
+		scrap_material_cost, base_scrap_material_cost = self.calculate_scrap_material_cost(bom)
+		self.calculate_exploded_cost(bom)
+
+		self.update_row(
+			"BOM",
+			bom,
+			{
+				"operating_cost": operating_cost,
+				"base_operating_cost": base_operating_cost,
+				"raw_material_cost": raw_material_cost,
+				"base_raw_material_cost": base_raw_material_cost,
+				"scrap_material_cost": scrap_material_cost,
+				"base_scrap_material_cost": base_scrap_material_cost,
+				"total_cost": operating_cost + raw_material_cost - scrap_material_cost,
+				"base_total_cost": base_operating_cost + base_raw_material_cost - base_scrap_material_cost,
+			},
+		)
+
+	def calculate_operating_cost(self, bom):
+		operating_cost = base_operating_cost = 0.0
+		conversion_rate = flt(bom.conversion_rate)
+
+		if bom.with_operations:
+			for row in bom.operations:
+				if row.workstation:
+					values = {}
+					hour_rate = flt(self.workstation_hour_rates.get(row.workstation))
+					if hour_rate:
+						values["hour_rate"] = hour_rate / conversion_rate if conversion_rate else hour_rate
+
+					hour_rate = flt(values.get("hour_rate", row.hour_rate))
+					if hour_rate and row.time_in_mins:
+						row_operating_cost = hour_rate * flt(row.time_in_mins) / 60.0
+						row_base_operating_cost = row_operating_cost * conversion_rate
+						values.update(
+							{
+								"base_hour_rate": hour_rate * conversion_rate,
+								"operating_cost": row_operating_cost,
+								"base_operating_cost": row_base_operating_cost,
+								"cost_per_unit": row_operating_cost / (row.batch_size or 1.0),
+								"base_cost_per_unit": row_base_operating_cost / (row.batch_size or 1.0),
+							}
+						)
+
+					self.update_row("BOM Operation", row, values)
+
+				if row.set_cost_based_on_bom_qty:
+					operating_cost += flt(row.cost_per_unit) * flt(bom.quantity)
+					base_operating_cost += flt(row.base_cost_per_unit) * flt(bom.quantity)
+				else:
+					operating_cost += flt(row.operating_cost)
+					base_operating_cost += flt(row.base_operating_cost)
+
+		elif bom.fg_based_operating_cost:
+			operating_cost = flt(bom.quantity) * flt(bom.operating_cost_per_bom_quantity)
+			base_operating_cost = flt(operating_cost * conversion_rate, 2)
+
+		return operating_cost, base_operating_cost
+
+	def calculate_raw_material_cost(self, bom):
+		raw_material_cost = base_raw_material_cost = 0.0
+		rate_precision = self.get_precision("BOM Product", "rate", bom)
+		qty_precision = self.get_precision("BOM Product", "qty", bom)
+		stock_qty_precision = self.get_precision("BOM Product", "stock_qty", bom)
+		quantity = flt(bom.quantity, self.get_precision("BOM", "quantity", bom))
+
+		for row in bom.products:
+			rate = self.get_raw_material_rate(bom, row)
+			amount = flt(rate, rate_precision) * flt(row.qty, qty_precision)
+			base_amount = amount * flt(bom.conversion_rate)
+
+			self.update_row(
+				"BOM Product",
+				row,
+				{
+					"rate": rate,
+					"base_rate": rate * flt(bom.conversion_rate),
+					"amount": amount,
+					"base_amount": base_amount,
+					"qty_consumed_per_unit": flt(row.stock_qty, stock_qty_precision) / quantity,
+				},
+			)
+
+			raw_material_cost += amount
+			base_raw_material_cost += base_amount
+
+		return raw_material_cost, base_raw_material_cost
+
+	def get_raw_material_rate(self, bom, row):
+		"Same as `BOM.get_rm_rate`, with the costs of sub-assembly BOMs from memory."
+
+		rate = 0.0
+		product = self.product_details.get(row.product_code) or {}
+
+		# Customer Provided parts and Supplier sourced parts will have zero rate
+		if not product.get("is_customer_provided_product") and not row.sourced_by_supplier:
+			if row.bom_no and bom.set_rate_of_sub_assembly_product_based_on_bom:
+				rate = self.get_bom_unit_cost(row.bom_no) * (row.conversion_factor or 1)
+			elif bom.rm_cost_as_per == "Valuation Rate":
+				rate = self.get_valuation_rate(row.product_code, bom.company) * (row.conversion_factor or 1)
+			elif bom.rm_cost_as_per == "Last Purchase Rate":
+				rate = flt(product.get("last_purchase_rate")) * (row.conversion_factor or 1)
+			else:
+				rate = get_bom_product_rate(
+					{
+						"company": bom.company,
+						"product_code": row.product_code,
+						"bom_no": row.bom_no,
+						"qty": row.qty,
+						"uom": row.uom,
+						"stock_uom": row.stock_uom,
+						"conversion_factor": row.conversion_factor,
+						"sourced_by_supplier": row.sourced_by_supplier,
+					},
+					bom,
+				)
+
+		return flt(rate) * flt(bom.plc_conversion_rate or 1) / (bom.conversion_rate or 1)
+
+	def get_bom_unit_cost(self, bom_no):
+		if bom_no in self.boms:
+			sub_assembly_bom = self.boms[bom_no]
+			if not flt(sub_assembly_bom.quantity):
+				return 0.0
+
+			return flt(sub_assembly_bom.base_total_cost) / flt(sub_assembly_bom.quantity)
+
+		return flt(self.sub_assembly_unit_costs.get(bom_no))
+
+	def get_valuation_rate(self, product_code, company):
+		"Same as `get_valuation_rate` of BOM, with the rates from Bins loaded upfront."
+
+		key = (product_code, company)
+		if key not in self.valuation_rates:
+			valuation_rate = self.bin_valuation_rates.get(key)
+			if valuation_rate is not None and valuation_rate <= 0:
+				# Bins exist without stock value, fallback to the rate of the last entry
+				valuation_rate = get_valuation_rate({"product_code": product_code, "company": company})
+			elif not valuation_rate:
+				valuation_rate = (self.product_details.get(product_code) or {}).get("valuation_rate")
+
+			self.valuation_rates[key] = flt(valuation_rate)
+
+		return self.valuation_rates[key]
+
+	def calculate_scrap_material_cost(self, bom):
+		scrap_material_cost = base_scrap_material_cost = 0.0
+		conversion_rate = flt(bom.conversion_rate, self.get_precision("BOM", "conversion_rate", bom))
+		rate_precision = self.get_precision("BOM Scrap Product", "rate", bom)
+		stock_qty_precision = self.get_precision("BOM Scrap Product", "stock_qty", bom)
+		amount_precision = self.get_precision("BOM Scrap Product", "amount", bom)
+
+		for row in bom.scrap_products:
+			rate = flt(row.rate, rate_precision)
+			amount = rate * flt(row.stock_qty, stock_qty_precision)
+			base_amount = flt(amount, amount_precision) * conversion_rate
+
+			self.update_row(
+				"BOM Scrap Product",
+				row,
+				{"base_rate": rate * conversion_rate, "amount": amount, "base_amount": base_amount},
+			)
+
+			scrap_material_cost += amount
+			base_scrap_material_cost += base_amount
+
+		return scrap_material_cost, base_scrap_material_cost
+
+	def calculate_exploded_cost(self, bom):
+		"Set exploded row rates from the raw materials and the exploded rates of sub-assemblies."
+
+		rm_rate_map = {}
+		for row in bom.products:
+			if row.bom_no:
+				rm_rate_map.update(self.exploded_rates.get(row.bom_no) or {})
+			else:
+				rm_rate_map[row.product_code] = flt(row.base_rate) / flt(row.conversion_factor or 1.0)
+
+		for row in bom.exploded_products:
+			rate = flt(rm_rate_map.get(row.product_code))
+			self.update_row(
+				"BOM Explosion Product", row, {"rate": rate, "amount": flt(row.stock_qty) * rate}
+			)
+
+		self.exploded_rates[bom.name] = {
+			row.product_code: flt(row.rate) for row in bom.exploded_products
+		}
+
+	def update_row(self, doctype, row, values):
+		"Set the values in the row and stage it to be written if any of them changed."
+
+		if any(flt(row.get(fieldname)) != flt(value) for fieldname, value in values.items()):
+			row.update(values)
+			self.changes[doctype][row.name] = row
+
+	def write_changes(self):
+		for doctype, rows in self.changes.items():
+			table = frappe.qb.DocType(doctype)
+			for batch in create_batch(list(rows), 500):
+				query = frappe.qb.update(table).where(table.name.isin(batch))
+				for fieldname in COST_FIELDS[doctype]:
+					values = Case()
+					for name in batch:
+						values = values.when(table.name == name, rows[name].get(fieldname))
+					query = query.set(table[fieldname], values)
+				query.run()
+
+				if not frappe.flags.in_test:
+					frappe.db.commit()  # nosemgrep
+
+
 def set_values_in_log(log_name: str, values: Dict[str, Any], commit: bool = False) -> None:
 	"Update BOM Update Log record."
 
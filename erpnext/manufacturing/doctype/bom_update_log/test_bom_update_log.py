@@ -4,14 +4,13 @@
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
-from erpnext.manufacturing.doctype.bom_update_log.bom_update_log import (
-	BOMMissingError,
-	resume_bom_cost_update_jobs,
-)
+from erpnext.manufacturing.doctype.bom_update_log.bom_update_log import BOMMissingError
 from erpnext.manufacturing.doctype.bom_update_tool.bom_update_tool import (
 	enqueue_replace_bom,
 	enqueue_update_cost,
 )
+from erpnext.manufacturing.doctype.production_plan.test_production_plan import make_bom
+from erpnext.stock.doctype.product.test_product import create_product
 
 test_records = frappe.get_test_records("BOM")
 
@@ -57,15 +56,52 @@ class TestBOMUpdateLog(FrappeTestCase):
 		log.reload()
 		self.assertEqual(log.status, "Completed")
 
+	def test_bom_cost_update_of_multi_level_boms(self):
+		"Test if sub-assembly costs roll up to the parent BOMs in a single run."
+
+		for product in ("_Test Rollup RM 1", "_Test Rollup RM 2"):
+			create_product(product, valuation_rate=100)
+			frappe.db.set_value("Product", product, "valuation_rate", 100)
+
+		for product in ("_Test Rollup Sub Assembly", "_Test Rollup FG"):
+			create_product(product)
+
+		sub_assembly_bom = make_bom(
+			product="_Test Rollup Sub Assembly",
+			raw_materials=["_Test Rollup RM 1", "_Test Rollup RM 2"],
+			rm_qty=2,
+			currency="INR",
+		)
+		fg_bom = make_bom(
+			product="_Test Rollup FG",
+			raw_materials=["_Test Rollup Sub Assembly", "_Test Rollup RM 1"],
+			currency="INR",
+		)
+		self.assertEqual(fg_bom.products[0].bom_no, sub_assembly_bom.name)
+
+		frappe.db.set_value("Product", "_Test Rollup RM 1", "valuation_rate", 150)
+		log = update_cost_in_all_boms_in_test()
+		self.assertEqual(log.status, "Completed")
+
+		sub_assembly_bom.load_from_db()
+		fg_bom.load_from_db()
+		self.assertEqual(sub_assembly_bom.total_cost, 500)
+		self.assertEqual(fg_bom.total_cost, 650)
+
+		exploded_rates = {row.product_code: row.rate for row in fg_bom.exploded_products}
+		self.assertEqual(exploded_rates, {"_Test Rollup RM 1": 150, "_Test Rollup RM 2": 100})
+
+		# costs should match costing each BOM by itself
+		for bom in (sub_assembly_bom, fg_bom):
+			total_cost = bom.total_cost
+			bom.calculate_cost()
+			self.assertEqual(bom.total_cost, total_cost)
 
 def update_cost_in_all_boms_in_test():
 	"""
-	Utility to run 'Update Cost' job in tests without Cron job until fully complete.
+	Utility to run 'Update Cost' job in tests until complete.
 	"""
-	log = enqueue_update_cost()  # create BOM Update Log
-
-	while log.status != "Completed":
-		resume_bom_cost_update_jobs()  # run cron job until complete
-		log.reload()
+	log = enqueue_update_cost()  # create BOM Update Log, job runs immediately in tests
+	log.reload()
 
 	return log
@@ -14,6 +14,7 @@ from frappe.utils import (
 	ceil,
 	cint,
 	comma_and,
+	create_batch,
 	flt,
 	get_link_to_form,
 	getdate,
@@ -23,11 +24,9 @@ from frappe.utils import (
 from frappe.utils.csvutils import build_csv_response
 from pypika.terms import ExistsCriterion
 
-from erpnext.manufacturing.doctype.bom.bom import get_children as get_bom_children
-from erpnext.manufacturing.doctype.bom.bom import validate_bom_no
+from erpnext.manufacturing.doctype.bom.bom import get_bom_explosion, validate_bom_no
 from erpnext.manufacturing.doctype.work_order.work_order import get_product_details
-from erpnext.setup.doctype.product_group.product_group import get_product_group_defaults
-from erpnext.stock.get_product_details import get_conversion_factor
+from erpnext.stock.get_product_details import ProductDetailsCache, get_conversion_factor
 from erpnext.stock.utils import get_or_make_bin
 from erpnext.utilities.transaction_base import validate_uom_is_integer
 
@@ -1038,9 +1037,124 @@ def get_subproducts(
 	return product_details
 
 
+class MaterialRequestPlanningData:
+	"""Bins, defaults and UOM details of all the products to be netted for Material Requests,
+	loaded at once instead of querying per product"""
+
+	def __init__(self, rows, company, warehouse=None):
+		self.company = company
+		self.warehouse = warehouse
+		product_codes = list({d.product_code for d in rows}) or [""]
+
+		self.products = {
+			d.name: d
+			for d in frappe.get_all(
+				"Product",
+				filters={"name": ("in", product_codes)},
+				fields=["name", "purchase_uom", "stock_uom", "product_group"],
+			)
+		}
+
+		self.product_group_defaults = {}
+		for d in frappe.get_all(
+			"Product Default",
+			filters={
+				"parenttype": "Product Group",
+				"parent": ("in", list({d.product_group for d in self.products.values()}) or [""]),
+				"company": company,
+			},
+			fields=["parent", "default_warehouse"],
+			order_by="idx",
+		):
+			self.product_group_defaults.setdefault(d.parent, d)
+
+		uoms = {d.get("purchase_uom") or d.get("stock_uom") for d in rows}
+		self.whole_number_uoms = set(
+			frappe.get_all(
+				"UOM",
+				filters={"name": ("in", list(uoms) or [""]), "must_be_whole_number": 1},
+				pluck="name",
+			)
+		)
+
+		self.purchase_conversion_factors = {}
+		with ProductDetailsCache(product_codes, []):
+			for d in self.products.values():
+				if d.purchase_uom and d.purchase_uom != d.stock_uom:
+					self.purchase_conversion_factors[d.name] = (
+						get_conversion_factor(d.name, d.purchase_uom).get("conversion_factor") or 1.0
+					)
+
+		self.bins = get_bin_details_of_products(rows, company, warehouse)
+
+	def get_bin_details(self, row):
+		"Same as the first row of `get_bin_details` for the row"
+		return self.bins.get((row.product_code, self.get_bin_warehouse(row))) or {}
+
+	def get_bin_warehouse(self, row):
+		return self.warehouse or row.get("source_warehouse") or row.get("default_warehouse")
+
+	def get_product_group_defaults(self, product_code):
+		product_group = (self.products.get(product_code) or {}).get("product_group")
+		return self.product_group_defaults.get(product_group) or frappe._dict()
+
+
+def get_bin_details_of_products(rows, company, for_warehouse=None):
+	"""Returns {(product_code, warehouse): bin details} with the first row of `get_bin_details` of
+	each row, `warehouse` being the warehouse under which the Bins are considered"""
+	product_codes_by_warehouse = {}
+	for row in rows:
+		warehouse = for_warehouse or row.get("source_warehouse") or row.get("default_warehouse")
+		product_codes_by_warehouse.setdefault(warehouse, set()).add(row.product_code)
+
+	bin = frappe.qb.DocType("Bin")
+	wh = frappe.qb.DocType("Warehouse")
+
+	bin_details = {}
+	for warehouse, product_codes in product_codes_by_warehouse.items():
+		for batch in create_batch(sorted(product_codes), 1000):
+			query = (
+				frappe.qb.from_(bin)
+				.inner_join(wh)
+				.on(wh.name == bin.warehouse)
+				.select(
+					bin.product_code,
+					bin.warehouse,
+					IfNull(Sum(bin.projected_qty), 0).as_("projected_qty"),
+					IfNull(Sum(bin.actual_qty), 0).as_("actual_qty"),
+					IfNull(Sum(bin.ordered_qty), 0).as_("ordered_qty"),
+					IfNull(Sum(bin.reserved_qty_for_production), 0).as_("reserved_qty_for_production"),
+					IfNull(Sum(bin.planned_qty), 0).as_("planned_qty"),
+				)
+				.where((wh.company == company) & (bin.product_code.isin(batch)))
+				.groupby(bin.product_code, bin.warehouse)
+				.orderby(bin.product_code)
+				.orderby(bin.warehouse)
+			)
+
+			if warehouse:
+				lft, rgt = frappe.db.get_value("Warehouse", warehouse, ["lft", "rgt"])
+				query = query.where((wh.lft >= lft) & (wh.rgt <= rgt))
+
+			for d in query.run(as_dict=True):
+				bin_details.setdefault((d.pop("product_code"), warehouse), d)
+
+	return bin_details
+
+
 def get_material_request_products(
-	row, sales_order, company, ignore_existing_ordered_qty, include_safety_stock, warehouse, bin_dict
+	row,
+	sales_order,
+	company,
+	ignore_existing_ordered_qty,
+	include_safety_stock,
+	warehouse,
+	bin_dict,
+	planning_data=None,
 ):
+	if not planning_data:
+		planning_data = MaterialRequestPlanningData([row], company, warehouse)
+
 	total_qty = row["qty"]
 
 	required_qty = 0
@@ -1050,7 +1164,7 @@ def get_material_request_products(
 		required_qty = total_qty - bin_dict.get("projected_qty", 0)
 	if required_qty > 0 and required_qty < row["min_order_qty"]:
 		required_qty = row["min_order_qty"]
-	product_group_defaults = get_product_group_defaults(row.product_code, company)
+	product_group_defaults = planning_data.get_product_group_defaults(row.product_code)
 
 	if not row["purchase_uom"]:
 		row["purchase_uom"] = row["stock_uom"]
@@ -1065,25 +1179,15 @@ def get_material_request_products(
 
 			required_qty = required_qty / row["conversion_factor"]
 
-	if frappe.db.get_value("UOM", row["purchase_uom"], "must_be_whole_number"):
+	if row["purchase_uom"] in planning_data.whole_number_uoms:
 		required_qty = ceil(required_qty)
 
 	if include_safety_stock:
 		required_qty += flt(row["safety_stock"])
 
-	product_details = frappe.get_cached_value(
-		"Product", row.product_code, ["purchase_uom", "stock_uom"], as_dict=1
-	)
-
 	conversion_factor = 1.0
-	if (
-		row.get("default_material_request_type") == "Purchase"
-		and product_details.purchase_uom
-		and product_details.purchase_uom != product_details.stock_uom
-	):
-		conversion_factor = (
-			get_conversion_factor(row.product_code, product_details.purchase_uom).get("conversion_factor") or 1.0
-		)
+	if row.get("default_material_request_type") == "Purchase":
+		conversion_factor = planning_data.purchase_conversion_factors.get(row.product_code, 1.0)
 
 	if required_qty > 0:
 		return {
@@ -1378,25 +1482,30 @@ def get_products_for_material_requests(doc, warehouses=None, get_parent_warehous
 			else:
 				so_product_details[sales_order][product_code] = details
 
+	planning_rows = [
+		(sales_order, details)
+		for sales_order, product_dict in so_product_details.items()
+		for details in product_dict.values()
+		if details.qty > 0
+	]
+	planning_data = MaterialRequestPlanningData(
+		[details for sales_order, details in planning_rows], company, warehouse
+	)
+
 	mr_products = []
-	for sales_order, product_code in so_product_details.products():
-		product_dict = so_product_details[sales_order]
-		for details in product_dict.values():
-			bin_dict = get_bin_details(details, doc.company, warehouse)
-			bin_dict = bin_dict[0] if bin_dict else {}
-
-			if details.qty > 0:
-				products = get_material_request_products(
-					details,
-					sales_order,
-					company,
-					ignore_existing_ordered_qty,
-					include_safety_stock,
-					warehouse,
-					bin_dict,
-				)
-				if products:
-					mr_products.append(products)
+	for sales_order, details in planning_rows:
+		products = get_material_request_products(
+			details,
+			sales_order,
+			company,
+			ignore_existing_ordered_qty,
+			include_safety_stock,
+			warehouse,
+			planning_data.get_bin_details(details),
+			planning_data=planning_data,
+		)
+		if products:
+			mr_products.append(products)
 
 	if (not ignore_existing_ordered_qty or get_parent_warehouse_data) and warehouses:
 		new_mr_products = []
@@ -1486,11 +1595,10 @@ def get_product_data(product_code):
 
 
 def get_sub_assembly_products(bom_no, bom_data, to_produce_qty, company, warehouse=None, indent=0):
-	data = get_bom_children(parent=bom_no)
-	for d in data:
-		if d.expandable:
-			parent_product_code = frappe.get_cached_value("BOM", bom_no, "product")
-			stock_qty = (d.stock_qty / d.parent_bom_qty) * flt(to_produce_qty)
+	explosion = get_bom_explosion(bom_no, fetch_exploded=0)
+	for d in explosion.products:
+		if d.bom_no:
+			stock_qty = d.stock_qty * flt(to_produce_qty)
 
 			if warehouse:
 				bin_dict = get_bin_details(d, company, for_warehouse=warehouse)
@@ -1504,14 +1612,9 @@ def get_sub_assembly_products(bom_no, bom_data, to_produce_qty, company, warehou
 			bom_data.append(
 				frappe._dict(
 					{
-						"parent_product_code": parent_product_code,
-						"description": d.description,
+						"parent_product_code": explosion.product,
 						"production_product": d.product_code,
-						"product_name": d.product_name,
-						"stock_uom": d.stock_uom,
-						"uom": d.stock_uom,
-						"bom_no": d.value,
-						"is_sub_contracted_product": d.is_sub_contracted_product,
+						"bom_no": d.bom_no,
 						"bom_level": indent,
 						"indent": indent,
 						"stock_qty": stock_qty,
@@ -1519,8 +1622,36 @@ def get_sub_assembly_products(bom_no, bom_data, to_produce_qty, company, warehou
 				)
 			)
 
-			if d.value:
-				get_sub_assembly_products(d.value, bom_data, stock_qty, company, warehouse, indent=indent + 1)
+			get_sub_assembly_products(d.bom_no, bom_data, stock_qty, company, warehouse, indent=indent + 1)
+
+	if not indent:
+		set_sub_assembly_product_details(bom_data)
+
+
+def set_sub_assembly_product_details(bom_data):
+	if not bom_data:
+		return
+
+	product_details = {
+		d.name: d
+		for d in frappe.get_all(
+			"Product",
+			filters={"name": ("in", list({row.production_product for row in bom_data}))},
+			fields=["name", "product_name", "description", "stock_uom", "is_sub_contracted_product"],
+		)
+	}
+
+	for row in bom_data:
+		product = product_details.get(row.production_product) or {}
+		row.update(
+			{
+				"description": product.get("description"),
+				"product_name": product.get("product_name"),
+				"stock_uom": product.get("stock_uom"),
+				"uom": product.get("stock_uom"),
+				"is_sub_contracted_product": product.get("is_sub_contracted_product"),
+			}
+		)
 
 
 def set_default_warehouses(row, default_warehouses):
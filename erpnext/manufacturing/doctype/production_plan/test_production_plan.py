@@ -6,6 +6,8 @@ from frappe.utils import add_to_date, flt, now_datetime, nowdate
 
 from erpnext.controllers.product_variant import create_variant
 from erpnext.manufacturing.doctype.production_plan.production_plan import (
+	get_bin_details,
+	get_bin_details_of_products,
 	get_products_for_material_requests,
 	get_sales_orders,
 	get_warehouse_list,
@@ -912,6 +914,34 @@ class TestProductionPlan(FrappeTestCase):
 		for product_code in mr_products:
 			self.assertTrue(product_code in validate_mr_products)
 
+	def test_bin_details_of_products(self):
+		"Test if Bins loaded for all products match the Bins of each product."
+		products = [
+			make_product(product_code, properties={"is_stock_product": 1}).name
+			for product_code in ("_Test MRP Product 1", "_Test MRP Product 2", "_Test MRP Product 3")
+		]
+
+		for warehouse in ("_Test Warehouse - _TC", "_Test Warehouse 1 - _TC"):
+			create_stock_reconciliation(product_code=products[0], warehouse=warehouse, qty=10, rate=100)
+		create_stock_reconciliation(
+			product_code=products[1], warehouse="_Test Warehouse 1 - _TC", qty=5, rate=100
+		)
+
+		rows = [
+			frappe._dict(product_code=products[0]),
+			frappe._dict(product_code=products[1], source_warehouse="_Test Warehouse 1 - _TC"),
+			frappe._dict(product_code=products[2], default_warehouse="_Test Warehouse - _TC"),
+		]
+
+		for for_warehouse in (None, "_Test Warehouse 1 - _TC", "All Warehouses - _TC"):
+			bin_details = get_bin_details_of_products(rows, "_Test Company", for_warehouse)
+			for row in rows:
+				warehouse = for_warehouse or row.source_warehouse or row.default_warehouse
+				expected = get_bin_details(row, "_Test Company", for_warehouse=for_warehouse)
+				self.assertEqual(
+					bin_details.get((row.product_code, warehouse)), expected[0] if expected else None
+				)
+
 	def test_resered_qty_for_production_plan_for_material_requests(self):
 		from erpnext.stock.utils import get_or_make_bin
 
@@ -0,0 +1,11 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+
+from erpnext.stock.doctype.stock_ledger_serial_no.stock_ledger_serial_no import (
+	rebuild_serial_no_index,
+)
+
+
+def execute():
+	rebuild_serial_no_index()
@@ -0,0 +1,11 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+
+from erpnext.accounts.doctype.voucher_outstanding.voucher_outstanding import (
+	rebuild_voucher_outstandings,
+)
+
+
+def execute():
+	rebuild_voucher_outstandings()
@@ -0,0 +1,20 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+
+import frappe
+
+
+def execute():
+	"""BOM cost updates now run as a single job, fail logs still waiting for the next level."""
+	bom_update_log = frappe.qb.DocType("BOM Update Log")
+	(
+		frappe.qb.update(bom_update_log)
+		.set(bom_update_log.status, "Failed")
+		.where(
+			(bom_update_log.update_type == "Update Cost")
+			& (bom_update_log.status.isin(["Queued", "In Progress"]))
+		)
+	).run()
+
+	frappe.db.delete("BOM Update Batch")
@@ -0,0 +1,23 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# License: MIT. See LICENSE
+
+
+import frappe
+
+
+def execute():
+	# update one year at a time to keep the transactions small on large ledgers
+	years = frappe.db.sql_list(
+		"select distinct year(posting_date) from `tabStock Ledger Entry` order by 1"
+	)
+
+	for year in years:
+		frappe.db.sql(
+			"""
+			update `tabStock Ledger Entry`
+			set posting_datetime = date_format(timestamp(posting_date, posting_time), '%%Y-%%m-%%d %%H:%%i:%%s')
+			where posting_date between %(from_date)s and %(to_date)s
+			""",
+			{"from_date": f"{year}-01-01", "to_date": f"{year}-12-31"},
+		)
+		frappe.db.commit()
@@ -27,4 +27,22 @@ $.extend(erpnext.bulk_transaction_processing, {
 			}
 		});
 	}
-});
\ No newline at end of file
+});
+
+// shards of a background job report their processed counts separately
+$(document).on('app_ready', function() {
+	const processed = {};
+	frappe.realtime.on("bulk_transaction_progress", (data) => {
+		processed[data.job_id] = (processed[data.job_id] || 0) + data.count;
+		frappe.show_progress(__("Bulk Transaction"), processed[data.job_id], data.total,
+			__("Processed {0} of {1}", [processed[data.job_id], data.total]), true);
+
+		if (processed[data.job_id] >= data.total) {
+			delete processed[data.job_id];
+			frappe.show_alert({
+				message: __("Check <a href='/app/bulk-transaction-log'>Bulk Transaction Log</a> for the status"),
+				indicator: "green"
+			});
+		}
+	});
+});
@@ -34,6 +34,7 @@ class TransactionDeletionRecord(Document):
 			self.populate_doctypes_to_be_ignored_table()
 
 		self.delete_bins()
+		self.delete_serial_no_index()
 		self.delete_lead_addresses()
 		self.reset_company_values()
 		clear_notifications()
@@ -51,6 +52,17 @@ class TransactionDeletionRecord(Document):
 			self.company,
 		)
 
+	def delete_serial_no_index(self):
+		"""Stock Ledger Serial No has no company, delete the rows of the company's ledger entries"""
+		if "Stock Ledger Entry" in [d.doctype_name for d in self.doctypes_to_be_ignored]:
+			return
+
+		frappe.db.sql(
+			"""delete from `tabStock Ledger Serial No` where stock_ledger_entry in
+				(select name from `tabStock Ledger Entry` where company=%s)""",
+			self.company,
+		)
+
 	def delete_lead_addresses(self):
 		"""Delete addresses to which leads are linked"""
 		leads = frappe.get_all("Lead", filters={"company": self.company})
@@ -6,7 +6,7 @@ import frappe
 from frappe import _
 from frappe.model.document import Document
 from frappe.model.naming import make_autoname, revert_series_if_last
-from frappe.query_builder.functions import CombineDatetime, CurDate, Sum
+from frappe.query_builder.functions import CurDate, Sum
 from frappe.utils import cint, flt, get_link_to_form, nowtime
 from frappe.utils.data import add_days
 from frappe.utils.jinja import render_template
@@ -188,13 +188,12 @@ def get_batch_qty(
 		)
 
 		if posting_date:
+			from erpnext.stock.utils import get_combine_datetime
+
 			if posting_time is None:
 				posting_time = nowtime()
 
-			query = query.where(
-				CombineDatetime(sle.posting_date, sle.posting_time)
-				<= CombineDatetime(posting_date, posting_time)
-			)
+			query = query.where(sle.posting_datetime <= get_combine_datetime(posting_date, posting_time))
 
 		out = query.run(as_list=True)[0][0] or 0
 
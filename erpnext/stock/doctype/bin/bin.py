@@ -5,7 +5,7 @@
 import frappe
 from frappe.model.document import Document
 from frappe.query_builder import Case, Order
-from frappe.query_builder.functions import Coalesce, CombineDatetime, Sum
+from frappe.query_builder.functions import Coalesce, Sum
 from frappe.utils import flt
 
 
@@ -189,7 +189,7 @@ def update_qty(bin_name, args):
 				& (sle.warehouse == args.get("warehouse"))
 				& (sle.is_cancelled == 0)
 			)
-			.orderby(CombineDatetime(sle.posting_date, sle.posting_time), order=Order.desc)
+			.orderby(sle.posting_datetime, order=Order.desc)
 			.orderby(sle.creation, order=Order.desc)
 			.limit(1)
 			.run()
@@ -458,6 +458,8 @@ class Product(Document):
 			self.delete_old_bins(old_name)
 
 	def after_rename(self, old_name, new_name, merge):
+		from erpnext.manufacturing.doctype.bom.bom import clear_bom_explosion_cache
+
 		if merge:
 			self.validate_duplicate_product_in_stock_reconciliation(old_name, new_name)
 			frappe.msgprint(
@@ -470,6 +472,8 @@ class Product(Document):
 			invalidate_cache_for_product(self)
 
 		frappe.db.set_value("Product", new_name, "product_code", new_name)
+		# cached explosions have the old product code
+		clear_bom_explosion_cache()
 
 		if merge:
 			self.set_last_purchase_rate(new_name)
@@ -606,6 +610,8 @@ class Product(Document):
 		)
 
 	def update_bom_product_desc(self):
+		from erpnext.manufacturing.doctype.bom.bom import clear_bom_explosion_cache
+
 		if self.is_new():
 			return
 
@@ -637,6 +643,8 @@ class Product(Document):
 				(self.description, self.name),
 			)
 
+			clear_bom_explosion_cache()
+
 	def validate_product_defaults(self):
 		companies = {row.company for row in self.product_defaults}
 
@@ -1,6 +1,8 @@
 # Copyright (c) 2020, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
+import json
+
 import frappe
 from frappe import _
 from frappe.exceptions import QueryDeadlockError, QueryTimeoutError
@@ -8,6 +10,7 @@ from frappe.model.document import Document
 from frappe.query_builder import DocType, Interval
 from frappe.query_builder.functions import Max, Now
 from frappe.utils import cint, get_link_to_form, get_weekday, getdate, now, nowtime
+from frappe.utils.background_jobs import is_job_queued
 from frappe.utils.user import get_users_with_role
 from rq.timeouts import JobTimeoutException
 
@@ -22,6 +25,15 @@ from erpnext.stock.stock_ledger import (
 
 RecoverableErrors = (JobTimeoutException, QueryDeadlockError, QueryTimeoutError)
 
+# vouchers which are recalculated and saved as a whole while reposting any one of their products
+SHARED_VOUCHER_TYPES = (
+	"Stock Entry",
+	"Stock Reconciliation",
+	"Purchase Receipt",
+	"Purchase Invoice",
+	"Subcontracting Receipt",
+)
+
 
 class RepostProductValuation(Document):
 	@staticmethod
@@ -189,8 +201,12 @@ class RepostProductValuation(Document):
 		self.distinct_product_and_warehouse = None
 		self.products_to_be_repost = None
 		self.gl_reposting_index = 0
+		self.parallel_reposting = 0
 		self.db_update()
 
+		# start afresh, product-warehouses are regrouped on next run
+		frappe.db.delete("Repost Product Valuation Component", {"parent": self.name})
+
 	def deduplicate_similar_repost(self):
 		"""Deduplicate similar reposts based on product-warehouse-posting combination."""
 		if self.based_on != "Product and Warehouse":
@@ -236,7 +252,13 @@ def repost(doc):
 		if not frappe.flags.in_test:
 			frappe.db.commit()
 
-		repost_sl_entries(doc)
+		if is_parallel_reposting(doc):
+			if not repost_sl_entries_in_parallel(doc):
+				# components are still being reposted, GL entries are reposted in a later run
+				return
+		else:
+			repost_sl_entries(doc)
+
 		repost_gl_entries(doc)
 
 		doc.set_status("Completed")
@@ -264,6 +286,233 @@ def repost(doc):
 			frappe.db.commit()
 
 
+def is_parallel_reposting(doc):
+	if doc.parallel_reposting:
+		return True
+
+	# mode can't be switched once sequential reposting has started
+	if doc.current_index or doc.products_to_be_repost:
+		return False
+
+	if not frappe.db.get_single_value("Stock Reposting Settings", "parallel_reposting"):
+		return False
+
+	doc.db_set("parallel_reposting", 1)
+	return True
+
+
+def repost_sl_entries_in_parallel(doc):
+	"""Repost independent components of product-warehouses in separate background jobs.
+
+	Each component keeps its own progress, so a failed or killed job resumes only its own
+	component. Returns True once all components are reposted."""
+
+	if not doc.components:
+		make_reposting_components(doc)
+
+	pending_components = [row for row in doc.components if row.status != "Completed"]
+	for row in pending_components:
+		job_name = get_component_job_name(row)
+		if is_job_queued(job_name, queue="long"):
+			continue
+
+		frappe.enqueue(
+			"erpnext.stock.doctype.repost_product_valuation.repost_product_valuation.repost_component",
+			queue="long",
+			job_name=job_name,
+			timeout=4000,
+			enqueue_after_commit=True,
+			now=frappe.flags.in_test,
+			repost_doc=doc.name,
+			component=row.name,
+		)
+
+	if frappe.db.exists(
+		"Repost Product Valuation Component",
+		{"parent": doc.name, "status": ("!=", "Completed")},
+	):
+		return False
+
+	affected_transactions = set()
+	for row in frappe.get_all(
+		"Repost Product Valuation Component",
+		filters={"parent": doc.name},
+		fields=["affected_transactions"],
+	):
+		affected_transactions.update(get_affected_transactions(row))
+
+	doc.db_set("affected_transactions", frappe.as_json(affected_transactions))
+	return True
+
+
+def make_reposting_components(doc):
+	args = get_initial_reposting_args(doc)
+
+	for component_args in get_independent_components(args, doc.posting_date):
+		distinct_product_warehouses = {
+			str((d.product_code, d.warehouse)): {"reposting_status": False, "sle": d, "args_idx": i}
+			for i, d in enumerate(component_args)
+		}
+
+		row = doc.append(
+			"components",
+			{
+				"status": "Queued",
+				"products": ", ".join(sorted({d.product_code for d in component_args})),
+				"products_to_be_repost": json.dumps(component_args, default=str),
+				"distinct_product_and_warehouse": json.dumps(distinct_product_warehouses, default=str),
+				"current_index": 0,
+			},
+		)
+		row.db_insert()
+
+	if not frappe.flags.in_test:
+		frappe.db.commit()
+
+
+def get_initial_reposting_args(doc):
+	if doc.based_on == "Transaction":
+		return get_products_to_be_repost(voucher_type=doc.voucher_type, voucher_no=doc.voucher_no)
+
+	return [
+		frappe._dict(
+			{
+				"product_code": doc.product_code,
+				"warehouse": doc.warehouse,
+				"posting_date": doc.posting_date,
+				"posting_time": doc.posting_time,
+			}
+		)
+	]
+
+
+def get_independent_components(args, posting_date):
+	"""Group reposting args into components which can be reposted independently.
+
+	All warehouses of a product are kept together as transfers and returns carry its rate
+	between warehouses. Products are joined when they share a voucher which carries rates across
+	products (manufacture, repack, packed products) or which is saved as a whole while reposting.
+	"""
+	parent = {}
+
+	def find(product_code):
+		parent.setdefault(product_code, product_code)
+		while parent[product_code] != product_code:
+			parent[product_code] = parent[parent[product_code]]
+			product_code = parent[product_code]
+		return product_code
+
+	def union(product_code, other_product_code):
+		parent[find(product_code)] = find(other_product_code)
+
+	voucher_products = {}
+	for row in get_shared_voucher_products(posting_date):
+		key = (row.voucher_type, row.voucher_no)
+		if key in voucher_products:
+			union(row.product_code, voucher_products[key])
+		else:
+			voucher_products[key] = row.product_code
+
+	components = {}
+	for arg in args:
+		components.setdefault(find(arg.product_code), []).append(frappe._dict(arg))
+
+	return list(components.values())
+
+
+def get_shared_voucher_products(posting_date):
+	return frappe.db.sql(
+		"""
+		select voucher_type, voucher_no, product_code
+		from `tabStock Ledger Entry`
+		where is_cancelled = 0
+			and posting_date >= %(posting_date)s
+			and (voucher_type in %(voucher_types)s
+				or ifnull(dependant_sle_voucher_detail_no, '') != '')
+		group by voucher_type, voucher_no, product_code
+		""",
+		{"posting_date": posting_date, "voucher_types": SHARED_VOUCHER_TYPES},
+		as_dict=True,
+	)
+
+
+def repost_component(repost_doc, component):
+	"""Repost stock ledger of one independent component, executed in its own background job."""
+	doc = frappe.get_doc("Repost Product Valuation", repost_doc)
+	row = frappe.get_doc("Repost Product Valuation Component", component)
+	if row.status == "Completed":
+		return
+
+	try:
+		frappe.db.MAX_WRITES_PER_TRANSACTION *= 4
+
+		row.db_set("status", "In Progress")
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+
+		repost_future_sle(
+			allow_negative_stock=doc.allow_negative_stock,
+			via_landed_cost_voucher=doc.via_landed_cost_voucher,
+			doc=row,
+		)
+		row.db_set("status", "Completed")
+
+		# tests repost the components within the repost of the document
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+
+			# components completing together check one after another, so that the last one sees
+			# all of them completed
+			frappe.db.get_value("Repost Product Valuation", doc.name, "name", for_update=True)
+			if not frappe.db.exists(
+				"Repost Product Valuation Component",
+				{"parent": doc.name, "status": ("!=", "Completed")},
+			):
+				enqueue_repost_after_components(doc)
+
+	except Exception:
+		if frappe.flags.in_test:
+			raise
+
+		# progress till the last committed index is kept, next run resumes from there
+		frappe.db.rollback()
+		doc.log_error("Unable to repost product valuation component")
+		row.db_set({"status": "Failed", "error_log": frappe.get_traceback()})
+	finally:
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+
+
+def enqueue_repost_after_components(doc):
+	"""Repost GL entries once the last component is reposted, instead of waiting for the next
+	scheduler run."""
+	job_name = f"repost_product_valuation_{doc.name}"
+	if is_job_queued(job_name, queue="long"):
+		return
+
+	frappe.enqueue(
+		repost_after_components,
+		queue="long",
+		job_name=job_name,
+		timeout=4000,
+		enqueue_after_commit=True,
+		repost_doc=doc.name,
+	)
+
+
+def repost_after_components(repost_doc):
+	doc = frappe.get_doc("Repost Product Valuation", repost_doc)
+	if doc.status not in ("Queued", "In Progress"):
+		return
+
+	repost(doc)
+	doc.deduplicate_similar_repost()
+
+
+def get_component_job_name(row):
+	return f"repost_product_valuation_component_{row.name}"
+
+
 def repost_sl_entries(doc):
 	if doc.based_on == "Transaction":
 		repost_future_sle(
@@ -383,6 +632,10 @@ def repost_entries():
 			repost(doc)
 			doc.deduplicate_similar_repost()
 
+			if doc.parallel_reposting and doc.status == "In Progress":
+				# later reposts have to wait for all components of this one
+				break
+
 	riv_entries = get_repost_product_valuation_entries()
 	if riv_entries:
 		return
@@ -1,20 +1,23 @@
 # Copyright (c) 2021, Frappe Technologies Pvt. Ltd. and Contributors
 # See license.txt
 
-
-from unittest.mock import MagicMock, call
+import inspect
+from unittest.mock import MagicMock, call, patch
 
 import frappe
-from frappe.tests.utils import FrappeTestCase
+from frappe.tests.utils import FrappeTestCase, change_settings
 from frappe.utils import add_days, add_to_date, now, nowdate, today
 
 from erpnext.accounts.doctype.sales_invoice.test_sales_invoice import create_sales_invoice
 from erpnext.accounts.utils import repost_gle_for_stock_vouchers
 from erpnext.controllers.stock_controller import create_product_wise_repost_entries
+from erpnext.stock.doctype.delivery_note.test_delivery_note import create_delivery_note
 from erpnext.stock.doctype.product.test_product import make_product
 from erpnext.stock.doctype.purchase_receipt.test_purchase_receipt import make_purchase_receipt
 from erpnext.stock.doctype.repost_product_valuation.repost_product_valuation import (
+	get_independent_components,
 	in_configured_timeslot,
+	repost,
 )
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
 from erpnext.stock.tests.test_utils import StockTestMixin
@@ -178,6 +181,121 @@ class TestRepostProductValuation(FrappeTestCase, StockTestMixin):
 		riv4.set_status("Skipped")
 		riv3.set_status("Skipped")
 
+	def test_independent_reposting_components(self):
+		rm = make_product().name
+		fg = make_product().name
+		other = make_product().name
+		warehouse = "_Test Warehouse - _TC"
+		posting_date = add_days(today(), -5)
+
+		for product in (rm, other):
+			make_stock_entry(
+				product_code=product, target=warehouse, qty=10, rate=10, posting_date=posting_date
+			)
+
+		repack = make_stock_entry(
+			product_code=rm, source=warehouse, qty=5, purpose="Repack", do_not_save=True
+		)
+		repack.append(
+			"products",
+			{"product_code": fg, "t_warehouse": warehouse, "qty": 1, "transfer_qty": 1},
+		)
+		repack.submit()
+
+		args = [
+			frappe._dict(product_code=product, warehouse=warehouse, posting_date=posting_date)
+			for product in (rm, fg, other)
+		]
+		components = get_independent_components(args, posting_date)
+		self.assertEqual(
+			sorted(sorted(d.product_code for d in component) for component in components),
+			sorted([sorted([rm, fg]), [other]]),
+		)
+
+	@change_settings("Stock Reposting Settings", {"parallel_reposting": 1})
+	def test_parallel_reposting(self):
+		products = [make_product().name for _ in range(2)]
+		warehouse = "_Test Warehouse - _TC"
+
+		consumptions = []
+		for product in products:
+			make_stock_entry(
+				product_code=product, target=warehouse, qty=10, rate=10, posting_date=add_days(today(), -3)
+			)
+			consumptions.append(
+				make_stock_entry(
+					product_code=product, source=warehouse, qty=5, posting_date=add_days(today(), -1)
+				)
+			)
+
+		# back-dated delivery of both products, products don't depend on each other
+		dn = create_delivery_note(
+			product_code=products[0],
+			warehouse=warehouse,
+			qty=5,
+			posting_date=add_days(today(), -2),
+			do_not_save=True,
+		)
+		row = frappe.copy_doc(dn.products[0], ignore_no_copy=False)
+		row.product_code = products[1]
+		dn.append("products", row)
+		dn.submit()
+
+		riv = frappe.get_last_doc("Repost Product Valuation", {"voucher_no": dn.name})
+		self.assertEqual(riv.status, "Completed")
+		self.assertEqual(riv.parallel_reposting, 1)
+		self.assertEqual(len(riv.components), 2)
+		self.assertEqual({row.status for row in riv.components}, {"Completed"})
+
+		for consumption in consumptions:
+			self.assertSLEs(consumption, [{"stock_value_difference": -50, "qty_after_transaction": 0}])
+
+	@change_settings("Stock Reposting Settings", {"parallel_reposting": 1})
+	def test_parallel_reposting_jobs(self):
+		from frappe.utils.background_jobs import enqueue
+
+		product = make_product().name
+		warehouse = "_Test Warehouse - _TC"
+		make_stock_entry(
+			product_code=product, target=warehouse, qty=10, rate=10, posting_date=add_days(today(), -3)
+		)
+		consumption = make_stock_entry(
+			product_code=product, source=warehouse, qty=5, posting_date=add_days(today(), -1)
+		)
+
+		frappe.flags.dont_execute_stock_reposts = True
+		dn = create_delivery_note(
+			product_code=product, warehouse=warehouse, qty=5, posting_date=add_days(today(), -2)
+		)
+		riv = frappe.get_last_doc("Repost Product Valuation", {"voucher_no": dn.name})
+
+		with patch("frappe.enqueue") as enqueue_job:
+			repost(riv)
+
+		riv.reload()
+		self.assertEqual(riv.status, "In Progress")
+
+		jobs = [job for job in enqueue_job.call_args_list if job.args[0].endswith(".repost_component")]
+		self.assertEqual(len(jobs), len(riv.components))
+
+		# workers call the job with the arguments which are not options of `enqueue`
+		enqueue_options = {
+			name
+			for name, parameter in inspect.signature(enqueue).parameters.items()
+			if parameter.kind != parameter.VAR_KEYWORD
+		}
+		for job in jobs:
+			frappe.get_attr(job.args[0])(
+				**{key: value for key, value in job.kwargs.items() if key not in enqueue_options}
+			)
+
+		riv.reload()
+		repost(riv)
+
+		riv.reload()
+		self.assertEqual(riv.status, "Completed")
+		self.assertSLEs(consumption, [{"stock_value_difference": -50, "qty_after_transaction": 0}])
+
 	def test_stock_freeze_validation(self):
 
 		today = nowdate()
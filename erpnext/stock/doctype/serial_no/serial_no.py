@@ -208,53 +208,37 @@ class SerialNo(StockController):
 
 		for sle in frappe.db.sql(
 			"""
-			SELECT voucher_type, voucher_no,
-				posting_date, posting_time, incoming_rate, actual_qty, serial_no
+			SELECT sle.voucher_type, sle.voucher_no,
+				sle.posting_date, sle.posting_time, sle.incoming_rate, sle.actual_qty, sle.serial_no
 			FROM
-				`tabStock Ledger Entry`
+				`tabStock Ledger Entry` sle, `tabStock Ledger Serial No` sle_serial_no
 			WHERE
-				product_code=%s AND company = %s
-				AND is_cancelled = 0
-				AND (serial_no = %s
-					OR serial_no like %s
-					OR serial_no like %s
-					OR serial_no like %s
-				)
+				sle_serial_no.serial_no = %s AND sle_serial_no.product_code = %s
+				AND sle_serial_no.stock_ledger_entry = sle.name
+				AND sle.company = %s
+				AND sle.is_cancelled = 0
 			ORDER BY
-				posting_date desc, posting_time desc, creation desc""",
-			(
-				self.product_code,
-				self.company,
-				serial_no,
-				serial_no + "\n%",
-				"%\n" + serial_no,
-				"%\n" + serial_no + "\n%",
-			),
+				sle.posting_datetime desc, sle.creation desc""",
+			(serial_no, self.product_code, self.company),
 			as_dict=1,
 		):
-			if serial_no.upper() in get_serial_nos(sle.serial_no):
-				if cint(sle.actual_qty) > 0:
-					sle_dict.setdefault("incoming", []).append(sle)
-				else:
-					sle_dict.setdefault("outgoing", []).append(sle)
+			if cint(sle.actual_qty) > 0:
+				sle_dict.setdefault("incoming", []).append(sle)
+			else:
+				sle_dict.setdefault("outgoing", []).append(sle)
 
 		return sle_dict
 
 	def on_trash(self):
-		sl_entries = frappe.db.sql(
-			"""select serial_no from `tabStock Ledger Entry`
-			where serial_no like %s and product_code=%s and is_cancelled=0""",
-			("%%%s%%" % self.name, self.product_code),
-			as_dict=True,
+		sle_exists = frappe.db.sql(
+			"""select sle.name
+			from `tabStock Ledger Entry` sle, `tabStock Ledger Serial No` sle_serial_no
+			where sle_serial_no.serial_no = %s and sle_serial_no.product_code = %s
+				and sle_serial_no.stock_ledger_entry = sle.name and sle.is_cancelled = 0
+			limit 1""",
+			(self.name, self.product_code),
 		)
 
-		# Find the exact match
-		sle_exists = False
-		for d in sl_entries:
-			if self.name.upper() in get_serial_nos(d.serial_no):
-				sle_exists = True
-				break
-
 		if sle_exists:
 			frappe.throw(
 				_("Cannot delete Serial No {0}, as it is used in stock transactions").format(self.name)
@@ -566,7 +550,13 @@ def allow_serial_nos_with_different_product(sle_serial_no, sle):
 
 
 def update_serial_nos(sle, product_det):
+	from erpnext.stock.doctype.stock_ledger_serial_no.stock_ledger_serial_no import (
+		make_serial_no_index,
+	)
+
 	if sle.skip_update_serial_no:
+		if sle.serial_no:
+			make_serial_no_index(sle)
 		return
 	if (
 		not sle.is_cancelled
@@ -579,6 +569,8 @@ def update_serial_nos(sle, product_det):
 		sle.db_set("serial_no", serial_nos)
 		validate_serial_no(sle, product_det)
 	if sle.serial_no:
+		# references of the Serial Nos are read from the index, including this entry
+		make_serial_no_index(sle)
 		auto_make_serial_nos(sle)
 
 
@@ -0,0 +1,114 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+"""Saved FIFO queues of the Stock Ageing report, so that only later entries are replayed.
+
+A checkpoint holds the warehouse wise queues of a company after all Stock Ledger Entries upto
+its date, as a gzipped JSON attachment. It is built at the end of the last month having Stock
+Balance Snapshots and stores the name of that month's snapshot marker. Any change to Stock
+Ledger Entries upto the checkpoint removes the marker, so a checkpoint is only used while its
+marker exists.
+"""
+
+import json
+
+import frappe
+from frappe.core.doctype.prepared_report.prepared_report import create_json_gz_file
+from frappe.desk.form.load import get_attachments
+from frappe.model.document import Document
+from frappe.query_builder import Order
+from frappe.utils import getdate, gzip_decompress
+
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	get_stock_balance_snapshot_period,
+)
+
+
+class StockAgeingCheckpoint(Document):
+	def get_data(self):
+		if attachments := get_attachments(self.doctype, self.name):
+			attached_file = frappe.get_doc("File", attachments[0].name)
+			return json.loads(gzip_decompress(attached_file.get_content()).decode("utf-8"))
+
+
+def get_stock_ageing_checkpoint(company, to_date):
+	"""Returns the latest valid checkpoint of the company upto `to_date`, with its data."""
+	if not company or not to_date:
+		return
+
+	checkpoint = frappe.qb.DocType("Stock Ageing Checkpoint")
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot")
+
+	checkpoints = (
+		frappe.qb.from_(checkpoint)
+		.inner_join(snapshot)
+		.on(snapshot.name == checkpoint.snapshot_marker)
+		.select(checkpoint.name, checkpoint.to_date)
+		.where((checkpoint.company == company) & (checkpoint.to_date <= getdate(to_date)))
+		.orderby(checkpoint.to_date, order=Order.desc)
+		.limit(1)
+	).run(as_dict=True)
+
+	if not checkpoints:
+		return
+
+	data = frappe.get_doc("Stock Ageing Checkpoint", checkpoints[0].name).get_data()
+	if data:
+		return frappe._dict(name=checkpoints[0].name, to_date=checkpoints[0].to_date, data=data)
+
+
+def build_stock_ageing_checkpoints():
+	"""Build checkpoints at the last month having snapshots, runs daily."""
+	for company in frappe.get_all("Company", pluck="name"):
+		make_stock_ageing_checkpoint(company)
+
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+
+
+def make_stock_ageing_checkpoint(company):
+	from erpnext.stock.report.stock_ageing.stock_ageing import FIFOSlots
+
+	snapshot_period = get_stock_balance_snapshot_period(company)
+	if not snapshot_period:
+		return
+
+	to_date = snapshot_period[1]
+	snapshot_marker = frappe.db.get_value(
+		"Stock Balance Snapshot",
+		{"company": company, "period_end": to_date, "product_code": ("is", "not set")},
+		"name",
+	)
+
+	latest_checkpoint = get_stock_ageing_checkpoint(company, to_date)
+	if latest_checkpoint and getdate(latest_checkpoint.to_date) == getdate(to_date):
+		return
+
+	# continues from the latest valid checkpoint, if any
+	fifo_slots = FIFOSlots(
+		frappe._dict(company=company, to_date=to_date, show_warehouse_wise_stock=True)
+	)
+	fifo_slots.generate()
+
+	doc = frappe.get_doc(
+		{
+			"doctype": "Stock Ageing Checkpoint",
+			"company": company,
+			"to_date": to_date,
+			"snapshot_marker": snapshot_marker,
+		}
+	).insert(ignore_permissions=True)
+	create_json_gz_file(fifo_slots.get_checkpoint(), doc.doctype, doc.name)
+
+	for name in frappe.get_all(
+		"Stock Ageing Checkpoint",
+		filters={"company": company, "name": ("!=", doc.name)},
+		pluck="name",
+	):
+		frappe.delete_doc("Stock Ageing Checkpoint", name, ignore_permissions=True)
+
+	return doc
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Ageing Checkpoint", ["company", "to_date"])
@@ -0,0 +1,73 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_months, get_first_day, nowdate
+
+from erpnext.stock.doctype.product.test_product import make_product
+from erpnext.stock.doctype.stock_ageing_checkpoint.stock_ageing_checkpoint import (
+	get_stock_ageing_checkpoint,
+	make_stock_ageing_checkpoint,
+)
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	build_company_stock_snapshots,
+)
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.report.stock_ageing.stock_ageing import execute
+
+COMPANY = "_Test Company"
+WAREHOUSE = "_Test Warehouse - _TC"
+
+
+class TestStockAgeingCheckpoint(FrappeTestCase):
+	def setUp(self):
+		frappe.db.delete("Stock Balance Snapshot", {"company": COMPANY})
+		frappe.db.delete("Stock Ageing Checkpoint", {"company": COMPANY})
+		self.product = make_product(properties={"is_stock_product": 1}).name
+
+		month_start = get_first_day(nowdate())
+		for months in (-3, -2, -1):
+			posting_date = add_days(add_months(month_start, months), 10)
+			make_stock_entry(
+				product_code=self.product, qty=10, rate=100, to_warehouse=WAREHOUSE, posting_date=posting_date
+			)
+			make_stock_entry(
+				product_code=self.product,
+				qty=4,
+				from_warehouse=WAREHOUSE,
+				to_warehouse="_Test Warehouse 1 - _TC",
+				posting_date=add_days(posting_date, 1),
+			)
+
+		make_stock_entry(product_code=self.product, qty=6, from_warehouse=WAREHOUSE)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_ageing(self):
+		filters = frappe._dict(
+			company=COMPANY, to_date=nowdate(), product_code=self.product, range1=30, range2=60, range3=90
+		)
+		return [execute(filters)[1], execute(frappe._dict(filters, show_warehouse_wise_stock=1))[1]]
+
+	def test_ageing_with_checkpoint(self):
+		expected = self.get_ageing()
+
+		build_company_stock_snapshots(COMPANY)
+		self.assertTrue(make_stock_ageing_checkpoint(COMPANY))
+		self.assertTrue(get_stock_ageing_checkpoint(COMPANY, nowdate()))
+		self.assertEqual(self.get_ageing(), expected)
+
+		# back dated entry should invalidate the checkpoint
+		posting_date = add_days(add_months(get_first_day(nowdate()), -2), 5)
+		make_stock_entry(
+			product_code=self.product, qty=3, rate=90, to_warehouse=WAREHOUSE, posting_date=posting_date
+		)
+		self.assertFalse(get_stock_ageing_checkpoint(COMPANY, nowdate()))
+
+		build_company_stock_snapshots(COMPANY)
+		make_stock_ageing_checkpoint(COMPANY)
+		with_checkpoint = self.get_ageing()
+		frappe.db.delete("Stock Ageing Checkpoint", {"company": COMPANY})
+		self.assertEqual(with_checkpoint, self.get_ageing())
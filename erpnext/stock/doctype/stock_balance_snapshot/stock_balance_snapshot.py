@@ -0,0 +1,265 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+"""Monthly closing balances of Stock Ledger Entries used by the stock balance reports.
+
+Every built month of a company has one row per (product, warehouse) having Stock Ledger
+Entries in the month, with the balance qty, value and valuation rate after the last entry of
+the month, and one marker row without product. The balance of a (product, warehouse) at the
+end of a built month is its latest row upto that month. Months are always built in order, and
+any change to Stock Ledger Entries of a month removes the snapshots of that month and all
+later months, so the marker rows of a company always form a contiguous range of complete
+months starting from its first Stock Ledger Entry.
+"""
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder.functions import Max, Min
+from frappe.utils import (
+	add_days,
+	add_months,
+	flt,
+	get_first_day,
+	get_last_day,
+	getdate,
+	now,
+	today,
+)
+
+SNAPSHOT_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"company",
+	"period_end",
+	"product_code",
+	"warehouse",
+	"qty",
+	"stock_value",
+	"valuation_rate",
+)
+
+
+class StockBalanceSnapshot(Document):
+	pass
+
+
+def get_stock_balance_snapshot_period(company, date=None):
+	"""Returns (from_date, to_date) of the snapshots of the company built upto `date`."""
+	if not company:
+		return
+
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot")
+	query = (
+		frappe.qb.from_(snapshot)
+		.select(Min(snapshot.period_end), Max(snapshot.period_end))
+		.where((snapshot.company == company) & (snapshot.product_code.isnull()))
+	)
+
+	if date:
+		query = query.where(snapshot.period_end <= getdate(date))
+
+	first_period_end, last_period_end = query.run()[0]
+	if last_period_end:
+		return get_first_day(first_period_end), last_period_end
+
+
+def get_stock_balance_snapshot_query(company, period_end):
+	"""Returns query on the latest snapshot rows of each (product, warehouse) upto `period_end`,
+	select fields of `frappe.qb.DocType("Stock Balance Snapshot").as_("snapshot")`."""
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot").as_("snapshot")
+	latest = frappe.qb.DocType("Stock Balance Snapshot").as_("latest")
+
+	latest_period_end = (
+		frappe.qb.from_(latest)
+		.select(Max(latest.period_end))
+		.where(
+			(latest.company == snapshot.company)
+			& (latest.product_code == snapshot.product_code)
+			& (latest.warehouse == snapshot.warehouse)
+			& (latest.period_end <= period_end)
+		)
+	)
+
+	return frappe.qb.from_(snapshot).where(
+		(snapshot.company == company)
+		& (snapshot.product_code.isnotnull())
+		& (snapshot.period_end == latest_period_end)
+	)
+
+
+def invalidate_stock_balance_snapshots(entries):
+	"""Remove snapshots affected by added, cancelled, reposted or deleted Stock Ledger Entries.
+
+	Should be called after the Stock Ledger Entries are written, so that a snapshot being built
+	for the same period waits for this transaction."""
+	from_dates = {}
+	for entry in entries:
+		company, posting_date = entry.get("company"), getdate(entry.get("posting_date"))
+		if company not in from_dates or posting_date < from_dates[company]:
+			from_dates[company] = posting_date
+
+	for company, from_date in from_dates.items():
+		frappe.db.sql(
+			"""delete from `tabStock Balance Snapshot`
+			where company = %s and period_end >= %s""",
+			(company, from_date),
+		)
+
+
+def invalidate_stock_balance_snapshots_of_voucher(voucher_type, voucher_no):
+	"""Remove snapshots affected by Stock Ledger Entries of the voucher, call before deleting
+	them."""
+	sle = frappe.qb.DocType("Stock Ledger Entry")
+	entries = (
+		frappe.qb.from_(sle)
+		.select(sle.company, Min(sle.posting_date).as_("posting_date"))
+		.where((sle.voucher_type == voucher_type) & (sle.voucher_no == voucher_no))
+		.groupby(sle.company)
+	).run(as_dict=True)
+
+	invalidate_stock_balance_snapshots(entries)
+
+
+def build_stock_balance_snapshots():
+	"""Build snapshots of all completed months, runs daily."""
+	for company in frappe.get_all("Company", pluck="name"):
+		build_company_stock_snapshots(company)
+
+
+def build_company_stock_snapshots(company, upto=None):
+	upto = getdate(upto or get_last_day(add_months(today(), -1)))
+
+	snapshot_period = get_stock_balance_snapshot_period(company)
+	if snapshot_period:
+		from_date = add_days(snapshot_period[1], 1)
+	else:
+		from_date = frappe.db.get_value("Stock Ledger Entry", {"company": company}, "min(posting_date)")
+		if not from_date:
+			return
+
+	is_first_period = not snapshot_period
+	period_end = get_last_day(from_date)
+	while period_end <= upto:
+		# each month in a new transaction, so that its entries are read after its marker is added
+		if not frappe.flags.in_test:
+			frappe.db.commit()
+
+		if not make_stock_snapshot(company, get_first_day(period_end), period_end, is_first_period):
+			break
+
+		is_first_period = False
+		period_end = get_last_day(add_days(period_end, 1))
+
+	if not frappe.flags.in_test:
+		frappe.db.commit()
+
+
+def make_stock_snapshot(company, from_date, to_date, is_first_period=False):
+	if not is_first_period:
+		# previous month may have been invalidated meanwhile, lock its marker until this month is
+		# committed so that the built months stay contiguous
+		previous_period_marker = frappe.db.sql(
+			"""select name from `tabStock Balance Snapshot`
+			where company = %s and period_end = %s and product_code is null
+			for update""",
+			(company, add_days(from_date, -1)),
+		)
+		if not previous_period_marker:
+			return False
+
+	timestamp = now()
+	user = frappe.session.user
+
+	def make_row(values):
+		return (
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			company,
+			to_date,
+			*values,
+		)
+
+	# marker for the month, added before reading the entries instead of locking them, so that
+	# back-dated postings are not blocked: a posting invalidating the month meanwhile either
+	# makes this insert wait until it is committed, or waits for this transaction and removes
+	# the snapshot
+	frappe.db.bulk_insert(
+		"Stock Balance Snapshot", SNAPSHOT_FIELDS, [make_row((None, None, 0, 0, 0))]
+	)
+
+	entries = frappe.db.sql(
+		"""
+		select
+			product_code, warehouse, voucher_type, actual_qty, qty_after_transaction,
+			stock_value_difference, valuation_rate, batch_no, serial_no
+		from `tabStock Ledger Entry`
+		where company = %s and posting_date between %s and %s
+			and is_cancelled = 0 and docstatus < 2
+		order by posting_date, posting_time, creation, actual_qty""",
+		(company, from_date, to_date),
+		as_dict=True,
+	)
+
+	# (product, warehouse) -> [qty is reset by reconciliation, qty, value, valuation rate]
+	changes = {}
+	for d in entries:
+		change = changes.setdefault((d.product_code, d.warehouse), [False, 0.0, 0.0, 0.0])
+
+		# same as the Stock Balance report
+		if d.voucher_type == "Stock Reconciliation" and (not d.batch_no or d.serial_no):
+			change[0], change[1] = True, flt(d.qty_after_transaction)
+		else:
+			change[1] += flt(d.actual_qty)
+
+		change[2] += flt(d.stock_value_difference)
+		change[3] = flt(d.valuation_rate)
+
+	opening = {}
+	if changes and not is_first_period:
+		opening = get_stock_balances(company, add_days(from_date, -1), {key[0] for key in changes})
+
+	rows = []
+	for (product_code, warehouse), (is_reset, qty, value, valuation_rate) in changes.items():
+		opening_qty, opening_value = opening.get((product_code, warehouse), (0.0, 0.0))
+		rows.append(
+			make_row(
+				(
+					product_code,
+					warehouse,
+					qty if is_reset else opening_qty + qty,
+					opening_value + value,
+					valuation_rate,
+				)
+			)
+		)
+
+	frappe.db.bulk_insert("Stock Balance Snapshot", SNAPSHOT_FIELDS, rows)
+	return True
+
+
+def get_stock_balances(company, period_end, product_codes):
+	"""Returns {(product, warehouse): (qty, value)} at the end of a built month."""
+	balances = {}
+	for batch in frappe.utils.create_batch(sorted(product_codes), 1000):
+		snapshot = frappe.qb.DocType("Stock Balance Snapshot").as_("snapshot")
+		query = get_stock_balance_snapshot_query(company, period_end).select(
+			snapshot.product_code, snapshot.warehouse, snapshot.qty, snapshot.stock_value
+		).where(snapshot.product_code.isin(batch))
+
+		for product_code, warehouse, qty, value in query.run():
+			balances[(product_code, warehouse)] = (flt(qty), flt(value))
+
+	return balances
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Balance Snapshot", ["company", "period_end"])
+	frappe.db.add_index(
+		"Stock Balance Snapshot", ["product_code", "warehouse", "company", "period_end"]
+	)
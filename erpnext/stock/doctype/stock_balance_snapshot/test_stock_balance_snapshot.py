@@ -0,0 +1,110 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, add_months, get_first_day, nowdate
+
+from erpnext.stock.doctype.product.test_product import make_product
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	build_company_stock_snapshots,
+	get_stock_balance_snapshot_period,
+)
+from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
+from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
+	create_stock_reconciliation,
+)
+from erpnext.stock.report.stock_analytics.stock_analytics import execute as stock_analytics
+from erpnext.stock.report.stock_balance.stock_balance import execute as stock_balance
+from erpnext.stock.report.warehouse_wise_stock_balance.warehouse_wise_stock_balance import (
+	execute as warehouse_wise_stock_balance,
+)
+
+COMPANY = "_Test Company"
+WAREHOUSE = "_Test Warehouse - _TC"
+
+
+class TestStockBalanceSnapshot(FrappeTestCase):
+	def setUp(self):
+		frappe.db.delete("Stock Balance Snapshot", {"company": COMPANY})
+		self.product = make_product(properties={"is_stock_product": 1}).name
+
+		month_start = get_first_day(nowdate())
+		for months in (-3, -2, -1):
+			posting_date = add_days(add_months(month_start, months), 10)
+			make_stock_entry(
+				product_code=self.product, qty=10, rate=100, to_warehouse=WAREHOUSE, posting_date=posting_date
+			)
+			make_stock_entry(
+				product_code=self.product,
+				qty=4,
+				from_warehouse=WAREHOUSE,
+				to_warehouse="_Test Warehouse 1 - _TC",
+				posting_date=add_days(posting_date, 1),
+			)
+
+		create_stock_reconciliation(
+			product_code=self.product,
+			warehouse=WAREHOUSE,
+			qty=7,
+			rate=120,
+			posting_date=add_days(add_months(month_start, -2), 20),
+		)
+		make_stock_entry(product_code=self.product, qty=5, rate=110, to_warehouse=WAREHOUSE)
+
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_balances(self):
+		month_start = get_first_day(nowdate())
+		from_dates = [add_months(month_start, -2), month_start, add_days(add_months(month_start, -1), 5)]
+
+		balances = []
+		for from_date in from_dates:
+			filters = frappe._dict(company=COMPANY, from_date=from_date, to_date=nowdate())
+			balances.append(stock_balance(frappe._dict(filters, product_code=self.product))[1])
+			balances.append(
+				stock_analytics(
+					frappe._dict(filters, product_code=self.product, value_quantity="Value", range="Monthly")
+				)[1]
+			)
+
+		balances.append(warehouse_wise_stock_balance(frappe._dict(company=COMPANY))[1])
+		return balances
+
+	def test_reports_with_snapshots(self):
+		expected = self.get_balances()
+
+		build_company_stock_snapshots(COMPANY)
+		self.assertTrue(get_stock_balance_snapshot_period(COMPANY))
+		self.assertEqual(self.get_balances(), expected)
+
+		# back dated entry should remove snapshots of its month and later
+		posting_date = add_days(add_months(get_first_day(nowdate()), -2), 5)
+		make_stock_entry(
+			product_code=self.product, qty=3, rate=90, to_warehouse=WAREHOUSE, posting_date=posting_date
+		)
+		self.assertLess(get_stock_balance_snapshot_period(COMPANY)[1], posting_date)
+
+		build_company_stock_snapshots(COMPANY)
+		with_snapshots = self.get_balances()
+		frappe.db.delete("Stock Balance Snapshot", {"company": COMPANY})
+		self.assertEqual(with_snapshots, self.get_balances())
+
+	def test_report_without_entries_after_snapshots(self):
+		product = make_product(properties={"is_stock_product": 1}).name
+		posting_date = add_days(add_months(get_first_day(nowdate()), -1), 10)
+		make_stock_entry(
+			product_code=product, qty=10, rate=100, to_warehouse=WAREHOUSE, posting_date=posting_date
+		)
+
+		filters = frappe._dict(
+			company=COMPANY, from_date=get_first_day(nowdate()), to_date=nowdate(), product_code=product
+		)
+		expected = stock_balance(frappe._dict(filters))[1]
+
+		# no entries of the product after the last snapshot
+		build_company_stock_snapshots(COMPANY)
+		data = stock_balance(frappe._dict(filters))[1]
+		self.assertEqual(data, expected)
+		self.assertEqual([(row.opening_qty, row.bal_qty) for row in data], [(10, 10)])
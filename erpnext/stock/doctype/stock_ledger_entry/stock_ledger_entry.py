@@ -45,18 +45,26 @@ class StockLedgerEntry(Document):
 		validate_disabled_warehouse(self.warehouse)
 		validate_warehouse_company(self.warehouse, self.company)
 		self.scrub_posting_time()
+		self.set_posting_datetime()
 		self.validate_and_set_fiscal_year()
 		self.block_transactions_against_group_warehouse()
 		self.validate_with_last_transaction_posting_time()
 
 	def on_submit(self):
+		from erpnext.stock.doctype.stock_ledger_serial_no.stock_ledger_serial_no import (
+			make_serial_no_index,
+		)
+
 		self.check_stock_frozen_date()
 		self.calculate_batch_qty()
 
 		if not self.get("via_landed_cost_voucher"):
 			from erpnext.stock.doctype.serial_no.serial_no import process_serial_no
 
+			# also indexes the serial nos, after generating them if the product has a series
 			process_serial_no(self)
+		elif self.serial_no:
+			make_serial_no_index(self)
 
 	def calculate_batch_qty(self):
 		if self.batch_no:
@@ -151,6 +159,11 @@ class StockLedgerEntry(Document):
 		if not self.posting_time or self.posting_time == "00:0":
 			self.posting_time = "00:00"
 
+	def set_posting_datetime(self):
+		from erpnext.stock.utils import get_combine_datetime
+
+		self.posting_datetime = get_combine_datetime(self.posting_date, self.posting_time)
+
 	def validate_batch(self):
 		if self.batch_no and self.voucher_type != "Stock Entry":
 			if (self.voucher_type in ["Purchase Receipt", "Purchase Invoice"] and self.actual_qty < 0) or (
@@ -187,7 +200,7 @@ class StockLedgerEntry(Document):
 			if authorized_users and frappe.session.user not in authorized_users:
 				last_transaction_time = frappe.db.sql(
 					"""
-					select MAX(timestamp(posting_date, posting_time)) as posting_time
+					select MAX(posting_datetime) as posting_time
 					from `tabStock Ledger Entry`
 					where docstatus = 1 and is_cancelled = 0 and product_code = %s
 					and warehouse = %s""",
@@ -225,5 +238,13 @@ def on_doctype_update():
 		"Stock Ledger Entry", fields=["posting_date", "posting_time"], index_name="posting_sort_index"
 	)
 	frappe.db.add_index("Stock Ledger Entry", ["voucher_no", "voucher_type"])
+	frappe.db.add_index(
+		"Stock Ledger Entry",
+		["product_code", "warehouse", "posting_datetime", "creation"],
+		"product_warehouse_posting_datetime_index",
+	)
+	frappe.db.add_index(
+		"Stock Ledger Entry", ["posting_datetime", "creation"], "posting_datetime_creation_index"
+	)
 	frappe.db.add_index("Stock Ledger Entry", ["batch_no", "product_code", "warehouse"])
 	frappe.db.add_index("Stock Ledger Entry", ["warehouse", "product_code"], "product_warehouse")
@@ -992,6 +992,45 @@ class TestStockLedgerEntry(FrappeTestCase, StockTestMixin):
 		receipt2 = make_stock_entry(product_code=product, target=warehouse, qty=15, rate=15)
 		self.assertSLEs(receipt2, [{"stock_queue": [[5, 15]], "stock_value_difference": 175}])
 
+	@change_settings("Stock Reposting Settings", {"ledger_update_batch_size": 2})
+	def test_batched_reposting_of_future_entries(self):
+		product = make_product().name
+		warehouse = "_Test Warehouse - _TC"
+
+		make_stock_entry(
+			product_code=product, target=warehouse, qty=10, rate=10, posting_date=add_days(today(), -3)
+		)
+		consumptions = [
+			make_stock_entry(
+				product_code=product, source=warehouse, qty=2, posting_date=add_days(today(), -2)
+			)
+			for _ in range(3)
+		]
+
+		# back-dated receipt should be consumed first by all future consumptions
+		make_stock_entry(
+			product_code=product, target=warehouse, qty=10, rate=20, posting_date=add_days(today(), -5)
+		)
+
+		for idx, consumption in enumerate(consumptions, start=1):
+			self.assertSLEs(
+				consumption,
+				[
+					{
+						"stock_value_difference": -40,
+						"qty_after_transaction": 20 - 2 * idx,
+						"stock_queue": [[10 - 2 * idx, 20], [10, 10]],
+					}
+				],
+			)
+			self.assertEqual(
+				frappe.db.get_value("Stock Entry Detail", consumption.products[0].name, "basic_rate"), 20
+			)
+
+		self.assertEqual(
+			frappe.db.get_value("Bin", {"product_code": product, "warehouse": warehouse}, "actual_qty"), 14
+		)
+
 	def test_dependent_gl_entry_reposting(self):
 		def _get_stock_credit(doc):
 			return frappe.db.get_value(
@@ -1265,6 +1304,42 @@ class TestStockLedgerEntry(FrappeTestCase, StockTestMixin):
 			product_code=product_code, source=warehouse, qty=470.84, rate=100, posting_date=add_days(today(), -1)
 		)
 
+	def test_posting_datetime_index_usage(self):
+		"""Ledger range queries should be answered by the posting_datetime index."""
+		product = make_product().name
+		warehouse = "_Test Warehouse - _TC"
+
+		for day in range(1, 6):
+			make_stock_entry(
+				product_code=product,
+				to_warehouse=warehouse,
+				qty=10,
+				rate=10,
+				posting_date=f"2021-01-0{day}",
+				posting_time="01:00:00.1234",
+			)
+
+		posting_datetime = frappe.db.get_value(
+			"Stock Ledger Entry",
+			{"product_code": product, "posting_date": "2021-01-03", "is_cancelled": 0},
+			"posting_datetime",
+		)
+		self.assertEqual(str(posting_datetime), "2021-01-03 01:00:00")
+
+		previous_sle = get_previous_sle(
+			{
+				"product_code": product,
+				"warehouse": warehouse,
+				"posting_date": "2021-01-03",
+				"posting_time": "01:00:00",
+			}
+		)
+		self.assertEqual(previous_sle.qty_after_transaction, 30)
+
+		plan = frappe.db.sql(f"explain {frappe.db.last_query}", as_dict=True)
+		self.assertEqual(plan[0].key, "product_warehouse_posting_datetime_index")
+		self.assertNotIn("filesort", plan[0].Extra or "")
+
 
 def create_repack_entry(**args):
 	args = frappe._dict(args)
@@ -0,0 +1,100 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now
+
+INDEX_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"serial_no",
+	"stock_ledger_entry",
+	"product_code",
+	"warehouse",
+	"voucher_type",
+	"voucher_no",
+)
+
+
+class StockLedgerSerialNo(Document):
+	pass
+
+
+def make_serial_no_index(sle):
+	"""Add one row per serial no of the Stock Ledger Entry, so that serial nos can be looked up
+	without matching the newline separated `serial_no` column."""
+	if sle.is_cancelled:
+		return
+
+	rows = get_serial_no_index_rows(sle)
+	if rows:
+		frappe.db.bulk_insert("Stock Ledger Serial No", INDEX_FIELDS, rows)
+
+
+def get_serial_no_index_rows(sle, timestamp=None):
+	from erpnext.stock.doctype.serial_no.serial_no import get_serial_nos
+
+	timestamp = timestamp or now()
+	user = frappe.session.user
+
+	return [
+		(
+			frappe.generate_hash(length=10),
+			timestamp,
+			timestamp,
+			user,
+			user,
+			serial_no,
+			sle.name,
+			sle.product_code,
+			sle.warehouse,
+			sle.voucher_type,
+			sle.voucher_no,
+		)
+		for serial_no in get_serial_nos(sle.serial_no)
+	]
+
+
+def rebuild_serial_no_index(batch_size=1000):
+	"""Rebuild index rows for all active Stock Ledger Entries with serial nos."""
+	frappe.db.truncate("Stock Ledger Serial No")
+
+	last_name = ""
+	while True:
+		sl_entries = frappe.db.sql(
+			"""
+			select name, serial_no, product_code, warehouse, voucher_type, voucher_no
+			from `tabStock Ledger Entry`
+			where name > %(last_name)s
+				and is_cancelled = 0
+				and ifnull(serial_no, '') != ''
+			order by name
+			limit %(batch_size)s
+			""",
+			{"last_name": last_name, "batch_size": batch_size},
+			as_dict=True,
+		)
+
+		if not sl_entries:
+			break
+
+		timestamp = now()
+		rows = []
+		for sle in sl_entries:
+			rows.extend(get_serial_no_index_rows(sle, timestamp))
+
+		if rows:
+			frappe.db.bulk_insert("Stock Ledger Serial No", INDEX_FIELDS, rows)
+			frappe.db.commit()
+
+		last_name = sl_entries[-1].name
+
+
+def on_doctype_update():
+	frappe.db.add_index("Stock Ledger Serial No", ["serial_no", "product_code"])
+	frappe.db.add_index("Stock Ledger Serial No", ["product_code", "warehouse"])
+	frappe.db.add_index("Stock Ledger Serial No", ["voucher_no", "voucher_type"])
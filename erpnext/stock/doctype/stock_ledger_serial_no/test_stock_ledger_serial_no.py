@@ -0,0 +1,51 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from erpnext.stock.doctype.delivery_note.test_delivery_note import create_delivery_note
+from erpnext.stock.doctype.serial_no.serial_no import get_serial_nos
+from erpnext.stock.doctype.stock_entry.test_stock_entry import make_serialized_product
+from erpnext.stock.stock_ledger import get_stock_ledger_entries
+
+
+class TestStockLedgerSerialNo(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def test_serial_no_index(self):
+		se = make_serialized_product(target_warehouse="_Test Warehouse - _TC")
+		product_code = se.get("products")[0].product_code
+		serial_nos = get_serial_nos(se.get("products")[0].serial_no)
+		# generated from the series of the product on submit
+		self.assertEqual(len(serial_nos), 2)
+
+		sle = frappe.db.get_value(
+			"Stock Ledger Entry",
+			{"voucher_type": "Stock Entry", "voucher_no": se.name, "is_cancelled": 0},
+			"name",
+		)
+		indexed_serial_nos = frappe.get_all(
+			"Stock Ledger Serial No", filters={"stock_ledger_entry": sle}, pluck="serial_no"
+		)
+		self.assertEqual(sorted(indexed_serial_nos), sorted(serial_nos))
+
+		dn = create_delivery_note(product_code=product_code, qty=1, serial_no=serial_nos[0])
+
+		def get_vouchers(serial_no):
+			args = {
+				"product_code": product_code,
+				"serial_no": serial_no,
+				"posting_date": dn.posting_date,
+				"posting_time": dn.posting_time,
+			}
+			return [(d.voucher_type, d.voucher_no) for d in get_stock_ledger_entries(args, "<=", "asc")]
+
+		self.assertEqual(
+			get_vouchers(serial_nos[0]), [("Stock Entry", se.name), ("Delivery Note", dn.name)]
+		)
+		self.assertEqual(get_vouchers(serial_nos[1]), [("Stock Entry", se.name)])
+
+		dn.cancel()
+		self.assertEqual(get_vouchers(serial_nos[0]), [("Stock Entry", se.name)])
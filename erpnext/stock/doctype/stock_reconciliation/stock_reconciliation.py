@@ -5,7 +5,7 @@ from typing import Optional
 
 import frappe
 from frappe import _, bold, msgprint
-from frappe.query_builder.functions import CombineDatetime, Sum
+from frappe.query_builder.functions import Sum
 from frappe.utils import cint, cstr, flt
 
 import erpnext
@@ -13,7 +13,7 @@ from erpnext.accounts.utils import get_company_default
 from erpnext.controllers.stock_controller import StockController
 from erpnext.stock.doctype.batch.batch import get_batch_qty
 from erpnext.stock.doctype.serial_no.serial_no import get_serial_nos
-from erpnext.stock.utils import get_stock_balance
+from erpnext.stock.utils import get_combine_datetime, get_stock_balance
 
 
 class OpeningEntryAccountError(frappe.ValidationError):
@@ -627,10 +627,7 @@ def get_batch_qty_for_stock_reco(
 			& (ledger.is_cancelled == 0)
 			& (ledger.batch_no == batch_no)
 			& (ledger.posting_date <= posting_date)
-			& (
-				CombineDatetime(ledger.posting_date, ledger.posting_time)
-				<= CombineDatetime(posting_date, posting_time)
-			)
+			& (ledger.posting_datetime <= get_combine_datetime(posting_date, posting_time))
 			& (ledger.voucher_no != voucher_no)
 		)
 		.groupby(ledger.batch_no)
@@ -3,6 +3,7 @@
 
 
 import json
+from decimal import Decimal
 
 import frappe
 from frappe import _, throw
@@ -124,7 +125,13 @@ def get_product_details(args, doc=None, for_validate=False, overwrite_warehouse=
 		if args.get(key) is None:
 			args[key] = value
 
-	data = get_pricing_rule_for_product(args, doc=doc, for_validate=for_validate)
+	cache = get_product_details_cache()
+	data = get_pricing_rule_for_product(
+		args,
+		doc=doc,
+		for_validate=for_validate,
+		pricing_rule_index=cache.pricing_rule_index if cache else None,
+	)
 
 	out.update(data)
 
@@ -145,6 +152,214 @@ def get_product_details(args, doc=None, for_validate=False, overwrite_warehouse=
 	return out
 
 
+@frappe.whitelist()
+def get_product_details_for_rows(
+	rows, args, doc=None, for_validate=False, overwrite_warehouse=True
+):
+	"""
+	Returns `get_product_details` of every row of a document.
+
+	rows = [{"product_code": "", "qty": 1.0, "uom": "", "warehouse": "", "child_docname": ""}, ...]
+	args = arguments shared by all rows, same as `get_product_details`
+	"""
+	rows = process_string_args(rows)
+	args = process_string_args(args)
+
+	if isinstance(doc, str):
+		doc = json.loads(doc)
+
+	rows_args = [process_args(dict(args, **row)) for row in rows]
+
+	product_codes = {d.product_code for d in rows_args if d.product_code}
+	price_lists = {d.price_list for d in rows_args if d.price_list}
+
+	with ProductDetailsCache(product_codes, price_lists):
+		return [
+			get_product_details(row_args, doc, for_validate, overwrite_warehouse) for row_args in rows_args
+		]
+
+
+class ProductDetailsCache:
+	"""
+	Products, prices, bins and UOM conversions of all rows of a document, loaded with one query
+	per table. While active, the single row functions read from it instead of querying per row.
+
+	with ProductDetailsCache(product_codes, price_lists):
+	        for row_args in rows_args:
+	                get_product_details(row_args)
+	"""
+
+	def __init__(self, product_codes, price_lists):
+		from erpnext.accounts.doctype.pricing_rule.pricing_rule_index import get_pricing_rule_index
+
+		price_lists = set(price_lists)
+
+		self.products = {
+			d.name: d
+			for d in frappe.get_all(
+				"Product",
+				filters={"name": ("in", list(product_codes) or [""])},
+				fields=["name", "variant_of", "stock_uom"],
+			)
+		}
+		self.product_codes = set(self.products) | {
+			d.variant_of for d in self.products.values() if d.variant_of
+		}
+
+		self.price_lists = price_lists
+		self.product_prices = {}
+		if price_lists:
+			for d in frappe.get_all(
+				"Product Price",
+				filters={
+					"product_code": ("in", list(self.product_codes) or [""]),
+					"price_list": ("in", list(price_lists)),
+				},
+				fields=[
+					"name",
+					"price_list_rate",
+					"uom",
+					"product_code",
+					"price_list",
+					"batch_no",
+					"customer",
+					"supplier",
+					"valid_from",
+					"valid_upto",
+					"packing_unit",
+				],
+			):
+				self.product_prices.setdefault(d.product_code, []).append(d)
+
+		self.product_price_packing_units = {
+			d.name: d.packing_unit for prices in self.product_prices.values() for d in prices
+		}
+
+		self.conversion_factors = {}
+		for d in frappe.get_all(
+			"UOM Conversion Detail",
+			filters={"parent": ("in", list(self.product_codes) or [""]), "parenttype": "Product"},
+			fields=["parent", "uom", "conversion_factor"],
+			order_by="modified desc",
+		):
+			self.conversion_factors.setdefault((d.parent, d.uom), d.conversion_factor)
+
+		self.bins = {}
+		for d in frappe.get_all(
+			"Bin",
+			filters={"product_code": ("in", list(self.products) or [""])},
+			fields=[
+				"product_code",
+				"warehouse",
+				"projected_qty",
+				"actual_qty",
+				"reserved_qty",
+				"valuation_rate",
+			],
+		):
+			self.bins[(d.product_code, d.warehouse)] = d
+
+		self.warehouse_companies = dict(
+			frappe.get_all(
+				"Warehouse",
+				filters={"name": ("in", list({d[1] for d in self.bins}) or [""])},
+				fields=["name", "company"],
+				as_list=True,
+			)
+		)
+
+		self.child_warehouses = {}
+		self.last_purchase_rates = {}
+		self.pricing_rule_index = get_pricing_rule_index()
+
+	def __enter__(self):
+		self.previous_cache = frappe.flags.product_details_cache
+		frappe.flags.product_details_cache = self
+		return self
+
+	def __exit__(self, *args):
+		frappe.flags.product_details_cache = self.previous_cache
+
+	def get_product_price(self, args, product_code, ignore_party=False):
+		"""Same rows and order as the `get_product_price` query"""
+		transaction_date = args.get("transaction_date") and getdate(args.get("transaction_date"))
+
+		product_prices = []
+		for d in self.product_prices.get(product_code, []):
+			if d.price_list != args.get("price_list"):
+				continue
+
+			if cstr(d.uom) not in ("", cstr(args.get("uom"))) or cstr(d.batch_no) not in (
+				"",
+				cstr(args.get("batch_no")),
+			):
+				continue
+
+			if not ignore_party:
+				if args.get("customer"):
+					if d.customer != args.get("customer"):
+						continue
+				elif args.get("supplier"):
+					if d.supplier != args.get("supplier"):
+						continue
+				elif d.customer or d.supplier:
+					continue
+
+			if transaction_date and not (
+				getdate(d.valid_from or "2000-01-01")
+				<= transaction_date
+				<= getdate(d.valid_upto or "2500-12-31")
+			):
+				continue
+
+			product_prices.append(d)
+
+		# order by valid_from desc, ifnull(batch_no, '') desc, uom desc with nulls last
+		product_prices.sort(key=lambda d: (d.uom is not None, cstr(d.uom)), reverse=True)
+		product_prices.sort(key=lambda d: cstr(d.batch_no), reverse=True)
+		product_prices.sort(
+			key=lambda d: (d.valid_from is not None, getdate(d.valid_from or "2000-01-01")), reverse=True
+		)
+
+		return tuple((d.name, d.price_list_rate, d.uom) for d in product_prices)
+
+	def get_bin_details(self, product_code, warehouses):
+		bins = [self.bins[(product_code, w)] for w in warehouses if (product_code, w) in self.bins]
+		return {
+			fieldname: sum_exact(d.get(fieldname) for d in bins)
+			for fieldname in ("projected_qty", "actual_qty", "reserved_qty")
+		}
+
+	def get_company_total_stock(self, product_code, company):
+		bins = [
+			d
+			for d in self.bins.values()
+			if d.product_code == product_code and self.warehouse_companies.get(d.warehouse) == company
+		]
+		if bins:
+			return sum_exact(d.actual_qty for d in bins)
+
+	def get_child_warehouses(self, warehouse):
+		from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
+
+		if warehouse not in self.child_warehouses:
+			self.child_warehouses[warehouse] = get_child_warehouses(warehouse)
+
+		return self.child_warehouses[warehouse]
+
+
+def get_product_details_cache(product_code=None):
+	"""Returns active `ProductDetailsCache` if it has data of the product"""
+	cache = frappe.flags.product_details_cache
+	if cache and (not product_code or product_code in cache.products):
+		return cache
+
+
+def sum_exact(values):
+	"""Sum like the database does for decimal columns, without float rounding errors"""
+	return flt(sum((Decimal(cstr(flt(value))) for value in values), Decimal(0)))
+
+
 def remove_standard_fields(details):
 	for key in child_table_fields + default_fields:
 		details.pop(key, None)
@@ -427,9 +642,14 @@ def get_basic_details(args, product, overwrite_warehouse=True):
 	):
 		from erpnext.buying.doctype.purchase_order.purchase_order import product_last_purchase_rate
 
-		out.last_purchase_rate = product_last_purchase_rate(
-			args.name, args.conversion_rate, product.name, out.conversion_factor
-		)
+		key = (args.name, args.conversion_rate, product.name, out.conversion_factor)
+		cache = get_product_details_cache(product.name)
+		if cache and key in cache.last_purchase_rates:
+			out.last_purchase_rate = cache.last_purchase_rates[key]
+		else:
+			out.last_purchase_rate = product_last_purchase_rate(*key)
+			if cache:
+				cache.last_purchase_rates[key] = out.last_purchase_rate
 
 	# if default specified in product is for another company, fetch from company
 	for d in [
@@ -452,18 +672,13 @@ def get_basic_details(args, product, overwrite_warehouse=True):
 			out["manufacturer_part_no"] = None
 			out["manufacturer"] = None
 	else:
-		data = frappe.get_value(
-			"Product", product.name, ["default_product_manufacturer", "default_manufacturer_part_no"], as_dict=1
+		out.update(
+			{
+				"manufacturer": product.get("default_product_manufacturer"),
+				"manufacturer_part_no": product.get("default_manufacturer_part_no"),
+			}
 		)
 
-		if data:
-			out.update(
-				{
-					"manufacturer": data.default_product_manufacturer,
-					"manufacturer_part_no": data.default_manufacturer_part_no,
-				}
-			)
-
 	child_doctype = args.doctype + " Product"
 	meta = frappe.get_meta(child_doctype)
 	if meta.get_field("barcode"):
@@ -891,6 +1106,10 @@ def get_product_price(args, product_code, ignore_party=False):
 	:param product_code: str, Product Doctype field product_code
 	"""
 
+	cache = get_product_details_cache()
+	if cache and product_code in cache.product_codes and args.get("price_list") in cache.price_lists:
+		return cache.get_product_price(args, product_code, ignore_party)
+
 	ip = frappe.qb.DocType("Product Price")
 	query = (
 		frappe.qb.from_(ip)
@@ -984,9 +1203,14 @@ def check_packing_list(price_list_rate_name, desired_qty, product_code):
 	"""
 
 	flag = True
-	product_price = frappe.get_doc("Product Price", price_list_rate_name)
-	if product_price.packing_unit:
-		packing_increment = desired_qty % product_price.packing_unit
+	cache = get_product_details_cache()
+	if cache and price_list_rate_name in cache.product_price_packing_units:
+		packing_unit = cache.product_price_packing_units[price_list_rate_name]
+	else:
+		packing_unit = frappe.get_doc("Product Price", price_list_rate_name).packing_unit
+
+	if packing_unit:
+		packing_increment = desired_qty % packing_unit
 
 		if packing_increment != 0:
 			flag = False
@@ -1145,6 +1369,17 @@ def get_serial_nos_by_fifo(args, sales_order=None):
 
 @frappe.whitelist()
 def get_conversion_factor(product_code, uom):
+	cache = get_product_details_cache(product_code)
+	if cache:
+		product = cache.products[product_code]
+		conversion_factor = cache.conversion_factors.get((product_code, uom))
+		if not conversion_factor and product.variant_of:
+			conversion_factor = cache.conversion_factors.get((product.variant_of, uom))
+		if not conversion_factor:
+			conversion_factor = get_uom_conv_factor(uom, product.stock_uom)
+
+		return {"conversion_factor": conversion_factor or 1.0}
+
 	variant_of = frappe.db.get_value("Product", product_code, "variant_of", cache=True)
 	filters = {"parent": product_code, "uom": uom}
 
@@ -1170,8 +1405,13 @@ def get_projected_qty(product_code, warehouse):
 @frappe.whitelist()
 def get_bin_details(product_code, warehouse, company=None, include_child_warehouses=False):
 	bin_details = {"projected_qty": 0, "actual_qty": 0, "reserved_qty": 0}
+	cache = get_product_details_cache(product_code)
+
+	if warehouse and cache:
+		warehouses = cache.get_child_warehouses(warehouse) if include_child_warehouses else [warehouse]
+		bin_details = cache.get_bin_details(product_code, warehouses)
 
-	if warehouse:
+	elif warehouse:
 		from frappe.query_builder.functions import Coalesce, Sum
 
 		from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
@@ -1190,7 +1430,11 @@ def get_bin_details(product_code, warehouse, company=None, include_child_warehou
 		).run(as_dict=True)[0]
 
 	if company:
-		bin_details["company_total_stock"] = get_company_total_stock(product_code, company)
+		bin_details["company_total_stock"] = (
+			cache.get_company_total_stock(product_code, company)
+			if cache
+			else get_company_total_stock(product_code, company)
+		)
 
 	return bin_details
 
@@ -1400,6 +1644,11 @@ def get_valuation_rate(product_code, company, warehouse=None):
 				or brand.get("default_warehouse")
 			)
 
+		cache = get_product_details_cache(product_code)
+		if cache:
+			bin = cache.bins.get((product_code, warehouse))
+			return frappe._dict({"valuation_rate": bin.valuation_rate}) if bin else {"valuation_rate": 0}
+
 		return frappe.db.get_value(
 			"Bin", {"product_code": product_code, "warehouse": warehouse}, ["valuation_rate"], as_dict=True
 		) or {"valuation_rate": 0}
@@ -7,7 +7,8 @@ from math import ceil
 
 import frappe
 from frappe import _
-from frappe.utils import add_days, cint, flt, nowdate
+from frappe.query_builder.functions import Sum
+from frappe.utils import add_days, cint, create_batch, flt, nowdate
 
 import erpnext
 
@@ -22,7 +23,21 @@ def reorder_product():
 		return _reorder_product()
 
 
-def _reorder_product():
+def _reorder_product(dry_run=False, product_codes=None, warehouses=None):
+	"""Create Material Requests for the products below their reorder levels.
+
+	With `dry_run`, returns the requests by material request type and company without creating
+	them. `product_codes` and `warehouses` limit the products and reorder warehouses checked."""
+	material_requests = get_material_requests_to_reorder(product_codes, warehouses)
+
+	if dry_run:
+		return material_requests
+
+	if material_requests:
+		return create_material_request(material_requests)
+
+
+def get_material_requests_to_reorder(product_codes=None, warehouses=None, batch_size=1000):
 	material_requests = {"Purchase": {}, "Transfer": {}, "Material Issue": {}, "Manufacture": {}}
 	warehouse_company = frappe._dict(
 		frappe.db.sql(
@@ -34,25 +49,14 @@ def _reorder_product():
 		erpnext.get_default_company() or frappe.db.sql("""select name from tabCompany limit 1""")[0][0]
 	)
 
-	products_to_consider = frappe.db.sql_list(
-		"""select name from `tabProduct` product
-		where is_stock_product=1 and has_variants=0
-			and disabled=0
-			and (end_of_life is null or end_of_life='0000-00-00' or end_of_life > %(today)s)
-			and (exists (select name from `tabProduct Reorder` ir where ir.parent=product.name)
-				or (variant_of is not null and variant_of != ''
-				and exists (select name from `tabProduct Reorder` ir where ir.parent=product.variant_of))
-			)""",
-		{"today": nowdate()},
-	)
-
+	products_to_consider = get_products_to_consider(product_codes)
 	if not products_to_consider:
-		return
+		return material_requests
 
-	product_warehouse_projected_qty = get_product_warehouse_projected_qty(products_to_consider)
+	reorder_levels = get_reorder_levels(products_to_consider, warehouses)
 
 	def add_to_material_request(
-		product_code, warehouse, reorder_level, reorder_qty, material_request_type, warehouse_group=None
+		product_code, warehouse, reorder_level, reorder_qty, material_request_type, projected_qty
 	):
 		if warehouse not in warehouse_company:
 			# a disabled warehouse
@@ -61,12 +65,6 @@ def _reorder_product():
 		reorder_level = flt(reorder_level)
 		reorder_qty = flt(reorder_qty)
 
-		# projected_qty will be 0 if Bin does not exist
-		if warehouse_group:
-			projected_qty = flt(product_warehouse_projected_qty.get(product_code, {}).get(warehouse_group))
-		else:
-			projected_qty = flt(product_warehouse_projected_qty.get(product_code, {}).get(warehouse))
-
 		if (reorder_level or reorder_qty) and projected_qty < reorder_level:
 			deficiency = reorder_level - projected_qty
 			if deficiency > reorder_qty:
@@ -78,55 +76,118 @@ def _reorder_product():
 				{"product_code": product_code, "warehouse": warehouse, "reorder_qty": reorder_qty}
 			)
 
-	for product_code in products_to_consider:
-		product = frappe.get_doc("Product", product_code)
+	for batch in create_batch(list(products_to_consider), batch_size):
+		warehouses_to_consider = {
+			d.warehouse_group or d.warehouse for product in batch for d in reorder_levels[product]
+		}
+		if not warehouses_to_consider:
+			continue
 
-		if product.variant_of and not product.get("reorder_levels"):
-			product.update_template_tables()
+		product_warehouse_projected_qty = get_product_warehouse_projected_qty(
+			batch, warehouses_to_consider
+		)
+
+		for product_code in batch:
+			for d in reorder_levels[product_code]:
+				# projected_qty will be 0 if Bin does not exist
+				projected_qty = flt(
+					product_warehouse_projected_qty.get(product_code, {}).get(d.warehouse_group or d.warehouse)
+				)
 
-		if product.get("reorder_levels"):
-			for d in product.get("reorder_levels"):
 				add_to_material_request(
 					product_code,
 					d.warehouse,
 					d.warehouse_reorder_level,
 					d.warehouse_reorder_qty,
 					d.material_request_type,
-					warehouse_group=d.warehouse_group,
+					projected_qty,
 				)
 
-	if material_requests:
-		return create_material_request(material_requests)
+	return material_requests
 
 
-def get_product_warehouse_projected_qty(products_to_consider):
-	product_warehouse_projected_qty = {}
+def get_products_to_consider(product_codes=None):
+	"""Returns {product: template} of the stock products having reorder levels, of their own or of
+	their template"""
+	product_condition = "and product.name in %(product_codes)s" if product_codes else ""
 
-	for product_code, warehouse, projected_qty in frappe.db.sql(
-		"""select product_code, warehouse, projected_qty
-		from tabBin where product_code in ({0})
-			and (warehouse != '' and warehouse is not null)""".format(
-			", ".join(["%s"] * len(products_to_consider))
-		),
-		products_to_consider,
+	return frappe._dict(
+		frappe.db.sql(
+			"""select name, variant_of from `tabProduct` product
+			where is_stock_product=1 and has_variants=0
+				and disabled=0
+				and (end_of_life is null or end_of_life='0000-00-00' or end_of_life > %(today)s)
+				and (exists (select name from `tabProduct Reorder` ir where ir.parent=product.name)
+					or (variant_of is not null and variant_of != ''
+					and exists (select name from `tabProduct Reorder` ir where ir.parent=product.variant_of))
+				)
+				{product_condition}""".format(
+				product_condition=product_condition
+			),
+			{"today": nowdate(), "product_codes": product_codes},
+		)
+	)
+
+
+def get_reorder_levels(products_to_consider, warehouses=None):
+	"""Returns {product: reorder level rows}, variants without reorder levels take the rows of
+	their template, without warehouse group, same as `Product.update_template_tables`"""
+	reorder_levels_by_parent = {}
+	for d in frappe.db.sql(
+		"""select parent, warehouse_group, warehouse, warehouse_reorder_level,
+			warehouse_reorder_qty, material_request_type
+		from `tabProduct Reorder`
+		where parenttype = 'Product'
+		order by parent, idx""",
+		as_dict=True,
 	):
+		reorder_levels_by_parent.setdefault(d.parent, []).append(d)
 
-		if product_code not in product_warehouse_projected_qty:
-			product_warehouse_projected_qty.setdefault(product_code, {})
+	reorder_levels = {}
+	for product_code, template in products_to_consider.items():
+		rows = reorder_levels_by_parent.get(product_code)
+		if not rows and template:
+			rows = [
+				frappe._dict(d, warehouse_group=None) for d in reorder_levels_by_parent.get(template, [])
+			]
 
-		if warehouse not in product_warehouse_projected_qty.get(product_code):
-			product_warehouse_projected_qty[product_code][warehouse] = flt(projected_qty)
+		if warehouses:
+			rows = [d for d in rows or [] if d.warehouse in warehouses]
 
-		warehouse_doc = frappe.get_doc("Warehouse", warehouse)
+		reorder_levels[product_code] = rows or []
 
-		while warehouse_doc.parent_warehouse:
-			if not product_warehouse_projected_qty.get(product_code, {}).get(warehouse_doc.parent_warehouse):
-				product_warehouse_projected_qty.setdefault(product_code, {})[warehouse_doc.parent_warehouse] = flt(
-					projected_qty
-				)
-			else:
-				product_warehouse_projected_qty[product_code][warehouse_doc.parent_warehouse] += flt(projected_qty)
-			warehouse_doc = frappe.get_doc("Warehouse", warehouse_doc.parent_warehouse)
+	return reorder_levels
+
+
+def get_product_warehouse_projected_qty(products_to_consider, warehouses=None):
+	"""Returns {product: {warehouse: projected qty}}, projected qty of a warehouse group being the
+	total of all the warehouses under it"""
+	if not products_to_consider:
+		return {}
+
+	bin = frappe.qb.DocType("Bin")
+	warehouse = frappe.qb.DocType("Warehouse")
+	parent_warehouse = frappe.qb.DocType("Warehouse").as_("parent_warehouse")
+
+	query = (
+		frappe.qb.from_(bin)
+		.inner_join(warehouse)
+		.on(warehouse.name == bin.warehouse)
+		.inner_join(parent_warehouse)
+		.on((parent_warehouse.lft <= warehouse.lft) & (parent_warehouse.rgt >= warehouse.rgt))
+		.select(bin.product_code, parent_warehouse.name, Sum(bin.projected_qty))
+		.where(bin.product_code.isin(list(products_to_consider)))
+		.groupby(bin.product_code, parent_warehouse.name)
+	)
+
+	if warehouses:
+		query = query.where(parent_warehouse.name.isin(list(warehouses)))
+
+	product_warehouse_projected_qty = {}
+	for product_code, warehouse_name, projected_qty in query.run():
+		product_warehouse_projected_qty.setdefault(product_code, {})[warehouse_name] = flt(
+			projected_qty
+		)
 
 	return product_warehouse_projected_qty
 
@@ -161,21 +222,18 @@ def create_material_request(material_requests):
 					}
 				)
 
+				product_details = get_product_details({d["product_code"] for d in products})
+
 				for d in products:
 					d = frappe._dict(d)
-					product = frappe.get_doc("Product", d.product_code)
+					product = product_details[d.product_code]
 					uom = product.stock_uom
 					conversion_factor = 1.0
 
 					if request_type == "Purchase":
 						uom = product.purchase_uom or product.stock_uom
 						if uom != product.stock_uom:
-							conversion_factor = (
-								frappe.db.get_value(
-									"UOM Conversion Detail", {"parent": product.name, "uom": uom}, "conversion_factor"
-								)
-								or 1.0
-							)
+							conversion_factor = product.conversion_factors.get(uom) or 1.0
 
 					must_be_whole_number = frappe.db.get_value("UOM", uom, "must_be_whole_number", cache=True)
 					qty = d.reorder_qty / conversion_factor
@@ -224,6 +282,37 @@ def create_material_request(material_requests):
 	return mr_list
 
 
+def get_product_details(product_codes):
+	"""Returns {product: details} with the UOM conversion factors of each product"""
+	product_details = {}
+	for batch in create_batch(sorted(product_codes), 1000):
+		for d in frappe.get_all(
+			"Product",
+			filters={"name": ("in", batch)},
+			fields=[
+				"name",
+				"stock_uom",
+				"purchase_uom",
+				"lead_time_days",
+				"product_name",
+				"description",
+				"product_group",
+				"brand",
+			],
+		):
+			d.conversion_factors = {}
+			product_details[d.name] = d
+
+		for d in frappe.get_all(
+			"UOM Conversion Detail",
+			filters={"parent": ("in", batch), "parenttype": "Product"},
+			fields=["parent", "uom", "conversion_factor"],
+		):
+			product_details[d.parent].conversion_factors.setdefault(d.uom, d.conversion_factor)
+
+	return product_details
+
+
 def send_email_notification(mr_list):
 	"""Notify user about auto creation of indent"""
 
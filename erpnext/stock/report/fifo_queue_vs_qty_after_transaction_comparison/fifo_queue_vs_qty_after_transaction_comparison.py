@@ -1,13 +1,13 @@
 # Copyright (c) 2022, Frappe Technologies Pvt. Ltd. and contributors
 # For license information, please see license.txt
 
-import json
-
 import frappe
 from frappe import _
 from frappe.utils import flt
 from frappe.utils.nestedset import get_descendants_of
 
+from erpnext.stock.stock_queue import decode_stock_queue
+
 SLE_FIELDS = (
 	"name",
 	"product_code",
@@ -80,7 +80,7 @@ def find_first_bad_queue(sles):
 
 	for _product_wh, sles in product_warehouse_sles.products():
 		for idx, sle in enumerate(sles):
-			queue = json.loads(sle.stock_queue or "[]")
+			queue = decode_stock_queue(sle.stock_queue)
 
 			sle.fifo_queue_qty = 0.0
 			sle.fifo_stock_value = 0.0
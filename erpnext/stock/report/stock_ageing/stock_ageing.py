@@ -2,17 +2,21 @@
 # License: GNU General Public License v3. See license.txt
 
 
+from collections import deque
 from operator import productgetter
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Iterator, List, Tuple, Union
 
 import frappe
 from frappe import _
-from frappe.utils import cint, date_diff, flt
+from frappe.utils import cint, date_diff, flt, getdate
+from pypika import terms
 
 from erpnext.stock.doctype.serial_no.serial_no import get_serial_nos
 
 Filters = frappe._dict
 
+STREAM_PAGE_LENGTH = 10000
+
 
 def execute(filters: Filters = None) -> Tuple:
 	to_date = filters["to_date"]
@@ -221,6 +225,9 @@ class FIFOSlots:
 		self.filters = filters
 		self.sle = sle
 
+		# posting date and time of the entries having transfer buckets
+		self.transfer_posting_datetime = None
+
 	def generate(self) -> Dict:
 		"""
 		Returns dict of the foll.g structure:
@@ -232,9 +239,11 @@ class FIFOSlots:
 		}
 		"""
 		if self.sle is None:
-			self.sle = self.__get_stock_ledger_entries()
+			from_date = self.__load_checkpoint()
+			self.sle = self.__iter_stock_ledger_entries(from_date)
 
 		for d in self.sle:
+			self.__evict_transfer_buckets(d)
 			key, fifo_queue, transferred_product_key = self.__init_key_stores(d)
 
 			if d.voucher_type == "Stock Reconciliation":
@@ -251,21 +260,81 @@ class FIFOSlots:
 
 			self.__update_balances(d, key)
 
+		for row in self.product_details.values():
+			row["fifo_queue"] = list(row["fifo_queue"])
+
 		if not self.filters.get("show_warehouse_wise_stock"):
 			# (Product 1, WH 1), (Product 1, WH 2) => (Product 1)
 			self.product_details = self.__aggregate_details_by_product(self.product_details)
 
 		return self.product_details
 
+	def get_checkpoint(self) -> Dict:
+		"""Returns state of the warehouse wise queues after the last entry, to continue from with
+		later entries. Call after `generate` with `show_warehouse_wise_stock`."""
+		return {
+			"product_details": [
+				[key[0], key[1], row.get("qty_after_transaction"), row.get("total_qty"), row["fifo_queue"]]
+				for key, row in self.product_details.items()
+			],
+			"serial_nos": self.serial_no_batch_purchase_details,
+		}
+
+	def __load_checkpoint(self):
+		"""Seed queues from the latest valid Stock Ageing Checkpoint, returns its date."""
+		from erpnext.stock.doctype.stock_ageing_checkpoint.stock_ageing_checkpoint import (
+			get_stock_ageing_checkpoint,
+		)
+
+		# a serial no first received in another warehouse would be aged from a different date
+		if self.filters.get("warehouse"):
+			return
+
+		checkpoint = get_stock_ageing_checkpoint(self.filters.get("company"), self.filters.get("to_date"))
+		if not checkpoint:
+			return
+
+		products = {d.name: d for d in self.__get_product_query().run(as_dict=True)}
+		for product_code, warehouse, qty_after_transaction, total_qty, fifo_queue in checkpoint.data[
+			"product_details"
+		]:
+			if product_code not in products:
+				continue
+
+			self.product_details[(product_code, warehouse)] = {
+				"details": frappe._dict(products[product_code], warehouse=warehouse),
+				"fifo_queue": deque(
+					[slot[0], getdate(slot[1]) if slot[1] else slot[1]] for slot in fifo_queue
+				),
+				"qty_after_transaction": qty_after_transaction,
+				"total_qty": total_qty,
+				"has_serial_no": products[product_code].has_serial_no,
+			}
+
+		self.serial_no_batch_purchase_details = {
+			serial_no: getdate(posting_date)
+			for serial_no, posting_date in checkpoint.data["serial_nos"].items()
+		}
+
+		return checkpoint.to_date
+
+	def __evict_transfer_buckets(self, row: Dict):
+		"""Transfer buckets are only consumed by entries of the same voucher, product & warehouse,
+		which share the posting date and time. Drop them once the ledger moves past them."""
+		posting_datetime = (row.posting_date, row.get("posting_time"))
+		if posting_datetime != self.transfer_posting_datetime:
+			self.transferred_product_details = {}
+			self.transfer_posting_datetime = posting_datetime
+
 	def __init_key_stores(self, row: Dict) -> Tuple:
 		"Initialise keys and FIFO Queue."
 
 		key = (row.name, row.warehouse)
-		self.product_details.setdefault(key, {"details": row, "fifo_queue": []})
+		self.product_details.setdefault(key, {"details": row, "fifo_queue": deque()})
 		fifo_queue = self.product_details[key]["fifo_queue"]
 
 		transferred_product_key = (row.voucher_no, row.name, row.warehouse)
-		self.transferred_product_details.setdefault(transferred_product_key, [])
+		self.transferred_product_details.setdefault(transferred_product_key, deque())
 
 		return key, fifo_queue, transferred_product_key
 
@@ -302,7 +371,9 @@ class FIFOSlots:
 	):
 		"Update FIFO Queue on outward stock."
 		if serial_nos:
-			fifo_queue[:] = [serial_no for serial_no in fifo_queue if serial_no[0] not in serial_nos]
+			remaining_slots = [serial_no for serial_no in fifo_queue if serial_no[0] not in serial_nos]
+			fifo_queue.clear()
+			fifo_queue.extend(remaining_slots)
 			return
 
 		qty_to_pop = abs(row.actual_qty)
@@ -312,7 +383,7 @@ class FIFOSlots:
 				# qty to pop >= slot qty
 				# if +ve and not enough or exactly same balance in current slot, consume whole slot
 				qty_to_pop -= flt(slot[0])
-				self.transferred_product_details[transfer_key].append(fifo_queue.pop(0))
+				self.transferred_product_details[transfer_key].append(fifo_queue.popleft())
 			elif not fifo_queue:
 				# negative stock, no balance but qty yet to consume
 				fifo_queue.append([-(qty_to_pop), row.posting_date])
@@ -341,7 +412,7 @@ class FIFOSlots:
 			if transfer_data and 0 < transfer_data[0][0] <= transfer_qty_to_pop:
 				# bucket qty is not enough, consume whole
 				transfer_qty_to_pop -= transfer_data[0][0]
-				add_to_fifo_queue(transfer_data.pop(0))
+				add_to_fifo_queue(transfer_data.popleft())
 			elif not transfer_data:
 				# transfer bucket is empty, extra incoming qty
 				add_to_fifo_queue([transfer_qty_to_pop, row.posting_date])
@@ -381,7 +452,9 @@ class FIFOSlots:
 
 		return product_aggregated_data
 
-	def __get_stock_ledger_entries(self) -> List[Dict]:
+	def __iter_stock_ledger_entries(self, from_date=None) -> Iterator[Dict]:
+		"""Yields entries upto the to date, read in pages, each page starting after the sort key
+		of the last entry of the previous page."""
 		sle = frappe.qb.DocType("Stock Ledger Entry")
 		product = self.__get_product_query()  # used as derived table in sle query
 
@@ -398,6 +471,9 @@ class FIFOSlots:
 				product.has_serial_no,
 				sle.actual_qty,
 				sle.posting_date,
+				sle.posting_time,
+				sle.creation,
+				sle.name.as_("sle_name"),
 				sle.voucher_type,
 				sle.voucher_no,
 				sle.serial_no,
@@ -413,12 +489,38 @@ class FIFOSlots:
 			)
 		)
 
+		if from_date:
+			sle_query = sle_query.where(sle.posting_date > from_date)
+
 		if self.filters.get("warehouse"):
 			sle_query = self.__get_warehouse_conditions(sle, sle_query)
 
-		sle_query = sle_query.orderby(sle.posting_date, sle.posting_time, sle.creation, sle.actual_qty)
+		sort_key = (sle.posting_date, sle.posting_time, sle.creation, sle.actual_qty, sle.name)
+		sle_query = sle_query.orderby(*sort_key).limit(STREAM_PAGE_LENGTH)
+
+		last_sort_key = None
+		while True:
+			query = sle_query
+			if last_sort_key:
+				query = query.where(terms.Tuple(*sort_key) > terms.Tuple(*last_sort_key))
 
-		return sle_query.run(as_dict=True)
+			entries = query.run(as_dict=True)
+			if not entries:
+				return
+
+			last = entries[-1]
+			last_sort_key = (
+				last.posting_date,
+				last.posting_time,
+				last.creation,
+				last.actual_qty,
+				last.sle_name,
+			)
+
+			yield from entries
+
+			if len(entries) < STREAM_PAGE_LENGTH:
+				return
 
 	def __get_product_query(self) -> str:
 		product_table = frappe.qb.DocType("Product")
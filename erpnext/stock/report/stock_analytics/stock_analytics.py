@@ -7,10 +7,14 @@ import frappe
 from frappe import _, scrub
 from frappe.query_builder.functions import CombineDatetime
 from frappe.utils import get_first_day as get_first_day_of_month
-from frappe.utils import get_first_day_of_week, get_quarter_start, getdate
+from frappe.utils import add_days, get_first_day_of_week, get_quarter_start, getdate
 from frappe.utils.nestedset import get_descendants_of
 
 from erpnext.accounts.utils import get_fiscal_year
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	get_stock_balance_snapshot_period,
+	get_stock_balance_snapshot_query,
+)
 from erpnext.stock.doctype.warehouse.warehouse import apply_warehouse_filter
 from erpnext.stock.utils import is_reposting_product_valuation_in_progress
 
@@ -309,7 +313,53 @@ def get_stock_ledger_entries(filters, products):
 	if products:
 		query = query.where(sle.product_code.isin(products))
 
+	# balances before the report periods from snapshots, as opening entries
+	opening_entries = []
+	if snapshot_period := get_snapshot_period(filters):
+		query = query.where(sle.posting_date > snapshot_period[1])
+		opening_entries = get_opening_entries_from_snapshots(filters, products, snapshot_period[1])
+
 	query = apply_conditions(query, filters)
+	return opening_entries + query.run(as_dict=True)
+
+
+def get_snapshot_period(filters):
+	# balance qty of Stock Reconciliation of batch products differs from the snapshots
+	if filters.get("value_quantity") != "Value":
+		return
+
+	return get_stock_balance_snapshot_period(
+		filters.get("company"), add_days(get_period_date_ranges(filters)[0][0], -1)
+	)
+
+
+def get_opening_entries_from_snapshots(filters, products, period_end):
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot").as_("snapshot")
+	warehouse_table = frappe.qb.DocType("Warehouse")
+
+	query = get_stock_balance_snapshot_query(filters.company, period_end).select(
+		snapshot.product_code,
+		snapshot.warehouse,
+		snapshot.period_end.as_("posting_date"),
+		snapshot.qty.as_("actual_qty"),
+		snapshot.company,
+		snapshot.stock_value.as_("stock_value_difference"),
+		snapshot.product_code.as_("name"),
+		snapshot.stock_value,
+	)
+
+	if products:
+		query = query.where(snapshot.product_code.isin(products))
+
+	if filters.get("warehouse"):
+		query = apply_warehouse_filter(query, snapshot, filters)
+	elif warehouse_type := filters.get("warehouse_type"):
+		query = (
+			query.join(warehouse_table)
+			.on(warehouse_table.name == snapshot.warehouse)
+			.where(warehouse_table.warehouse_type == warehouse_type)
+		)
+
 	return query.run(as_dict=True)
 
 
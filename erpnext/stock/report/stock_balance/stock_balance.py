@@ -14,6 +14,10 @@ from frappe.utils.nestedset import get_descendants_of
 
 import erpnext
 from erpnext.stock.doctype.inventory_dimension.inventory_dimension import get_inventory_dimensions
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	get_stock_balance_snapshot_period,
+	get_stock_balance_snapshot_query,
+)
 from erpnext.stock.doctype.warehouse.warehouse import apply_warehouse_filter
 from erpnext.stock.report.stock_ageing.stock_ageing import FIFOSlots, get_average_age
 from erpnext.stock.utils import add_additional_uom_columns
@@ -61,7 +65,8 @@ class StockBalanceReport(object):
 		self.float_precision = cint(frappe.db.get_default("float_precision")) or 3
 
 		self.inventory_dimensions = self.get_inventory_dimension_fields()
-		self.prepare_opening_data_from_closing_balance()
+		if not self.prepare_opening_data_from_snapshots():
+			self.prepare_opening_data_from_closing_balance()
 		self.prepare_stock_ledger_entries()
 		self.prepare_new_data()
 
@@ -89,8 +94,67 @@ class StockBalanceReport(object):
 			if group_by_key not in self.opening_data:
 				self.opening_data.setdefault(group_by_key, entry)
 
+	def prepare_opening_data_from_snapshots(self) -> bool:
+		"""Set balances before the from date from Stock Balance Snapshots, if built and more recent
+		than the Closing Stock Balance"""
+		if not self.can_use_balance_snapshots():
+			return False
+
+		snapshot_period = get_stock_balance_snapshot_period(
+			self.filters.company, add_days(self.from_date, -1)
+		)
+		if not snapshot_period:
+			return False
+
+		period_end = snapshot_period[1]
+		closing_balance = self.get_closing_balance()
+		if closing_balance and getdate(closing_balance[0].to_date) >= period_end:
+			return False
+
+		snapshot = frappe.qb.DocType("Stock Balance Snapshot").as_("snapshot")
+		product_table = frappe.qb.DocType("Product")
+
+		query = (
+			get_stock_balance_snapshot_query(self.filters.company, period_end)
+			.inner_join(product_table)
+			.on(snapshot.product_code == product_table.name)
+			.select(
+				snapshot.company,
+				snapshot.product_code,
+				snapshot.warehouse,
+				snapshot.qty.as_("bal_qty"),
+				snapshot.stock_value.as_("bal_val"),
+				snapshot.valuation_rate.as_("snapshot_val_rate"),
+				product_table.product_group,
+				product_table.stock_uom,
+				product_table.product_name,
+			)
+		)
+
+		query = self.apply_warehouse_filters(query, snapshot)
+		query = self.apply_products_filters(query, product_table)
+
+		self.opening_data = frappe._dict({})
+		for entry in query.run(as_dict=True):
+			self.opening_data[self.get_group_by_key(entry)] = entry
+
+		self.start_from = add_days(period_end, 1)
+		return True
+
+	def can_use_balance_snapshots(self) -> bool:
+		if (
+			not self.filters.get("company")
+			or self.filters.get("ignore_closing_balance")
+			or self.filters.get("show_stock_ageing_data")
+		):
+			return False
+
+		# snapshots are not kept by inventory dimension
+		return not any(self.filters.get(fieldname) for fieldname in self.inventory_dimensions)
+
 	def prepare_new_data(self):
-		if not self.sle_entries:
+		# openings are shown even if there are no entries after them
+		if not self.sle_entries and not self.opening_data:
 			return
 
 		if self.filters.get("show_stock_ageing_data"):
@@ -211,7 +275,8 @@ class StockBalanceReport(object):
 				"out_val": 0.0,
 				"bal_qty": opening_data.get("bal_qty") or 0.0,
 				"bal_val": opening_data.get("bal_val") or 0.0,
-				"val_rate": 0.0,
+				# only openings from snapshots carry the valuation rate
+				"val_rate": opening_data.get("snapshot_val_rate") or 0.0,
 			}
 		)
 
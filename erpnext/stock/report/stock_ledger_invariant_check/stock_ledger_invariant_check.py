@@ -1,11 +1,11 @@
 # Copyright (c) 2021, Frappe Technologies Pvt. Ltd. and contributors
 # License: GNU GPL v3. See LICENSE
 
-import json
-
 import frappe
 from frappe import _
 
+from erpnext.stock.stock_queue import decode_stock_queue
+
 SLE_FIELDS = (
 	"name",
 	"posting_date",
@@ -50,7 +50,7 @@ def add_invariant_check_fields(sles):
 	balance_qty = 0.0
 	balance_stock_value = 0.0
 	for idx, sle in enumerate(sles):
-		queue = json.loads(sle.stock_queue)
+		queue = decode_stock_queue(sle.stock_queue)
 
 		fifo_qty = 0.0
 		fifo_value = 0.0
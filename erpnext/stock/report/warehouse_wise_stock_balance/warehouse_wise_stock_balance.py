@@ -6,6 +6,12 @@ from typing import Any, Dict, List, Optional, TypedDict
 import frappe
 from frappe import _
 from frappe.query_builder.functions import Sum
+from frappe.utils import flt
+
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	get_stock_balance_snapshot_period,
+	get_stock_balance_snapshot_query,
+)
 
 
 class StockBalanceFilter(TypedDict):
@@ -38,8 +44,29 @@ def get_warehouse_wise_balance(filters: StockBalanceFilter) -> List[SLEntry]:
 	if filters.get("company"):
 		query = query.where(sle.company == filters.get("company"))
 
-	data = query.run(as_list=True)
-	return frappe._dict(data) if data else frappe._dict()
+	# balance upto the last built month from snapshots, later entries from the ledger
+	snapshot_balance = {}
+	if snapshot_period := get_stock_balance_snapshot_period(filters.get("company")):
+		query = query.where(sle.posting_date > snapshot_period[1])
+		snapshot_balance = get_snapshot_balance(filters.company, snapshot_period[1])
+
+	data = frappe._dict(query.run(as_list=True))
+	for warehouse, stock_balance in snapshot_balance.items():
+		data[warehouse] = flt(data.get(warehouse)) + flt(stock_balance)
+
+	return data
+
+
+def get_snapshot_balance(company: str, period_end) -> Dict[str, float]:
+	snapshot = frappe.qb.DocType("Stock Balance Snapshot").as_("snapshot")
+
+	query = (
+		get_stock_balance_snapshot_query(company, period_end)
+		.select(snapshot.warehouse, Sum(snapshot.stock_value))
+		.groupby(snapshot.warehouse)
+	)
+
+	return frappe._dict(query.run(as_list=True))
 
 
 def get_warehouses(report_filters: StockBalanceFilter):
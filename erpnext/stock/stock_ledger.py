@@ -8,12 +8,17 @@ from typing import Optional, Set, Tuple
 import frappe
 from frappe import _
 from frappe.model.meta import get_field_precision
-from frappe.query_builder.functions import CombineDatetime, Sum
+from frappe.query_builder.functions import Sum
 from frappe.utils import cint, cstr, flt, get_link_to_form, getdate, now, nowdate
 
 import erpnext
 from erpnext.stock.doctype.bin.bin import update_qty as update_bin_qty
+from erpnext.stock.doctype.stock_balance_snapshot.stock_balance_snapshot import (
+	invalidate_stock_balance_snapshots,
+)
+from erpnext.stock.stock_queue import decode_stock_queue, encode_stock_queue
 from erpnext.stock.utils import (
+	get_combine_datetime,
 	get_incoming_outgoing_rate_for_cancel,
 	get_or_make_bin,
 	get_valuation_method,
@@ -21,6 +26,20 @@ from erpnext.stock.utils import (
 from erpnext.stock.valuation import FIFOValuation, LIFOValuation, round_off_if_near_zero
 
 
+# values recalculated by `update_entries_after.process_sle`
+BUFFERED_SLE_FIELDS = (
+	"qty_after_transaction",
+	"valuation_rate",
+	"stock_value",
+	"stock_queue",
+	"stock_value_difference",
+	"incoming_rate",
+	"outgoing_rate",
+	"actual_qty",
+	"is_cancelled",
+)
+
+
 class NegativeStockError(frappe.ValidationError):
 	pass
 
@@ -89,6 +108,8 @@ def make_sl_entries(sl_entries, allow_negative_stock=False, via_landed_cost_vouc
 					_("Product {0} ignored since it is not a stock product").format(args.get("product_code"))
 				)
 
+		invalidate_stock_balance_snapshots(sl_entries)
+
 
 def repost_current_voucher(args, allow_negative_stock=False, via_landed_cost_voucher=False):
 	if args.get("actual_qty") or args.get("voucher_type") == "Stock Reconciliation":
@@ -220,6 +241,10 @@ def repost_future_sle(
 	distinct_product_warehouses = get_distinct_product_warehouse(args, doc)
 	affected_transactions = get_affected_transactions(doc)
 
+	batch_size = cint(
+		frappe.db.get_single_value("Stock Reposting Settings", "ledger_update_batch_size")
+	)
+
 	i = get_current_index(doc) or 0
 	while i < len(args):
 		validate_product_warehouse(args[i])
@@ -235,6 +260,7 @@ def repost_future_sle(
 			},
 			allow_negative_stock=allow_negative_stock,
 			via_landed_cost_voucher=via_landed_cost_voucher,
+			batch_size=batch_size,
 		)
 		affected_transactions.update(obj.affected_transactions)
 
@@ -350,6 +376,9 @@ class update_entries_after(object):
 	                "posting_date": "2012-12-12",
 	                "posting_time": "12:00"
 	        }
+
+	:param batch_size: if set, recalculated values of future entries and rates of
+	        their vouchers are buffered and written together every `batch_size` entries.
 	"""
 
 	def __init__(
@@ -359,6 +388,7 @@ class update_entries_after(object):
 		allow_negative_stock=None,
 		via_landed_cost_voucher=False,
 		verbose=1,
+		batch_size=0,
 	):
 		self.exceptions = {}
 		self.verbose = verbose
@@ -381,10 +411,20 @@ class update_entries_after(object):
 		self.distinct_product_warehouses = args.get("distinct_product_warehouses", frappe._dict())
 		self.affected_transactions: Set[Tuple[str, str]] = set()
 
+		self.batch_size = cint(batch_size)
+		self.pending_sle_updates = {}
+		self.pending_rate_updates = {}
+		self.pending_stock_entries = set()
+		self.pending_bin_updates = {}
+
 		self.data = frappe._dict()
 		self.initialize_previous_data(self.args)
 		self.build()
 
+		invalidate_stock_balance_snapshots(
+			[{"company": self.company, "posting_date": self.args.posting_date}]
+		)
+
 	def set_precision(self):
 		self.flt_precision = cint(frappe.db.get_default("float_precision")) or 2
 		self.currency_precision = get_field_precision(
@@ -422,7 +462,7 @@ class update_entries_after(object):
 		warehouse_dict.update(
 			{
 				"prev_stock_value": previous_sle.stock_value or 0.0,
-				"stock_queue": json.loads(previous_sle.stock_queue or "[]"),
+				"stock_queue": decode_stock_queue(previous_sle.stock_queue),
 				"stock_value_difference": 0.0,
 			}
 		)
@@ -443,11 +483,17 @@ class update_entries_after(object):
 				i += 1
 
 				self.process_sle(sle)
-				self.update_bin_data(sle)
+				if self.batch_size:
+					# only the latest values of each bin need to be written
+					self.pending_bin_updates[(sle.product_code, sle.warehouse)] = sle
+				else:
+					self.update_bin_data(sle)
 
 				if sle.dependant_sle_voucher_detail_no:
 					entries_to_fix = self.get_dependent_entries_to_fix(entries_to_fix, sle)
 
+			self.flush_pending_updates()
+
 		if self.exceptions:
 			self.raise_exceptions()
 
@@ -457,22 +503,21 @@ class update_entries_after(object):
 			self.process_sle(sle)
 
 	def get_sle_against_current_voucher(self):
-		self.args["time_format"] = "%H:%i:%s"
+		self.args["posting_datetime"] = get_combine_datetime(
+			self.args.posting_date, self.args.posting_time
+		)
 
 		return frappe.db.sql(
 			"""
 			select
-				*, timestamp(posting_date, posting_time) as "timestamp"
+				*, posting_datetime as "timestamp"
 			from
 				`tabStock Ledger Entry`
 			where
 				product_code = %(product_code)s
 				and warehouse = %(warehouse)s
 				and is_cancelled = 0
-				and (
-					posting_date = %(posting_date)s and
-					time_format(posting_time, %(time_format)s) = time_format(%(posting_time)s, %(time_format)s)
-				)
+				and posting_datetime = %(posting_datetime)s
 			order by
 				creation ASC
 			for update
@@ -549,6 +594,9 @@ class update_entries_after(object):
 		self.wh_data = self.data[sle.warehouse]
 		self.affected_transactions.add((sle.voucher_type, sle.voucher_no))
 
+		if self.reads_updated_values(sle):
+			self.flush_pending_updates()
+
 		if (sle.serial_no and not self.via_landed_cost_voucher) or not cint(self.allow_negative_stock):
 			# validate negative stock for serialized products, fifo valuation
 			# or when negative stock is not allowed for moving average
@@ -620,15 +668,61 @@ class update_entries_after(object):
 		sle.qty_after_transaction = self.wh_data.qty_after_transaction
 		sle.valuation_rate = self.wh_data.valuation_rate
 		sle.stock_value = self.wh_data.stock_value
-		sle.stock_queue = json.dumps(self.wh_data.stock_queue)
+		sle.stock_queue = encode_stock_queue(self.get_stock_queue())
 		sle.stock_value_difference = stock_value_difference
 		sle.doctype = "Stock Ledger Entry"
 
-		frappe.get_doc(sle).db_update()
+		if self.batch_size and not self.args.get("sle_id"):
+			self.queue_sle_update(sle)
+		else:
+			frappe.get_doc(sle).db_update()
 
 		if not self.args.get("sle_id"):
 			self.update_outgoing_rate_on_transaction(sle)
 
+	def reads_updated_values(self, sle):
+		"""Check if processing `sle` reads ledger or voucher values which could be pending in buffer."""
+		if not self.batch_size:
+			return False
+
+		return bool(
+			sle.recalculate_rate
+			or sle.serial_no
+			or sle.batch_no
+			or sle.voucher_type == "Stock Reconciliation"
+			or (sle.voucher_type in ("Purchase Receipt", "Purchase Invoice") and flt(sle.actual_qty) < 0)
+		)
+
+	def queue_sle_update(self, sle):
+		self.pending_sle_updates[sle.name] = {
+			fieldname: sle.get(fieldname) for fieldname in BUFFERED_SLE_FIELDS
+		}
+
+		if len(self.pending_sle_updates) >= self.batch_size:
+			self.flush_pending_updates()
+
+	def queue_rate_update(self, doctype, name, fieldname, value):
+		self.pending_rate_updates.setdefault((doctype, fieldname), {})[name] = value
+
+	def flush_pending_updates(self):
+		"""Write buffered ledger values and voucher rates with one statement per field."""
+		if self.pending_sle_updates:
+			bulk_update_rows("Stock Ledger Entry", self.pending_sle_updates)
+			self.pending_sle_updates = {}
+
+		for (doctype, fieldname), values in self.pending_rate_updates.items():
+			bulk_update_rows(doctype, {name: {fieldname: value} for name, value in values.items()})
+		self.pending_rate_updates = {}
+
+		for sle in self.pending_bin_updates.values():
+			self.update_bin_data(sle)
+		self.pending_bin_updates = {}
+
+		# rates of outgoing rows are updated above, recalculate each stock entry only once
+		pending_stock_entries, self.pending_stock_entries = self.pending_stock_entries, set()
+		for voucher_no in pending_stock_entries:
+			self.recalculate_amounts_in_stock_entry(voucher_no)
+
 	def reset_actual_qty_for_stock_reco(self, sle):
 		current_qty = frappe.get_cached_value(
 			"Stock Reconciliation Product", sle.voucher_detail_no, "current_qty"
@@ -749,6 +843,12 @@ class update_entries_after(object):
 			self.update_rate_on_stock_reconciliation(sle)
 
 	def update_rate_on_stock_entry(self, sle, outgoing_rate):
+		if self.batch_size:
+			self.queue_rate_update("Stock Entry Detail", sle.voucher_detail_no, "basic_rate", outgoing_rate)
+			if not sle.dependant_sle_voucher_detail_no:
+				self.pending_stock_entries.add(sle.voucher_no)
+			return
+
 		frappe.db.set_value("Stock Entry Detail", sle.voucher_detail_no, "basic_rate", outgoing_rate)
 
 		# Update outgoing product's rate, recalculate FG Product's rate and total incoming/outgoing amount
@@ -765,7 +865,11 @@ class update_entries_after(object):
 	def update_rate_on_delivery_and_sales_return(self, sle, outgoing_rate):
 		# Update product's incoming rate on transaction
 		product_code = frappe.db.get_value(sle.voucher_type + " Product", sle.voucher_detail_no, "product_code")
-		if product_code == sle.product_code:
+		if product_code == sle.product_code and self.batch_size:
+			self.queue_rate_update(
+				sle.voucher_type + " Product", sle.voucher_detail_no, "incoming_rate", outgoing_rate
+			)
+		elif product_code == sle.product_code:
 			frappe.db.set_value(
 				sle.voucher_type + " Product", sle.voucher_detail_no, "incoming_rate", outgoing_rate
 			)
@@ -779,6 +883,7 @@ class update_entries_after(object):
 			)
 
 	def update_rate_on_purchase_receipt(self, sle, outgoing_rate):
+		self.flush_pending_updates()
 		if frappe.db.exists(sle.voucher_type + " Product", sle.voucher_detail_no):
 			if sle.voucher_type in ["Purchase Receipt", "Purchase Invoice"] and frappe.get_cached_value(
 				sle.voucher_type, sle.voucher_no, "is_internal_supplier"
@@ -799,6 +904,7 @@ class update_entries_after(object):
 				d.db_update()
 
 	def update_rate_on_subcontracting_receipt(self, sle, outgoing_rate):
+		self.flush_pending_updates()
 		if frappe.db.exists("Subcontracting Receipt Product", sle.voucher_detail_no):
 			frappe.db.set_value("Subcontracting Receipt Product", sle.voucher_detail_no, "rate", outgoing_rate)
 		else:
@@ -815,6 +921,7 @@ class update_entries_after(object):
 			d.db_update()
 
 	def update_rate_on_stock_reconciliation(self, sle):
+		self.flush_pending_updates()
 		if not sle.serial_no and not sle.batch_no:
 			sr = frappe.get_doc("Stock Reconciliation", sle.voucher_no, for_update=True)
 
@@ -899,21 +1006,18 @@ class update_entries_after(object):
 		for serial_no in invalid_serial_nos:
 			incoming_rate = frappe.db.sql(
 				"""
-				select incoming_rate
-				from `tabStock Ledger Entry`
+				select sle.incoming_rate
+				from `tabStock Ledger Entry` sle, `tabStock Ledger Serial No` sle_serial_no
 				where
-					company = %s
-					and actual_qty > 0
-					and is_cancelled = 0
-					and (serial_no = %s
-						or serial_no like %s
-						or serial_no like %s
-						or serial_no like %s
-					)
-				order by posting_date desc
+					sle_serial_no.serial_no = %s
+					and sle_serial_no.stock_ledger_entry = sle.name
+					and sle.company = %s
+					and sle.actual_qty > 0
+					and sle.is_cancelled = 0
+				order by sle.posting_date desc
 				limit 1
 			""",
-				(sle.company, serial_no, serial_no + "\n%", "%\n" + serial_no, "%\n" + serial_no + "\n%"),
+				(serial_no, sle.company),
 			)
 
 			incoming_values += flt(incoming_rate[0][0]) if incoming_rate else 0
@@ -968,10 +1072,7 @@ class update_entries_after(object):
 			self.wh_data.qty_after_transaction + actual_qty
 		)
 
-		if self.valuation_method == "LIFO":
-			stock_queue = LIFOValuation(self.wh_data.stock_queue)
-		else:
-			stock_queue = FIFOValuation(self.wh_data.stock_queue)
+		stock_queue = self.get_valuation_queue()
 
 		_prev_qty, prev_stock_value = stock_queue.get_total_stock_and_value()
 
@@ -996,19 +1097,46 @@ class update_entries_after(object):
 
 		stock_value_difference = stock_value - prev_stock_value
 
-		self.wh_data.stock_queue = stock_queue.state
 		self.wh_data.stock_value = round_off_if_near_zero(
 			self.wh_data.stock_value + stock_value_difference
 		)
 
-		if not self.wh_data.stock_queue:
-			self.wh_data.stock_queue.append(
+		if stock_queue.is_empty():
+			stock_queue.state.append(
 				[0, sle.incoming_rate or sle.outgoing_rate or self.wh_data.valuation_rate]
 			)
 
+		# not `state`, consumed bins are dropped only when the queue is serialized
+		self.wh_data.stock_queue = stock_queue.bins
+
 		if self.wh_data.qty_after_transaction:
 			self.wh_data.valuation_rate = self.wh_data.stock_value / self.wh_data.qty_after_transaction
 
+	def get_valuation_queue(self):
+		"""Get FIFO/LIFO queue for current warehouse.
+
+		Queue object (and hence its running totals) is reused across entries of the warehouse
+		as long as `stock_queue` has not been replaced by any other valuation path."""
+		stock_queue = self.wh_data.get("valuation_queue")
+
+		if stock_queue is None or stock_queue.bins is not self.wh_data.stock_queue:
+			if self.valuation_method == "LIFO":
+				stock_queue = LIFOValuation(self.wh_data.stock_queue)
+			else:
+				stock_queue = FIFOValuation(self.wh_data.stock_queue)
+			self.wh_data.valuation_queue = stock_queue
+
+		return stock_queue
+
+	def get_stock_queue(self):
+		"""Get bins of the stock queue of current warehouse for serializing."""
+		stock_queue = self.wh_data.get("valuation_queue")
+
+		if stock_queue is not None and stock_queue.bins is self.wh_data.stock_queue:
+			return stock_queue.state
+
+		return self.wh_data.stock_queue
+
 	def update_batched_values(self, sle):
 		incoming_rate = flt(sle.incoming_rate)
 		actual_qty = flt(sle.actual_qty)
@@ -1058,6 +1186,7 @@ class update_entries_after(object):
 	def get_fallback_rate(self, sle) -> float:
 		"""When exact incoming rate isn't available use any of other "average" rates as fallback.
 		This should only get used for negative stock."""
+		self.flush_pending_updates()
 		return get_valuation_rate(
 			sle.product_code,
 			sle.warehouse,
@@ -1139,15 +1268,47 @@ class update_entries_after(object):
 			frappe.db.set_value("Bin", bin_name, updated_values, update_modified=True)
 
 
+def bulk_update_rows(doctype, rows):
+	"""Update multiple rows of `doctype` using a single UPDATE statement with CASE per column.
+
+	:param rows: dict of name -> dict of fieldname and value, all rows must have same fields.
+	"""
+	if not rows:
+		return
+
+	names = list(rows)
+	fieldnames = list(rows[names[0]])
+
+	values = []
+	set_clauses = []
+	for fieldname in fieldnames:
+		set_clauses.append(
+			f"`{fieldname}` = case name {' '.join(['when %s then %s'] * len(names))} end"
+		)
+		for name in names:
+			values.extend((name, rows[name][fieldname]))
+
+	values.extend(names)
+	frappe.db.sql(
+		f"""
+		update `tab{doctype}`
+		set {", ".join(set_clauses)}
+		where name in ({", ".join(["%s"] * len(names))})
+		""",
+		tuple(values),
+	)
+
+
 def get_previous_sle_of_current_voucher(args, operator="<", exclude_current_voucher=False):
 	"""get stock ledger entries filtered by specific posting datetime conditions"""
 
-	args["time_format"] = "%H:%i:%s"
 	if not args.get("posting_date"):
 		args["posting_date"] = "1900-01-01"
 	if not args.get("posting_time"):
 		args["posting_time"] = "00:00"
 
+	args["posting_datetime"] = get_combine_datetime(args["posting_date"], args["posting_time"])
+
 	voucher_condition = ""
 	if exclude_current_voucher:
 		voucher_no = args.get("voucher_no")
@@ -1155,20 +1316,14 @@ def get_previous_sle_of_current_voucher(args, operator="<", exclude_current_vouc
 
 	sle = frappe.db.sql(
 		"""
-		select *, timestamp(posting_date, posting_time) as "timestamp"
+		select *, posting_datetime as "timestamp"
 		from `tabStock Ledger Entry`
 		where product_code = %(product_code)s
 			and warehouse = %(warehouse)s
 			and is_cancelled = 0
 			{voucher_condition}
-			and (
-				posting_date < %(posting_date)s or
-				(
-					posting_date = %(posting_date)s and
-					time_format(posting_time, %(time_format)s) {operator} time_format(%(posting_time)s, %(time_format)s)
-				)
-			)
-		order by timestamp(posting_date, posting_time) desc, creation desc
+			and posting_datetime {operator} %(posting_datetime)s
+		order by posting_datetime desc, creation desc
 		limit 1
 		for update""".format(
 			operator=operator, voucher_condition=voucher_condition
@@ -1209,49 +1364,38 @@ def get_stock_ledger_entries(
 	check_serial_no=True,
 ):
 	"""get stock ledger entries filtered by specific posting datetime conditions"""
-	conditions = " and timestamp(posting_date, posting_time) {0} timestamp(%(posting_date)s, %(posting_time)s)".format(
-		operator
-	)
+	conditions = " and posting_datetime {0} %(posting_datetime)s".format(operator)
 	if previous_sle.get("warehouse"):
 		conditions += " and warehouse = %(warehouse)s"
 	elif previous_sle.get("warehouse_condition"):
 		conditions += " and " + previous_sle.get("warehouse_condition")
 
 	if check_serial_no and previous_sle.get("serial_no"):
-		# conditions += " and serial_no like {}".format(frappe.db.escape('%{0}%'.format(previous_sle.get("serial_no"))))
-		serial_no = previous_sle.get("serial_no")
-		conditions += (
-			""" and
-			(
-				serial_no = {0}
-				or serial_no like {1}
-				or serial_no like {2}
-				or serial_no like {3}
-			)
-		"""
-		).format(
-			frappe.db.escape(serial_no),
-			frappe.db.escape("{}\n%".format(serial_no)),
-			frappe.db.escape("%\n{}".format(serial_no)),
-			frappe.db.escape("%\n{}\n%".format(serial_no)),
-		)
+		conditions += """ and name in (
+			select stock_ledger_entry from `tabStock Ledger Serial No`
+			where serial_no = {0} and product_code = %(product_code)s
+		)""".format(frappe.db.escape(previous_sle.get("serial_no")))
 
 	if not previous_sle.get("posting_date"):
 		previous_sle["posting_date"] = "1900-01-01"
 	if not previous_sle.get("posting_time"):
 		previous_sle["posting_time"] = "00:00"
 
+	previous_sle["posting_datetime"] = get_combine_datetime(
+		previous_sle["posting_date"], previous_sle["posting_time"]
+	)
+
 	if operator in (">", "<=") and previous_sle.get("name"):
 		conditions += " and name!=%(name)s"
 
 	return frappe.db.sql(
 		"""
-		select *, timestamp(posting_date, posting_time) as "timestamp"
+		select *, posting_datetime as "timestamp"
 		from `tabStock Ledger Entry`
 		where product_code = %%(product_code)s
 		and is_cancelled = 0
 		%(conditions)s
-		order by timestamp(posting_date, posting_time) %(order)s, creation %(order)s
+		order by posting_datetime %(order)s, creation %(order)s
 		%(limit)s %(for_update)s"""
 		% {
 			"conditions": conditions,
@@ -1277,7 +1421,7 @@ def get_sle_by_voucher_detail_no(voucher_detail_no, excluded_sle=None):
 			"posting_date",
 			"posting_time",
 			"voucher_detail_no",
-			"timestamp(posting_date, posting_time) as timestamp",
+			"posting_datetime as timestamp",
 		],
 		as_dict=1,
 	)
@@ -1288,15 +1432,11 @@ def get_batch_incoming_rate(
 ):
 
 	sle = frappe.qb.DocType("Stock Ledger Entry")
+	posting_datetime = get_combine_datetime(posting_date, posting_time)
 
-	timestamp_condition = CombineDatetime(sle.posting_date, sle.posting_time) < CombineDatetime(
-		posting_date, posting_time
-	)
+	timestamp_condition = sle.posting_datetime < posting_datetime
 	if creation:
-		timestamp_condition |= (
-			CombineDatetime(sle.posting_date, sle.posting_time)
-			== CombineDatetime(posting_date, posting_time)
-		) & (sle.creation < creation)
+		timestamp_condition |= (sle.posting_datetime == posting_datetime) & (sle.creation < creation)
 
 	batch_details = (
 		frappe.qb.from_(sle)
@@ -1351,14 +1491,14 @@ def get_valuation_rate(
 	if not last_valuation_rate or last_valuation_rate[0][0] is None:
 		last_valuation_rate = frappe.db.sql(
 			"""select valuation_rate
-			from `tabStock Ledger Entry` force index (product_warehouse)
+			from `tabStock Ledger Entry` force index (product_warehouse_posting_datetime_index)
 			where
 				product_code = %s
 				AND warehouse = %s
 				AND valuation_rate >= 0
 				AND is_cancelled = 0
 				AND NOT (voucher_no = %s AND voucher_type = %s)
-			order by posting_date desc, posting_time desc, name desc limit 1""",
+			order by posting_datetime desc, name desc limit 1""",
 			(product_code, warehouse, voucher_no, voucher_type),
 		)
 
@@ -1419,7 +1559,7 @@ def update_qty_in_future_sle(args, allow_negative_stock=False):
 	datetime_limit_condition = ""
 	qty_shift = args.actual_qty
 
-	args["time_format"] = "%H:%i:%s"
+	args["posting_datetime"] = get_combine_datetime(args.posting_date, args.posting_time)
 
 	# find difference/shift in qty caused by stock reconciliation
 	if args.voucher_type == "Stock Reconciliation":
@@ -1444,13 +1584,7 @@ def update_qty_in_future_sle(args, allow_negative_stock=False):
 			and warehouse = %(warehouse)s
 			and voucher_no != %(voucher_no)s
 			and is_cancelled = 0
-			and (
-				posting_date > %(posting_date)s or
-				(
-					posting_date = %(posting_date)s and
-					time_format(posting_time, %(time_format)s) > time_format(%(posting_time)s, %(time_format)s)
-				)
-			)
+			and posting_datetime > %(posting_datetime)s
 		{datetime_limit_condition}
 		""",
 		args,
@@ -1496,6 +1630,7 @@ def get_next_stock_reco(kwargs):
 	"""Returns next nearest stock reconciliaton's details."""
 
 	sle = frappe.qb.DocType("Stock Ledger Entry")
+	posting_datetime = get_combine_datetime(kwargs.get("posting_date"), kwargs.get("posting_time"))
 
 	query = (
 		frappe.qb.from_(sle)
@@ -1516,20 +1651,11 @@ def get_next_stock_reco(kwargs):
 			& (sle.voucher_no != kwargs.get("voucher_no"))
 			& (sle.is_cancelled == 0)
 			& (
-				(
-					CombineDatetime(sle.posting_date, sle.posting_time)
-					> CombineDatetime(kwargs.get("posting_date"), kwargs.get("posting_time"))
-				)
-				| (
-					(
-						CombineDatetime(sle.posting_date, sle.posting_time)
-						== CombineDatetime(kwargs.get("posting_date"), kwargs.get("posting_time"))
-					)
-					& (sle.creation > kwargs.get("creation"))
-				)
+				(sle.posting_datetime > posting_datetime)
+				| ((sle.posting_datetime == posting_datetime) & (sle.creation > kwargs.get("creation")))
 			)
 		)
-		.orderby(CombineDatetime(sle.posting_date, sle.posting_time))
+		.orderby(sle.posting_datetime)
 		.orderby(sle.creation)
 		.limit(1)
 	)
@@ -1541,11 +1667,13 @@ def get_next_stock_reco(kwargs):
 
 
 def get_datetime_limit_condition(detail):
+	posting_datetime = get_combine_datetime(detail.posting_date, detail.posting_time)
+
 	return f"""
 		and
-		(timestamp(posting_date, posting_time) < timestamp('{detail.posting_date}', '{detail.posting_time}')
+		(posting_datetime < '{posting_datetime}'
 			or (
-				timestamp(posting_date, posting_time) = timestamp('{detail.posting_date}', '{detail.posting_time}')
+				posting_datetime = '{posting_datetime}'
 				and creation < '{detail.creation}'
 			)
 		)"""
@@ -1608,6 +1736,8 @@ def is_negative_with_precision(neg_sle, is_batch=False):
 
 
 def get_future_sle_with_negative_qty(args):
+	args = {**args, "posting_datetime": get_combine_datetime(args.posting_date, args.posting_time)}
+
 	return frappe.db.sql(
 		"""
 		select
@@ -1618,10 +1748,10 @@ def get_future_sle_with_negative_qty(args):
 			product_code = %(product_code)s
 			and warehouse = %(warehouse)s
 			and voucher_no != %(voucher_no)s
-			and timestamp(posting_date, posting_time) >= timestamp(%(posting_date)s, %(posting_time)s)
+			and posting_datetime >= %(posting_datetime)s
 			and is_cancelled = 0
 			and qty_after_transaction < 0
-		order by timestamp(posting_date, posting_time) asc
+		order by posting_datetime asc, creation asc
 		limit 1
 	""",
 		args,
@@ -1630,24 +1760,26 @@ def get_future_sle_with_negative_qty(args):
 
 
 def get_future_sle_with_negative_batch_qty(args):
+	args = {**args, "posting_datetime": get_combine_datetime(args.posting_date, args.posting_time)}
+
 	return frappe.db.sql(
 		"""
 		with batch_ledger as (
 			select
-				posting_date, posting_time, voucher_type, voucher_no,
-				sum(actual_qty) over (order by posting_date, posting_time, creation) as cumulative_total
+				posting_date, posting_time, posting_datetime, voucher_type, voucher_no,
+				sum(actual_qty) over (order by posting_datetime, creation) as cumulative_total
 			from `tabStock Ledger Entry`
 			where
 				product_code = %(product_code)s
 				and warehouse = %(warehouse)s
 				and batch_no=%(batch_no)s
 				and is_cancelled = 0
-			order by posting_date, posting_time, creation
+			order by posting_datetime, creation
 		)
 		select * from batch_ledger
 		where
 			cumulative_total < 0.0
-			and timestamp(posting_date, posting_time) >= timestamp(%(posting_date)s, %(posting_time)s)
+			and posting_datetime >= %(posting_datetime)s
 		limit 1
 	""",
 		args,
@@ -0,0 +1,139 @@
+# Copyright (c) 2023, Frappe Technologies Pvt. Ltd. and Contributors
+# License: GNU General Public License v3. See license.txt
+
+"""Serialization of FIFO/LIFO queues stored in `Stock Ledger Entry.stock_queue`.
+
+Small queues are stored as JSON, same as before. Queues with many bins are stored in a
+versioned binary format:
+
+        "#Q" + base64(header + body)
+
+header: version (uint8), flags (uint8)
+body:   all qtys followed by all rates as little-endian float64, zlib compressed if
+        `FLAG_ZLIB` is set. Storing columns separately keeps similar values together
+        which compresses much better than interleaved pairs.
+
+All reads and writes of `stock_queue` should go through `encode_stock_queue` and
+`decode_stock_queue`, legacy JSON values are always readable.
+"""
+
+import base64
+import json
+import struct
+import zlib
+from typing import List, Optional, Union
+
+import frappe
+from frappe import _
+
+from erpnext.stock.valuation import StockBin
+
+BINARY_PREFIX = "#Q"
+HEADER = struct.Struct("<BB")
+VERSION = 1
+FLAG_ZLIB = 1
+
+# queues smaller than this are stored as JSON, which is readable and just as cheap.
+BINARY_ENCODING_THRESHOLD = 64
+
+
+def encode_stock_queue(queue: Optional[List[StockBin]], compress: bool = True) -> str:
+	"""Serialize stock queue for storing in Stock Ledger Entry."""
+	queue = queue or []
+	if len(queue) < BINARY_ENCODING_THRESHOLD:
+		return json.dumps(queue)
+
+	count = len(queue)
+	body = struct.pack(
+		f"<{2 * count}d", *[stock_bin[0] for stock_bin in queue], *[stock_bin[1] for stock_bin in queue]
+	)
+
+	flags = 0
+	if compress:
+		compressed = zlib.compress(body, 1)
+		if len(compressed) < len(body):
+			body = compressed
+			flags |= FLAG_ZLIB
+
+	return BINARY_PREFIX + base64.b64encode(HEADER.pack(VERSION, flags) + body).decode()
+
+
+def decode_stock_queue(value: Union[str, List[StockBin], None]) -> List[StockBin]:
+	"""Deserialize stock queue stored in either JSON or binary format."""
+	if not value:
+		return []
+
+	if isinstance(value, list):
+		return value
+
+	if not value.startswith(BINARY_PREFIX):
+		return json.loads(value)
+
+	data = base64.b64decode(value[len(BINARY_PREFIX) :])
+	version, flags = HEADER.unpack_from(data)
+	if version != VERSION:
+		frappe.throw(_("Unsupported stock queue format version {0}").format(version))
+
+	body = data[HEADER.size :]
+	if flags & FLAG_ZLIB:
+		body = zlib.decompress(body)
+
+	count = len(body) // 16
+	values = struct.unpack(f"<{2 * count}d", body)
+	return [[values[idx], values[count + idx]] for idx in range(count)]
+
+
+def is_queue_empty(value: Union[str, List[StockBin], None]) -> bool:
+	"""Check if stored queue has no bins without decoding it."""
+	if isinstance(value, str):
+		return value in ("", "[]")
+	return not value
+
+
+def convert_stock_queues(batch_size: int = 1000, compress: bool = True, verbose: bool = False) -> int:
+	"""Re-encode existing JSON stock queues which qualify for binary encoding.
+
+	Rows are processed in batches of `batch_size` ordered by name and changes are committed
+	after every batch, so the conversion can be stopped and resumed at any time.
+
+	Returns number of converted rows."""
+
+	converted = 0
+	last_name = ""
+
+	# JSON of a queue with threshold bins is at least this long: "[[0, 0], [0, 0]]"
+	min_length = BINARY_ENCODING_THRESHOLD * 8
+
+	while True:
+		rows = frappe.db.sql(
+			"""
+			select name, stock_queue
+			from `tabStock Ledger Entry`
+			where name > %(last_name)s
+				and stock_queue like '[%%'
+				and length(stock_queue) >= %(min_length)s
+			order by name
+			limit %(batch_size)s
+			""",
+			{"last_name": last_name, "min_length": min_length, "batch_size": batch_size},
+			as_dict=True,
+		)
+
+		if not rows:
+			break
+
+		for row in rows:
+			encoded = encode_stock_queue(json.loads(row.stock_queue), compress=compress)
+			if encoded != row.stock_queue:
+				frappe.db.set_value(
+					"Stock Ledger Entry", row.name, "stock_queue", encoded, update_modified=False
+				)
+				converted += 1
+
+		last_name = rows[-1].name
+		frappe.db.commit()
+
+		if verbose:
+			print(f"Converted {converted} stock queues, last processed entry: {last_name}")
+
+	return converted
@@ -4,7 +4,7 @@ import frappe
 from frappe.test_runner import make_test_records
 from frappe.tests.utils import FrappeTestCase
 
-from erpnext.stock.get_product_details import get_product_details
+from erpnext.stock.get_product_details import get_product_details, get_product_details_for_rows
 
 test_ignore = ["BOM"]
 test_dependencies = ["Customer", "Supplier", "Product", "Price List", "Product Price"]
@@ -38,3 +38,28 @@ class TestGetProductDetail(FrappeTestCase):
 		)
 		details = get_product_details(args)
 		self.assertEqual(details.get("price_list_rate"), 100)
+
+	def test_get_product_details_for_rows(self):
+		args = {
+			"company": "_Test Company",
+			"conversion_rate": 1.0,
+			"price_list_currency": "USD",
+			"plc_conversion_rate": 1.0,
+			"doctype": "Purchase Order",
+			"name": None,
+			"supplier": "_Test Supplier",
+			"transaction_date": frappe.utils.nowdate(),
+			"price_list": "_Test Buying Price List",
+			"is_subcontracted": 0,
+			"ignore_pricing_rule": 0,
+		}
+		rows = [
+			{"product_code": product_code, "qty": qty, "warehouse": warehouse, "uom": uom}
+			for product_code in ("_Test Product", "_Test Product 2", "_Test Product Home Desktop 100")
+			for warehouse in ("_Test Warehouse - _TC", "_Test Warehouse 1 - _TC")
+			for qty, uom in ((1, None), (5, "_Test UOM"), (10, "_Test UOM 1"))
+		]
+
+		expected = [get_product_details(dict(args, **row)) for row in rows]
+		self.assertEqual(get_product_details_for_rows(json.dumps(rows), json.dumps(args)), expected)
+		self.assertFalse(frappe.flags.product_details_cache)
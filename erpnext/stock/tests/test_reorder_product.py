@@ -0,0 +1,68 @@
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from erpnext.stock.doctype.stock_reconciliation.test_stock_reconciliation import (
+	create_stock_reconciliation,
+)
+from erpnext.stock.reorder_product import _reorder_product, get_product_warehouse_projected_qty
+
+PRODUCT = "_Test Product Warehouse Group Wise Reorder"
+WAREHOUSE = "_Test Warehouse Group-C1 - _TC"
+WAREHOUSE_GROUP = "_Test Warehouse Group - _TC"
+
+
+class TestReorderProduct(FrappeTestCase):
+	def tearDown(self):
+		frappe.db.rollback()
+
+	def get_group_projected_qty(self):
+		lft, rgt = frappe.db.get_value("Warehouse", WAREHOUSE_GROUP, ["lft", "rgt"])
+		return flt(
+			frappe.db.sql(
+				"""select sum(bin.projected_qty)
+				from `tabBin` bin, `tabWarehouse` wh
+				where bin.warehouse = wh.name and bin.product_code = %s
+					and wh.lft >= %s and wh.rgt <= %s""",
+				(PRODUCT, lft, rgt),
+			)[0][0]
+		)
+
+	def test_projected_qty_of_warehouse_group(self):
+		create_stock_reconciliation(product_code=PRODUCT, warehouse=WAREHOUSE, qty=5, rate=100)
+
+		projected_qty = get_product_warehouse_projected_qty([PRODUCT])[PRODUCT]
+		self.assertEqual(projected_qty[WAREHOUSE_GROUP], self.get_group_projected_qty())
+		bin_projected_qty = frappe.db.get_value(
+			"Bin", {"product_code": PRODUCT, "warehouse": WAREHOUSE}, "projected_qty"
+		)
+		self.assertEqual(projected_qty[WAREHOUSE], flt(bin_projected_qty))
+
+	def test_dry_run(self):
+		create_stock_reconciliation(product_code=PRODUCT, warehouse=WAREHOUSE, qty=5, rate=100)
+		material_requests_count = frappe.db.count("Material Request")
+
+		material_requests = _reorder_product(dry_run=True, product_codes=[PRODUCT])
+		self.assertEqual(frappe.db.count("Material Request"), material_requests_count)
+
+		reorder_level = frappe.get_doc("Product", PRODUCT).reorder_levels[0]
+		projected_qty = self.get_group_projected_qty()
+		expected = []
+		if projected_qty < reorder_level.warehouse_reorder_level:
+			expected.append(
+				{
+					"product_code": PRODUCT,
+					"warehouse": WAREHOUSE,
+					"reorder_qty": max(
+						reorder_level.warehouse_reorder_qty, reorder_level.warehouse_reorder_level - projected_qty
+					),
+				}
+			)
+
+		self.assertEqual(material_requests["Purchase"].get("_Test Company", []), expected)
+
+		# other warehouses are not checked
+		material_requests = _reorder_product(
+			dry_run=True, product_codes=[PRODUCT], warehouses=["_Test Warehouse - _TC"]
+		)
+		self.assertFalse(material_requests["Purchase"])
@@ -0,0 +1,43 @@
+import json
+import unittest
+
+from erpnext.stock.stock_queue import (
+	BINARY_ENCODING_THRESHOLD,
+	BINARY_PREFIX,
+	decode_stock_queue,
+	encode_stock_queue,
+	is_queue_empty,
+)
+
+
+class TestStockQueueCodec(unittest.TestCase):
+	def test_small_queue_stays_json(self):
+		queue = [[10, 100], [5.5, 12.25]]
+		encoded = encode_stock_queue(queue)
+
+		self.assertEqual(json.loads(encoded), queue)
+		self.assertEqual(decode_stock_queue(encoded), queue)
+
+	def test_large_queue_roundtrip(self):
+		queue = [[float(i % 7 + 1), i * 0.1] for i in range(BINARY_ENCODING_THRESHOLD * 10)]
+
+		for compress in (True, False):
+			encoded = encode_stock_queue(queue, compress=compress)
+			self.assertTrue(encoded.startswith(BINARY_PREFIX))
+			self.assertEqual(decode_stock_queue(encoded), queue)
+
+		self.assertLess(len(encode_stock_queue(queue)), len(json.dumps(queue)))
+
+	def test_negative_and_zero_bins(self):
+		queue = [[-5.0, 100.0]] + [[0.0, 0.0]] * BINARY_ENCODING_THRESHOLD
+		self.assertEqual(decode_stock_queue(encode_stock_queue(queue)), queue)
+
+	def test_legacy_and_empty_values(self):
+		self.assertEqual(decode_stock_queue(None), [])
+		self.assertEqual(decode_stock_queue(""), [])
+		self.assertEqual(decode_stock_queue("[]"), [])
+		self.assertEqual(decode_stock_queue("[[1, 2]]"), [[1, 2]])
+
+		self.assertTrue(is_queue_empty("[]"))
+		self.assertTrue(is_queue_empty(None))
+		self.assertFalse(is_queue_empty(encode_stock_queue([[1, 1]] * BINARY_ENCODING_THRESHOLD)))
@@ -1,8 +1,7 @@
-import json
-
 import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from erpnext.stock.stock_queue import decode_stock_queue
 from erpnext.stock.utils import scan_barcode
 
 
@@ -32,7 +31,7 @@ class StockTestMixin:
 			for k, v in exp_sle.products():
 				act_value = act_sle[k]
 				if k == "stock_queue":
-					act_value = json.loads(act_value)
+					act_value = decode_stock_queue(act_value)
 					if act_value and act_value[0][0] == 0:
 						# ignore empty fifo bins
 						continue
@@ -1,5 +1,6 @@
 import json
 import unittest
+from unittest.mock import patch
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
@@ -8,7 +9,13 @@ from hypothesis import strategies as st
 
 from erpnext.stock.doctype.product.test_product import make_product
 from erpnext.stock.doctype.stock_entry.stock_entry_utils import make_stock_entry
-from erpnext.stock.valuation import FIFOValuation, LIFOValuation, round_off_if_near_zero
+from erpnext.stock.stock_ledger import update_entries_after
+from erpnext.stock.valuation import (
+	COMPACTION_THRESHOLD,
+	FIFOValuation,
+	LIFOValuation,
+	round_off_if_near_zero,
+)
 
 qty_gen = st.floats(min_value=-1e6, max_value=1e6)
 value_gen = st.floats(min_value=1, max_value=1e6)
@@ -126,6 +133,14 @@ class TestFIFOValuation(unittest.TestCase):
 		self.queue.add_stock(5, 17)
 		self.queue.add_stock(8, 11)
 
+	def test_totals_with_initial_state(self):
+		self.queue = FIFOValuation([[1, 10], [2, 20]])
+		self.assertEqual(self.queue.get_total_stock_and_value(), (3, 50))
+
+		self.queue.remove_stock(2)
+		self.assertEqual(self.queue.get_total_stock_and_value(), (1, 20))
+		self.assertEqual(self.queue, [[1, 20]])
+
 	@given(stock_queue_generator)
 	def test_fifo_qty_hypothesis(self, stock_queue):
 		self.queue = FIFOValuation([])
@@ -322,6 +337,70 @@ class TestLIFOValuation(unittest.TestCase):
 			self.assertTotalValue(total_value)
 
 
+class TestValuationQueueReplay(unittest.TestCase):
+	"""Replay a long ledger of a single product and check that the running totals kept by
+	`update_queue_values` match the queue."""
+
+	ENTRIES = 10_000
+
+	def replay(self, valuation):
+		for idx in range(1, self.ENTRIES + 1):
+			if idx % 3:
+				# receipts at distinct rates keep growing the queue
+				valuation.add_stock(qty=10, rate=idx % 997 + 1)
+			else:
+				valuation.remove_stock(qty=7)
+			valuation.get_total_stock_and_value()
+
+	def assertTotals(self, valuation):
+		total_qty, total_value = valuation.get_total_stock_and_value()
+		# 6667 receipts of 10 and 3333 issues of 7
+		self.assertAlmostEqual(total_qty, 43339, places=4)
+		self.assertAlmostEqual(total_qty, sum(q for q, _ in valuation), places=4)
+		self.assertAlmostEqual(total_value, sum(q * r for q, r in valuation), places=2)
+
+	def test_fifo_replay(self):
+		valuation = FIFOValuation([])
+		self.replay(valuation)
+
+		self.assertGreater(len(valuation.state), 1000)
+		self.assertTotals(valuation)
+
+	def test_lifo_replay(self):
+		valuation = LIFOValuation([])
+		self.replay(valuation)
+
+		self.assertTotals(valuation)
+
+	def test_queue_is_not_compacted_per_entry(self):
+		sle_updater = update_entries_after.__new__(update_entries_after)
+		sle_updater.valuation_method = "FIFO"
+		sle_updater.wh_data = frappe._dict(
+			qty_after_transaction=0.0, stock_value=0.0, valuation_rate=0.0, stock_queue=[]
+		)
+
+		with patch.object(
+			FIFOValuation, "compact", autospec=True, side_effect=FIFOValuation.compact
+		) as compact:
+			for idx in range(1, self.ENTRIES + 1):
+				sle_updater.update_queue_values(
+					frappe._dict(
+						actual_qty=10 if idx % 3 else -7,
+						incoming_rate=idx % 997 + 1 if idx % 3 else 0,
+						outgoing_rate=0,
+					)
+				)
+
+		# consumed bins are dropped in bulk, not every time an entry is processed
+		self.assertLess(compact.call_count, self.ENTRIES // COMPACTION_THRESHOLD)
+
+		stock_queue = sle_updater.get_stock_queue()
+		self.assertAlmostEqual(sum(q for q, _ in stock_queue), 43339, places=4)
+		self.assertAlmostEqual(
+			sum(q * r for q, r in stock_queue), sle_updater.wh_data.stock_value, places=2
+		)
+
+
 class TestLIFOValuationSLE(FrappeTestCase):
 	PRODUCT_CODE = "_Test LIFO product"
 	WAREHOUSE = "_Test Warehouse - _TC"
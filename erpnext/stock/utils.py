@@ -2,16 +2,18 @@
 # License: GNU General Public License v3. See license.txt
 
 
+import datetime
 import json
 from typing import Dict, Optional
 
 import frappe
 from frappe import _
-from frappe.query_builder.functions import CombineDatetime, IfNull, Sum
-from frappe.utils import cstr, flt, get_link_to_form, nowdate, nowtime
+from frappe.query_builder.functions import IfNull, Sum
+from frappe.utils import cstr, flt, get_link_to_form, get_time, getdate, nowdate, nowtime
 
 import erpnext
 from erpnext.stock.doctype.warehouse.warehouse import get_child_warehouses
+from erpnext.stock.stock_queue import decode_stock_queue
 from erpnext.stock.valuation import FIFOValuation, LIFOValuation
 
 BarcodeScanResult = Dict[str, Optional[str]]
@@ -65,7 +67,7 @@ def get_stock_value_on(
 		frappe.qb.from_(sle)
 		.select(IfNull(Sum(sle.stock_value_difference), 0))
 		.where((sle.posting_date <= posting_date) & (sle.is_cancelled == 0))
-		.orderby(CombineDatetime(sle.posting_date, sle.posting_time), order=frappe.qb.desc)
+		.orderby(sle.posting_datetime, order=frappe.qb.desc)
 		.orderby(sle.creation, order=frappe.qb.desc)
 	)
 
@@ -137,29 +139,28 @@ def get_serial_nos_data_after_transactions(args):
 	serial_nos = set()
 	args = frappe._dict(args)
 	sle = frappe.qb.DocType("Stock Ledger Entry")
+	sle_serial_no = frappe.qb.DocType("Stock Ledger Serial No")
 
 	stock_ledger_entries = (
-		frappe.qb.from_(sle)
-		.select("serial_no", "actual_qty")
+		frappe.qb.from_(sle_serial_no)
+		.inner_join(sle)
+		.on(sle_serial_no.stock_ledger_entry == sle.name)
+		.select(sle_serial_no.serial_no, sle.actual_qty)
 		.where(
-			(sle.product_code == args.product_code)
-			& (sle.warehouse == args.warehouse)
-			& (
-				CombineDatetime(sle.posting_date, sle.posting_time)
-				< CombineDatetime(args.posting_date, args.posting_time)
-			)
+			(sle_serial_no.product_code == args.product_code)
+			& (sle_serial_no.warehouse == args.warehouse)
+			& (sle.posting_datetime < get_combine_datetime(args.posting_date, args.posting_time))
 			& (sle.is_cancelled == 0)
 		)
-		.orderby(sle.posting_date, sle.posting_time, sle.creation)
+		.orderby(sle.posting_datetime, sle.creation)
 		.run(as_dict=1)
 	)
 
 	for stock_ledger_entry in stock_ledger_entries:
-		changed_serial_no = get_serial_nos_data(stock_ledger_entry.serial_no)
 		if stock_ledger_entry.actual_qty > 0:
-			serial_nos.update(changed_serial_no)
+			serial_nos.add(stock_ledger_entry.serial_no)
 		else:
-			serial_nos.difference_update(changed_serial_no)
+			serial_nos.discard(stock_ledger_entry.serial_no)
 
 	return "\n".join(serial_nos)
 
@@ -276,7 +277,7 @@ def get_incoming_rate(args, raise_error_if_no_rate=True):
 		previous_sle = get_previous_sle(args)
 		if valuation_method in ("FIFO", "LIFO"):
 			if previous_sle:
-				previous_stock_queue = json.loads(previous_sle.get("stock_queue", "[]") or "[]")
+				previous_stock_queue = decode_stock_queue(previous_sle.get("stock_queue"))
 				in_rate = (
 					_get_fifo_lifo_rate(previous_stock_queue, args.get("qty") or 0, valuation_method)
 					if previous_stock_queue
@@ -601,3 +602,19 @@ def _update_product_info(scan_result: Dict[str, Optional[str]]) -> Dict[str, Opt
 		):
 			scan_result.update(product_info)
 	return scan_result
+
+
+def get_combine_datetime(posting_date, posting_time):
+	"""Combine posting date and time into the value stored in `posting_datetime`.
+
+	Microseconds are dropped, entries posted within the same second are ordered by `creation`."""
+	if isinstance(posting_date, str):
+		posting_date = getdate(posting_date)
+
+	if isinstance(posting_time, str):
+		posting_time = get_time(posting_time)
+
+	if isinstance(posting_time, datetime.timedelta):
+		posting_time = (datetime.datetime.min + posting_time).time()
+
+	return datetime.datetime.combine(posting_date, posting_time).replace(microsecond=0)
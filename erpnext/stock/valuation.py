@@ -9,8 +9,19 @@ StockBin = NewType("StockBin", List[float])  # [[qty, rate], ...]
 QTY = 0
 RATE = 1
 
+# Consumed FIFO bins are physically removed only after these many have piled up
+COMPACTION_THRESHOLD = 64
+
 
 class BinWiseValuation(ABC):
+	"""Base class for valuation methods that maintain bins of [qty, rate].
+
+	Total qty and value of all bins are kept as running totals, so that
+	reading them doesn't require walking the entire queue/stack.
+	"""
+
+	__slots__ = ["total_qty", "total_value", "value_compensation"]
+
 	@abstractmethod
 	def add_stock(self, qty: float, rate: float) -> None:
 		pass
@@ -25,7 +36,22 @@ class BinWiseValuation(ABC):
 	def state(self) -> List[StockBin]:
 		pass
 
+	@abstractproperty
+	def bins(self) -> List[StockBin]:
+		"""List holding the bins, may have consumed bins that are yet to be dropped."""
+		pass
+
+	@abstractmethod
+	def is_empty(self) -> bool:
+		pass
+
 	def get_total_stock_and_value(self) -> Tuple[float, float]:
+		return round_off_if_near_zero(self.total_qty), round_off_if_near_zero(
+			self.total_value + self.value_compensation
+		)
+
+	def reset_totals(self) -> None:
+		"""Recompute running totals by walking all the bins."""
 		total_qty = 0.0
 		total_value = 0.0
 
@@ -33,7 +59,30 @@ class BinWiseValuation(ABC):
 			total_qty += flt(qty)
 			total_value += flt(qty) * flt(rate)
 
-		return round_off_if_near_zero(total_qty), round_off_if_near_zero(total_value)
+		self.total_qty = total_qty
+		self.total_value = total_value
+		self.value_compensation = 0.0
+
+	def update_totals(self, qty: float, rate: float) -> None:
+		"""Adjust running totals for `qty` added (or removed, if negative) at `rate`."""
+		if self.is_empty():
+			# start afresh, avoids carrying float errors forward once stock is exhausted
+			self.total_qty = 0.0
+			self.total_value = 0.0
+			self.value_compensation = 0.0
+			return
+
+		self.total_qty += flt(qty)
+
+		# compensated (Neumaier) summation, values of large queues would otherwise drift
+		# from the sum of individual bins as they are added and consumed over time.
+		value = flt(qty) * flt(rate)
+		total_value = self.total_value + value
+		if abs(self.total_value) >= abs(value):
+			self.value_compensation += (self.total_value - total_value) + value
+		else:
+			self.value_compensation += (value - total_value) + self.total_value
+		self.total_value = total_value
 
 	def __repr__(self):
 		return str(self.state)
@@ -56,20 +105,38 @@ class FIFOValuation(BinWiseValuation):
 	Queue is implemented using "bins" of [qty, rate].
 
 	ref: https://en.wikipedia.org/wiki/FIFO_and_LIFO_accounting
+	Implementation detail: consumed bins at the head are skipped using an offset
+	and only removed from the list in bulk, so consumption is O(1).
 	"""
 
 	# specifying the attributes to save resources
 	# ref: https://docs.python.org/3/reference/datamodel.html#slots
-	__slots__ = ["queue"]
+	__slots__ = ["queue", "head"]
 
 	def __init__(self, state: Optional[List[StockBin]]):
 		self.queue: List[StockBin] = state if state is not None else []
+		self.head = 0  # index of first unconsumed bin
+		self.reset_totals()
 
 	@property
 	def state(self) -> List[StockBin]:
 		"""Get current state of queue."""
+		self.compact()
 		return self.queue
 
+	@property
+	def bins(self) -> List[StockBin]:
+		return self.queue
+
+	def is_empty(self) -> bool:
+		return self.head >= len(self.queue)
+
+	def compact(self) -> None:
+		"""Drop consumed bins from the head of the queue."""
+		if self.head:
+			del self.queue[: self.head]
+			self.head = 0
+
 	def add_stock(self, qty: float, rate: float) -> None:
 		"""Update fifo queue with new stock.
 
@@ -77,22 +144,29 @@ class FIFOValuation(BinWiseValuation):
 		        qty: new quantity to add
 		        rate: incoming rate of new quantity"""
 
-		if not len(self.queue):
+		if self.is_empty():
+			self.compact()
 			self.queue.append([0, 0])
 
+		last_bin = self.queue[-1]
 		# last row has the same rate, merge new bin.
-		if self.queue[-1][RATE] == rate:
-			self.queue[-1][QTY] += qty
+		if last_bin[RATE] == rate:
+			last_bin[QTY] += qty
+			self.update_totals(qty, rate)
 		else:
 			# Product has a positive balance qty, add new entry
-			if self.queue[-1][QTY] > 0:
+			if last_bin[QTY] > 0:
 				self.queue.append([qty, rate])
+				self.update_totals(qty, rate)
 			else:  # negative balance qty
-				qty = self.queue[-1][QTY] + qty
+				self.update_totals(-last_bin[QTY], last_bin[RATE])
+				qty = last_bin[QTY] + qty
 				if qty > 0:  # new balance qty is positive
 					self.queue[-1] = [qty, rate]
+					self.update_totals(qty, rate)
 				else:  # new balance qty is still negative, maintain same rate
-					self.queue[-1][QTY] = qty
+					last_bin[QTY] = qty
+					self.update_totals(qty, last_bin[RATE])
 
 	def remove_stock(
 		self, qty: float, outgoing_rate: float = 0.0, rate_generator: Callable[[], float] = None
@@ -109,46 +183,57 @@ class FIFOValuation(BinWiseValuation):
 
 		consumed_bins = []
 		while qty:
-			if not len(self.queue):
+			if self.is_empty():
 				# rely on rate generator.
+				self.compact()
 				self.queue.append([0, rate_generator()])
 
-			index = None
+			index = self.head
 			if outgoing_rate > 0:
 				# Find the entry where rate matched with outgoing rate
-				for idx, fifo_bin in enumerate(self.queue):
-					if fifo_bin[RATE] == outgoing_rate:
+				# If no entry found with outgoing rate, consume as per FIFO
+				for idx in range(self.head, len(self.queue)):
+					if self.queue[idx][RATE] == outgoing_rate:
 						index = idx
 						break
 
-				# If no entry found with outgoing rate, consume as per FIFO
-				if index is None:  # nosemgrep
-					index = 0
-			else:
-				index = 0
-
 			# select first bin or the bin with same rate
 			fifo_bin = self.queue[index]
 			if qty >= fifo_bin[QTY]:
 				# consume current bin
 				qty = round_off_if_near_zero(qty - fifo_bin[QTY])
-				to_consume = self.queue.pop(index)
-				consumed_bins.append(list(to_consume))
+				self._pop(index)
+				self.update_totals(-fifo_bin[QTY], fifo_bin[RATE])
+				consumed_bins.append(list(fifo_bin))
 
-				if not self.queue and qty:
+				if self.is_empty() and qty:
 					# stock finished, qty still remains to be withdrawn
 					# negative stock, keep in as a negative bin
+					self.compact()
 					self.queue.append([-qty, outgoing_rate or fifo_bin[RATE]])
+					self.update_totals(-qty, outgoing_rate or fifo_bin[RATE])
 					consumed_bins.append([qty, outgoing_rate or fifo_bin[RATE]])
 					break
 			else:
 				# qty found in current bin consume it and exit
-				fifo_bin[QTY] = round_off_if_near_zero(fifo_bin[QTY] - qty)
+				remaining_qty = round_off_if_near_zero(fifo_bin[QTY] - qty)
+				self.update_totals(remaining_qty - fifo_bin[QTY], fifo_bin[RATE])
+				fifo_bin[QTY] = remaining_qty
 				consumed_bins.append([qty, fifo_bin[RATE]])
 				qty = 0
 
 		return consumed_bins
 
+	def _pop(self, index: int) -> None:
+		if index != self.head:
+			del self.queue[index]
+			return
+
+		self.head += 1
+		# amortize removal of consumed bins
+		if self.head >= COMPACTION_THRESHOLD and self.head * 2 >= len(self.queue):
+			self.compact()
+
 
 class LIFOValuation(BinWiseValuation):
 	"""Valuation method where a *stack* of all the incoming stock is maintained.
@@ -168,12 +253,20 @@ class LIFOValuation(BinWiseValuation):
 
 	def __init__(self, state: Optional[List[StockBin]]):
 		self.stack: List[StockBin] = state if state is not None else []
+		self.reset_totals()
 
 	@property
 	def state(self) -> List[StockBin]:
 		"""Get current state of stack."""
 		return self.stack
 
+	@property
+	def bins(self) -> List[StockBin]:
+		return self.stack
+
+	def is_empty(self) -> bool:
+		return not self.stack
+
 	def add_stock(self, qty: float, rate: float) -> None:
 		"""Update lifo stack with new stock.
 
@@ -186,19 +279,25 @@ class LIFOValuation(BinWiseValuation):
 		if not len(self.stack):
 			self.stack.append([0, 0])
 
+		last_bin = self.stack[-1]
 		# last row has the same rate, merge new bin.
-		if self.stack[-1][RATE] == rate:
-			self.stack[-1][QTY] += qty
+		if last_bin[RATE] == rate:
+			last_bin[QTY] += qty
+			self.update_totals(qty, rate)
 		else:
 			# Product has a positive balance qty, add new entry
-			if self.stack[-1][QTY] > 0:
+			if last_bin[QTY] > 0:
 				self.stack.append([qty, rate])
+				self.update_totals(qty, rate)
 			else:  # negative balance qty
-				qty = self.stack[-1][QTY] + qty
+				self.update_totals(-last_bin[QTY], last_bin[RATE])
+				qty = last_bin[QTY] + qty
 				if qty > 0:  # new balance qty is positive
 					self.stack[-1] = [qty, rate]
+					self.update_totals(qty, rate)
 				else:  # new balance qty is still negative, maintain same rate
-					self.stack[-1][QTY] = qty
+					last_bin[QTY] = qty
+					self.update_totals(qty, last_bin[RATE])
 
 	def remove_stock(
 		self, qty: float, outgoing_rate: float = 0.0, rate_generator: Callable[[], float] = None
@@ -227,17 +326,21 @@ class LIFOValuation(BinWiseValuation):
 				# consume current bin
 				qty = round_off_if_near_zero(qty - stock_bin[QTY])
 				to_consume = self.stack.pop(index)
+				self.update_totals(-to_consume[QTY], to_consume[RATE])
 				consumed_bins.append(list(to_consume))
 
 				if not self.stack and qty:
 					# stock finished, qty still remains to be withdrawn
 					# negative stock, keep in as a negative bin
 					self.stack.append([-qty, outgoing_rate or stock_bin[RATE]])
+					self.update_totals(-qty, outgoing_rate or stock_bin[RATE])
 					consumed_bins.append([qty, outgoing_rate or stock_bin[RATE]])
 					break
 			else:
 				# qty found in current bin consume it and exit
-				stock_bin[QTY] = round_off_if_near_zero(stock_bin[QTY] - qty)
+				remaining_qty = round_off_if_near_zero(stock_bin[QTY] - qty)
+				self.update_totals(remaining_qty - stock_bin[QTY], stock_bin[RATE])
+				stock_bin[QTY] = remaining_qty
 				consumed_bins.append([qty, stock_bin[RATE]])
 				qty = 0
 
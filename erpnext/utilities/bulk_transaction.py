@@ -3,6 +3,33 @@ from datetime import date, datetime
 
 import frappe
 from frappe import _
+from frappe.utils import cint, create_batch, getdate, now
+
+# records are split across upto these many jobs on the long queue
+BULK_TRANSACTION_WORKERS = 4
+# the naming series of the new documents stays locked until commit, keep chunks short
+BULK_TRANSACTION_CHUNK_SIZE = 20
+
+LOG_DETAIL_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"parent",
+	"parenttype",
+	"parentfield",
+	"idx",
+	"transaction_name",
+	"transaction_status",
+	"error_description",
+	"from_doctype",
+	"to_doctype",
+	"date",
+	"time",
+	"retried",
+)
 
 
 @frappe.whitelist()
@@ -18,40 +45,86 @@ def transaction_processing(data, from_doctype, to_doctype):
 		frappe.msgprint(
 			_("Started a background job to create {1} {0}").format(to_doctype, length_of_data)
 		)
-		frappe.enqueue(
-			job,
-			deserialized_data=deserialized_data,
-			from_doctype=from_doctype,
-			to_doctype=to_doctype,
-		)
+		enqueue_bulk_transaction([(d.get("name"), from_doctype, to_doctype) for d in deserialized_data])
 	else:
 		job(deserialized_data, from_doctype, to_doctype)
 
 
 def job(deserialized_data, from_doctype, to_doctype):
+	records = [(d.get("name"), from_doctype, to_doctype) for d in deserialized_data]
+	fail_count = process_transactions(records)
+
+	show_job_status(fail_count, len(records), to_doctype)
+
+
+def enqueue_bulk_transaction(records, log_date=None, restarted=0, workers=None, chunk_size=None):
+	"""Split records of (name, from doctype, to doctype) across parallel jobs on the long queue,
+	returns the id sent with their progress events."""
+	if not records:
+		return
+
+	log_date = log_date or str(date.today())
+	create_logger_doc(log_date)
+
+	job_id = frappe.generate_hash(length=10)
+	workers = cint(workers) or BULK_TRANSACTION_WORKERS
+	shard_size = -(-len(records) // workers)
+	# each shard logs its records after the ones of the previous shards
+	idx = get_last_log_idx(log_date)
+
+	for shard_no, shard in enumerate(create_batch(records, shard_size)):
+		frappe.enqueue(
+			process_transactions,
+			queue="long",
+			job_name=f"bulk_transaction_{job_id}_{shard_no}",
+			now=frappe.flags.in_test,
+			records=shard,
+			log_date=log_date,
+			restarted=restarted,
+			chunk_size=chunk_size,
+			job_id=job_id,
+			total=len(records),
+			idx=idx + shard_no * shard_size,
+		)
+
+	return job_id
+
+
+def process_transactions(
+	records, log_date=None, restarted=0, chunk_size=None, job_id=None, total=None, idx=None
+):
+	"""Convert records of (name, from doctype, to doctype), logging and committing them in
+	chunks. Records are logged from row `idx` + 1 of the log, after its last row by default.
+	Returns the number of failed records."""
+	log_date = log_date or str(date.today())
+	chunk_size = cint(chunk_size) or BULK_TRANSACTION_CHUNK_SIZE
+	if idx is None:
+		idx = get_last_log_idx(log_date)
 	fail_count = 0
-	for d in deserialized_data:
-		try:
-			doc_name = d.get("name")
-			frappe.db.savepoint("before_creation_state")
-			task(doc_name, from_doctype, to_doctype)
-		except Exception as e:
-			frappe.db.rollback(save_point="before_creation_state")
-			fail_count += 1
-			update_logger(
-				doc_name,
-				str(frappe.get_traceback()),
-				from_doctype,
-				to_doctype,
-				status="Failed",
-				log_date=str(date.today()),
-			)
-		else:
-			update_logger(
-				doc_name, None, from_doctype, to_doctype, status="Success", log_date=str(date.today())
-			)
 
-	show_job_status(fail_count, len(deserialized_data), to_doctype)
+	for chunk in create_batch(records, chunk_size):
+		log_rows = []
+		for doc_name, from_doctype, to_doctype in chunk:
+			try:
+				frappe.db.savepoint("before_creation_state")
+				task(doc_name, from_doctype, to_doctype)
+			except Exception:
+				frappe.db.rollback(save_point="before_creation_state")
+				fail_count += 1
+				log_rows.append((doc_name, from_doctype, to_doctype, "Failed", str(frappe.get_traceback())))
+			else:
+				log_rows.append((doc_name, from_doctype, to_doctype, "Success", None))
+
+		append_rows_to_logger(log_rows, log_date, restarted, idx)
+		idx += len(chunk)
+
+		if job_id:
+			# background jobs keep the converted documents of each chunk
+			if not frappe.flags.in_test:
+				frappe.db.commit()
+			publish_progress(job_id, len(chunk), total or len(records))
+
+	return fail_count
 
 
 def task(doc_name, from_doctype, to_doctype):
@@ -108,45 +181,99 @@ def task(doc_name, from_doctype, to_doctype):
 	obj.insert(ignore_mandatory=True)
 
 
-def check_logger_doc_exists(log_date):
-	return frappe.db.exists("Bulk Transaction Log", log_date)
+def create_logger_doc(log_date=None):
+	"""Create the log of `log_date` unless it exists, a parallel job may be creating it too."""
+	log_date = log_date or str(date.today())
+	if frappe.db.exists("Bulk Transaction Log", log_date):
+		return
+
+	log_doc = frappe.new_doc("Bulk Transaction Log")
+	log_doc.set_new_name(set_name=log_date)
+	log_doc.log_date = getdate(log_date)
 
+	try:
+		frappe.db.savepoint("before_logger_creation")
+		log_doc.insert()
+	except frappe.DuplicateEntryError:
+		frappe.db.rollback(save_point="before_logger_creation")
 
-def get_logger_doc(log_date):
-	return frappe.get_doc("Bulk Transaction Log", log_date)
 
+def get_last_log_idx(log_date):
+	return cint(frappe.db.get_value("Bulk Transaction Log Detail", {"parent": log_date}, "max(idx)"))
 
-def create_logger_doc():
-	log_doc = frappe.new_doc("Bulk Transaction Log")
-	log_doc.set_new_name(set_name=str(date.today()))
-	log_doc.log_date = date.today()
 
-	return log_doc
+def append_rows_to_logger(rows, log_date, restarted=0, idx=None):
+	"""Insert rows of (name, from doctype, to doctype, status, error) in the log of `log_date`,
+	numbered from `idx` + 1, after the last row of the log by default.
 
+	Earlier failures of the same documents are marked as retried, a document failing again is
+	not logged again."""
+	if not rows:
+		return
 
-def append_data_to_logger(log_doc, doc_name, error, from_doctype, to_doctype, status, restarted):
-	row = log_doc.append("logger_data", {})
-	row.transaction_name = doc_name
-	row.date = date.today()
-	now = datetime.now()
-	row.time = now.strftime("%H:%M:%S")
-	row.transaction_status = status
-	row.error_description = str(error)
-	row.from_doctype = from_doctype
-	row.to_doctype = to_doctype
-	row.retried = restarted
+	create_logger_doc(log_date)
+	if idx is None:
+		idx = get_last_log_idx(log_date)
 
+	log_detail = frappe.qb.DocType("Bulk Transaction Log Detail")
+	failed_earlier = (
+		frappe.qb.from_(log_detail)
+		.select(log_detail.name, log_detail.transaction_name)
+		.where(
+			(log_detail.parent == log_date)
+			& (log_detail.transaction_status == "Failed")
+			& (log_detail.transaction_name.isin(list({row[0] for row in rows})))
+		)
+	).run()
 
-def update_logger(doc_name, e, from_doctype, to_doctype, status, log_date=None, restarted=0):
-	if not check_logger_doc_exists(log_date):
-		log_doc = create_logger_doc()
-		append_data_to_logger(log_doc, doc_name, e, from_doctype, to_doctype, status, restarted)
-		log_doc.insert()
-	else:
-		log_doc = get_logger_doc(log_date)
-		if record_exists(log_doc, doc_name, status):
-			append_data_to_logger(log_doc, doc_name, e, from_doctype, to_doctype, status, restarted)
-			log_doc.save()
+	# update only the failed rows by name, so that parallel jobs don't lock the rest of the log
+	retried = {transaction_name for name, transaction_name in failed_earlier}
+	if failed_earlier:
+		frappe.qb.update(log_detail).set(log_detail.retried, 1).where(
+			log_detail.name.isin([name for name, transaction_name in failed_earlier])
+		).run()
+
+	timestamp = now()
+	user = frappe.session.user
+	log_time = datetime.now().strftime("%H:%M:%S")
+
+	values = []
+	for row_idx, (doc_name, from_doctype, to_doctype, status, error) in enumerate(rows, idx + 1):
+		if status == "Failed" and doc_name in retried:
+			continue
+
+		values.append(
+			(
+				frappe.generate_hash(length=10),
+				timestamp,
+				timestamp,
+				user,
+				user,
+				0,
+				log_date,
+				"Bulk Transaction Log",
+				"logger_data",
+				row_idx,
+				doc_name,
+				status,
+				error,
+				from_doctype,
+				to_doctype,
+				date.today(),
+				log_time,
+				restarted,
+			)
+		)
+
+	frappe.db.bulk_insert("Bulk Transaction Log Detail", LOG_DETAIL_FIELDS, values)
+
+
+def publish_progress(job_id, count, total):
+	frappe.publish_realtime(
+		"bulk_transaction_progress",
+		{"job_id": job_id, "count": count, "total": total},
+		user=frappe.session.user,
+	)
 
 
 def show_job_status(fail_count, deserialized_data_count, to_doctype):
@@ -176,25 +303,3 @@ def show_job_status(fail_count, deserialized_data_count, to_doctype):
 			title="Failed",
 			indicator="red",
 		)
-
-
-def record_exists(log_doc, doc_name, status):
-	record = mark_retrired_transaction(log_doc, doc_name)
-	if record and status == "Failed":
-		return False
-	elif record and status == "Success":
-		return True
-	else:
-		return True
-
-
-def mark_retrired_transaction(log_doc, doc_name):
-	record = 0
-	for d in log_doc.get("logger_data"):
-		if d.transaction_name == doc_name and d.transaction_status == "Failed":
-			d.retried = 1
-			record = record + 1
-
-	log_doc.save()
-
-	return record